@@ -0,0 +1,37 @@
+"""add applicant feature store
+
+Revision ID: 20261019_applicant_features
+Revises: 20261019_eligibility_fingerprints
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_applicant_features"
+down_revision = "20261019_eligibility_fingerprints"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Starts empty; reads and scripts/refresh_features.py fill it.
+    op.create_table(
+        "applicantfeatures",
+        sa.Column("applicant_id", sa.Integer(), nullable=False),
+        sa.Column("schema_version", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("vector", sa.LargeBinary(), nullable=False),
+        sa.Column("stale", sa.Boolean(), nullable=False, server_default=sa.true()),
+        sa.Column("marked_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["applicant_id"], ["applicant.id"]),
+        sa.PrimaryKeyConstraint("applicant_id"),
+    )
+    op.create_index(op.f("ix_applicantfeatures_stale"), "applicantfeatures", ["stale"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_applicantfeatures_stale"), table_name="applicantfeatures")
+    op.drop_table("applicantfeatures")
@@ -0,0 +1,96 @@
+"""add applicant full-text and trigram search
+
+Revision ID: 20261019_applicant_search
+Revises: 20260211_profile
+Create Date: 2026-10-19
+
+PostgreSQL only: adds applicant.search_vector (tsvector) and applicant.search_text
+(lowercased concatenation for pg_trgm), both maintained by a trigger, plus GIN
+indexes. Other dialects use the in-process index in app/services/search.py.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_applicant_search"
+down_revision = "20260211_profile"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("ALTER TABLE applicant ADD COLUMN IF NOT EXISTS search_vector tsvector")
+    op.execute("ALTER TABLE applicant ADD COLUMN IF NOT EXISTS search_text text")
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION applicant_search_refresh() RETURNS trigger AS $$
+        DECLARE
+            owner_email text;
+        BEGIN
+            SELECT email INTO owner_email FROM "user" WHERE id = NEW.account_user_id;
+            NEW.search_vector :=
+                setweight(to_tsvector('simple', coalesce(NEW.first_name, '') || ' ' || coalesce(NEW.last_name, '')), 'A') ||
+                setweight(to_tsvector('simple',
+                    coalesce(NEW.latest_education, '') || ' ' ||
+                    coalesce(NEW.country_of_residence, '') || ' ' ||
+                    coalesce(NEW.study_destination, '')), 'B') ||
+                setweight(to_tsvector('simple', coalesce(owner_email, '')), 'C');
+            NEW.search_text := lower(concat_ws(' ',
+                NEW.first_name, NEW.last_name, NEW.latest_education,
+                NEW.country_of_residence, NEW.study_destination, owner_email));
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute("DROP TRIGGER IF EXISTS applicant_search_refresh ON applicant")
+    op.execute(
+        """
+        CREATE TRIGGER applicant_search_refresh
+        BEFORE INSERT OR UPDATE OF first_name, last_name, latest_education,
+            country_of_residence, study_destination, account_user_id
+        ON applicant FOR EACH ROW EXECUTE FUNCTION applicant_search_refresh()
+        """
+    )
+    # Keep applicants searchable by the new email when an owner changes it.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION applicant_search_owner_email() RETURNS trigger AS $$
+        BEGIN
+            UPDATE applicant SET account_user_id = account_user_id WHERE account_user_id = NEW.id;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute('DROP TRIGGER IF EXISTS applicant_search_owner_email ON "user"')
+    op.execute(
+        """
+        CREATE TRIGGER applicant_search_owner_email
+        AFTER UPDATE OF email ON "user"
+        FOR EACH ROW WHEN (OLD.email IS DISTINCT FROM NEW.email)
+        EXECUTE FUNCTION applicant_search_owner_email()
+        """
+    )
+    # Backfill existing rows through the trigger.
+    op.execute("UPDATE applicant SET first_name = first_name")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_applicant_search_vector ON applicant USING gin (search_vector)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_applicant_search_text_trgm ON applicant USING gin (search_text gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("DROP INDEX IF EXISTS ix_applicant_search_text_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_applicant_search_vector")
+    op.execute('DROP TRIGGER IF EXISTS applicant_search_owner_email ON "user"')
+    op.execute("DROP FUNCTION IF EXISTS applicant_search_owner_email()")
+    op.execute("DROP TRIGGER IF EXISTS applicant_search_refresh ON applicant")
+    op.execute("DROP FUNCTION IF EXISTS applicant_search_refresh()")
+    op.execute("ALTER TABLE applicant DROP COLUMN IF EXISTS search_text")
+    op.execute("ALTER TABLE applicant DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,32 @@
+"""add applicant.updated_at
+
+Revision ID: 20261019_applicant_updated_at
+Revises: 20261019_ledger_refund_reference
+Create Date: 2026-10-19
+
+The in-process applicant search index catches up on edits, merges and
+archiving by reading rows with updated_at past its watermark. Existing
+rows start at their created_at.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_applicant_updated_at"
+down_revision = "20261019_ledger_refund_reference"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("applicant", sa.Column("updated_at", sa.DateTime(), nullable=True))
+    op.execute("UPDATE applicant SET updated_at = created_at")
+    with op.batch_alter_table("applicant") as batch:
+        batch.alter_column("updated_at", existing_type=sa.DateTime(), nullable=False)
+    op.create_index(op.f("ix_applicant_updated_at"), "applicant", ["updated_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_applicant_updated_at"), table_name="applicant")
+    op.drop_column("applicant", "updated_at")
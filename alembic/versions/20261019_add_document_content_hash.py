@@ -0,0 +1,45 @@
+"""add document content hash and shared stored objects
+
+Revision ID: 20261019_content_hash
+Revises: 20261019_document_scan
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_content_hash"
+down_revision = "20261019_document_scan"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("document", sa.Column("content_sha256", sa.String(), nullable=True))
+    op.create_index(op.f("ix_document_content_sha256"), "document", ["content_sha256"], unique=False)
+
+    bind = op.get_bind()
+    existing = sa.inspect(bind).get_table_names()
+
+    if "storedobject" not in existing:
+        op.create_table(
+            "storedobject",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("sha256", sa.String(), nullable=False),
+            sa.Column("s3_key", sa.String(), nullable=False),
+            sa.Column("size_bytes", sa.Integer(), nullable=True),
+            sa.Column("ref_count", sa.Integer(), nullable=False, server_default="1"),
+            sa.Column("scanned_status", sa.String(), nullable=False, server_default="pending"),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(op.f("ix_storedobject_sha256"), "storedobject", ["sha256"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_storedobject_sha256"), table_name="storedobject")
+    op.drop_table("storedobject")
+    op.drop_index(op.f("ix_document_content_sha256"), table_name="document")
+    op.drop_column("document", "content_sha256")
@@ -0,0 +1,26 @@
+"""add declared size and checksum to documents
+
+Revision ID: 20261019_document_expected_upload
+Revises: 20261019_applicant_features
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_document_expected_upload"
+down_revision = "20261019_applicant_features"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("document", sa.Column("expected_size_bytes", sa.Integer(), nullable=True))
+    op.add_column("document", sa.Column("expected_sha256", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("document", "expected_sha256")
+    op.drop_column("document", "expected_size_bytes")
@@ -0,0 +1,26 @@
+"""count preview claims per document
+
+Revision ID: 20261019_document_preview_attempts
+Revises: 20261019_applicant_updated_at
+Create Date: 2026-10-19
+
+A document whose rendering lease keeps expiring (the file crashes or hangs
+the worker) is marked failed after preview_max_attempts claims.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_document_preview_attempts"
+down_revision = "20261019_applicant_updated_at"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("document", sa.Column("preview_attempts", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade() -> None:
+    op.drop_column("document", "preview_attempts")
@@ -0,0 +1,33 @@
+"""add document preview columns
+
+Revision ID: 20261019_document_previews
+Revises: 20261019_content_hash
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_document_previews"
+down_revision = "20261019_content_hash"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "document",
+        sa.Column("preview_status", sa.String(), nullable=False, server_default="pending"),
+    )
+    op.add_column("document", sa.Column("preview_etag", sa.String(), nullable=True))
+    op.add_column("document", sa.Column("preview_claimed_at", sa.DateTime(), nullable=True))
+    op.create_index(op.f("ix_document_preview_status"), "document", ["preview_status"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_document_preview_status"), table_name="document")
+    op.drop_column("document", "preview_claimed_at")
+    op.drop_column("document", "preview_etag")
+    op.drop_column("document", "preview_status")
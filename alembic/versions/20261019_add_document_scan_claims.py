@@ -0,0 +1,29 @@
+"""add document scan claim columns for the scan worker pool
+
+Revision ID: 20261019_document_scan
+Revises: 20261019_document_upload_id
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_document_scan"
+down_revision = "20261019_document_upload_id"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "document",
+        sa.Column("scan_attempts", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column("document", sa.Column("scan_claimed_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("document", "scan_claimed_at")
+    op.drop_column("document", "scan_attempts")
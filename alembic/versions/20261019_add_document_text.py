@@ -0,0 +1,64 @@
+"""add document text extraction and full-text index
+
+Revision ID: 20261019_document_text
+Revises: 20261019_document_previews
+Create Date: 2026-10-19
+
+Extracted text lives in documenttext, one row per content hash. On PostgreSQL
+a GIN expression index on to_tsvector('english', body) matches the expression
+used by app/services/search.py; it is built CONCURRENTLY so the table stays
+writable.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_document_text"
+down_revision = "20261019_document_previews"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "document",
+        sa.Column("text_status", sa.String(), nullable=False, server_default="pending"),
+    )
+    op.add_column("document", sa.Column("text_claimed_at", sa.DateTime(), nullable=True))
+    op.create_index(op.f("ix_document_text_status"), "document", ["text_status"], unique=False)
+
+    bind = op.get_bind()
+    existing = sa.inspect(bind).get_table_names()
+
+    if "documenttext" not in existing:
+        op.create_table(
+            "documenttext",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("content_sha256", sa.String(), nullable=False),
+            sa.Column("body", sa.Text(), nullable=False),
+            sa.Column("char_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("truncated", sa.Boolean(), nullable=False, server_default=sa.false()),
+            sa.Column("extractor_version", sa.Integer(), nullable=False, server_default="1"),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(op.f("ix_documenttext_content_sha256"), "documenttext", ["content_sha256"], unique=True)
+
+    if bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute(
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_documenttext_body_fts "
+                "ON documenttext USING gin (to_tsvector('english', body))"
+            )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_documenttext_body_fts")
+    op.drop_index(op.f("ix_documenttext_content_sha256"), table_name="documenttext")
+    op.drop_table("documenttext")
+    op.drop_index(op.f("ix_document_text_status"), table_name="document")
+    op.drop_column("document", "text_claimed_at")
+    op.drop_column("document", "text_status")
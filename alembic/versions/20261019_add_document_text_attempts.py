@@ -0,0 +1,26 @@
+"""count text extraction claims per document
+
+Revision ID: 20261019_document_text_attempts
+Revises: 20261019_document_preview_attempts
+Create Date: 2026-10-19
+
+A document whose extraction lease keeps expiring (the file crashes or hangs
+the worker) is marked failed after text_extract_max_attempts claims.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_document_text_attempts"
+down_revision = "20261019_document_preview_attempts"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("document", sa.Column("text_attempts", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade() -> None:
+    op.drop_column("document", "text_attempts")
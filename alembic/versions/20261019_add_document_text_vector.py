@@ -0,0 +1,67 @@
+"""store the document text search vector
+
+Revision ID: 20261019_document_text_vector
+Revises: 20261019_eligibility_last_checked
+Create Date: 2026-10-19
+
+PostgreSQL only: adds documenttext.search_vector (tsvector), maintained by a
+trigger like applicant.search_vector, with a GIN index. Ranking reads the
+stored vector instead of re-parsing every matching body, so the expression
+index from 20261019_document_text is replaced.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_document_text_vector"
+down_revision = "20261019_eligibility_last_checked"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("ALTER TABLE documenttext ADD COLUMN IF NOT EXISTS search_vector tsvector")
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION documenttext_search_refresh() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := to_tsvector('english', NEW.body);
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute("DROP TRIGGER IF EXISTS documenttext_search_refresh ON documenttext")
+    op.execute(
+        """
+        CREATE TRIGGER documenttext_search_refresh
+        BEFORE INSERT OR UPDATE OF body
+        ON documenttext FOR EACH ROW EXECUTE FUNCTION documenttext_search_refresh()
+        """
+    )
+    # Backfill existing rows through the trigger.
+    op.execute("UPDATE documenttext SET body = body WHERE search_vector IS NULL")
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_documenttext_search_vector "
+            "ON documenttext USING gin (search_vector)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_documenttext_body_fts")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_documenttext_body_fts "
+            "ON documenttext USING gin (to_tsvector('english', body))"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_documenttext_search_vector")
+    op.execute("DROP TRIGGER IF EXISTS documenttext_search_refresh ON documenttext")
+    op.execute("DROP FUNCTION IF EXISTS documenttext_search_refresh()")
+    op.execute("ALTER TABLE documenttext DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,24 @@
+"""add document upload_id for multipart uploads
+
+Revision ID: 20261019_document_upload_id
+Revises: 20261019_duplicates
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_document_upload_id"
+down_revision = "20261019_duplicates"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("document", sa.Column("upload_id", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("document", "upload_id")
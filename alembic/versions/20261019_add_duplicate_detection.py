@@ -0,0 +1,64 @@
+"""add applicant blocking keys and duplicate candidates
+
+Revision ID: 20261019_duplicates
+Revises: 20261019_message_search
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_duplicates"
+down_revision = "20261019_message_search"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    existing = sa.inspect(bind).get_table_names()
+
+    if "applicantblockingkey" not in existing:
+        op.create_table(
+            "applicantblockingkey",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("applicant_id", sa.Integer(), nullable=False),
+            sa.Column("key", sa.String(), nullable=False),
+            sa.ForeignKeyConstraint(["applicant_id"], ["applicant.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(op.f("ix_applicantblockingkey_applicant_id"), "applicantblockingkey", ["applicant_id"], unique=False)
+        op.create_index(op.f("ix_applicantblockingkey_key"), "applicantblockingkey", ["key"], unique=False)
+
+    if "duplicatecandidate" not in existing:
+        op.create_table(
+            "duplicatecandidate",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("applicant_id", sa.Integer(), nullable=False),
+            sa.Column("duplicate_of_id", sa.Integer(), nullable=False),
+            sa.Column("score", sa.Float(), nullable=False),
+            sa.Column("status", sa.String(), nullable=False),
+            sa.Column("reviewed_by_user_id", sa.Integer(), nullable=True),
+            sa.Column("reviewed_at", sa.DateTime(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["applicant_id"], ["applicant.id"]),
+            sa.ForeignKeyConstraint(["duplicate_of_id"], ["applicant.id"]),
+            sa.ForeignKeyConstraint(["reviewed_by_user_id"], ["user.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("applicant_id", "duplicate_of_id"),
+        )
+        op.create_index(op.f("ix_duplicatecandidate_applicant_id"), "duplicatecandidate", ["applicant_id"], unique=False)
+        op.create_index(op.f("ix_duplicatecandidate_duplicate_of_id"), "duplicatecandidate", ["duplicate_of_id"], unique=False)
+        op.create_index(op.f("ix_duplicatecandidate_status"), "duplicatecandidate", ["status"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_duplicatecandidate_status"), table_name="duplicatecandidate")
+    op.drop_index(op.f("ix_duplicatecandidate_duplicate_of_id"), table_name="duplicatecandidate")
+    op.drop_index(op.f("ix_duplicatecandidate_applicant_id"), table_name="duplicatecandidate")
+    op.drop_table("duplicatecandidate")
+    op.drop_index(op.f("ix_applicantblockingkey_key"), table_name="applicantblockingkey")
+    op.drop_index(op.f("ix_applicantblockingkey_applicant_id"), table_name="applicantblockingkey")
+    op.drop_table("applicantblockingkey")
@@ -0,0 +1,27 @@
+"""add input fingerprint to eligibility results
+
+Revision ID: 20261019_eligibility_fingerprints
+Revises: 20261019_eligibility_rules
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_eligibility_fingerprints"
+down_revision = "20261019_eligibility_rules"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing rows keep a NULL fingerprint; they stay in history but are not reused.
+    op.add_column("eligibilityresult", sa.Column("fingerprint", sa.String(), nullable=True))
+    op.create_index(op.f("ix_eligibilityresult_fingerprint"), "eligibilityresult", ["fingerprint"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_eligibilityresult_fingerprint"), table_name="eligibilityresult")
+    op.drop_column("eligibilityresult", "fingerprint")
@@ -0,0 +1,37 @@
+"""track when each eligibility result was last checked
+
+Revision ID: 20261019_eligibility_last_checked
+Revises: 20261019_document_text_attempts
+Create Date: 2026-10-19
+
+A repeated check reuses its stored result instead of inserting a row, so
+the newest id is no longer the applicant's latest inputs. Existing rows
+start at their created_at.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_eligibility_last_checked"
+down_revision = "20261019_document_text_attempts"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("eligibilityresult", sa.Column("last_checked_at", sa.DateTime(), nullable=True))
+    op.execute("UPDATE eligibilityresult SET last_checked_at = created_at")
+    with op.batch_alter_table("eligibilityresult") as batch:
+        batch.alter_column("last_checked_at", existing_type=sa.DateTime(), nullable=False)
+    op.create_index(
+        "ix_eligibilityresult_applicant_id_last_checked_at",
+        "eligibilityresult",
+        ["applicant_id", "last_checked_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_eligibilityresult_applicant_id_last_checked_at", table_name="eligibilityresult")
+    op.drop_column("eligibilityresult", "last_checked_at")
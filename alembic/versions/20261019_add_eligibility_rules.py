@@ -0,0 +1,47 @@
+"""add versioned eligibility rule sets and indexed result columns
+
+Revision ID: 20261019_eligibility_rules
+Revises: 20261019_email_digests
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_eligibility_rules"
+down_revision = "20261019_email_digests"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    existing = sa.inspect(bind).get_table_names()
+
+    if "eligibilityruleset" not in existing:
+        op.create_table(
+            "eligibilityruleset",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("version", sa.Integer(), nullable=False),
+            sa.Column("rules", sa.Text(), nullable=False),
+            sa.Column("created_by_user_id", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["created_by_user_id"], ["user.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(op.f("ix_eligibilityruleset_version"), "eligibilityruleset", ["version"], unique=True)
+
+    # Results recorded before this revision came from the built-in rules (version 0).
+    op.add_column("eligibilityresult", sa.Column("rule_version", sa.Integer(), nullable=True))
+    op.add_column("eligibilityresult", sa.Column("is_eligible", sa.Boolean(), nullable=True))
+    op.create_index(op.f("ix_eligibilityresult_rule_version"), "eligibilityresult", ["rule_version"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_eligibilityresult_rule_version"), table_name="eligibilityresult")
+    op.drop_column("eligibilityresult", "is_eligible")
+    op.drop_column("eligibilityresult", "rule_version")
+    op.drop_index(op.f("ix_eligibilityruleset_version"), table_name="eligibilityruleset")
+    op.drop_table("eligibilityruleset")
@@ -0,0 +1,54 @@
+"""add email digest preference, held notifications and task reminders
+
+Revision ID: 20261019_email_digests
+Revises: 20261019_email_outbox
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_email_digests"
+down_revision = "20261019_email_outbox"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "user",
+        sa.Column("email_digest", sa.String(), nullable=False, server_default="immediate"),
+    )
+    op.add_column("task", sa.Column("reminder_sent_at", sa.DateTime(), nullable=True))
+
+    bind = op.get_bind()
+    existing = sa.inspect(bind).get_table_names()
+
+    if "emailnotification" not in existing:
+        op.create_table(
+            "emailnotification",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("kind", sa.String(), nullable=False),
+            sa.Column("context", sa.Text(), nullable=False, server_default="{}"),
+            sa.Column("dedupe_key", sa.String(), nullable=True),
+            sa.Column("status", sa.String(), nullable=False, server_default="pending"),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("sent_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(op.f("ix_emailnotification_user_id"), "emailnotification", ["user_id"], unique=False)
+        op.create_index(op.f("ix_emailnotification_dedupe_key"), "emailnotification", ["dedupe_key"], unique=True)
+        op.create_index(op.f("ix_emailnotification_status"), "emailnotification", ["status"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_emailnotification_status"), table_name="emailnotification")
+    op.drop_index(op.f("ix_emailnotification_dedupe_key"), table_name="emailnotification")
+    op.drop_index(op.f("ix_emailnotification_user_id"), table_name="emailnotification")
+    op.drop_table("emailnotification")
+    op.drop_column("task", "reminder_sent_at")
+    op.drop_column("user", "email_digest")
@@ -0,0 +1,51 @@
+"""add email outbox
+
+Revision ID: 20261019_email_outbox
+Revises: 20261019_payment_ledger
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_email_outbox"
+down_revision = "20261019_payment_ledger"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    existing = sa.inspect(bind).get_table_names()
+
+    if "outboundemail" not in existing:
+        op.create_table(
+            "outboundemail",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("to_address", sa.String(), nullable=False),
+            sa.Column("subject", sa.String(), nullable=False),
+            sa.Column("html_body", sa.Text(), nullable=False),
+            sa.Column("text_body", sa.Text(), nullable=True),
+            sa.Column("dedupe_key", sa.String(), nullable=True),
+            sa.Column("status", sa.String(), nullable=False, server_default="queued"),
+            sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("last_error", sa.String(), nullable=True),
+            sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+            sa.Column("claimed_at", sa.DateTime(), nullable=True),
+            sa.Column("provider_message_id", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("sent_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(op.f("ix_outboundemail_dedupe_key"), "outboundemail", ["dedupe_key"], unique=True)
+        op.create_index(op.f("ix_outboundemail_status"), "outboundemail", ["status"], unique=False)
+        op.create_index(op.f("ix_outboundemail_next_attempt_at"), "outboundemail", ["next_attempt_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_outboundemail_next_attempt_at"), table_name="outboundemail")
+    op.drop_index(op.f("ix_outboundemail_status"), table_name="outboundemail")
+    op.drop_index(op.f("ix_outboundemail_dedupe_key"), table_name="outboundemail")
+    op.drop_table("outboundemail")
@@ -0,0 +1,37 @@
+"""add job checkpoints
+
+Revision ID: 20261019_job_checkpoints
+Revises: 20261019_stripe_events
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_job_checkpoints"
+down_revision = "20261019_stripe_events"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    existing = sa.inspect(bind).get_table_names()
+
+    if "jobcheckpoint" not in existing:
+        op.create_table(
+            "jobcheckpoint",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("state", sa.String(), nullable=False, server_default="{}"),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(op.f("ix_jobcheckpoint_name"), "jobcheckpoint", ["name"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_jobcheckpoint_name"), table_name="jobcheckpoint")
+    op.drop_table("jobcheckpoint")
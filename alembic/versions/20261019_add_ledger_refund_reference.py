@@ -0,0 +1,54 @@
+"""allow several refund entries per payment in the ledger
+
+Revision ID: 20261019_ledger_refund_reference
+Revises: 20261019_document_expected_upload
+Create Date: 2026-10-19
+
+Partial refunds append one entry each, keyed by the cumulative refunded
+amount they bring the payment to; existing entries get reference "".
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_ledger_refund_reference"
+down_revision = "20261019_document_expected_upload"
+branch_labels = None
+depends_on = None
+
+OLD_UNIQUE = "paymentledgerentry_payment_id_entry_type_key"  # PostgreSQL's name for the unnamed constraint
+NEW_UNIQUE = "paymentledgerentry_payment_id_entry_type_reference_key"
+
+
+def _batch():
+    # SQLite recreates the table; a naming convention lets the unnamed constraint be dropped.
+    return op.batch_alter_table(
+        "paymentledgerentry",
+        naming_convention={"uq": "%(table_name)s_%(column_0_N_name)s_key"},
+    )
+
+
+def upgrade() -> None:
+    with _batch() as batch:
+        batch.add_column(sa.Column("reference", sa.String(), nullable=False, server_default=""))
+        batch.drop_constraint(OLD_UNIQUE, type_="unique")
+        batch.create_unique_constraint(NEW_UNIQUE, ["payment_id", "entry_type", "reference"])
+
+
+def downgrade() -> None:
+    # Fold each payment's refund entries into its latest one (rebuild the aggregates afterwards).
+    op.execute(
+        "UPDATE paymentledgerentry SET amount_cents = (SELECT sum(r.amount_cents) FROM paymentledgerentry r "
+        "WHERE r.payment_id = paymentledgerentry.payment_id AND r.entry_type = 'refunded') "
+        "WHERE entry_type = 'refunded' AND id IN "
+        "(SELECT max(id) FROM paymentledgerentry WHERE entry_type = 'refunded' GROUP BY payment_id)"
+    )
+    op.execute(
+        "DELETE FROM paymentledgerentry WHERE entry_type = 'refunded' AND id NOT IN "
+        "(SELECT max(id) FROM paymentledgerentry WHERE entry_type = 'refunded' GROUP BY payment_id)"
+    )
+    with _batch() as batch:
+        batch.drop_constraint(NEW_UNIQUE, type_="unique")
+        batch.create_unique_constraint(OLD_UNIQUE, ["payment_id", "entry_type"])
+        batch.drop_column("reference")
@@ -0,0 +1,38 @@
+"""add message body full-text index
+
+Revision ID: 20261019_message_search
+Revises: 20261019_applicant_search
+Create Date: 2026-10-19
+
+PostgreSQL only: GIN expression index on to_tsvector('english', body), matching
+the expression used by app/services/search.py. GIN indexes are maintained
+incrementally on insert (fastupdate pending list), so no refresh job is needed.
+Built CONCURRENTLY so large message tables stay writable during the migration.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_message_search"
+down_revision = "20261019_applicant_search"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_message_body_fts "
+            "ON message USING gin (to_tsvector('english', body))"
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_message_body_fts")
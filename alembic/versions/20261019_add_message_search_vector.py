@@ -0,0 +1,67 @@
+"""store the message search vector
+
+Revision ID: 20261019_message_search_vector
+Revises: 20261019_document_text_vector
+Create Date: 2026-10-19
+
+PostgreSQL only: adds message.search_vector (tsvector), maintained by a
+trigger like applicant.search_vector, with a GIN index. Ranking reads the
+stored vector instead of re-parsing every matching body, so the expression
+index from 20261019_message_search is replaced.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_message_search_vector"
+down_revision = "20261019_document_text_vector"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("ALTER TABLE message ADD COLUMN IF NOT EXISTS search_vector tsvector")
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION message_search_refresh() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := to_tsvector('english', NEW.body);
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute("DROP TRIGGER IF EXISTS message_search_refresh ON message")
+    op.execute(
+        """
+        CREATE TRIGGER message_search_refresh
+        BEFORE INSERT OR UPDATE OF body
+        ON message FOR EACH ROW EXECUTE FUNCTION message_search_refresh()
+        """
+    )
+    # Backfill existing rows through the trigger.
+    op.execute("UPDATE message SET body = body WHERE search_vector IS NULL")
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_message_search_vector "
+            "ON message USING gin (search_vector)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_message_body_fts")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_message_body_fts "
+            "ON message USING gin (to_tsvector('english', body))"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_message_search_vector")
+    op.execute("DROP TRIGGER IF EXISTS message_search_refresh ON message")
+    op.execute("DROP FUNCTION IF EXISTS message_search_refresh()")
+    op.execute("ALTER TABLE message DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,91 @@
+"""add payments ledger and per-currency daily aggregates
+
+Revision ID: 20261019_payment_ledger
+Revises: 20261019_job_checkpoints
+Create Date: 2026-10-19
+
+Backfills the ledger from existing payments (created at created_at;
+succeeded/refunded at updated_at, the best timestamp available) and builds
+the aggregates from it.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_payment_ledger"
+down_revision = "20261019_job_checkpoints"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    existing = sa.inspect(bind).get_table_names()
+
+    if "paymentledgerentry" not in existing:
+        op.create_table(
+            "paymentledgerentry",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("payment_id", sa.Integer(), nullable=False),
+            sa.Column("entry_type", sa.String(), nullable=False),
+            sa.Column("amount_cents", sa.Integer(), nullable=False),
+            sa.Column("currency", sa.String(), nullable=False),
+            sa.Column("source", sa.String(), nullable=False),
+            sa.Column("occurred_at", sa.DateTime(), nullable=False),
+            sa.Column("day", sa.Date(), nullable=False),
+            sa.ForeignKeyConstraint(["payment_id"], ["payment.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("payment_id", "entry_type"),
+        )
+        op.create_index(op.f("ix_paymentledgerentry_payment_id"), "paymentledgerentry", ["payment_id"], unique=False)
+        op.create_index(op.f("ix_paymentledgerentry_day"), "paymentledgerentry", ["day"], unique=False)
+
+        day = "date({})" if bind.dialect.name == "sqlite" else "CAST({} AS DATE)"
+        for entry_type, timestamp, statuses in (
+            ("created", "created_at", None),
+            ("succeeded", "updated_at", "('succeeded', 'refunded')"),
+            ("refunded", "updated_at", "('refunded')"),
+        ):
+            where = f"WHERE status IN {statuses}" if statuses else ""
+            op.execute(
+                "INSERT INTO paymentledgerentry (payment_id, entry_type, amount_cents, currency, source, occurred_at, day) "
+                f"SELECT id, '{entry_type}', amount_cents, lower(currency), 'backfill', {timestamp}, {day.format(timestamp)} "
+                f"FROM payment {where}"
+            )
+
+    if "paymentdailyaggregate" not in existing:
+        op.create_table(
+            "paymentdailyaggregate",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("day", sa.Date(), nullable=False),
+            sa.Column("currency", sa.String(), nullable=False),
+            sa.Column("created_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("created_cents", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("succeeded_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("succeeded_cents", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("refunded_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("refunded_cents", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("day", "currency"),
+        )
+        op.create_index(op.f("ix_paymentdailyaggregate_day"), "paymentdailyaggregate", ["day"], unique=False)
+
+        sums = ", ".join(
+            f"SUM(CASE WHEN entry_type = '{t}' THEN 1 ELSE 0 END), SUM(CASE WHEN entry_type = '{t}' THEN amount_cents ELSE 0 END)"
+            for t in ("created", "succeeded", "refunded")
+        )
+        op.execute(
+            "INSERT INTO paymentdailyaggregate (day, currency, created_count, created_cents, succeeded_count, "
+            "succeeded_cents, refunded_count, refunded_cents, updated_at) "
+            f"SELECT day, currency, {sums}, CURRENT_TIMESTAMP FROM paymentledgerentry GROUP BY day, currency"
+        )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_paymentdailyaggregate_day"), table_name="paymentdailyaggregate")
+    op.drop_table("paymentdailyaggregate")
+    op.drop_index(op.f("ix_paymentledgerentry_day"), table_name="paymentledgerentry")
+    op.drop_index(op.f("ix_paymentledgerentry_payment_id"), table_name="paymentledgerentry")
+    op.drop_table("paymentledgerentry")
@@ -0,0 +1,47 @@
+"""add stripe webhook event log
+
+Revision ID: 20261019_stripe_events
+Revises: 20261019_document_text
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_stripe_events"
+down_revision = "20261019_document_text"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    existing = sa.inspect(bind).get_table_names()
+
+    if "stripeevent" not in existing:
+        op.create_table(
+            "stripeevent",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("stripe_event_id", sa.String(), nullable=False),
+            sa.Column("type", sa.String(), nullable=False),
+            sa.Column("payload", sa.Text(), nullable=False),
+            sa.Column("status", sa.String(), nullable=False, server_default="pending"),
+            sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("last_error", sa.String(), nullable=True),
+            sa.Column("claimed_at", sa.DateTime(), nullable=True),
+            sa.Column("received_at", sa.DateTime(), nullable=False),
+            sa.Column("processed_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(op.f("ix_stripeevent_stripe_event_id"), "stripeevent", ["stripe_event_id"], unique=True)
+        op.create_index(op.f("ix_stripeevent_type"), "stripeevent", ["type"], unique=False)
+        op.create_index(op.f("ix_stripeevent_status"), "stripeevent", ["status"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_stripeevent_status"), table_name="stripeevent")
+    op.drop_index(op.f("ix_stripeevent_type"), table_name="stripeevent")
+    op.drop_index(op.f("ix_stripeevent_stripe_event_id"), table_name="stripeevent")
+    op.drop_table("stripeevent")
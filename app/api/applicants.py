@@ -1,14 +1,16 @@
 from __future__ import annotations
 
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlmodel import Session, select
 
 from app.api.auth import get_current_user, require_role
 from app.db.session import get_session
 from app.models.applicant import Applicant
 from app.models.document import DocumentBundle
+from app.models.duplicate import DuplicateCandidate
 from app.models.review import ApplicantReview
 from app.models.user import User
 from app.schemas.applicant import (
@@ -16,8 +18,14 @@ from app.schemas.applicant import (
     ApplicantCreateResponse,
     ApplicantListEntry,
     ApplicantRead,
+    ApplicantSearchHit,
+    ApplicantSearchPage,
 )
+from app.schemas.duplicate import DuplicateCandidateRead, DuplicateMergeRequest, DuplicateQueueEntry
 from app.schemas.review import ReviewCreate, ReviewRead
+from app.services import dedup
+from app.services.audit import log_event
+from app.services.search import search_applicants as run_applicant_search
 
 
 router = APIRouter()
@@ -56,12 +64,15 @@ def create_applicant(
     session.commit()
     session.refresh(bundle)
 
+    candidates = dedup.check_applicant(session, applicant)
+
     return ApplicantCreateResponse(
         applicant_id=applicant.id,
         bundle_id=bundle.id,
         first_name=applicant.first_name,
         last_name=applicant.last_name,
         status=applicant.status,
+        possible_duplicate_ids=[c.duplicate_of_id for c in candidates],
     )
 
 
@@ -72,8 +83,11 @@ def list_applicants(
     page: int = Query(1, ge=1),
     limit: int = Query(50, ge=1, le=100),
 ):
-    """List applicants. Clients see only their own; managers and root see all with owner email."""
-    base = select(Applicant)
+    """
+    List applicants. Clients see only their own; managers and root see all with owner email.
+    Applicants archived by a duplicate merge are left out.
+    """
+    base = select(Applicant).where(Applicant.status != "archived")
     if current_user.role == "client":
         base = base.where(Applicant.account_user_id == current_user.id)
     base = base.order_by(Applicant.created_at.desc())
@@ -96,6 +110,146 @@ def list_applicants(
     return out
 
 
+@router.get("/search", response_model=ApplicantSearchPage)
+def search_applicants(
+    q: str = Query(..., min_length=1, max_length=200),
+    cursor: Optional[str] = Query(default=None),
+    limit: int = Query(20, ge=1, le=100),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Ranked search over name, latest education, country, destination and owner email.
+
+    Typo tolerant (trigram matching). Pass `next_cursor` back as `cursor` for the next page.
+    Clients only see their own applicants; archived applicants are left out.
+    """
+    is_staff = current_user.role in ("manager", "root")
+    try:
+        results, next_cursor = run_applicant_search(
+            session,
+            q,
+            owner_id=None if is_staff else current_user.id,
+            cursor=cursor,
+            limit=limit,
+        )
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    items = [
+        ApplicantSearchHit(
+            id=app.id,
+            first_name=app.first_name,
+            last_name=app.last_name,
+            latest_education=app.latest_education,
+            country_of_residence=app.country_of_residence,
+            study_destination=app.study_destination,
+            status=app.status,
+            created_at=app.created_at,
+            owner_email=email if is_staff else None,
+            score=score,
+        )
+        for app, email, score in results
+    ]
+    return ApplicantSearchPage(items=items, next_cursor=next_cursor)
+
+
+@router.get("/duplicates", response_model=List[DuplicateQueueEntry])
+def list_duplicate_candidates(
+    session: Session = Depends(get_session),
+    current_user: User = Depends(require_role("manager", "root")),
+    status_filter: str = Query("pending", alias="status"),
+    page: int = Query(1, ge=1),
+    limit: int = Query(50, ge=1, le=100),
+):
+    """Duplicate review queue, highest score first. Manager/root only."""
+    candidates = session.exec(
+        select(DuplicateCandidate)
+        .where(DuplicateCandidate.status == status_filter)
+        .order_by(DuplicateCandidate.score.desc(), DuplicateCandidate.id)
+        .offset((page - 1) * limit)
+        .limit(limit)
+    ).all()
+    ids = {c.applicant_id for c in candidates} | {c.duplicate_of_id for c in candidates}
+    applicants = {a.id: a for a in session.exec(select(Applicant).where(Applicant.id.in_(ids))).all()} if ids else {}
+    return [
+        DuplicateQueueEntry(
+            **DuplicateCandidateRead.model_validate(c).model_dump(),
+            applicant=ApplicantRead.model_validate(applicants[c.applicant_id]),
+            duplicate_of=ApplicantRead.model_validate(applicants[c.duplicate_of_id]),
+        )
+        for c in candidates
+        if c.applicant_id in applicants and c.duplicate_of_id in applicants
+    ]
+
+
+def _get_pending_candidate(session: Session, candidate_id: int) -> DuplicateCandidate:
+    candidate = session.get(DuplicateCandidate, candidate_id)
+    if not candidate:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Duplicate candidate not found")
+    if candidate.status != "pending":
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Duplicate candidate already resolved")
+    return candidate
+
+
+@router.post("/duplicates/{candidate_id}/merge", response_model=DuplicateCandidateRead)
+def merge_duplicate(
+    candidate_id: int,
+    payload: DuplicateMergeRequest,
+    request: Request,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(require_role("manager", "root")),
+):
+    """
+    Merge a duplicate pair: bundles, messages, tasks, payments, reviews and eligibility
+    results move to the kept applicant; the other one is archived. Manager/root only.
+    """
+    candidate = _get_pending_candidate(session, candidate_id)
+    pair = (candidate.applicant_id, candidate.duplicate_of_id)
+    keep_id = payload.keep_applicant_id or candidate.duplicate_of_id
+    if keep_id not in pair:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="keep_applicant_id must be one of the pair")
+    merged_id = pair[0] if keep_id == pair[1] else pair[1]
+    keep = session.get(Applicant, keep_id)
+    merged = session.get(Applicant, merged_id)
+    if not keep or not merged:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Applicant not found")
+    if keep.account_user_id != merged.account_user_id:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Applicants belong to different accounts")
+    if keep.status == "archived":
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot merge into an archived applicant")
+
+    dedup.merge_applicants(session, keep, merged, reviewer_id=current_user.id)
+
+    log_event(
+        session,
+        user_id=current_user.id,
+        action="applicant_merged",
+        resource_type="applicant",
+        resource_id=str(keep_id),
+        metadata={"merged_applicant_id": merged_id, "candidate_id": candidate_id},
+        ip_address=request.client.host if request.client else None,
+    )
+    session.refresh(candidate)
+    return candidate
+
+
+@router.post("/duplicates/{candidate_id}/dismiss", response_model=DuplicateCandidateRead)
+def dismiss_duplicate(
+    candidate_id: int,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(require_role("manager", "root")),
+):
+    """Mark a candidate pair as not a duplicate; it will not be flagged again. Manager/root only."""
+    candidate = _get_pending_candidate(session, candidate_id)
+    candidate.status = "dismissed"
+    candidate.reviewed_by_user_id = current_user.id
+    candidate.reviewed_at = datetime.utcnow()
+    session.add(candidate)
+    session.commit()
+    session.refresh(candidate)
+    return candidate
+
+
 @router.get("/{applicant_id}", response_model=ApplicantRead)
 def get_applicant(
     applicant_id: int,
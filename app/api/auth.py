@@ -8,7 +8,7 @@ from app.core.config import get_settings
 from app.core.security import create_token, hash_password, verify_password
 from app.db.session import get_session
 from app.models.user import User
-from app.schemas.auth import Token, UserCreate, UserLogin, UserRead
+from app.schemas.auth import EmailPreferences, Token, UserCreate, UserLogin, UserRead
 
 
 router = APIRouter()
@@ -111,3 +111,17 @@ def require_role(*roles: str):
 
     return dependency
 
+
+
+@router.put("/me/email-preferences", response_model=UserRead)
+def update_email_preferences(
+    payload: EmailPreferences,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """Receive notification emails immediately, or as an hourly or daily digest."""
+    current_user.email_digest = payload.email_digest
+    session.add(current_user)
+    session.commit()
+    session.refresh(current_user)
+    return current_user
@@ -1,18 +1,24 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import func, select
 from sqlmodel import Session
 
 from app.api.auth import require_role
+from app.core.config import get_settings
 from app.db.session import get_session
 from app.models.applicant import Applicant
-from app.models.payment import Payment
 from app.models.task import Task
 from app.models.user import User
+from app.services.metrics import metrics
+from app.services.payment_ledger import daily_revenue, revenue_by_currency
 
 
 router = APIRouter()
+settings = get_settings()
 
 
 @router.get("/summary")
@@ -28,15 +34,59 @@ def dashboard_summary(
         select(func.count()).select_from(Task).where(Task.status == "pending")
     ).one()
 
-    total_revenue_cents = session.exec(
-        select(func.coalesce(func.sum(Payment.amount_cents), 0))
-        .select_from(Payment)
-        .where(Payment.status == "succeeded")
-    ).one()
+    # Read from the per-currency daily aggregates, never by summing payments.
+    revenue = revenue_by_currency(session)
 
     return {
         "accepted_clients": accepted_clients[0],
         "pending_tasks": pending_tasks[0],
-        "total_revenue_cents": total_revenue_cents[0],
+        # Net of refunds, in REPORTING_CURRENCY only; amounts in different
+        # currencies are never added together.
+        "total_revenue_cents": revenue.get(settings.reporting_currency.lower(), {}).get("net_cents", 0),
+        "revenue_by_currency": revenue,
+    }
+
+
+@router.get("/revenue")
+def dashboard_revenue(
+    start: Optional[date] = Query(default=None, description="First UTC day (default: 30 days ago)"),
+    end: Optional[date] = Query(default=None, description="Last UTC day (default: today)"),
+    currency: Optional[str] = Query(default=None, min_length=3, max_length=3),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(require_role("manager", "root")),
+):
+    """Daily revenue and refund report per currency, from the payment aggregates."""
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must not be after end")
+    days = daily_revenue(session, start, end, currency)
+    totals = revenue_by_currency(session, start, end)
+    if currency:
+        totals = {k: v for k, v in totals.items() if k == currency.lower()}
+    return {
+        "start": start,
+        "end": end,
+        "totals": totals,
+        "days": [
+            {
+                "day": row.day,
+                "currency": row.currency,
+                "created_count": row.created_count,
+                "succeeded_count": row.succeeded_count,
+                "gross_cents": row.succeeded_cents,
+                "refunded_count": row.refunded_count,
+                "refunded_cents": row.refunded_cents,
+                "net_cents": row.succeeded_cents - row.refunded_cents,
+            }
+            for row in days
+        ],
     }
 
+
+@router.get("/metrics")
+def dashboard_metrics(
+    current_user: User = Depends(require_role("manager", "root")),
+):
+    """Counters and latency histograms collected by this API process."""
+    return metrics.snapshot()
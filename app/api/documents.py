@@ -1,26 +1,67 @@
 from __future__ import annotations
 
-from typing import List
+import math
+from typing import List, Optional
 
 from uuid import uuid4
 
-import boto3
-from botocore.exceptions import ClientError
-from fastapi import APIRouter, Depends, HTTPException, Request, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import RedirectResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
 from sqlmodel import Session, select
 
 from app.api.auth import get_current_user
-from app.core.config import get_settings
 from app.db.session import get_session
-from app.models.document import Document, DocumentBundle
+from app.models.applicant import Applicant
+from app.models.document import Document, DocumentBundle, DocumentText
 from app.models.user import User
+from app.services.archive import ArchiveEntry, BundleArchive
 from app.services.audit import log_event
+from app.services.content_store import attach_content, checksum_to_hex, release_document
+from app.services.metrics import metrics
+from app.services.previews import THUMBNAIL_CONTENT_TYPE, preview_cache, preview_key
+from app.services.search import document_search_query, document_snippets
+from app.services.storage import (
+    InvalidUpload,
+    ObjectInfo,
+    ObjectNotFound,
+    StorageError,
+    StorageTimeout,
+    get_storage,
+    object_name,
+    parse_range,
+)
 
 
 router = APIRouter()
-settings = get_settings()
-s3_client = boto3.client("s3", region_name=settings.aws_region)
+storage = get_storage()
+
+# S3 multipart limits: parts of 5 MiB..5 GiB (last part may be smaller), at most 10,000 parts.
+MULTIPART_MIN_PART_SIZE = 5 * 1024 * 1024
+MULTIPART_DEFAULT_PART_SIZE = 8 * 1024 * 1024
+MULTIPART_MAX_PARTS = 10_000
+MULTIPART_URL_EXPIRES = 3600
+BATCH_INITIATE_MAX = 20
+ARCHIVE_CHUNK_SIZE = 1024 * 1024
+ARCHIVE_CONCURRENCY = 4
+
+
+def _check_checksum(sha256: Optional[str]) -> None:
+    if sha256 is not None and checksum_to_hex(sha256) is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="sha256 must be a base64-encoded SHA-256 digest",
+        )
+
+
+def _delete_objects(keys: List[str]) -> None:
+    """Best-effort delete after commit; leftovers are removed by storage reconciliation."""
+    for key in keys:
+        try:
+            storage.delete(key)
+        except StorageError:
+            pass
 
 
 def _check_bundle_access(session: Session, bundle_id: int, user: User) -> DocumentBundle:
@@ -42,12 +83,19 @@ def initiate_bundle_upload(
     filename: str,
     content_type: str,
     request: Request,
+    sha256: Optional[str] = None,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
-    """Create a Document record and return a presigned URL for uploading (e.g. transcript or degree)."""
+    """
+    Create a Document record and return a presigned URL for uploading (e.g. transcript or degree).
+
+    Pass `sha256` (base64, as in the x-amz-checksum-sha256 header) to have S3
+    verify the upload; completion then deduplicates it without reading it back.
+    """
+    _check_checksum(sha256)
     bundle = _check_bundle_access(session, bundle_id, current_user)
-    key = f"documents/{bundle_id}/{uuid4()}/{filename}"
+    key = f"documents/{bundle_id}/{uuid4()}/{object_name(filename)}"
 
     doc = Document(
         bundle_id=bundle_id,
@@ -61,16 +109,8 @@ def initiate_bundle_upload(
     session.refresh(doc)
 
     try:
-        url = s3_client.generate_presigned_url(
-            "put_object",
-            Params={
-                "Bucket": settings.aws_s3_bucket,
-                "Key": key,
-                "ContentType": content_type,
-            },
-            ExpiresIn=900,
-        )
-    except ClientError as exc:
+        url = storage.presign_put(key, content_type, sha256)
+    except StorageError as exc:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to generate presigned URL",
@@ -89,53 +129,163 @@ def initiate_bundle_upload(
     return {"upload_url": url, "key": key, "document_id": doc.id, "content_type": content_type}
 
 
-class DocumentCompleteBody(BaseModel):
-    key: str
+class BatchInitiateItem(BaseModel):
+    filename: str
+    content_type: str
+    sha256: Optional[str] = None  # base64 SHA-256, see initiate_bundle_upload
 
 
-@router.post("/documents/{document_id}/complete")
-def complete_document_upload(
-    document_id: int,
-    body: DocumentCompleteBody,
+class BatchInitiateBody(BaseModel):
+    documents: List[BatchInitiateItem] = Field(min_length=1, max_length=BATCH_INITIATE_MAX)
+
+
+@router.post("/bundles/{bundle_id}/documents/initiate-batch")
+def initiate_bundle_upload_batch(
+    bundle_id: int,
+    body: BatchInitiateBody,
     request: Request,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
-    """Confirm the file was uploaded to S3 and update the document record."""
-    key = body.key
-    doc = session.get(Document, document_id)
-    if not doc:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
-    if doc.s3_key != key:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Key does not match document")
-    bundle = _check_bundle_access(session, doc.bundle_id, current_user)
+    """
+    Initiate several document uploads at once (e.g. transcript, degree, passport, test scores).
+
+    One access check, one presigning pass, and all Document rows plus a single
+    aggregated audit event written in one transaction.
+    """
+    for item in body.documents:
+        _check_checksum(item.sha256)
+    _check_bundle_access(session, bundle_id, current_user)
+    keys = [f"documents/{bundle_id}/{uuid4()}/{object_name(item.filename)}" for item in body.documents]
 
     try:
-        head = s3_client.head_object(Bucket=settings.aws_s3_bucket, Key=key)
-        doc.size_bytes = head.get("ContentLength")
-    except ClientError as exc:
-        if exc.response["ResponseMetadata"]["HTTPStatusCode"] == 404:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Uploaded file not found in storage",
-            )
+        urls = [
+            storage.presign_put(key, item.content_type, item.sha256)
+            for key, item in zip(keys, body.documents)
+        ]
+    except StorageError as exc:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error validating upload",
+            detail="Failed to generate presigned URL",
         ) from exc
 
-    session.add(doc)
-    session.commit()
-    session.refresh(doc)
+    docs = [
+        Document(
+            bundle_id=bundle_id,
+            filename=item.filename,
+            content_type=item.content_type,
+            s3_key=key,
+            scanned_status="pending",
+        )
+        for key, item in zip(keys, body.documents)
+    ]
+    session.add_all(docs)
+    session.flush()
+    document_ids = [doc.id for doc in docs]
 
     log_event(
         session=session,
         user_id=current_user.id,
+        action="document_upload_initiated",
+        resource_type="document_bundle",
+        resource_id=str(bundle_id),
+        metadata={
+            "bundle_id": bundle_id,
+            "document_ids": document_ids,
+            "filenames": [item.filename for item in body.documents],
+        },
+        ip_address=request.client.host if request.client else None,
+        commit=False,
+    )
+    session.commit()
+
+    return {
+        "documents": [
+            {"upload_url": url, "key": key, "document_id": doc_id, "content_type": item.content_type}
+            for url, key, doc_id, item in zip(urls, keys, document_ids, body.documents)
+        ]
+    }
+
+
+class DocumentCompleteBody(BaseModel):
+    key: str
+
+
+def _get_document_for_completion(session: Session, document_id: int, key: str, user: User) -> Document:
+    doc = session.get(Document, document_id)
+    if not doc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
+    if doc.s3_key != key:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Key does not match document")
+    _check_bundle_access(session, doc.bundle_id, user)
+    return doc
+
+
+def _record_completion(session: Session, doc: Document, info: ObjectInfo, user: User, ip_address: Optional[str]) -> Optional[str]:
+    """Store size and content hash, audit, commit. Returns a key made redundant by deduplication."""
+    doc.size_bytes = info.size
+    redundant_key = None
+    sha256 = checksum_to_hex(info.checksum_sha256)
+    if sha256:
+        redundant_key = attach_content(session, doc, sha256)
+    session.add(doc)
+    log_event(
+        session=session,
+        user_id=user.id,
         action="document_upload_completed",
         resource_type="document",
         resource_id=str(doc.id),
-        ip_address=request.client.host if request.client else None,
+        ip_address=ip_address,
+        commit=False,
     )
+    session.commit()
+    return redundant_key
+
+
+@router.post("/documents/{document_id}/complete")
+async def complete_document_upload(
+    document_id: int,
+    body: DocumentCompleteBody,
+    request: Request,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Confirm the file was uploaded to S3 and update the document record.
+
+    The storage HEAD runs on the bounded storage pool with a timeout and
+    retries; database work runs in the request thread pool, so a slow store
+    never blocks the event loop. If S3 holds a verified SHA-256 for the object
+    and the same content is already stored, the document shares the existing
+    object (and its scan result) and the new copy is deleted.
+    """
+    with metrics.timer("documents.complete_seconds"):
+        doc = await run_in_threadpool(_get_document_for_completion, session, document_id, body.key, current_user)
+        try:
+            info = await storage.ahead(body.key)
+        except ObjectNotFound:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Uploaded file not found in storage",
+            )
+        except StorageTimeout as exc:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Storage did not respond in time; retry the completion",
+            ) from exc
+        except StorageError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Error validating upload",
+            ) from exc
+
+        ip_address = request.client.host if request.client else None
+        redundant_key = await run_in_threadpool(_record_completion, session, doc, info, current_user, ip_address)
+        if redundant_key:
+            try:
+                await storage.adelete(redundant_key)
+            except StorageError:
+                pass  # orphan; removed by storage reconciliation
 
     return {"status": "ok", "document_id": doc.id}
 
@@ -145,6 +295,8 @@ class DocumentListEntry(BaseModel):
     filename: str
     content_type: str
     scanned_status: str
+    preview_status: str
+    text_status: str
     created_at: str
 
     class Config:
@@ -166,7 +318,507 @@ def list_bundle_documents(
             filename=d.filename,
             content_type=d.content_type,
             scanned_status=d.scanned_status,
+            preview_status=d.preview_status,
+            text_status=d.text_status,
             created_at=d.created_at.isoformat() if d.created_at else "",
         )
         for d in docs
     ]
+
+
+class DocumentSearchHit(BaseModel):
+    """Content search result; snippet is HTML with matches wrapped in <mark>."""
+    document_id: int
+    bundle_id: int
+    applicant_id: int
+    filename: str
+    content_type: str
+    snippet: str
+
+
+@router.get("/documents/search", response_model=List[DocumentSearchHit])
+def search_document_contents(
+    q: str = Query(..., min_length=1, max_length=200),
+    bundle_id: Optional[int] = Query(default=None),
+    applicant_id: Optional[int] = Query(default=None),
+    page: int = Query(default=1, ge=1),
+    limit: int = Query(default=20, ge=1, le=100),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Full-text search over extracted document text, best match first.
+
+    Scoped to one bundle or applicant when given; clients only ever see
+    their own applicants' documents, staff may search across all.
+    """
+    if bundle_id is not None:
+        _check_bundle_access(session, bundle_id, current_user)
+    if applicant_id is not None:
+        applicant = session.get(Applicant, applicant_id)
+        if not applicant:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Applicant not found")
+        if current_user.role == "client" and applicant.account_user_id != current_user.id:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed")
+
+    query = (
+        select(Document, DocumentBundle.applicant_id)
+        .join(DocumentText, DocumentText.content_sha256 == Document.content_sha256)
+        .join(DocumentBundle, DocumentBundle.id == Document.bundle_id)
+        .where(Document.text_status == "ready")
+    )
+    if bundle_id is not None:
+        query = query.where(Document.bundle_id == bundle_id)
+    if applicant_id is not None:
+        query = query.where(DocumentBundle.applicant_id == applicant_id)
+    if current_user.role == "client":
+        query = query.join(Applicant, Applicant.id == DocumentBundle.applicant_id).where(
+            Applicant.account_user_id == current_user.id
+        )
+    query = document_search_query(query, session, q)
+
+    offset = (page - 1) * limit
+    rows = session.execute(query.offset(offset).limit(limit)).all()
+    snippets = document_snippets(session, list({text_id for _, _, text_id in rows}), q)
+    return [
+        DocumentSearchHit(
+            document_id=doc.id,
+            bundle_id=doc.bundle_id,
+            applicant_id=owner_applicant_id,
+            filename=doc.filename,
+            content_type=doc.content_type,
+            snippet=snippets.get(text_id, ""),
+        )
+        for doc, owner_applicant_id, text_id in rows
+    ]
+
+
+@router.delete("/documents/{document_id}")
+def delete_document(
+    document_id: int,
+    request: Request,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Delete a document. The stored object is removed only when no other
+    document shares its content (reference counted by content hash).
+    """
+    doc = session.get(Document, document_id)
+    if not doc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
+    _check_bundle_access(session, doc.bundle_id, current_user)
+    if doc.upload_id:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Multipart upload in progress; abort it instead",
+        )
+
+    has_preview = doc.preview_status == "ready"
+    key = release_document(session, doc)
+    log_event(
+        session=session,
+        user_id=current_user.id,
+        action="document_deleted",
+        resource_type="document",
+        resource_id=str(document_id),
+        metadata={"bundle_id": doc.bundle_id, "object_deleted": key is not None},
+        ip_address=request.client.host if request.client else None,
+        commit=False,
+    )
+    session.commit()
+    if key:
+        _delete_objects([key, preview_key(key)] if has_preview else [key])
+    return {"status": "deleted", "document_id": document_id}
+
+
+@router.get("/documents/{document_id}/download")
+def download_document(
+    document_id: int,
+    request: Request,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """Redirect to a short-lived download URL from the storage backend (S3 or local disk)."""
+    doc = session.get(Document, document_id)
+    if not doc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
+    _check_bundle_access(session, doc.bundle_id, current_user)
+    if doc.size_bytes is None or doc.upload_id:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Upload not completed")
+    if doc.scanned_status == "infected":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Document failed virus scan")
+    try:
+        url = storage.presign_get(doc.s3_key, filename=doc.filename, expires=300)
+    except StorageError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to generate download URL",
+        ) from exc
+
+    log_event(
+        session=session,
+        user_id=current_user.id,
+        action="document_downloaded",
+        resource_type="document",
+        resource_id=str(doc.id),
+        ip_address=request.client.host if request.client else None,
+    )
+    return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+
+
+@router.get("/documents/{document_id}/preview")
+def get_document_preview(
+    document_id: int,
+    request: Request,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    First-page thumbnail (JPEG) rendered by the preview worker.
+
+    Thumbnails never change for a given content, so responses carry an ETag
+    and are revalidated with If-None-Match (304) instead of re-sent.
+    """
+    doc = session.get(Document, document_id)
+    if not doc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
+    _check_bundle_access(session, doc.bundle_id, current_user)
+    if doc.preview_status != "ready" or not doc.preview_etag:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Preview not available")
+
+    etag = f'"{doc.preview_etag}"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=86400"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    key = preview_key(doc.s3_key)
+    data = preview_cache.get(key, doc.preview_etag)
+    if data is None:
+        try:
+            data = b"".join(_read_object(key))
+        except StorageError as exc:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Preview not available") from exc
+        preview_cache.put(key, doc.preview_etag, data)
+    return Response(content=data, media_type=THUMBNAIL_CONTENT_TYPE, headers=headers)
+
+
+class MultipartInitiateBody(BaseModel):
+    filename: str
+    content_type: str
+    size_bytes: int = Field(gt=0)
+    part_size: Optional[int] = Field(default=None, ge=MULTIPART_MIN_PART_SIZE)
+    sha256: Optional[str] = None  # base64 SHA-256 of the whole file
+
+
+class MultipartPartsBody(BaseModel):
+    part_numbers: List[int] = Field(min_length=1, max_length=MULTIPART_MAX_PARTS)
+
+
+class CompletedPart(BaseModel):
+    part_number: int = Field(ge=1, le=MULTIPART_MAX_PARTS)
+    etag: str
+
+
+class MultipartCompleteBody(BaseModel):
+    parts: List[CompletedPart] = Field(min_length=1, max_length=MULTIPART_MAX_PARTS)
+
+
+def _multipart_part_size(size_bytes: int, requested: Optional[int]) -> int:
+    part_size = requested or MULTIPART_DEFAULT_PART_SIZE
+    # Grow the part size so the object fits in the part limit.
+    return max(part_size, math.ceil(size_bytes / MULTIPART_MAX_PARTS))
+
+
+def _presign_parts(key: str, upload_id: str, part_numbers: List[int]) -> List[dict]:
+    """Presign upload_part URLs (local signing, no S3 round trips) so the client can PUT parts in parallel."""
+    try:
+        return [
+            {
+                "part_number": n,
+                "upload_url": storage.presign_part(key, upload_id, n, expires=MULTIPART_URL_EXPIRES),
+            }
+            for n in part_numbers
+        ]
+    except StorageError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to generate presigned URL",
+        ) from exc
+
+
+def _get_multipart_document(session: Session, document_id: int, user: User) -> Document:
+    doc = session.get(Document, document_id)
+    if not doc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
+    _check_bundle_access(session, doc.bundle_id, user)
+    if not doc.upload_id:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="No multipart upload in progress")
+    return doc
+
+
+@router.post("/bundles/{bundle_id}/documents/multipart/initiate")
+def initiate_multipart_upload(
+    bundle_id: int,
+    body: MultipartInitiateBody,
+    request: Request,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Start an S3 multipart upload for a large document.
+
+    Returns one presigned URL per part; upload parts in parallel, keep each
+    part's ETag response header, then call `/documents/{id}/multipart/complete`.
+    The declared `size_bytes` (and `sha256`, if given) are what completion
+    verifies the assembled object against.
+    """
+    _check_checksum(body.sha256)
+    _check_bundle_access(session, bundle_id, current_user)
+    part_size = _multipart_part_size(body.size_bytes, body.part_size)
+    part_count = math.ceil(body.size_bytes / part_size)
+    key = f"documents/{bundle_id}/{uuid4()}/{object_name(body.filename)}"
+
+    try:
+        upload_id = storage.create_multipart(key, body.content_type)
+    except StorageError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to start multipart upload",
+        ) from exc
+    parts = _presign_parts(key, upload_id, list(range(1, part_count + 1)))
+
+    doc = Document(
+        bundle_id=bundle_id,
+        filename=body.filename,
+        content_type=body.content_type,
+        s3_key=key,
+        upload_id=upload_id,
+        expected_size_bytes=body.size_bytes,
+        expected_sha256=checksum_to_hex(body.sha256),
+        scanned_status="pending",
+    )
+    session.add(doc)
+    session.commit()
+    session.refresh(doc)
+
+    log_event(
+        session=session,
+        user_id=current_user.id,
+        action="document_upload_initiated",
+        resource_type="document",
+        resource_id=str(doc.id),
+        metadata={"bundle_id": bundle_id, "filename": body.filename, "multipart": True, "parts": part_count},
+        ip_address=request.client.host if request.client else None,
+    )
+
+    return {
+        "document_id": doc.id,
+        "key": key,
+        "upload_id": upload_id,
+        "part_size": part_size,
+        "part_count": part_count,
+        "parts": parts,
+    }
+
+
+@router.post("/documents/{document_id}/multipart/parts")
+def presign_multipart_parts(
+    document_id: int,
+    body: MultipartPartsBody,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """Re-issue part URLs (e.g. expired or retried parts) for an in-progress multipart upload."""
+    doc = _get_multipart_document(session, document_id, current_user)
+    if any(n < 1 or n > MULTIPART_MAX_PARTS for n in body.part_numbers):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid part number")
+    return {"document_id": doc.id, "parts": _presign_parts(doc.s3_key, doc.upload_id, body.part_numbers)}
+
+
+@router.post("/documents/{document_id}/multipart/complete")
+def complete_multipart_upload(
+    document_id: int,
+    body: MultipartCompleteBody,
+    request: Request,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Assemble the uploaded parts and verify the result without downloading it.
+
+    The object's size must equal the size declared at initiate, and a
+    declared SHA-256 must equal the store's whole-object checksum when it
+    reports one; otherwise the scan worker checks it when it reads the
+    object. (The ETag is not compared: it is not an MD5 on SSE-KMS/SSE-C
+    buckets, and one derived from the client's part ETags proves nothing.)
+
+    Retrying is safe: if a previous call assembled the object but failed
+    before clearing upload_id, the store no longer knows the upload and the
+    existing object is verified instead.
+    """
+    doc = _get_multipart_document(session, document_id, current_user)
+    parts = sorted(body.parts, key=lambda p: p.part_number)
+    if [p.part_number for p in parts] != list(range(1, len(parts) + 1)):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Parts must be numbered 1..N without gaps")
+
+    try:
+        try:
+            storage.complete_multipart(doc.s3_key, doc.upload_id, [(p.part_number, p.etag) for p in parts])
+        except ObjectNotFound:
+            # Already completed (or aborted): head() below tells the two apart.
+            metrics.counter("uploads.multipart_already_completed").inc()
+        info = storage.head(doc.s3_key)
+    except StorageError as exc:
+        if isinstance(exc, (InvalidUpload, ObjectNotFound)):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Multipart upload could not be completed; check part ETags",
+            )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error completing multipart upload",
+        ) from exc
+
+    stored_sha256 = checksum_to_hex(info.checksum_sha256)
+    size_mismatch = doc.expected_size_bytes is not None and info.size != doc.expected_size_bytes
+    checksum_mismatch = bool(doc.expected_sha256 and stored_sha256 and stored_sha256 != doc.expected_sha256)
+    if size_mismatch or checksum_mismatch:
+        # The assembled object is not the file that was declared; discard it so the upload can restart cleanly.
+        metrics.counter("uploads.multipart_verification_failed").inc()
+        _delete_objects([doc.s3_key])
+        session.delete(doc)
+        session.commit()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Uploaded object does not match the declared size or checksum and was discarded; restart the upload",
+        )
+
+    redundant_key = attach_content(session, doc, stored_sha256) if stored_sha256 else None
+    doc.size_bytes = info.size
+    doc.upload_id = None
+    session.add(doc)
+    session.commit()
+    session.refresh(doc)
+
+    log_event(
+        session=session,
+        user_id=current_user.id,
+        action="document_upload_completed",
+        resource_type="document",
+        resource_id=str(doc.id),
+        metadata={"multipart": True, "parts": len(parts)},
+        ip_address=request.client.host if request.client else None,
+    )
+
+    if redundant_key:
+        _delete_objects([redundant_key])
+    return {"status": "ok", "document_id": doc.id, "size_bytes": doc.size_bytes}
+
+
+@router.post("/documents/{document_id}/multipart/abort")
+def abort_multipart_upload(
+    document_id: int,
+    request: Request,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """Abort an in-progress multipart upload; S3 discards stored parts and the document record is removed."""
+    doc = _get_multipart_document(session, document_id, current_user)
+    try:
+        storage.abort_multipart(doc.s3_key, doc.upload_id)
+    except StorageError as exc:
+        if not isinstance(exc, ObjectNotFound):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Error aborting multipart upload",
+            ) from exc
+
+    session.delete(doc)
+    session.commit()
+
+    log_event(
+        session=session,
+        user_id=current_user.id,
+        action="document_upload_aborted",
+        resource_type="document",
+        resource_id=str(document_id),
+        ip_address=request.client.host if request.client else None,
+    )
+
+    return {"status": "aborted", "document_id": document_id}
+
+
+def _read_object(key: str, offset: int = 0):
+    """Yield a stored object's bytes from `offset` in ARCHIVE_CHUNK_SIZE chunks."""
+    return storage.read(key, offset, ARCHIVE_CHUNK_SIZE)
+
+
+@router.get("/bundles/{bundle_id}/archive")
+def download_bundle_archive(
+    bundle_id: int,
+    request: Request,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Stream a ZIP of every uploaded document in the bundle, plus a SHA256SUMS manifest.
+
+    Objects are fetched concurrently (bounded) and written as they arrive, so
+    memory does not grow with bundle size. Supports `Range` / `If-Range` for
+    resuming interrupted downloads.
+    """
+    _check_bundle_access(session, bundle_id, current_user)
+    docs = session.exec(
+        select(Document)
+        .where(Document.bundle_id == bundle_id, Document.size_bytes.is_not(None), Document.upload_id.is_(None))
+        .order_by(Document.id)
+    ).all()
+    entries = [
+        ArchiveEntry(
+            name=f"{d.id}_{object_name(d.filename)}",  # no directories, "..", backslashes or control characters
+            key=d.s3_key,
+            size=d.size_bytes,
+            modified=d.created_at,
+        )
+        for d in docs
+    ]
+    archive = BundleArchive(entries, _read_object, concurrency=ARCHIVE_CONCURRENCY)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": archive.etag,
+        "Content-Disposition": f'attachment; filename="bundle-{bundle_id}.zip"',
+    }
+
+    start, end, status_code = 0, archive.total_size - 1, status.HTTP_200_OK
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range == archive.etag):
+        try:
+            start, end = parse_range(range_header, archive.total_size)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                detail="Invalid range",
+                headers={"Content-Range": f"bytes */{archive.total_size}"},
+            )
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{archive.total_size}"
+    headers["Content-Length"] = str(end - start + 1)
+
+    log_event(
+        session=session,
+        user_id=current_user.id,
+        action="document_bundle_downloaded",
+        resource_type="document_bundle",
+        resource_id=str(bundle_id),
+        metadata={"documents": len(entries), "range_start": start},
+        ip_address=request.client.host if request.client else None,
+    )
+
+    return StreamingResponse(
+        archive.stream(start, end),
+        status_code=status_code,
+        media_type="application/zip",
+        headers=headers,
+    )
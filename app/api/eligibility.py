@@ -3,17 +3,58 @@ from __future__ import annotations
 import json
 from datetime import datetime
 
-from fastapi import APIRouter, Depends
-from sqlmodel import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlmodel import Session, select
 
-from app.api.auth import get_current_user
+from app.api.auth import get_current_user, require_role
+from app.core.config import get_settings
 from app.db.session import get_session
+from app.models.applicant import Applicant
 from app.models.eligibility import EligibilityResult
 from app.models.user import User
-from app.schemas.eligibility import EligibilityInput, EligibilityOutput
+from app.schemas.eligibility import (
+    EligibilityBatchRequest,
+    EligibilityBatchResponse,
+    EligibilityBatchRow,
+    EligibilityHistoryItem,
+    EligibilityInput,
+    EligibilityOutput,
+    EligibilityRules,
+    EligibilityRulesRead,
+)
+from app.services.audit import log_event
+from app.services.eligibility import (
+    cache_result,
+    cached_result,
+    get_active_rules,
+    get_rules_document,
+    input_fingerprint,
+    publish_rules,
+    result_row,
+    store_results,
+    stored_result,
+    touch_results,
+)
+from app.services.metrics import metrics
 
 
 router = APIRouter()
+settings = get_settings()
+
+
+def _fingerprint(payload: EligibilityInput, rule_version: int) -> str:
+    return input_fingerprint(
+        payload.applicant_id, payload.gpa, payload.toefl, payload.study_destination, payload.level_of_study, rule_version
+    )
+
+
+def _ensure_access(session: Session, applicant_id: int, user: User) -> Applicant:
+    applicant = session.get(Applicant, applicant_id)
+    if not applicant:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Applicant not found")
+    if user.role == "client" and applicant.account_user_id != user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed")
+    return applicant
 
 
 @router.post("/check", response_model=EligibilityOutput)
@@ -23,42 +64,213 @@ def check_eligibility(
     current_user: User = Depends(get_current_user),
 ):
     """
-    Simple rule-based eligibility engine, extendable to ML later.
+    Rule-based eligibility for one applicant, using the active rule set.
+    Destination and level of study default to the applicant's profile.
+
+    A check whose normalized inputs and rule version were seen before is
+    answered from the in-process cache or the stored row, without
+    re-evaluating or inserting anything; the stored row becomes the
+    applicant's latest check again.
     """
-    recommendations: list[str]
-    is_eligible: bool
-
-    if payload.gpa >= 3.5 and payload.toefl >= 90:
-        is_eligible = True
-        recommendations = ["Top-tier programs", "Scholarship-focused options"]
-    elif payload.gpa >= 3.0 and payload.toefl >= 80:
-        is_eligible = True
-        recommendations = ["Solid programs", "Consider mid-tier schools"]
-    else:
-        is_eligible = False
-        recommendations = ["Foundational programs", "Language or academic prep first"]
+    if payload.study_destination is None or payload.level_of_study is None:
+        applicant = session.get(Applicant, payload.applicant_id)
+        if applicant is not None:
+            payload.study_destination = payload.study_destination or applicant.study_destination
+            payload.level_of_study = payload.level_of_study or applicant.level_of_study
 
-    created_at = datetime.utcnow()
+    rules = get_active_rules(session)
+    fingerprint = _fingerprint(payload, rules.version)
+    result = cached_result(fingerprint)
+    if result is None:
+        result = stored_result(session, fingerprint)
+        if result is not None:
+            cache_result(fingerprint, result)
+    if result is not None:
+        touch_results(session, [fingerprint])
+        session.commit()
+        metrics.counter("eligibility.check_reused").inc()
+        return EligibilityOutput(applicant_id=payload.applicant_id, cached=True, **result)
 
-    result_record = EligibilityResult(
-        applicant_id=payload.applicant_id,
-        input_payload=json.dumps(payload.model_dump()),
-        result_payload=json.dumps(
-            {
-                "is_eligible": is_eligible,
-                "recommendations": recommendations,
-                "evaluated_by_user_id": current_user.id,
-                "created_at": created_at.isoformat(),
-            }
-        ),
+    tier = int(rules.evaluate([payload.gpa], [payload.toefl], [payload.study_destination], [payload.level_of_study])[0])
+    tier_name, is_eligible, recommendations = rules.outcome(tier)
+    created_at = datetime.utcnow()
+    row = result_row(
+        payload.model_dump(),
+        rules.version,
+        (tier_name, is_eligible, recommendations),
+        evaluated_by_user_id=current_user.id,
+        created_at=created_at,
     )
-    session.add(result_record)
+    store_results(session, [row])
     session.commit()
+    result = {
+        "tier": tier_name,
+        "is_eligible": is_eligible,
+        "recommendations": recommendations,
+        "rule_version": rules.version,
+        "created_at": created_at,
+    }
+    cache_result(fingerprint, result)
+    metrics.counter("eligibility.check_evaluated").inc()
+    return EligibilityOutput(applicant_id=payload.applicant_id, **result)
 
-    return EligibilityOutput(
-        applicant_id=payload.applicant_id,
-        is_eligible=is_eligible,
-        recommendations=recommendations,
-        created_at=created_at,
+
+@router.post("/batch", response_model=EligibilityBatchResponse)
+def check_eligibility_batch(
+    payload: EligibilityBatchRequest,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(require_role("manager", "root")),
+):
+    """
+    Score many applicants in one call with the active rule set: one bulk
+    applicant lookup, one vectorized evaluation and (unless `persist` is
+    false) one bulk insert of the results. Rows whose inputs and rule
+    version already have a stored result are not stored again.
+    """
+    items = payload.items
+    if len(items) > settings.eligibility_batch_max_rows:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.eligibility_batch_max_rows} rows per batch",
+        )
+    with metrics.timer("eligibility.batch_seconds"):
+        ids = {item.applicant_id for item in items}
+        profiles = {
+            row.id: row
+            for row in session.exec(
+                select(Applicant.id, Applicant.study_destination, Applicant.level_of_study).where(Applicant.id.in_(ids))
+            ).all()
+        }
+        missing = sorted(ids - profiles.keys())
+        if missing:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Applicants not found: {missing[:20]}")
+        for item in items:
+            profile = profiles[item.applicant_id]
+            item.study_destination = item.study_destination or profile.study_destination
+            item.level_of_study = item.level_of_study or profile.level_of_study
+
+        rules = get_active_rules(session)
+        tiers = rules.evaluate(
+            [item.gpa for item in items],
+            [item.toefl for item in items],
+            [item.study_destination for item in items],
+            [item.level_of_study for item in items],
+        )
+        outcomes = {int(t): rules.outcome(int(t)) for t in set(tiers.tolist())}
+        results = [
+            EligibilityBatchRow(
+                applicant_id=item.applicant_id,
+                tier=outcomes[tier][0],
+                is_eligible=outcomes[tier][1],
+                recommendations=outcomes[tier][2],
+            )
+            for item, tier in zip(items, tiers.tolist())
+        ]
+
+        persisted = reused = 0
+        if payload.persist:
+            created_at = datetime.utcnow()
+            rows = {}
+            for item, tier in zip(items, tiers.tolist()):
+                row = result_row(
+                    item.model_dump(),
+                    rules.version,
+                    outcomes[tier],
+                    evaluated_by_user_id=current_user.id,
+                    created_at=created_at,
+                    source="batch",
+                )
+                rows.setdefault(row["fingerprint"], row)
+            inserted = store_results(session, list(rows.values()))
+            log_event(
+                session,
+                user_id=current_user.id,
+                action="eligibility_batch",
+                resource_type="eligibility",
+                metadata={"rows": len(items), "inserted": len(inserted), "rule_version": rules.version},
+                commit=False,
+            )
+            session.commit()
+            persisted = len(inserted)
+            reused = len(items) - persisted
+    metrics.counter("eligibility.batch_rows").inc(len(items))
+
+    return EligibilityBatchResponse(
+        rule_version=rules.version,
+        count=len(results),
+        eligible_count=sum(r.is_eligible for r in results),
+        persisted=persisted,
+        reused=reused,
+        results=results,
     )
 
+
+@router.get("/applicants/{applicant_id}/history", response_model=list[EligibilityHistoryItem])
+def eligibility_history(
+    applicant_id: int,
+    limit: int = Query(default=50, ge=1, le=500),
+    offset: int = Query(default=0, ge=0),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """Stored results for one applicant, newest first. Clients only see their own applicants."""
+    _ensure_access(session, applicant_id, current_user)
+    rows = session.exec(
+        select(EligibilityResult)
+        .where(EligibilityResult.applicant_id == applicant_id)
+        .order_by(EligibilityResult.created_at.desc(), EligibilityResult.id.desc())
+        .offset(offset)
+        .limit(limit)
+    ).all()
+    history = []
+    for row in rows:
+        inputs = json.loads(row.input_payload)
+        result = json.loads(row.result_payload)
+        history.append(
+            EligibilityHistoryItem(
+                id=row.id,
+                is_eligible=result.get("is_eligible", row.is_eligible),
+                tier=result.get("tier"),
+                recommendations=result.get("recommendations", []),
+                rule_version=row.rule_version,
+                gpa=inputs.get("gpa"),
+                toefl=inputs.get("toefl"),
+                study_destination=inputs.get("study_destination"),
+                level_of_study=inputs.get("level_of_study"),
+                created_at=row.created_at,
+            )
+        )
+    return history
+
+
+@router.get("/rules", response_model=EligibilityRulesRead)
+def get_eligibility_rules(
+    session: Session = Depends(get_session),
+    current_user: User = Depends(require_role("manager", "root")),
+):
+    version, rules, row = get_rules_document(session)
+    return EligibilityRulesRead(version=version, rules=rules, created_at=row.created_at if row else None)
+
+
+@router.put("/rules", response_model=EligibilityRulesRead)
+def publish_eligibility_rules(
+    payload: EligibilityRules,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(require_role("root")),
+):
+    """
+    Publish a new rule-set version; it applies to every check from now on.
+    Stored results are refreshed by scripts/reevaluate_eligibility.py.
+    """
+    row = publish_rules(session, payload, current_user.id)
+    log_event(
+        session,
+        user_id=current_user.id,
+        action="eligibility_rules_published",
+        resource_type="eligibility_rules",
+        resource_id=str(row.version),
+        commit=False,
+    )
+    session.commit()
+    session.refresh(row)
+    return EligibilityRulesRead(version=row.version, rules=payload, created_at=row.created_at)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from datetime import datetime
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
@@ -7,14 +8,35 @@ from sqlmodel import Session, select
 
 from app.api.auth import get_current_user
 from app.db.session import get_session
+from app.models.applicant import Applicant
 from app.models.message import Message
 from app.models.user import User
-from app.schemas.message import MessageCreate, MessageRead
+from app.schemas.message import MessageCreate, MessageRead, MessageSearchHit
+from app.services.notifications import notify
+from app.services.search import message_search_query, message_snippet
 
 
 router = APIRouter()
 
 
+def _visible_messages(query, session: Session, current_user: User, applicant_id: Optional[int]):
+    """
+    Messages for one applicant, or those sent to / received by the current user.
+    Clients may only read the thread of an applicant they own.
+    """
+    if applicant_id is not None:
+        applicant = session.get(Applicant, applicant_id)
+        if not applicant:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Applicant not found")
+        if current_user.role == "client" and applicant.account_user_id != current_user.id:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed")
+        return query.where(Message.applicant_id == applicant_id)
+    return query.where(
+        (Message.sender_id == current_user.id)
+        | (Message.recipient_id == current_user.id)
+    )
+
+
 @router.post("/", response_model=MessageRead)
 def create_message(
     payload: MessageCreate,
@@ -28,6 +50,15 @@ def create_message(
         body=payload.body,
     )
     session.add(message)
+    session.flush()
+    recipient = session.get(User, payload.recipient_id) if payload.recipient_id else None
+    if recipient and recipient.id != current_user.id and recipient.is_active:
+        item = {
+            "message_id": message.id,
+            "sender": current_user.full_name or current_user.email,
+            "preview": payload.body[:300],
+        }
+        notify(session, recipient, "new_message", item, dedupe_key=f"message-{message.id}")
     session.commit()
     session.refresh(message)
     return message
@@ -41,22 +72,43 @@ def list_messages(
     page: int = Query(default=1, ge=1),
     limit: int = Query(default=20, ge=1, le=100),
 ):
-    query = select(Message)
-
-    if applicant_id is not None:
-        query = query.where(Message.applicant_id == applicant_id)
-    else:
-        # Show messages either sent or received by current user
-        query = query.where(
-            (Message.sender_id == current_user.id)
-            | (Message.recipient_id == current_user.id)
-        )
+    query = _visible_messages(select(Message), session, current_user, applicant_id)
 
     offset = (page - 1) * limit
     results = session.exec(query.offset(offset).limit(limit)).all()
     return results
 
 
+@router.get("/search", response_model=List[MessageSearchHit])
+def search_messages(
+    q: str = Query(..., min_length=1, max_length=200),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+    applicant_id: Optional[int] = Query(default=None),
+    created_from: Optional[datetime] = Query(default=None),
+    created_to: Optional[datetime] = Query(default=None),
+    page: int = Query(default=1, ge=1),
+    limit: int = Query(default=20, ge=1, le=100),
+):
+    """Full-text search over message bodies, best match first, with highlighted snippets."""
+    query = _visible_messages(select(Message), session, current_user, applicant_id)
+    if created_from is not None:
+        query = query.where(Message.created_at >= created_from)
+    if created_to is not None:
+        query = query.where(Message.created_at <= created_to)
+    query = message_search_query(query, session, q)
+
+    offset = (page - 1) * limit
+    rows = session.execute(query.offset(offset).limit(limit)).all()
+    return [
+        MessageSearchHit(
+            **MessageRead.model_validate(message).model_dump(),
+            snippet=message_snippet(message, headline, q),
+        )
+        for message, headline in rows
+    ]
+
+
 @router.post("/{message_id}/read", response_model=MessageRead)
 def mark_read(
     message_id: int,
@@ -70,8 +122,6 @@ def mark_read(
     if message.recipient_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed")
 
-    from datetime import datetime
-
     message.read_at = datetime.utcnow()
     session.add(message)
     session.commit()
@@ -1,5 +1,10 @@
 from __future__ import annotations
 
+import math
+from typing import Any, Optional
+
+import numpy as np
+
 from fastapi import APIRouter, Depends
 from sqlmodel import Session, select
 
@@ -9,9 +14,14 @@ from app.models.consent import MLTrainingConsent
 from app.models.user import User
 from app.schemas.ml import (
     MLConsentUpdate,
+    MLModelInfo,
     MLRecommendationRequest,
     MLRecommendationResponse,
+    ProgramRecommendation,
 )
+from app.services.features import load_features
+from app.services.metrics import metrics
+from app.services.recommendation import LEVELS, ProfileBatch, get_recommender, parse_budget, recommend_one
 
 
 router = APIRouter()
@@ -53,6 +63,48 @@ def update_ml_consent(
     return {"ok": True}
 
 
+def _stored_inputs(session: Session, applicant_id: int) -> dict[str, Any]:
+    """Scoring inputs from the applicant's feature vector (one indexed read; refreshed first if stale)."""
+    features = load_features(session, [applicant_id])
+    if not len(features.applicant_ids):
+        return {}
+    row = dict(zip(features.names, features.values[0].tolist()))
+    return {
+        "gpa": None if math.isnan(row["gpa"]) else row["gpa"],
+        "toefl": None if math.isnan(row["toefl"]) else row["toefl"],
+        "study_destination": "USA" if row["destination_usa"] else "Canada" if row["destination_canada"] else None,
+        "level_of_study": next((level for level in LEVELS if row[f"level_{level}"]), None),
+        "budget": row["budget_usd"],
+    }
+
+
+def _profile(session: Session, applicant_id: int, context: dict[str, Any]) -> Optional[ProfileBatch]:
+    """
+    Scoring inputs for one applicant: `context` overrides, else the stored
+    features (latest eligibility check, destination, level and budget from
+    the profile). None without a GPA and TOEFL score.
+    """
+    inputs = _stored_inputs(session, applicant_id)
+    overrides = {k: v for k, v in context.items() if v is not None}
+    if "annual_budget" in overrides:
+        overrides["budget"] = parse_budget(overrides.pop("annual_budget"))
+    inputs.update(overrides)
+    if inputs.get("gpa") is None or inputs.get("toefl") is None:
+        return None
+    try:
+        gpa, toefl = float(inputs["gpa"]), float(inputs["toefl"])
+    except (TypeError, ValueError):
+        return None
+    budget = inputs.get("budget")
+    return ProfileBatch(
+        gpa=[gpa],
+        toefl=[toefl],
+        destinations=[inputs.get("study_destination")],
+        levels=[inputs.get("level_of_study")],
+        budgets=[np.inf if budget is None or math.isnan(budget) else float(budget)],
+    )
+
+
 @router.post("/recommendation", response_model=MLRecommendationResponse)
 def ml_recommendation(
     payload: MLRecommendationRequest,
@@ -60,12 +112,11 @@ def ml_recommendation(
     current_user: User = Depends(get_current_user),
 ):
     """
-    Stub endpoint for ML-based recommendations.
+    Program recommendations from the locally hosted nearest-neighbour model.
 
-    In a later phase this will:
-    - check MLTrainingConsent
-    - call a SageMaker/Deepseek endpoint
-    - return model-generated recommendations
+    Requires ML consent for the applicant. Scoring uses the applicant's GPA
+    and TOEFL (from `context` or the latest eligibility check), destination,
+    level of study and budget; `model_version` names the loaded artifact.
     """
     stmt = select(MLTrainingConsent).where(
         MLTrainingConsent.user_id == current_user.id,
@@ -80,10 +131,40 @@ def ml_recommendation(
             model_version="none",
         )
 
-    # Placeholder recommendation
+    recommender = get_recommender()
+    if recommender is None:
+        return MLRecommendationResponse(
+            applicant_id=payload.applicant_id,
+            recommendation="No ML recommendation available (no model installed).",
+            model_version="none",
+        )
+    profile = _profile(session, payload.applicant_id, payload.context)
+    if profile is None:
+        return MLRecommendationResponse(
+            applicant_id=payload.applicant_id,
+            recommendation="No ML recommendation available yet: run an eligibility check (GPA and TOEFL) first.",
+            model_version=recommender.version,
+        )
+
+    with metrics.timer("ml.recommendation_seconds"):
+        model_version, matches = recommend_one(profile)  # coalesced with concurrent requests
     return MLRecommendationResponse(
         applicant_id=payload.applicant_id,
-        recommendation="ML recommendation service is not yet implemented. This will call Deepseek/SageMaker.",
-        model_version="planned-v1",
+        recommendation="; ".join(m.name for m in matches) or "No matching programs for this destination.",
+        model_version=model_version,
+        programs=[ProgramRecommendation(**vars(m)) for m in matches],
     )
 
+
+@router.get("/model", response_model=MLModelInfo)
+def ml_model_info(current_user: User = Depends(get_current_user)):
+    """The recommendation model loaded by this worker."""
+    recommender = get_recommender()
+    if recommender is None:
+        return MLModelInfo(model_version="none")
+    return MLModelInfo(
+        model_version=recommender.version,
+        kind=recommender.manifest.get("kind"),
+        created_at=recommender.manifest.get("created_at"),
+        programs=len(recommender),
+    )
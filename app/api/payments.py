@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import stripe
-from fastapi import APIRouter, Depends, HTTPException, Request, status
-from sqlmodel import Session, select
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session
 
 from app.api.auth import get_current_user
 from app.core.config import get_settings
@@ -11,7 +12,9 @@ from app.models.payment import Payment
 from app.models.user import User
 from app.schemas.payment import PaymentCreate, PaymentRead
 from app.services.audit import log_event
-from app.services.email import send_email
+from app.services.payment_ledger import record_transitions
+from app.services.payment_gateway import GatewayUnavailable, PaymentGatewayError, StripeGateway, get_payment_gateway
+from app.services.stripe_events import process_pending, record_event
 
 
 router = APIRouter()
@@ -27,8 +30,16 @@ def create_checkout_session(
     request: Request,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
+    gateway: StripeGateway = Depends(get_payment_gateway),
 ):
-    if not settings.stripe_secret_key:
+    """
+    Create a Payment and its Stripe checkout session.
+
+    The gateway retries transient Stripe failures under an idempotency key
+    derived from the Payment, so a retry never creates a second session, and
+    fails fast with 503 while its circuit breaker is open.
+    """
+    if settings.stripe_backend != "stub" and not settings.stripe_secret_key:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Stripe is not configured",
@@ -42,24 +53,14 @@ def create_checkout_session(
         status="created",
     )
     session.add(payment)
+    session.flush()
+    record_transitions(session, [(payment.id, payment.amount_cents, payment.currency)], "created", "checkout")
     session.commit()
     session.refresh(payment)
 
     try:
-        checkout_session = stripe.checkout.Session.create(
-            mode="payment",
-            line_items=[
-                {
-                    "price_data": {
-                        "currency": payment.currency,
-                        "unit_amount": payment.amount_cents,
-                        "product_data": {
-                            "name": "ScholarValley Service",
-                        },
-                    },
-                    "quantity": 1,
-                }
-            ],
+        checkout_session = gateway.create_checkout_session(
+            payment,
             success_url=payload.success_url,
             cancel_url=payload.cancel_url,
             metadata={
@@ -68,14 +69,20 @@ def create_checkout_session(
                 "applicant_id": str(payload.applicant_id or ""),
             },
         )
-    except stripe.error.StripeError as exc:
+    except GatewayUnavailable as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Payment provider temporarily unavailable",
+            headers={"Retry-After": str(int(exc.retry_after))},
+        ) from exc
+    except PaymentGatewayError as exc:
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail="Error creating Stripe checkout session",
         ) from exc
 
     payment.stripe_checkout_session_id = checkout_session.id
-    payment.stripe_payment_intent_id = checkout_session.get("payment_intent")
+    payment.stripe_payment_intent_id = checkout_session.payment_intent
     session.add(payment)
     session.commit()
     session.refresh(payment)
@@ -97,8 +104,17 @@ def create_checkout_session(
 @router.post("/webhook")
 async def stripe_webhook(
     request: Request,
+    background_tasks: BackgroundTasks,
     session: Session = Depends(get_session),
 ):
+    """
+    Verify, record and acknowledge a Stripe event; processing happens in the background.
+
+    The event ID is stored under a unique constraint, so redeliveries are
+    acknowledged without being processed again. Recording runs in the thread
+    pool, never on the event loop; the state change and emails happen in the
+    event worker (kicked right after the response when inline processing is on).
+    """
     if not settings.stripe_webhook_secret:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -115,42 +131,7 @@ async def stripe_webhook(
     except (ValueError, stripe.error.SignatureVerificationError):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid payload")
 
-    if event["type"] == "checkout.session.completed":
-        data = event["data"]["object"]
-        checkout_session_id = data["id"]
-
-        payment = session.exec(
-            select(Payment).where(Payment.stripe_checkout_session_id == checkout_session_id)
-        ).first()
-
-        if payment:
-            payment.status = "succeeded"
-            session.add(payment)
-            session.commit()
-            session.refresh(payment)
-
-            # Optional: send confirmation email
-            if payment.user_id:
-                # In a later phase, join User to get email; for now assume lookup
-                from app.models.user import User  # local import to avoid cycles
-
-                user = session.get(User, payment.user_id)
-                if user and user.email:
-                    send_email(
-                        [user.email],
-                        "Payment received",
-                        "<p>Your payment was received successfully.</p>",
-                    )
-
-            log_event(
-                session,
-                user_id=payment.user_id,
-                action="payment_succeeded",
-                resource_type="payment",
-                resource_id=str(payment.id),
-                metadata={"stripe_checkout_session_id": checkout_session_id},
-                ip_address=request.client.host if request.client else None,
-            )
-
-    return {"ok": True}
-
+    created = await run_in_threadpool(record_event, session, event["id"], event["type"], payload.decode("utf-8"))
+    if created and settings.stripe_events_process_inline:
+        background_tasks.add_task(process_pending, session.get_bind())
+    return {"ok": True, "duplicate": not created}
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import os
+
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from app.core.config import get_settings
+from app.services.storage import (
+    DEFAULT_CHUNK_SIZE,
+    InvalidUpload,
+    LocalStorage,
+    ObjectNotFound,
+    StorageBackend,
+    content_disposition,
+    get_storage,
+    parse_range,
+)
+
+
+router = APIRouter()
+settings = get_settings()
+
+# Request body chunks are coalesced to this size before each (threaded) disk write.
+WRITE_BUFFER_SIZE = DEFAULT_CHUNK_SIZE
+
+
+def _local_storage(storage: StorageBackend = Depends(get_storage)) -> LocalStorage:
+    """These endpoints exist only for the local-disk backend; S3 serves its own URLs."""
+    if not isinstance(storage, LocalStorage):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    return storage
+
+
+@router.put("/objects/{key:path}")
+async def put_object(
+    key: str,
+    request: Request,
+    expires: int,
+    signature: str,
+    content_type: str = "",
+    checksum_sha256: str = "",
+    upload_id: str = "",
+    part_number: int = 0,
+    storage: LocalStorage = Depends(_local_storage),
+):
+    """
+    Target of LocalStorage presigned PUT URLs (whole objects and multipart parts).
+
+    The body is streamed to a temp file in buffered chunks and renamed into
+    place once complete; a signed checksum is enforced like S3's.
+    """
+    if upload_id:
+        params = {"upload_id": upload_id, "part_number": str(part_number)}
+    else:
+        params = {k: v for k, v in {"content_type": content_type, "checksum_sha256": checksum_sha256}.items() if v}
+    if not storage.verify("PUT", key, expires, signature, **params):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or expired signature")
+
+    try:
+        writer = await anyio.to_thread.run_sync(
+            storage.open_writer, key, content_type, upload_id or None, part_number or None
+        )
+    except ObjectNotFound:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No such multipart upload")
+    except InvalidUpload as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+    try:
+        buffer = bytearray()
+        async for chunk in request.stream():
+            buffer += chunk
+            if len(buffer) >= WRITE_BUFFER_SIZE:
+                await anyio.to_thread.run_sync(writer.write, bytes(buffer))
+                buffer.clear()
+        if buffer:
+            await anyio.to_thread.run_sync(writer.write, bytes(buffer))
+        if checksum_sha256 and writer.sha256 != checksum_sha256:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Checksum does not match content")
+        etag = await anyio.to_thread.run_sync(writer.commit)
+    except BaseException:
+        writer.abort()
+        raise
+    return Response(status_code=status.HTTP_200_OK, headers={"ETag": f'"{etag}"'})
+
+
+async def _file_slice(path: str, start: int, end: int):
+    """Yield bytes start..end (inclusive) with positional reads off the event loop."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        position = start
+        while position <= end:
+            chunk = await anyio.to_thread.run_sync(os.pread, fd, min(DEFAULT_CHUNK_SIZE, end - position + 1), position)
+            if not chunk:
+                break
+            position += len(chunk)
+            yield chunk
+    finally:
+        os.close(fd)
+
+
+@router.get("/objects/{key:path}")
+def get_object(
+    key: str,
+    request: Request,
+    expires: int,
+    signature: str,
+    filename: str = "",
+    storage: LocalStorage = Depends(_local_storage),
+):
+    """
+    Target of LocalStorage presigned GET URLs, with single-range support.
+
+    Full downloads are a FileResponse, or an X-Accel-Redirect to the reverse
+    proxy (kernel sendfile) when STORAGE_LOCAL_ACCEL_REDIRECT is set.
+    """
+    params = {"filename": filename} if filename else {}
+    if not storage.verify("GET", key, expires, signature, **params):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or expired signature")
+    try:
+        path = storage.path(key)
+        info = storage.head(key)
+    except (InvalidUpload, ObjectNotFound):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+
+    etag = f'"{info.etag}"' if info.etag else None
+    media_type = storage.content_type(key)
+    headers = {"Accept-Ranges": "bytes"}
+    if etag:
+        headers["ETag"] = etag
+    if filename:
+        headers["Content-Disposition"] = content_disposition(filename)
+
+    if settings.storage_local_accel_redirect:
+        headers["X-Accel-Redirect"] = settings.storage_local_accel_redirect.rstrip("/") + "/" + key
+        return Response(headers=headers, media_type=media_type)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range == etag):
+        try:
+            start, end = parse_range(range_header, info.size)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                detail="Invalid range",
+                headers={"Content-Range": f"bytes */{info.size}"},
+            )
+        headers["Content-Range"] = f"bytes {start}-{end}/{info.size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            _file_slice(str(path), start, end),
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            media_type=media_type,
+            headers=headers,
+        )
+    return FileResponse(path, media_type=media_type, headers=headers)
@@ -1,21 +1,19 @@
 from uuid import uuid4
 
-import boto3
-from botocore.exceptions import ClientError
 from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 
 from app.api.auth import get_current_user
-from app.core.config import get_settings
 from app.db.session import get_session
 from app.models.user import User
 from app.services.audit import log_event
+from app.services.metrics import metrics
+from app.services.storage import ObjectNotFound, StorageError, StorageTimeout, get_storage
 from sqlmodel import Session
 
 
 router = APIRouter()
-settings = get_settings()
-
-s3_client = boto3.client("s3", region_name=settings.aws_region)
+storage = get_storage()
 
 
 @router.post("/initiate")
@@ -36,16 +34,8 @@ def initiate_upload(
     key = f"uploads/{current_user.id}/{uuid4()}"
 
     try:
-        url = s3_client.generate_presigned_url(
-            "put_object",
-            Params={
-                "Bucket": settings.aws_s3_bucket,
-                "Key": key,
-                "ContentType": content_type,
-            },
-            ExpiresIn=900,
-        )
-    except ClientError as exc:
+        url = storage.presign_put(key, content_type)
+    except StorageError as exc:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to generate presigned URL",
@@ -65,7 +55,7 @@ def initiate_upload(
 
 
 @router.post("/complete")
-def complete_upload(
+async def complete_upload(
     key: str,
     request: Request,
     session: Session = Depends(get_session),
@@ -77,28 +67,38 @@ def complete_upload(
     For now this only validates that the object exists. In later phases:
     - validate against expected Document row
     - queue virus scan (S3 event -> Lambda) and mark status in DB
+
+    The HEAD runs on the bounded storage pool (timeout, retries) so a slow
+    store does not hold a request thread.
     """
-    try:
-        s3_client.head_object(Bucket=settings.aws_s3_bucket, Key=key)
-    except ClientError as exc:
-        if exc.response["ResponseMetadata"]["HTTPStatusCode"] == 404:
+    with metrics.timer("uploads.complete_seconds"):
+        try:
+            await storage.ahead(key)
+        except ObjectNotFound:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Uploaded object not found in S3",
             )
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error validating uploaded object",
-        ) from exc
-
-    log_event(
-        session=session,
-        user_id=current_user.id,
-        action="file_upload_completed",
-        resource_type="s3_object",
-        resource_id=key,
-        ip_address=request.client.host if request.client else None,
-    )
+        except StorageTimeout as exc:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Storage did not respond in time; retry the completion",
+            ) from exc
+        except StorageError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Error validating uploaded object",
+            ) from exc
+
+        await run_in_threadpool(
+            log_event,
+            session=session,
+            user_id=current_user.id,
+            action="file_upload_completed",
+            resource_type="s3_object",
+            resource_id=key,
+            ip_address=request.client.host if request.client else None,
+        )
 
     return {"status": "received", "key": key, "user_id": current_user.id}
 
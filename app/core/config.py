@@ -41,8 +41,114 @@ class Settings(BaseSettings):
 
     stripe_secret_key: str | None = None
     stripe_webhook_secret: str | None = None
+    # Stripe API calls: stripe (the API, or a stand-in such as stripe-mock at
+    # stripe_api_base) or stub (LocalStripeStub, state in stripe_stub_path)
+    stripe_backend: str = "stripe"
+    stripe_api_base: str | None = None
+    stripe_stub_path: str | None = None
+    stripe_timeout_seconds: float = 10.0
+    stripe_max_attempts: int = 3
+    stripe_circuit_reset_seconds: float = 30.0
+    # Webhook events are recorded, acknowledged, then processed in the background
+    # (right after the response when inline, and by scripts/run_stripe_event_worker.py)
+    stripe_events_process_inline: bool = True
+    stripe_event_batch_size: int = 50
+    stripe_event_max_attempts: int = 5
+    stripe_event_lease_seconds: int = 300
+    # Payment reconciliation against Stripe (scripts/reconcile_payments.py), for lost webhooks
+    payment_reconcile_lookback_days: int = 30
+    payment_reconcile_page_size: int = 100
+    # Currency of the dashboard's headline total_revenue_cents (others are reported separately)
+    reporting_currency: str = "usd"
+
+    # Eligibility: rows accepted by one POST /api/eligibility/batch call
+    eligibility_batch_max_rows: int = 5000
+    # Outcomes kept in memory per process, keyed by input fingerprint
+    eligibility_cache_size: int = 10000
+    # Re-evaluation after a rule change (scripts/reevaluate_eligibility.py); 0 rows/s = unthrottled
+    eligibility_reevaluate_chunk_size: int = 2000
+    eligibility_reevaluate_processes: int = 2
+    eligibility_reevaluate_rows_per_second: float = 5000.0
+
+    # Program recommendations (/api/ml/recommendation): artifacts built by
+    # scripts/build_recommendation_model.py; ml_model_version pins one, else LATEST
+    ml_model_dir: str = "data/models"
+    ml_model_version: str | None = None
+    ml_recommendation_top_k: int = 5
+    # Concurrent recommendation requests are scored together: up to ml_batch_max_size,
+    # waiting at most ml_batch_max_wait_ms for the batch to fill (0 = no batching)
+    ml_batch_max_size: int = 32
+    ml_batch_max_wait_ms: float = 2.0
+
+    # Applicant feature store: stale rows recomputed per batch by
+    # scripts/refresh_features.py (reads also refresh what they need)
+    feature_refresh_batch_size: int = 500
+
+    # Object storage: s3 (aws_s3_bucket) or local (files under storage_local_root,
+    # served by /api/storage; storage_public_url prefixes signed URLs if set)
+    storage_backend: str = "s3"
+    storage_local_root: str = "data/storage"
+    storage_public_url: str | None = None
+    # When a reverse proxy fronts the API (nginx internal location), local
+    # downloads are handed to it with X-Accel-Redirect for kernel sendfile.
+    storage_local_accel_redirect: str | None = None
+
+    # Object storage calls: bounded concurrency, per-call timeouts, retries
+    storage_concurrency: int = 32
+    storage_timeout_seconds: float = 10.0
+    storage_connect_timeout_seconds: float = 2.0
+    storage_read_timeout_seconds: float = 5.0
+    storage_max_attempts: int = 3
 
     ses_from_email: str | None = None
+    # Email outbox delivery (scripts/run_email_worker.py): ses, or file (JSON per message in email_file_dir)
+    email_backend: str = "ses"
+    email_file_dir: str = "data/outbox"
+    email_batch_size: int = 100
+    email_concurrency: int = 4
+    # Recipients per second across the worker (SES account sending rate); 0 disables pacing
+    email_rate_per_second: float = 14.0
+    email_max_attempts: int = 6
+    email_retry_base_seconds: float = 30.0
+    email_retry_max_seconds: float = 3600.0
+    email_lease_seconds: int = 300
+    # Digests and task reminders, run by the email worker every email_digest_check_seconds
+    email_digest_check_seconds: float = 60.0
+    task_reminder_hours: int = 24
+    # Re-read edited email templates (development); otherwise each compiles once per process
+    email_template_reload: bool = False
+
+    # Virus scanning worker (scripts/run_scan_worker.py)
+    scan_backend: str = "signature"  # signature (EICAR stub), clamd
+    clamd_host: str = "localhost"
+    clamd_port: int = 3310
+    scan_concurrency: int = 4
+    scan_batch_size: int = 50
+    # Reads retried per scan, and claims per document before it is marked failed
+    scan_max_attempts: int = 3
+    scan_lease_seconds: int = 900
+
+    # Thumbnail worker (scripts/run_preview_worker.py)
+    preview_processes: int = 2
+    preview_batch_size: int = 20
+    preview_lease_seconds: int = 600
+    # Claims per document before it is marked failed (a file that keeps crashing the worker)
+    preview_max_attempts: int = 3
+
+    # Text extraction worker (scripts/run_text_worker.py); text beyond max_chars is not indexed
+    text_extract_processes: int = 2
+    text_extract_batch_size: int = 20
+    text_extract_lease_seconds: int = 600
+    # Claims per document before it is marked failed (a file that keeps crashing the worker)
+    text_extract_max_attempts: int = 3
+    text_extract_max_chars: int = 1_000_000
+
+    # Upload completion from storage notifications (scripts/run_upload_event_worker.py):
+    # SQS queue fed by S3 ObjectCreated events; unset with the local backend uses its spool
+    upload_events_queue_url: str | None = None
+    upload_events_batch_size: int = 100
+    # Storage reconciliation (scripts/reconcile_storage.py): objects/rows younger than this are left alone
+    reconcile_grace_hours: int = 24
 
     frontend_origin: AnyUrl | None = None
 
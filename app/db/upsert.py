@@ -0,0 +1,18 @@
+from typing import Callable, Union
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection, Engine
+from sqlmodel import Session
+
+
+def insert_for(bind: Union[Session, Connection, Engine]) -> Callable:
+    """
+    The dialect's `insert` construct, which supports ON CONFLICT DO NOTHING /
+    DO UPDATE (PostgreSQL and SQLite). Raises NotImplementedError elsewhere.
+    """
+    dialect = (bind.get_bind() if isinstance(bind, Session) else bind).dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    raise NotImplementedError(f"Upserts are not implemented for {dialect}")
@@ -4,11 +4,14 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
+from sqlmodel import Session
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
-from app.api import auth, applicants, dashboard, documents, eligibility, messages, ml, payments, tasks, uploads
+from app.api import auth, applicants, dashboard, documents, eligibility, messages, ml, payments, storage, tasks, uploads
 from app.core.config import get_settings
 from app.db.session import init_db
+from app.services.features import track_feature_changes
+from app.services.recommendation import get_recommender
 
 
 settings = get_settings()
@@ -42,6 +45,11 @@ def on_startup() -> None:
         init_db()
     except Exception:
         pass  # If DB not ready or migrations used, continue anyway
+    track_feature_changes(Session)  # keep the applicant feature store in step with request writes
+    try:
+        get_recommender()  # map the recommendation model once per worker, before the first request
+    except Exception:
+        pass  # A broken artifact surfaces on /api/ml/recommendation instead of blocking startup
 
 allowed_origins = ["*"]
 if settings.frontend_origin:
@@ -163,6 +171,7 @@ app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(applicants.router, prefix="/api/applicants", tags=["applicants"])
 app.include_router(documents.router, prefix="/api", tags=["documents"])
 app.include_router(uploads.router, prefix="/api/uploads", tags=["uploads"])
+app.include_router(storage.router, prefix="/api/storage", tags=["storage"])
 app.include_router(payments.router, prefix="/api/payments", tags=["payments"])
 app.include_router(tasks.router, prefix="/api/tasks", tags=["tasks"])
 app.include_router(messages.router, prefix="/api/messages", tags=["messages"])
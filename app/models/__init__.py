@@ -1,25 +1,41 @@
 from app.models.user import User
 from app.models.applicant import Applicant
-from app.models.document import Document, DocumentBundle
+from app.models.document import Document, DocumentBundle, DocumentText, StoredObject
 from app.models.review import ApplicantReview
 from app.models.task import Task
 from app.models.message import Message
-from app.models.payment import Payment
+from app.models.payment import Payment, PaymentDailyAggregate, PaymentLedgerEntry, StripeEvent
 from app.models.audit import AuditLog
 from app.models.consent import MLTrainingConsent
-from app.models.eligibility import EligibilityResult
+from app.models.eligibility import EligibilityResult, EligibilityRuleSet
+from app.models.duplicate import ApplicantBlockingKey, DuplicateCandidate
+from app.models.job import JobCheckpoint
+from app.models.email import EmailNotification, OutboundEmail
+from app.models.feature import ApplicantFeatures
 
 __all__ = [
     "User",
     "Applicant",
     "Document",
     "DocumentBundle",
+    "DocumentText",
+    "StoredObject",
     "ApplicantReview",
     "Task",
     "Message",
     "Payment",
+    "StripeEvent",
+    "PaymentLedgerEntry",
+    "PaymentDailyAggregate",
     "AuditLog",
     "MLTrainingConsent",
     "EligibilityResult",
+    "EligibilityRuleSet",
+    "ApplicantBlockingKey",
+    "DuplicateCandidate",
+    "JobCheckpoint",
+    "OutboundEmail",
+    "EmailNotification",
+    "ApplicantFeatures",
 ]
 
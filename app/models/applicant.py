@@ -41,4 +41,8 @@ class Applicant(SQLModel, table=True):
     )
 
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    # Bumped on every UPDATE; the in-process search index re-reads rows past its watermark.
+    updated_at: datetime = Field(
+        default_factory=datetime.utcnow, index=True, sa_column_kwargs={"onupdate": datetime.utcnow}
+    )
 
@@ -37,9 +37,73 @@ class Document(SQLModel, table=True):
     s3_key: str = Field(index=True)
     size_bytes: Optional[int] = None
 
+    # S3 UploadId while a multipart upload is in progress; cleared on completion.
+    upload_id: Optional[str] = Field(default=None)
+    # Declared by the client when a multipart upload starts; verified on completion
+    # (size) and against the stored or scanned content hash (SHA-256, hex).
+    expected_size_bytes: Optional[int] = None
+    expected_sha256: Optional[str] = None
+
     scanned_status: str = Field(
         default="pending", index=True
-    )  # pending, clean, infected, failed
+    )  # pending, scanning, clean, infected, failed
+    scan_attempts: int = Field(default=0)
+    # Set when a scan worker claims the document; stale claims are re-queued.
+    scan_claimed_at: Optional[datetime] = None
+
+    # Hex SHA-256 of the content once known; documents with the same hash share one StoredObject.
+    content_sha256: Optional[str] = Field(default=None, index=True)
+
+    preview_status: str = Field(
+        default="pending", index=True
+    )  # pending, rendering, ready, unsupported, failed
+    preview_etag: Optional[str] = None
+    preview_attempts: int = Field(default=0)
+    preview_claimed_at: Optional[datetime] = None
+
+    # Searchable text, stored once per content hash in DocumentText.
+    text_status: str = Field(
+        default="pending", index=True
+    )  # pending, extracting, ready, unsupported, failed
+    text_attempts: int = Field(default=0)
+    text_claimed_at: Optional[datetime] = None
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+
+class StoredObject(SQLModel, table=True):
+    """
+    One physical S3 object per unique content hash, shared by every Document
+    with that content_sha256. Deleted from storage when ref_count drops to 0.
+    """
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    sha256: str = Field(index=True, unique=True)
+    s3_key: str
+    size_bytes: Optional[int] = None
+    ref_count: int = Field(default=1)
+
+    scanned_status: str = Field(default="pending")  # pending, clean, infected, failed
 
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+
+class DocumentText(SQLModel, table=True):
+    """
+    Text extracted from one piece of content, shared by every Document with
+    that content_sha256, so unchanged content is never extracted twice.
+    Full-text indexed on PostgreSQL through a stored search_vector column
+    (migrations 20261019_document_text and 20261019_document_text_vector).
+    """
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    content_sha256: str = Field(index=True, unique=True)
+    body: str
+    char_count: int = Field(default=0)
+    truncated: bool = Field(default=False)  # body was cut at TEXT_EXTRACT_MAX_CHARS
+    extractor_version: int = Field(default=1)
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
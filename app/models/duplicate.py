@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import UniqueConstraint
+from sqlmodel import Field, SQLModel
+
+
+class ApplicantBlockingKey(SQLModel, table=True):
+    """
+    Blocking key for duplicate detection (normalized name, phonetic code, country + phonetic).
+
+    Applicants sharing a key are compared; everything else is never scored.
+    """
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    applicant_id: int = Field(foreign_key="applicant.id", index=True)
+    key: str = Field(index=True)  # e.g. "n:doe jane", "p:D000J500", "c:nigeria|D000"
+
+
+class DuplicateCandidate(SQLModel, table=True):
+    """
+    Suspected duplicate pair awaiting manager review.
+
+    `duplicate_of_id` is the older applicant; `applicant_id` the newer one.
+    """
+
+    __table_args__ = (UniqueConstraint("applicant_id", "duplicate_of_id"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    applicant_id: int = Field(foreign_key="applicant.id", index=True)
+    duplicate_of_id: int = Field(foreign_key="applicant.id", index=True)
+    score: float
+
+    status: str = Field(default="pending", index=True)  # pending, merged, dismissed
+
+    reviewed_by_user_id: Optional[int] = Field(default=None, foreign_key="user.id")
+    reviewed_at: Optional[datetime] = Field(default=None)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
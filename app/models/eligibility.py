@@ -3,14 +3,18 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional
 
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
 
 class EligibilityResult(SQLModel, table=True):
     """
-    Stores the outcome of an eligibility check for an applicant.
+    Stores the outcome of an eligibility check for an applicant: one row per
+    distinct set of inputs and rule version.
     """
 
+    __table_args__ = (Index("ix_eligibilityresult_applicant_id_last_checked_at", "applicant_id", "last_checked_at"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
 
     applicant_id: int = Field(foreign_key="applicant.id", index=True)
@@ -19,5 +23,32 @@ class EligibilityResult(SQLModel, table=True):
     input_payload: str
     result_payload: str
 
+    rule_version: Optional[int] = Field(default=None, index=True)
+    is_eligible: Optional[bool] = None
+    # Hash of the normalized inputs and rule version (services.eligibility.input_fingerprint);
+    # a repeated check reuses the row instead of inserting another. NULL for older rows.
+    fingerprint: Optional[str] = Field(default=None, index=True, unique=True)
+
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    # Bumped when a check reuses this row; an applicant's latest inputs are
+    # the row checked most recently, not the newest id.
+    last_checked_at: datetime = Field(default_factory=datetime.utcnow)
+
 
+
+class EligibilityRuleSet(SQLModel, table=True):
+    """
+    Versioned eligibility rules (tiers and GPA/TOEFL thresholds per
+    destination and level of study). Publishing creates a new version;
+    the newest one is active. Without any row, the built-in defaults
+    (version 0) apply.
+    """
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    version: int = Field(index=True, unique=True)
+    # Simple stringified JSON, validated by schemas.eligibility.EligibilityRules
+    rules: str
+
+    created_by_user_id: Optional[int] = Field(default=None, foreign_key="user.id")
+    created_at: datetime = Field(default_factory=datetime.utcnow)
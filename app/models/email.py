@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlmodel import Field, SQLModel
+
+
+class OutboundEmail(SQLModel, table=True):
+    """
+    Email outbox: one row per recipient, written in the caller's transaction
+    and delivered by the email worker (scripts/run_email_worker.py).
+    """
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    to_address: str
+    subject: str
+    html_body: str
+    text_body: Optional[str] = None
+    # Makes enqueueing idempotent, e.g. "payment-12-receipt:jane@example.com"
+    dedupe_key: Optional[str] = Field(default=None, index=True, unique=True)
+
+    status: str = Field(
+        default="queued", index=True
+    )  # queued, sending, sent, dead
+    attempts: int = Field(default=0)
+    last_error: Optional[str] = None
+    next_attempt_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    claimed_at: Optional[datetime] = None
+    provider_message_id: Optional[str] = None
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    sent_at: Optional[datetime] = None
+
+
+class EmailNotification(SQLModel, table=True):
+    """
+    Notification held for a user's digest email (users on hourly/daily
+    digests). Rendered with the other pending ones into a single email
+    once the user's window has passed.
+    """
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    user_id: int = Field(foreign_key="user.id", index=True)
+    kind: str  # payment_receipt, new_message, task_reminder (template partial name)
+    # Simple stringified JSON: the template context for this item
+    context: str = Field(default="{}")
+    dedupe_key: Optional[str] = Field(default=None, index=True, unique=True)
+
+    status: str = Field(default="pending", index=True)  # pending, sent
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    sent_at: Optional[datetime] = None
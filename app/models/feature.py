@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlmodel import Field, SQLModel
+
+
+class ApplicantFeatures(SQLModel, table=True):
+    """
+    Numeric feature vector of one applicant for scoring and training
+    (layout: services.features.FEATURE_NAMES), kept up to date from the
+    applicant, eligibility results, reviews and documents.
+
+    Source changes only mark the row stale; it is recomputed by the
+    refresh job or on the next read.
+    """
+
+    applicant_id: int = Field(foreign_key="applicant.id", primary_key=True)
+
+    # Layout version of `vector`; 0 until first computed
+    schema_version: int = Field(default=0)
+    # Little-endian float32 values, len(FEATURE_NAMES) of them (NaN = unknown)
+    vector: bytes = Field(default=b"")
+
+    stale: bool = Field(default=True, index=True)
+    marked_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: Optional[datetime] = None
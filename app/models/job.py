@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlmodel import Field, SQLModel
+
+
+class JobCheckpoint(SQLModel, table=True):
+    """
+    Resume point of a long-running batch job (e.g. payment reconciliation),
+    saved in the same transaction as the work it covers.
+    """
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    name: str = Field(index=True, unique=True)
+    # Simple stringified JSON, job-specific
+    state: str = Field(default="{}")
+
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -9,6 +9,8 @@ from sqlmodel import Field, SQLModel
 class Message(SQLModel, table=True):
     """
     Internal message related to an applicant (client <-> manager).
+    On PostgreSQL a trigger keeps a GIN-indexed search_vector column over
+    body (migration 20261019_message_search_vector).
     """
 
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 
+from sqlalchemy import UniqueConstraint
 from sqlmodel import Field, SQLModel
 
 
@@ -33,3 +34,73 @@ class Payment(SQLModel, table=True):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+
+
+class StripeEvent(SQLModel, table=True):
+    """
+    Stripe webhook event, recorded on receipt and processed by a background
+    worker. The unique event ID makes redelivered events no-ops.
+    """
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    stripe_event_id: str = Field(index=True, unique=True)
+    type: str = Field(index=True)
+    payload: str  # raw verified JSON body
+
+    status: str = Field(
+        default="pending", index=True
+    )  # pending, processing, processed, ignored, failed, dead
+    attempts: int = Field(default=0)
+    last_error: Optional[str] = None
+    claimed_at: Optional[datetime] = None
+
+    received_at: datetime = Field(default_factory=datetime.utcnow)
+    processed_at: Optional[datetime] = None
+
+
+class PaymentLedgerEntry(SQLModel, table=True):
+    """
+    Append-only record of a Payment state transition that moves money.
+    One entry per (payment, entry_type, reference): replays and re-applied
+    transitions add nothing. Rows are never updated or deleted.
+    """
+
+    __table_args__ = (UniqueConstraint("payment_id", "entry_type", "reference"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    payment_id: int = Field(foreign_key="payment.id", index=True)
+
+    entry_type: str  # created, succeeded, refunded
+    # "" for created/succeeded. A payment can be refunded in several steps:
+    # each refund entry holds the increment and, here, the cumulative
+    # refunded amount it brings the payment to.
+    reference: str = Field(default="")
+    amount_cents: int
+    currency: str
+    source: str  # checkout, webhook, reconciliation, backfill
+
+    occurred_at: datetime = Field(default_factory=datetime.utcnow)
+    day: date = Field(index=True)  # UTC day of occurred_at
+
+
+class PaymentDailyAggregate(SQLModel, table=True):
+    """
+    Per-currency, per-day payment totals, maintained incrementally with each
+    ledger entry. Revenue and refund reports read only these rows.
+    """
+
+    __table_args__ = (UniqueConstraint("day", "currency"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    day: date = Field(index=True)
+    currency: str
+
+    created_count: int = Field(default=0)
+    created_cents: int = Field(default=0)
+    succeeded_count: int = Field(default=0)
+    succeeded_cents: int = Field(default=0)
+    refunded_count: int = Field(default=0)  # refund entries (a partially refunded payment may have several)
+    refunded_cents: int = Field(default=0)
+
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -29,6 +29,7 @@ class Task(SQLModel, table=True):
     )  # pending, in_progress, completed, cancelled
 
     due_at: Optional[datetime] = Field(default=None, index=True)
+    reminder_sent_at: Optional[datetime] = Field(default=None)
 
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
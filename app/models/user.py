@@ -13,5 +13,7 @@ class User(SQLModel, table=True):
     hashed_password: str
     role: str = Field(default="client", index=True)  # root, manager, client
     is_active: bool = Field(default=True)
+    # Notification emails: immediate, or collapsed into an hourly/daily digest
+    email_digest: str = Field(default="immediate")
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel
 
@@ -41,6 +41,7 @@ class ApplicantCreateResponse(BaseModel):
     first_name: str
     last_name: str
     status: str
+    possible_duplicate_ids: List[int] = []
 
 
 class ApplicantListEntry(BaseModel):
@@ -55,3 +56,15 @@ class ApplicantListEntry(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class ApplicantSearchHit(ApplicantListEntry):
+    """Search result row; score is the relevance rank (higher is better)."""
+    country_of_residence: Optional[str] = None
+    study_destination: Optional[str] = None
+    score: float
+
+
+class ApplicantSearchPage(BaseModel):
+    items: List[ApplicantSearchHit]
+    next_cursor: Optional[str] = None
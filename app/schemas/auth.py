@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import BaseModel, field_validator
 
@@ -37,12 +37,17 @@ class UserRead(UserBase):
     id: int
     role: str
     is_active: bool
+    email_digest: str = "immediate"
     created_at: datetime
 
     class Config:
         from_attributes = True
 
 
+class EmailPreferences(BaseModel):
+    email_digest: Literal["immediate", "hourly", "daily"]
+
+
 class UserLogin(BaseModel):
     email: str
     password: str
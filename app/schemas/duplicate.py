@@ -0,0 +1,31 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+from app.schemas.applicant import ApplicantRead
+
+
+class DuplicateCandidateRead(BaseModel):
+    id: int
+    applicant_id: int
+    duplicate_of_id: int
+    score: float
+    status: str
+    created_at: datetime
+    reviewed_by_user_id: Optional[int] = None
+    reviewed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class DuplicateQueueEntry(DuplicateCandidateRead):
+    """Review-queue row with both applicant profiles side by side."""
+    applicant: ApplicantRead
+    duplicate_of: ApplicantRead
+
+
+class DuplicateMergeRequest(BaseModel):
+    # Defaults to keeping the older applicant (duplicate_of_id).
+    keep_applicant_id: Optional[int] = None
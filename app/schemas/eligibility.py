@@ -1,19 +1,114 @@
 from datetime import datetime
-from typing import List
+from typing import Dict, List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 
 class EligibilityInput(BaseModel):
     applicant_id: int
     gpa: float
     toefl: int
+    # Defaults to the applicant's profile when omitted
+    study_destination: Optional[str] = None
+    level_of_study: Optional[str] = None
     notes: str | None = None
 
+    @field_validator("gpa")
+    @classmethod
+    def gpa_two_decimals(cls, v: float) -> float:
+        # Rules are evaluated on the same rounded GPA the result fingerprint uses.
+        return round(v, 2)
+
 
 class EligibilityOutput(BaseModel):
     applicant_id: int
     is_eligible: bool
     recommendations: List[str]
     created_at: datetime
+    tier: Optional[str] = None
+    rule_version: Optional[int] = None
+    # True when served from an earlier evaluation of the same inputs and rules
+    cached: bool = False
+
+
+class EligibilityHistoryItem(BaseModel):
+    id: int
+    is_eligible: Optional[bool]
+    tier: Optional[str] = None
+    recommendations: List[str]
+    rule_version: Optional[int] = None
+    gpa: Optional[float] = None
+    toefl: Optional[int] = None
+    study_destination: Optional[str] = None
+    level_of_study: Optional[str] = None
+    created_at: datetime
+
+
+class EligibilityTier(BaseModel):
+    eligible: bool
+    recommendations: List[str]
+
+
+class EligibilityThreshold(BaseModel):
+    tier: str
+    min_gpa: float = Field(ge=0, le=5)
+    min_toefl: int = Field(ge=0, le=120)
+
+
+class EligibilityRule(BaseModel):
+    """Thresholds for one destination and level of study; "*" matches any."""
+
+    destination: str = "*"
+    level: str = "*"
+    thresholds: List[EligibilityThreshold] = Field(min_length=1)  # first satisfied wins
+
+
+class EligibilityRules(BaseModel):
+    tiers: Dict[str, EligibilityTier]
+    rules: List[EligibilityRule] = Field(min_length=1)
+    fallback_tier: str
+
+    @model_validator(mode="after")
+    def check_references(self):
+        names = set(self.tiers)
+        if self.fallback_tier not in names:
+            raise ValueError(f"Unknown fallback_tier: {self.fallback_tier}")
+        seen = set()
+        for rule in self.rules:
+            key = (rule.destination.lower(), rule.level.lower())
+            if key in seen:
+                raise ValueError(f"Duplicate rule for destination={rule.destination} level={rule.level}")
+            seen.add(key)
+            for threshold in rule.thresholds:
+                if threshold.tier not in names:
+                    raise ValueError(f"Unknown tier: {threshold.tier}")
+        if ("*", "*") not in seen:
+            raise ValueError('A catch-all rule (destination "*", level "*") is required')
+        return self
+
+
+class EligibilityRulesRead(BaseModel):
+    version: int
+    rules: EligibilityRules
+    created_at: Optional[datetime] = None
+
+
+class EligibilityBatchRequest(BaseModel):
+    items: List[EligibilityInput] = Field(min_length=1)
+    persist: bool = True
+
+
+class EligibilityBatchRow(BaseModel):
+    applicant_id: int
+    is_eligible: bool
+    tier: str
+    recommendations: List[str]
+
 
+class EligibilityBatchResponse(BaseModel):
+    rule_version: int
+    count: int
+    eligible_count: int
+    persisted: int
+    reused: int  # rows whose inputs and rule version already had a stored result
+    results: List[EligibilityBatchRow]
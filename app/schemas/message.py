@@ -22,3 +22,8 @@ class MessageRead(BaseModel):
     class Config:
         from_attributes = True
 
+
+
+class MessageSearchHit(MessageRead):
+    """Message search result; snippet is HTML with matches wrapped in <mark>."""
+    snippet: str
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel
 
@@ -14,8 +14,23 @@ class MLRecommendationRequest(BaseModel):
     context: dict
 
 
+class ProgramRecommendation(BaseModel):
+    name: str
+    destination: str
+    level: str
+    score: float  # 1 / (1 + distance), higher is closer
+
+
 class MLRecommendationResponse(BaseModel):
     applicant_id: int
     recommendation: str
     model_version: str
+    programs: List[ProgramRecommendation] = []
+
+
+class MLModelInfo(BaseModel):
+    model_version: str
+    kind: Optional[str] = None
+    created_at: Optional[str] = None
+    programs: int = 0
 
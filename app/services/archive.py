@@ -0,0 +1,396 @@
+"""
+Streaming ZIP writer for document bundles.
+
+Entries are STORED (documents are already compressed PDFs/images) with data
+descriptors, so the archive can be written front to back without seeking and
+its exact length is known before any object is read. That makes HTTP Range
+requests possible: a resumed download regenerates the same byte stream and
+only emits the requested slice.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import queue
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, Optional
+
+
+MANIFEST_NAME = "SHA256SUMS"
+ZIP64_LIMIT = 0xFFFFFFFF
+_FLAGS = 0x0808  # bit 3: sizes/CRC in data descriptor, bit 11: UTF-8 names
+
+# Checksums of objects already streamed, keyed by storage key (keys are
+# immutable per upload). Lets a ranged restart skip re-reading objects that
+# lie entirely before the requested offset.
+_CHECKSUM_CACHE_SIZE = 10_000
+_checksum_cache: "OrderedDict[str, tuple[int, str]]" = OrderedDict()
+_checksum_lock = threading.Lock()
+
+# Reads an object starting at a byte offset and yields chunks.
+FetchFn = Callable[[str, int], Iterable[bytes]]
+
+
+def _cached_checksums(key: str) -> Optional[tuple[int, str]]:
+    with _checksum_lock:
+        value = _checksum_cache.get(key)
+        if value is not None:
+            _checksum_cache.move_to_end(key)
+        return value
+
+
+def _store_checksums(key: str, crc: int, sha256: str) -> None:
+    with _checksum_lock:
+        _checksum_cache[key] = (crc, sha256)
+        _checksum_cache.move_to_end(key)
+        while len(_checksum_cache) > _CHECKSUM_CACHE_SIZE:
+            _checksum_cache.popitem(last=False)
+
+
+def _dos_datetime(value: datetime) -> tuple[int, int]:
+    year = min(max(value.year, 1980), 2107)
+    dos_time = (value.hour << 11) | (value.minute << 5) | (value.second // 2)
+    dos_date = ((year - 1980) << 9) | (value.month << 5) | value.day
+    return dos_time, dos_date
+
+
+@dataclass
+class ArchiveEntry:
+    name: str
+    key: Optional[str]  # storage key; None for the generated manifest
+    size: int
+    modified: datetime
+    # Filled in by layout / streaming
+    offset: int = 0
+    crc: int = 0
+    sha256: str = ""
+    name_bytes: bytes = field(default=b"", repr=False)
+
+    @property
+    def zip64(self) -> bool:
+        return self.size >= ZIP64_LIMIT or self.offset >= ZIP64_LIMIT
+
+    @property
+    def header_size(self) -> int:
+        return 30 + len(self.name_bytes) + (20 if self.zip64 else 0)
+
+    @property
+    def descriptor_size(self) -> int:
+        return 24 if self.zip64 else 16
+
+    @property
+    def data_offset(self) -> int:
+        return self.offset + self.header_size
+
+    def local_header(self) -> bytes:
+        dos_time, dos_date = _dos_datetime(self.modified)
+        extra = struct.pack("<HHQQ", 0x0001, 16, 0, 0) if self.zip64 else b""
+        sizes = ZIP64_LIMIT if self.zip64 else 0
+        return (
+            struct.pack(
+                "<IHHHHHIIIHH",
+                0x04034B50,
+                45 if self.zip64 else 20,
+                _FLAGS,
+                0,  # stored
+                dos_time,
+                dos_date,
+                0,
+                sizes,
+                sizes,
+                len(self.name_bytes),
+                len(extra),
+            )
+            + self.name_bytes
+            + extra
+        )
+
+    def data_descriptor(self) -> bytes:
+        if self.zip64:
+            return struct.pack("<IIQQ", 0x08074B50, self.crc, self.size, self.size)
+        return struct.pack("<IIII", 0x08074B50, self.crc, self.size, self.size)
+
+    def central_header(self) -> bytes:
+        dos_time, dos_date = _dos_datetime(self.modified)
+        big_size = self.size >= ZIP64_LIMIT
+        big_offset = self.offset >= ZIP64_LIMIT
+        extra_fields = b""
+        if big_size:
+            extra_fields += struct.pack("<QQ", self.size, self.size)
+        if big_offset:
+            extra_fields += struct.pack("<Q", self.offset)
+        extra = struct.pack("<HH", 0x0001, len(extra_fields)) + extra_fields if extra_fields else b""
+        return (
+            struct.pack(
+                "<IHHHHHHIIIHHHHHII",
+                0x02014B50,
+                45,  # made by: spec 4.5
+                45 if self.zip64 else 20,
+                _FLAGS,
+                0,
+                dos_time,
+                dos_date,
+                self.crc,
+                ZIP64_LIMIT if big_size else self.size,
+                ZIP64_LIMIT if big_size else self.size,
+                len(self.name_bytes),
+                len(extra),
+                0,
+                0,
+                0,
+                0,
+                ZIP64_LIMIT if big_offset else self.offset,
+            )
+            + self.name_bytes
+            + extra
+        )
+
+
+def _clip(chunk: bytes, pos: int, start: int, end: int) -> bytes:
+    """Part of `chunk` (which begins at stream position `pos`) inside [start, end]."""
+    lo = max(start - pos, 0)
+    hi = min(end + 1 - pos, len(chunk))
+    return chunk[lo:hi] if lo < hi else b""
+
+
+class _Prefetcher:
+    """
+    Downloads up to `concurrency` objects ahead of the writer, each buffered in a
+    bounded queue of chunks, so memory stays at concurrency * buffer_chunks * chunk size.
+    """
+
+    _DONE = object()
+
+    def __init__(self, fetch: FetchFn, concurrency: int, buffer_chunks: int) -> None:
+        self._fetch = fetch
+        self._concurrency = concurrency
+        self._buffer_chunks = buffer_chunks
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="archive-fetch")
+        self._cancelled = threading.Event()
+        self._pending: list[tuple[str, int]] = []
+        self._queues: dict[int, queue.Queue] = {}
+        self._next = 0
+
+    def plan(self, requests: list[tuple[str, int]]) -> None:
+        """Objects (key, start offset) in the order they will be consumed."""
+        self._pending = requests
+
+    def _produce(self, key: str, offset: int, out: queue.Queue) -> None:
+        def put(item) -> bool:
+            while not self._cancelled.is_set():
+                try:
+                    out.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        try:
+            for chunk in self._fetch(key, offset):
+                if not put(chunk):
+                    return
+            put(self._DONE)
+        except Exception as exc:  # surfaced to the consumer
+            put(exc)
+
+    def _fill(self, upto: int) -> None:
+        while self._next < len(self._pending) and self._next <= upto:
+            key, offset = self._pending[self._next]
+            out: queue.Queue = queue.Queue(maxsize=self._buffer_chunks)
+            self._queues[self._next] = out
+            self._executor.submit(self._produce, key, offset, out)
+            self._next += 1
+
+    def chunks(self, index: int) -> Iterator[bytes]:
+        self._fill(index + self._concurrency - 1)
+        out = self._queues.pop(index)
+        while True:
+            item = out.get()
+            if item is self._DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def close(self) -> None:
+        self._cancelled.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class BundleArchive:
+    """Deterministic, range-capable streaming ZIP of storage objects plus a SHA256SUMS manifest."""
+
+    def __init__(
+        self,
+        entries: list[ArchiveEntry],
+        fetch: FetchFn,
+        *,
+        concurrency: int = 4,
+        buffer_chunks: int = 4,
+    ) -> None:
+        self.entries = entries
+        self._fetch = fetch
+        self._concurrency = concurrency
+        self._buffer_chunks = buffer_chunks
+        for entry in entries:
+            entry.name_bytes = entry.name.encode("utf-8")
+        manifest_size = sum(64 + 2 + len(e.name_bytes) + 1 for e in entries)
+        modified = max((e.modified for e in entries), default=datetime(1980, 1, 1))
+        self.manifest = ArchiveEntry(name=MANIFEST_NAME, key=None, size=manifest_size, modified=modified)
+        self.manifest.name_bytes = MANIFEST_NAME.encode()
+        self._layout()
+
+    def _layout(self) -> None:
+        pos = 0
+        for entry in self._all_entries:
+            entry.offset = pos
+            pos = entry.data_offset + entry.size + entry.descriptor_size
+        self.central_offset = pos
+        self.central_size = sum(
+            46 + len(e.name_bytes) + (8 if e.size >= ZIP64_LIMIT else 0) * 2
+            + (8 if e.offset >= ZIP64_LIMIT else 0)
+            + (4 if (e.size >= ZIP64_LIMIT or e.offset >= ZIP64_LIMIT) else 0)
+            for e in self._all_entries
+        )
+        self.zip64_end = (
+            len(self._all_entries) >= 0xFFFF
+            or self.central_offset >= ZIP64_LIMIT
+            or self.central_size >= ZIP64_LIMIT
+        )
+        self.total_size = self.central_offset + self.central_size + 22 + (56 + 20 if self.zip64_end else 0)
+
+    @property
+    def _all_entries(self) -> list[ArchiveEntry]:
+        return [*self.entries, self.manifest]
+
+    @property
+    def etag(self) -> str:
+        """Identifies the exact byte layout (for If-Range)."""
+        digest = hashlib.sha256()
+        for e in self.entries:
+            digest.update(f"{e.name}\0{e.key}\0{e.size}\0{e.modified.isoformat()}\n".encode())
+        return f'"{digest.hexdigest()[:32]}"'
+
+    def _end_records(self) -> bytes:
+        count = len(self._all_entries)
+        records = b""
+        if self.zip64_end:
+            zip64_end_offset = self.central_offset + self.central_size
+            records += struct.pack(
+                "<IQHHIIQQQQ", 0x06064B50, 44, 45, 45, 0, 0, count, count, self.central_size, self.central_offset
+            )
+            records += struct.pack("<IIQI", 0x07064B50, 0, zip64_end_offset, 1)
+        records += struct.pack(
+            "<IHHHHIIH",
+            0x06054B50,
+            0,
+            0,
+            min(count, 0xFFFF),
+            min(count, 0xFFFF),
+            min(self.central_size, ZIP64_LIMIT),
+            min(self.central_offset, ZIP64_LIMIT),
+            0,
+        )
+        return records
+
+    def stream(self, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """Yield archive bytes in [start, end] (inclusive), reading only what is needed."""
+        end = self.total_size - 1 if end is None else end
+
+        # Per entry: "skip" (checksums cached, data before `start`), "fetch" from
+        # an offset (cached, `start` inside the data) or from 0, or "header"
+        # when the range ends before the data.
+        modes: list[tuple[str, int]] = []
+        plan: list[tuple[str, int]] = []
+        for entry in self.entries:
+            if entry.offset > end:
+                break
+            cached = _cached_checksums(entry.key)
+            if entry.data_offset > end:
+                modes.append(("header", 0))
+            elif cached and entry.data_offset + entry.size <= start:
+                entry.crc, entry.sha256 = cached
+                modes.append(("skip", 0))
+            elif cached and entry.data_offset < start:
+                entry.crc, entry.sha256 = cached
+                modes.append(("fetch", start - entry.data_offset))
+                plan.append((entry.key, start - entry.data_offset))
+            else:
+                modes.append(("fetch", 0))
+                plan.append((entry.key, 0))
+
+        prefetcher = _Prefetcher(self._fetch, self._concurrency, self._buffer_chunks)
+        prefetcher.plan(plan)
+        fetch_index = 0
+        pos = 0
+        try:
+            for entry, (mode, skip) in zip(self.entries, modes):
+                header = entry.local_header()
+                piece = _clip(header, pos, start, end)
+                if piece:
+                    yield piece
+                pos += len(header)
+                if mode == "header":
+                    return
+
+                if mode == "skip":
+                    pos += entry.size
+                else:
+                    # With skip > 0 the checksums come from the cache and the
+                    # object is read from the resume point only.
+                    crc, sha, read = 0, hashlib.sha256(), skip
+                    pos += skip
+                    for chunk in prefetcher.chunks(fetch_index):
+                        if not skip:
+                            crc = zlib.crc32(chunk, crc)
+                            sha.update(chunk)
+                        read += len(chunk)
+                        if read > entry.size:
+                            raise RuntimeError(f"Object {entry.key} is larger than recorded size")
+                        piece = _clip(chunk, pos, start, end)
+                        if piece:
+                            yield piece
+                        pos += len(chunk)
+                        if pos > end:
+                            break
+                    fetch_index += 1
+                    complete = read == entry.size
+                    if complete and not skip:
+                        entry.crc, entry.sha256 = crc, sha.hexdigest()
+                        _store_checksums(entry.key, entry.crc, entry.sha256)
+                    if pos > end:
+                        return
+                    if not complete:
+                        raise RuntimeError(f"Object {entry.key} is smaller than recorded size")
+
+                descriptor = entry.data_descriptor()
+                piece = _clip(descriptor, pos, start, end)
+                if piece:
+                    yield piece
+                pos += len(descriptor)
+                if pos > end:
+                    return
+
+            if len(modes) < len(self.entries):
+                return
+            content = "".join(f"{e.sha256}  {e.name}\n" for e in self.entries).encode("utf-8")
+            self.manifest.crc = zlib.crc32(content)
+            self.manifest.sha256 = hashlib.sha256(content).hexdigest()
+            tail = (
+                self.manifest.local_header()
+                + content
+                + self.manifest.data_descriptor()
+                + b"".join(e.central_header() for e in self._all_entries)
+                + self._end_records()
+            )
+            piece = _clip(tail, pos, start, end)
+            if piece:
+                yield piece
+        finally:
+            prefetcher.close()
@@ -16,9 +16,12 @@ def log_event(
     resource_id: Optional[str] = None,
     metadata: Optional[dict[str, Any]] = None,
     ip_address: Optional[str] = None,
+    commit: bool = True,
 ) -> None:
     """
     Persist a simple audit log entry.
+
+    Pass commit=False to write it in the caller's transaction.
     """
     log = AuditLog(
         user_id=user_id,
@@ -29,5 +32,6 @@ def log_event(
         ip_address=ip_address,
     )
     session.add(log)
-    session.commit()
+    if commit:
+        session.commit()
 
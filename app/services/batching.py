@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Generic, Optional, Sequence, TypeVar
+
+from app.services.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+BATCH_SIZE_BUCKETS: tuple[float, ...] = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+# Seconds; queueing delay is meant to stay around a few milliseconds.
+QUEUE_DELAY_BUCKETS: tuple[float, ...] = (0.0001, 0.00025, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+
+_STOP = object()
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Coalesces concurrent single-item calls into batched calls of `fn`.
+
+    Callers (request threads) `submit` an item and wait on the returned
+    future. One background thread takes the first waiting item, collects
+    more until `max_batch` items are queued or `max_wait` seconds have
+    passed since that first item was queued, then calls `fn` once with the
+    whole batch and resolves each future with its result (or `fn`'s
+    exception). A lone request therefore waits at most `max_wait`; under
+    load, batches fill up before the deadline. If the thread dies anyway,
+    the futures it held fail and the next `submit` starts a new thread.
+
+    Records `<name>.batch_size`, `<name>.queue_seconds` (per item, submit
+    to dispatch) and `<name>.batch_seconds`.
+    """
+
+    def __init__(
+        self,
+        fn: Callable[[list[T]], Sequence[R]],
+        *,
+        max_batch: int,
+        max_wait: float,
+        name: str = "batcher",
+    ) -> None:
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        self.fn = fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.name = name
+        self._queue: "queue.SimpleQueue[object]" = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def submit(self, item: T) -> "Future[R]":
+        future: Future[R] = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"{self.name} is closed")
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._queue.put((item, future, time.perf_counter()))  # under the lock: never after close's stop marker
+        return future
+
+    def __call__(self, item: T, timeout: Optional[float] = None) -> R:
+        return self.submit(item).result(timeout)
+
+    def close(self) -> None:
+        """Dispatch what is queued, then stop the background thread."""
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+
+    def _run(self) -> None:
+        batch: list = []
+        try:
+            self._loop(batch)
+        except BaseException as exc:
+            logger.exception("%s worker thread died", self.name)
+            error = RuntimeError(f"{self.name} worker thread died")
+            error.__cause__ = exc
+            with self._lock:
+                # Anything queued before this point would never be dispatched;
+                # later submits see the thread is gone and start a new one.
+                self._thread = None
+                while True:
+                    try:
+                        entry = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if entry is not _STOP:
+                        batch.append(entry)
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(error)
+
+    def _loop(self, batch: list) -> None:
+        """Collect and dispatch batches until stopped; `batch` holds the one in flight."""
+        stopping = False
+        while not stopping:
+            batch.clear()
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch.append(first)
+            deadline = first[2] + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                try:
+                    entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    stopping = True
+                    break
+                batch.append(entry)
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: list) -> None:
+        started = time.perf_counter()
+        metrics.histogram(f"{self.name}.batch_size", BATCH_SIZE_BUCKETS).observe(len(batch))
+        delays = metrics.histogram(f"{self.name}.queue_seconds", QUEUE_DELAY_BUCKETS)
+        for _, _, queued in batch:
+            delays.observe(started - queued)
+        try:
+            with metrics.timer(f"{self.name}.batch_seconds"):
+                results = self.fn([item for item, _, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"{self.name} returned {len(results)} results for {len(batch)} items")
+        except Exception as exc:
+            logger.exception("%s batch of %d failed", self.name, len(batch))
+            for _, future, _ in batch:
+                future.set_exception(exc)
+            return
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from typing import Any
+
+from sqlmodel import Session, select
+
+from app.models.job import JobCheckpoint
+
+
+def load_checkpoint(session: Session, name: str) -> dict[str, Any]:
+    row = session.exec(select(JobCheckpoint).where(JobCheckpoint.name == name)).first()
+    return json.loads(row.state) if row else {}
+
+
+def save_checkpoint(session: Session, name: str, state: dict[str, Any]) -> None:
+    """Store `state` for job `name` in the caller's transaction. Does not commit."""
+    row = session.exec(select(JobCheckpoint).where(JobCheckpoint.name == name)).first()
+    if row is None:
+        row = JobCheckpoint(name=name)
+    row.state = json.dumps(state)
+    row.updated_at = datetime.utcnow()
+    session.add(row)
+
+
+def clear_checkpoint(session: Session, name: str) -> None:
+    row = session.exec(select(JobCheckpoint).where(JobCheckpoint.name == name)).first()
+    if row is not None:
+        session.delete(row)
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+from typing import Iterable, Iterator, Optional
+
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from app.models.document import Document, DocumentText, StoredObject
+from app.services.metrics import metrics
+
+
+# Scan outcomes that can be shared with later uploads of the same content.
+FINAL_SCAN_STATUSES = ("clean", "infected")
+
+
+def checksum_to_hex(checksum: Optional[str]) -> Optional[str]:
+    """
+    Convert an S3 ChecksumSHA256 (base64) to hex.
+
+    Returns None for missing, malformed or multipart composite ("...-N") checksums,
+    which are not hashes of the whole object.
+    """
+    if not checksum or "-" in checksum:
+        return None
+    try:
+        raw = base64.b64decode(checksum, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    return raw.hex() if len(raw) == 32 else None
+
+
+class HashingStream:
+    """
+    Iterate chunks unchanged while computing their SHA-256.
+
+    `sha256` is only set once the stream has been read to the end, so a
+    consumer that stops early (e.g. a scanner that found a signature) never
+    records a hash of partial content.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._chunks = chunks
+        self._hasher = hashlib.sha256()
+        self.sha256: Optional[str] = None
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self._chunks:
+            self._hasher.update(chunk)
+            yield chunk
+        self.sha256 = self._hasher.hexdigest()
+
+
+def _get_for_update(session: Session, sha256: str) -> Optional[StoredObject]:
+    return session.exec(
+        select(StoredObject).where(StoredObject.sha256 == sha256).with_for_update()
+    ).first()
+
+
+def attach_content(session: Session, doc: Document, sha256: str) -> Optional[str]:
+    """
+    Record `doc`'s content hash and link it to the shared StoredObject.
+
+    If the content is already stored under another key, the document is
+    repointed at it (inheriting a final scan result) and the now-redundant
+    key is returned so the caller can delete it after committing. Otherwise
+    the document's own object becomes the stored copy. Does not commit.
+    """
+    if doc.content_sha256 == sha256:
+        return None
+    doc.content_sha256 = sha256
+    session.add(doc)
+
+    stored = _get_for_update(session, sha256)
+    if stored is None:
+        try:
+            with session.begin_nested():
+                session.add(
+                    StoredObject(
+                        sha256=sha256,
+                        s3_key=doc.s3_key,
+                        size_bytes=doc.size_bytes,
+                        scanned_status=doc.scanned_status if doc.scanned_status in FINAL_SCAN_STATUSES else "pending",
+                    )
+                )
+            return None
+        except IntegrityError:
+            # Another upload of the same content registered first.
+            stored = _get_for_update(session, sha256)
+
+    stored.ref_count += 1
+    session.add(stored)
+    redundant = doc.s3_key if doc.s3_key != stored.s3_key else None
+    doc.s3_key = stored.s3_key
+    if stored.scanned_status in FINAL_SCAN_STATUSES:
+        doc.scanned_status = stored.scanned_status
+        doc.scan_claimed_at = None
+    metrics.counter("dedup.hits").inc()
+    metrics.counter("dedup.bytes_saved").inc(doc.size_bytes or 0)
+    return redundant
+
+
+def record_scan_result(session: Session, sha256: str, scan_status: str) -> None:
+    """Store a final scan result on the shared object and every document still waiting on it."""
+    if scan_status not in FINAL_SCAN_STATUSES:
+        return
+    session.exec(
+        update(StoredObject).where(StoredObject.sha256 == sha256).values(scanned_status=scan_status)
+    )
+    session.exec(
+        update(Document)
+        .where(Document.content_sha256 == sha256, Document.scanned_status == "pending")
+        .values(scanned_status=scan_status)
+    )
+
+
+def release_document(session: Session, doc: Document) -> Optional[str]:
+    """
+    Delete `doc` and drop its reference to the stored content.
+
+    Returns the storage key to delete after commit when no document references
+    it any more, or None while other documents still share it. Does not commit.
+    """
+    key: Optional[str] = doc.s3_key
+    if doc.content_sha256:
+        stored = _get_for_update(session, doc.content_sha256)
+        if stored is not None:
+            stored.ref_count -= 1
+            if stored.ref_count > 0:
+                session.add(stored)
+                key = None
+            else:
+                session.delete(stored)
+                session.exec(delete(DocumentText).where(DocumentText.content_sha256 == doc.content_sha256))
+    session.delete(doc)
+    return key
@@ -0,0 +1,357 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+import zlib
+from datetime import datetime
+from itertools import combinations
+from typing import Iterable, Iterator, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import and_, delete, or_, update
+from sqlmodel import Session, select
+
+from app.models.applicant import Applicant
+from app.models.consent import MLTrainingConsent
+from app.models.document import DocumentBundle
+from app.models.duplicate import ApplicantBlockingKey, DuplicateCandidate
+from app.models.eligibility import EligibilityResult
+from app.models.message import Message
+from app.models.payment import Payment
+from app.models.review import ApplicantReview
+from app.models.task import Task
+from app.services.features import mark_stale
+
+
+DUPLICATE_THRESHOLD = 0.8
+NAME_VECTOR_DIM = 128
+
+# Relative weight of each signal in the pair score (sums to 1.0).
+WEIGHT_NAME = 0.6
+WEIGHT_COUNTRY = 0.1
+WEIGHT_EDUCATION = 0.1
+WEIGHT_DESTINATION = 0.05
+WEIGHT_SAME_OWNER = 0.15
+
+# Blocks larger than this (very common names) are compared with a sorted
+# neighbourhood window instead of all pairs, keeping the scan near-linear.
+MAX_BLOCK_SIZE = 200
+NEIGHBOURHOOD_WINDOW = 20
+# Cap on candidates scored for one applicant at creation time.
+MAX_INCREMENTAL_CANDIDATES = 500
+
+_NON_LETTERS = re.compile(r"[^a-z ]+")
+_SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"),
+    **dict.fromkeys("cgjkqsxz", "2"),
+    **dict.fromkeys("dt", "3"),
+    "l": "4",
+    **dict.fromkeys("mn", "5"),
+    "r": "6",
+}
+
+
+def normalize(value: Optional[str]) -> str:
+    """Lowercase, strip accents and punctuation, collapse whitespace."""
+    if not value:
+        return ""
+    ascii_value = unicodedata.normalize("NFKD", value).encode("ascii", "ignore").decode()
+    return " ".join(_NON_LETTERS.sub(" ", ascii_value.lower()).split())
+
+
+def soundex(word: str) -> str:
+    """American Soundex code ("" for words without letters)."""
+    word = normalize(word).replace(" ", "")
+    if not word:
+        return ""
+    code = word[0].upper()
+    last = _SOUNDEX_CODES.get(word[0], "")
+    for ch in word[1:]:
+        digit = _SOUNDEX_CODES.get(ch, "")
+        if digit and digit != last:
+            code += digit
+            if len(code) == 4:
+                break
+        if ch not in "hw":
+            last = digit
+    return code.ljust(4, "0")
+
+
+def blocking_keys(applicant: Applicant) -> set[str]:
+    first = normalize(applicant.first_name)
+    last = normalize(applicant.last_name)
+    keys = set()
+    if first or last:
+        keys.add("n:" + " ".join(sorted(f"{first} {last}".split())))
+    phonetic_last = soundex(last)
+    if phonetic_last:
+        keys.add(f"p:{phonetic_last}{soundex(first)}")
+        country = normalize(applicant.country_of_residence)
+        if country:
+            keys.add(f"c:{country}|{phonetic_last}")
+    return keys
+
+
+def _hashed_trigram_matrix(values: Sequence[str]) -> np.ndarray:
+    """L2-normalized hashed trigram count vectors, one row per value."""
+    matrix = np.zeros((len(values), NAME_VECTOR_DIM), dtype=np.float32)
+    for row, value in enumerate(values):
+        padded = f"  {value} "
+        for i in range(len(padded) - 2):
+            matrix[row, zlib.crc32(padded[i : i + 3].encode()) % NAME_VECTOR_DIM] += 1.0
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def _column(applicants: Sequence[Applicant], attr: str) -> np.ndarray:
+    return np.array([normalize(getattr(a, attr)) for a in applicants], dtype=object)
+
+
+def score_pairs(left: Sequence[Applicant], right: Sequence[Applicant]) -> np.ndarray:
+    """
+    Similarity in [0, 1] for each (left[i], right[i]) pair.
+
+    Names and education are compared as cosine similarity of hashed trigram
+    vectors; country, destination and owner as exact matches. Everything is
+    computed column-wise over the whole batch.
+    """
+    if not left:
+        return np.zeros(0, dtype=np.float32)
+
+    def names(apps: Sequence[Applicant]) -> list[str]:
+        return [" ".join(sorted(f"{normalize(a.first_name)} {normalize(a.last_name)}".split())) for a in apps]
+
+    name_sim = np.einsum(
+        "ij,ij->i", _hashed_trigram_matrix(names(left)), _hashed_trigram_matrix(names(right))
+    )
+    edu_left, edu_right = _column(left, "latest_education"), _column(right, "latest_education")
+    edu_sim = np.einsum(
+        "ij,ij->i", _hashed_trigram_matrix(list(edu_left)), _hashed_trigram_matrix(list(edu_right))
+    )
+
+    def same(attr: str) -> np.ndarray:
+        a, b = _column(left, attr), _column(right, attr)
+        return ((a == b) & (a != "")).astype(np.float32)
+
+    same_owner = np.array(
+        [l.account_user_id == r.account_user_id for l, r in zip(left, right)], dtype=np.float32
+    )
+    return (
+        WEIGHT_NAME * name_sim
+        + WEIGHT_COUNTRY * same("country_of_residence")
+        + WEIGHT_EDUCATION * edu_sim
+        + WEIGHT_DESTINATION * same("study_destination")
+        + WEIGHT_SAME_OWNER * same_owner
+    ).astype(np.float32)
+
+
+def _existing_pairs(session: Session, pairs: Iterable[tuple[int, int]]) -> set[tuple[int, int]]:
+    newer_ids = {newer for newer, _ in pairs}
+    if not newer_ids:
+        return set()
+    rows = session.exec(
+        select(DuplicateCandidate.applicant_id, DuplicateCandidate.duplicate_of_id).where(
+            DuplicateCandidate.applicant_id.in_(newer_ids)
+        )
+    ).all()
+    return {(a, b) for a, b in rows}
+
+
+def _record_candidates(
+    session: Session, pairs: list[tuple[int, int]], applicants: dict[int, Applicant]
+) -> list[DuplicateCandidate]:
+    """Score (newer_id, older_id) pairs and add new ones above the threshold to the session."""
+    existing = _existing_pairs(session, pairs)
+    pairs = [p for p in pairs if p not in existing and p[0] in applicants and p[1] in applicants]
+    if not pairs:
+        return []
+    scores = score_pairs([applicants[a] for a, _ in pairs], [applicants[b] for _, b in pairs])
+    created = []
+    for (newer, older), score in zip(pairs, scores):
+        if score >= DUPLICATE_THRESHOLD:
+            candidate = DuplicateCandidate(applicant_id=newer, duplicate_of_id=older, score=round(float(score), 4))
+            session.add(candidate)
+            created.append(candidate)
+    return created
+
+
+def index_applicant(session: Session, applicant: Applicant) -> set[str]:
+    """Replace the applicant's blocking keys (caller commits)."""
+    session.exec(delete(ApplicantBlockingKey).where(ApplicantBlockingKey.applicant_id == applicant.id))
+    keys = blocking_keys(applicant)
+    session.add_all(ApplicantBlockingKey(applicant_id=applicant.id, key=key) for key in keys)
+    return keys
+
+
+def check_applicant(session: Session, applicant: Applicant) -> list[DuplicateCandidate]:
+    """
+    Incremental check for one applicant, e.g. right after `create_applicant`.
+
+    Writes its blocking keys, scores it against applicants sharing any key
+    (indexed lookup, capped) and records pending candidates. Commits.
+    """
+    keys = index_applicant(session, applicant)
+    session.flush()
+    other_ids = session.exec(
+        select(ApplicantBlockingKey.applicant_id)
+        .where(ApplicantBlockingKey.key.in_(keys), ApplicantBlockingKey.applicant_id != applicant.id)
+        .distinct()
+        .limit(MAX_INCREMENTAL_CANDIDATES)
+    ).all() if keys else []
+    others = session.exec(
+        select(Applicant).where(Applicant.id.in_(other_ids), Applicant.status != "archived")
+    ).all() if other_ids else []
+    applicants = {a.id: a for a in others}
+    applicants[applicant.id] = applicant
+    pairs = [(max(applicant.id, o.id), min(applicant.id, o.id)) for o in others]
+    created = _record_candidates(session, pairs, applicants)
+    session.commit()
+    return created
+
+
+def _backfill_keys(session: Session, chunk_size: int) -> int:
+    """Write blocking keys for applicants that have none yet."""
+    total, last_id = 0, 0
+    while True:
+        missing = session.exec(
+            select(Applicant)
+            .outerjoin(ApplicantBlockingKey, ApplicantBlockingKey.applicant_id == Applicant.id)
+            .where(ApplicantBlockingKey.id.is_(None), Applicant.status != "archived", Applicant.id > last_id)
+            .order_by(Applicant.id)
+            .limit(chunk_size)
+        ).all()
+        if not missing:
+            return total
+        session.add_all(ApplicantBlockingKey(applicant_id=a.id, key=k) for a in missing for k in blocking_keys(a))
+        total += len(missing)
+        last_id = missing[-1].id
+        session.commit()
+
+
+def _block_pairs(members: list[int], names: dict[int, str]) -> Iterator[tuple[int, int]]:
+    if len(members) <= MAX_BLOCK_SIZE:
+        candidates = combinations(members, 2)
+    else:
+        ordered = sorted(members, key=lambda aid: names.get(aid, ""))
+        candidates = (
+            (ordered[i], ordered[j])
+            for i in range(len(ordered))
+            for j in range(i + 1, min(i + 1 + NEIGHBOURHOOD_WINDOW, len(ordered)))
+        )
+    for a, b in candidates:
+        if a != b:
+            yield (max(a, b), min(a, b))
+
+
+def _iter_blocks(session: Session, chunk_size: int) -> Iterator[list[int]]:
+    """
+    Walk the key index in (key, applicant_id) order with keyset pagination and
+    yield the members of every block that has 2+ applicants.
+    """
+    last_key, last_id = "", 0
+    current_key, members = None, []
+    while True:
+        rows = session.exec(
+            select(ApplicantBlockingKey.key, ApplicantBlockingKey.applicant_id)
+            .where(
+                or_(
+                    ApplicantBlockingKey.key > last_key,
+                    and_(ApplicantBlockingKey.key == last_key, ApplicantBlockingKey.applicant_id > last_id),
+                )
+            )
+            .order_by(ApplicantBlockingKey.key, ApplicantBlockingKey.applicant_id)
+            .limit(chunk_size)
+        ).all()
+        for key, applicant_id in rows:
+            if key != current_key:
+                if len(members) > 1:
+                    yield members
+                current_key, members = key, []
+            members.append(applicant_id)
+        if len(rows) < chunk_size:
+            break
+        last_key, last_id = rows[-1]
+    if len(members) > 1:
+        yield members
+
+
+def scan_all(session: Session, chunk_size: int = 10_000) -> dict[str, int]:
+    """
+    Full batch scan: backfill missing keys, walk every block and score pairs in vectorized chunks.
+
+    Memory is bounded by `chunk_size` pairs; blocks are paged from the key index. Commits per chunk.
+    """
+    backfilled = _backfill_keys(session, chunk_size)
+    seen: set[tuple[int, int]] = set()
+    pending: list[tuple[int, int]] = []
+    stats = {"backfilled": backfilled, "pairs_scored": 0, "candidates": 0}
+
+    def flush() -> None:
+        ids = {i for pair in pending for i in pair}
+        applicants = {
+            a.id: a
+            for a in session.exec(
+                select(Applicant).where(Applicant.id.in_(ids), Applicant.status != "archived")
+            ).all()
+        }
+        stats["pairs_scored"] += len(pending)
+        stats["candidates"] += len(_record_candidates(session, pending, applicants))
+        session.commit()
+        pending.clear()
+
+    names: dict[int, str] = {}
+    for members in _iter_blocks(session, chunk_size):
+        if len(members) > MAX_BLOCK_SIZE:
+            names = dict(
+                session.exec(
+                    select(Applicant.id, Applicant.last_name + " " + Applicant.first_name).where(
+                        Applicant.id.in_(members)
+                    )
+                ).all()
+            )
+        for pair in _block_pairs(members, names):
+            if pair not in seen:
+                seen.add(pair)
+                pending.append(pair)
+        if len(pending) >= chunk_size:
+            flush()
+        if len(seen) > chunk_size * 10:
+            seen.clear()  # bound memory; _existing_pairs catches repeats
+    if pending:
+        flush()
+    return stats
+
+
+def merge_applicants(session: Session, keep: Applicant, merged: Applicant, reviewer_id: int) -> None:
+    """
+    Move everything owned by `merged` onto `keep`, archive `merged` and resolve its candidates. Commits.
+    """
+    for model in (DocumentBundle, Message, Task, Payment, ApplicantReview, EligibilityResult, MLTrainingConsent):
+        session.exec(update(model).where(model.applicant_id == merged.id).values(applicant_id=keep.id))
+
+    now = datetime.utcnow()
+    session.exec(
+        update(DuplicateCandidate)
+        .where(
+            DuplicateCandidate.status == "pending",
+            or_(
+                (DuplicateCandidate.applicant_id == merged.id) & (DuplicateCandidate.duplicate_of_id == keep.id),
+                (DuplicateCandidate.applicant_id == keep.id) & (DuplicateCandidate.duplicate_of_id == merged.id),
+            ),
+        )
+        .values(status="merged", reviewed_by_user_id=reviewer_id, reviewed_at=now)
+    )
+    # Other open pairs involving the archived applicant are moot.
+    session.exec(
+        delete(DuplicateCandidate).where(
+            DuplicateCandidate.status == "pending",
+            or_(DuplicateCandidate.applicant_id == merged.id, DuplicateCandidate.duplicate_of_id == merged.id),
+        )
+    )
+    session.exec(delete(ApplicantBlockingKey).where(ApplicantBlockingKey.applicant_id == merged.id))
+
+    mark_stale(session, (keep.id, merged.id))  # the bulk updates above bypass the ORM
+    merged.status = "archived"
+    session.add(merged)
+    session.commit()
@@ -0,0 +1,331 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import func, update
+from sqlmodel import Session, select
+
+from app.core.config import get_settings
+from app.db.upsert import insert_for
+from app.models.eligibility import EligibilityResult, EligibilityRuleSet
+from app.schemas.eligibility import EligibilityRules
+from app.services.features import mark_stale
+
+
+settings = get_settings()
+
+ANY = "*"
+
+# Built-in rules (version 0), in effect until a rule set is published.
+DEFAULT_RULES: dict[str, Any] = {
+    "tiers": {
+        "top": {"eligible": True, "recommendations": ["Top-tier programs", "Scholarship-focused options"]},
+        "solid": {"eligible": True, "recommendations": ["Solid programs", "Consider mid-tier schools"]},
+        "prep": {"eligible": False, "recommendations": ["Foundational programs", "Language or academic prep first"]},
+    },
+    "rules": [
+        {
+            "destination": ANY,
+            "level": ANY,
+            "thresholds": [
+                {"tier": "top", "min_gpa": 3.5, "min_toefl": 90},
+                {"tier": "solid", "min_gpa": 3.0, "min_toefl": 80},
+            ],
+        },
+    ],
+    "fallback_tier": "prep",
+}
+
+
+def _key(value: Optional[str]) -> str:
+    return (value or "").strip().lower()
+
+
+@dataclass
+class CompiledRules:
+    """
+    Rules compiled to arrays. Every known (destination, level) pair, plus
+    index 0 for "anything else", is resolved once to its most specific rule
+    (exact, then destination, then level, then the catch-all), and every
+    rule's thresholds are padded to the same width with +inf, so evaluation
+    is a handful of array operations over the input columns.
+    """
+
+    version: int
+    tier_names: list[str]
+    tier_eligible: np.ndarray  # (tiers,) bool
+    tier_recommendations: list[list[str]]
+    destinations: dict[str, int]
+    levels: dict[str, int]
+    group_of: np.ndarray  # (destinations + 1, levels + 1) -> rule index
+    min_gpa: np.ndarray  # (rules, thresholds) float, +inf padding
+    min_toefl: np.ndarray
+    tier_of: np.ndarray  # (rules, thresholds) tier index
+    fallback: int
+
+    def _codes(self, values: Sequence[Optional[str]], index: dict[str, int]) -> np.ndarray:
+        codes = {v: index.get(_key(v), 0) for v in set(values)}  # normalize each distinct value once
+        return np.fromiter(map(codes.__getitem__, values), dtype=np.intp, count=len(values))
+
+    def evaluate(
+        self,
+        gpa: Sequence[float],
+        toefl: Sequence[float],
+        destinations: Sequence[Optional[str]],
+        levels: Sequence[Optional[str]],
+    ) -> np.ndarray:
+        """Tier index per row; the first threshold of the row's rule it meets, else the fallback."""
+        gpa = np.asarray(gpa, dtype=np.float64)
+        toefl = np.asarray(toefl, dtype=np.float64)
+        if not len(gpa):
+            return np.empty(0, dtype=np.intp)
+        group = self.group_of[self._codes(destinations, self.destinations), self._codes(levels, self.levels)]
+        met = (gpa[:, None] >= self.min_gpa[group]) & (toefl[:, None] >= self.min_toefl[group])
+        first = met.argmax(axis=1)
+        return np.where(met.any(axis=1), self.tier_of[group, first], self.fallback)
+
+    def evaluate_row(self, gpa: float, toefl: float, destination: Optional[str], level: Optional[str]) -> int:
+        """Same result as `evaluate` for one row, in plain Python."""
+        group = self.group_of[self.destinations.get(_key(destination), 0), self.levels.get(_key(level), 0)]
+        for min_gpa, min_toefl, tier in zip(self.min_gpa[group], self.min_toefl[group], self.tier_of[group]):
+            if gpa >= min_gpa and toefl >= min_toefl:
+                return int(tier)
+        return self.fallback
+
+    def outcome(self, tier: int) -> tuple[str, bool, list[str]]:
+        """(tier name, eligible, recommendations)"""
+        return self.tier_names[tier], bool(self.tier_eligible[tier]), list(self.tier_recommendations[tier])
+
+
+def compile_rules(rules: dict[str, Any], version: int = 0) -> CompiledRules:
+    spec = EligibilityRules.model_validate(rules)
+    tier_names = list(spec.tiers)
+    tier_index = {name: i for i, name in enumerate(tier_names)}
+
+    by_scope = {(_key(r.destination), _key(r.level)): i for i, r in enumerate(spec.rules)}
+    destinations = {d: i + 1 for i, d in enumerate(sorted({d for d, _ in by_scope if d != ANY}))}
+    levels = {lv: i + 1 for i, lv in enumerate(sorted({lv for _, lv in by_scope if lv != ANY}))}
+    group_of = np.empty((len(destinations) + 1, len(levels) + 1), dtype=np.intp)
+    for destination, d in [(ANY, 0), *destinations.items()]:
+        for level, lv in [(ANY, 0), *levels.items()]:
+            for scope in ((destination, level), (destination, ANY), (ANY, level), (ANY, ANY)):
+                if scope in by_scope:
+                    group_of[d, lv] = by_scope[scope]
+                    break
+
+    width = max(len(r.thresholds) for r in spec.rules)
+    fallback = tier_index[spec.fallback_tier]
+    min_gpa = np.full((len(spec.rules), width), np.inf)
+    min_toefl = np.full((len(spec.rules), width), np.inf)
+    tier_of = np.full((len(spec.rules), width), fallback, dtype=np.intp)
+    for i, rule in enumerate(spec.rules):
+        for j, threshold in enumerate(rule.thresholds):
+            min_gpa[i, j] = threshold.min_gpa
+            min_toefl[i, j] = threshold.min_toefl
+            tier_of[i, j] = tier_index[threshold.tier]
+
+    return CompiledRules(
+        version=version,
+        tier_names=tier_names,
+        tier_eligible=np.array([spec.tiers[name].eligible for name in tier_names], dtype=bool),
+        tier_recommendations=[spec.tiers[name].recommendations for name in tier_names],
+        destinations=destinations,
+        levels=levels,
+        group_of=group_of,
+        min_gpa=min_gpa,
+        min_toefl=min_toefl,
+        tier_of=tier_of,
+        fallback=fallback,
+    )
+
+
+_lock = threading.Lock()
+_active: Optional[CompiledRules] = None
+
+
+def get_active_rules(session: Session) -> CompiledRules:
+    """
+    The newest published rule set, compiled. Compilation happens once per
+    version per process; each call costs one indexed lookup of the version.
+    """
+    global _active
+    version = session.exec(select(func.max(EligibilityRuleSet.version))).one() or 0
+    with _lock:
+        if _active is not None and _active.version == version:
+            return _active
+    if version:
+        stored = session.exec(select(EligibilityRuleSet.rules).where(EligibilityRuleSet.version == version)).one()
+        compiled = compile_rules(json.loads(stored), version)
+    else:
+        compiled = compile_rules(DEFAULT_RULES, 0)
+    with _lock:
+        if _active is None or _active.version <= compiled.version:
+            _active = compiled
+    return compiled
+
+
+def get_rules_document(session: Session) -> tuple[int, dict[str, Any], Optional[EligibilityRuleSet]]:
+    """(version, rules, stored row or None for the built-in defaults)"""
+    row = session.exec(select(EligibilityRuleSet).order_by(EligibilityRuleSet.version.desc()).limit(1)).first()
+    if row is None:
+        return 0, DEFAULT_RULES, None
+    return row.version, json.loads(row.rules), row
+
+
+def publish_rules(session: Session, rules: EligibilityRules, user_id: Optional[int]) -> EligibilityRuleSet:
+    """Store `rules` as the next version (it becomes active on commit). Does not commit."""
+    compile_rules(rules.model_dump())  # fail before storing anything that would not compile
+    latest = session.exec(select(func.max(EligibilityRuleSet.version))).one() or 0
+    row = EligibilityRuleSet(version=latest + 1, rules=rules.model_dump_json(), created_by_user_id=user_id)
+    session.add(row)
+    return row
+
+
+def result_row(
+    inputs: dict[str, Any],
+    rule_version: int,
+    outcome: tuple[str, bool, list[str]],
+    *,
+    evaluated_by_user_id: Optional[int],
+    created_at: datetime,
+    source: str = "check",
+) -> dict[str, Any]:
+    """
+    An EligibilityResult row (as a dict, for bulk inserts) for `inputs`
+    (an EligibilityInput dump) and `outcome` from `CompiledRules.outcome`.
+    """
+    tier, is_eligible, recommendations = outcome
+    return {
+        "applicant_id": inputs["applicant_id"],
+        "input_payload": json.dumps(inputs),
+        "result_payload": json.dumps(
+            {
+                "is_eligible": is_eligible,
+                "tier": tier,
+                "recommendations": recommendations,
+                "rule_version": rule_version,
+                "source": source,
+                "evaluated_by_user_id": evaluated_by_user_id,
+                "created_at": created_at.isoformat(),
+            }
+        ),
+        "rule_version": rule_version,
+        "is_eligible": is_eligible,
+        "fingerprint": input_fingerprint(
+            inputs["applicant_id"],
+            inputs["gpa"],
+            inputs["toefl"],
+            inputs.get("study_destination"),
+            inputs.get("level_of_study"),
+            rule_version,
+        ),
+        "created_at": created_at,
+        "last_checked_at": created_at,
+    }
+
+
+def input_fingerprint(
+    applicant_id: int,
+    gpa: float,
+    toefl: float,
+    destination: Optional[str],
+    level: Optional[str],
+    rule_version: int,
+) -> str:
+    """
+    Key of one evaluation: the normalized inputs that decide the outcome
+    (GPA to two decimals, as EligibilityInput rounds it before evaluation;
+    whole TOEFL points; case-folded destination and level) and the rule
+    version. Notes do not take part.
+    """
+    normalized = f"{applicant_id}|{round(float(gpa), 2):.2f}|{int(toefl)}|{_key(destination)}|{_key(level)}|{rule_version}"
+    return hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+
+
+# Outcomes by fingerprint, so a repeated check skips the database entirely.
+# Fingerprints include the rule version, so entries never go stale.
+_result_cache: "OrderedDict[str, dict[str, Any]]" = OrderedDict()
+_result_lock = threading.Lock()
+
+
+def cached_result(fingerprint: str) -> Optional[dict[str, Any]]:
+    with _result_lock:
+        value = _result_cache.get(fingerprint)
+        if value is not None:
+            _result_cache.move_to_end(fingerprint)
+        return value
+
+
+def cache_result(fingerprint: str, result: dict[str, Any]) -> None:
+    with _result_lock:
+        _result_cache[fingerprint] = result
+        _result_cache.move_to_end(fingerprint)
+        while len(_result_cache) > settings.eligibility_cache_size:
+            _result_cache.popitem(last=False)
+
+
+def stored_result(session: Session, fingerprint: str) -> Optional[dict[str, Any]]:
+    """A persisted outcome for `fingerprint` (as cached), or None."""
+    row = session.exec(
+        select(EligibilityResult.result_payload, EligibilityResult.created_at).where(
+            EligibilityResult.fingerprint == fingerprint
+        )
+    ).first()
+    if row is None:
+        return None
+    payload = json.loads(row.result_payload)
+    return {
+        "tier": payload.get("tier"),
+        "is_eligible": payload["is_eligible"],
+        "recommendations": payload["recommendations"],
+        "rule_version": payload.get("rule_version"),
+        "created_at": row.created_at,
+    }
+
+
+def touch_results(session: Session, fingerprints: Sequence[str], checked_at: Optional[datetime] = None) -> None:
+    """
+    Record a repeated check of stored results: bump their last_checked_at so
+    each becomes its applicant's latest result again, and mark those
+    applicants' features stale. Does not commit.
+    """
+    if not fingerprints:
+        return
+    applicant_ids = session.execute(
+        update(EligibilityResult)
+        .where(EligibilityResult.fingerprint.in_(list(fingerprints)))
+        .values(last_checked_at=checked_at or datetime.utcnow())
+        .returning(EligibilityResult.applicant_id)
+    ).scalars().all()
+    mark_stale(session, applicant_ids)
+
+
+def store_results(session: Session, rows: list[dict[str, Any]]) -> set[str]:
+    """
+    Insert result rows (with `fingerprint`), in the caller's transaction.
+    Fingerprints already stored are not inserted again (ON CONFLICT DO
+    NOTHING) but touched, as a repeated check. Returns the fingerprints
+    actually inserted; affected applicants' features are marked stale.
+    Does not commit.
+    """
+    if not rows:
+        return set()
+    insert = insert_for(session)
+    inserted = set(
+        session.execute(
+            insert(EligibilityResult)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=["fingerprint"])
+            .returning(EligibilityResult.fingerprint)
+        ).scalars()
+    )
+    mark_stale(session, (row["applicant_id"] for row in rows if row["fingerprint"] in inserted))
+    touch_results(session, [row["fingerprint"] for row in rows if row["fingerprint"] not in inserted], rows[0]["created_at"])
+    return inserted
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Callable, Optional, Sequence
+
+from sqlalchemy import Row, func
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app.core.config import get_settings
+from app.models.applicant import Applicant
+from app.models.eligibility import EligibilityResult
+from app.services.checkpoints import clear_checkpoint, load_checkpoint, save_checkpoint
+from app.services.eligibility import CompiledRules, compile_rules, get_rules_document, result_row, store_results
+from app.services.features import latest_results
+from app.services.metrics import metrics
+from app.services.resilience import RateLimiter
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+CHECKPOINT_NAME = "eligibility_reevaluation"
+
+
+@dataclass
+class ReevaluationReport:
+    rule_version: int = 0
+    resumed: bool = False
+    completed: bool = False
+    total: int = 0  # applicants with at least one stored result
+    processed: int = 0
+    inserted: int = 0
+    changed: int = 0  # eligibility differs from the applicant's previous latest result
+    skipped: int = 0  # latest result already on this rule version, or unreadable inputs
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+# Rules compiled once per pool process (by the pool initializer).
+_worker_rules: Optional[CompiledRules] = None
+
+
+def _init_worker(rules: dict[str, Any], version: int) -> None:
+    global _worker_rules
+    _worker_rules = compile_rules(rules, version)
+
+
+def _evaluate_chunk(
+    gpa: Sequence[float], toefl: Sequence[float], destinations: Sequence[Optional[str]], levels: Sequence[Optional[str]]
+) -> list[int]:
+    return _worker_rules.evaluate(gpa, toefl, destinations, levels).tolist()
+
+
+def _latest_results(session: Session, after_applicant_id: int, limit: int) -> list[Row]:
+    """The latest checked result of the next `limit` applicants after `after_applicant_id`, in id order."""
+    applicant_ids = session.exec(
+        select(EligibilityResult.applicant_id)
+        .where(EligibilityResult.applicant_id > after_applicant_id)
+        .group_by(EligibilityResult.applicant_id)
+        .order_by(EligibilityResult.applicant_id)
+        .limit(limit)
+    ).all()
+    if not applicant_ids:
+        return []
+    latest = latest_results(applicant_ids)
+    return session.exec(
+        select(
+            latest.c.applicant_id,
+            EligibilityResult.input_payload,
+            EligibilityResult.result_payload,
+            EligibilityResult.rule_version,
+            Applicant.study_destination,
+            Applicant.level_of_study,
+        )
+        .join(EligibilityResult, EligibilityResult.id == latest.c.result_id)
+        .join(Applicant, Applicant.id == latest.c.applicant_id, isouter=True)
+        .order_by(latest.c.applicant_id)
+    ).all()
+
+
+def _inputs(row: Row) -> Optional[dict[str, Any]]:
+    """Stored inputs of a result, with destination and level filled from the profile for older rows."""
+    try:
+        inputs = json.loads(row.input_payload)
+        inputs["gpa"] = round(float(inputs["gpa"]), 2)  # as EligibilityInput does
+        inputs["toefl"] = int(inputs["toefl"])
+    except (ValueError, KeyError, TypeError):
+        return None
+    inputs["applicant_id"] = row.applicant_id
+    inputs["study_destination"] = inputs.get("study_destination") or row.study_destination
+    inputs["level_of_study"] = inputs.get("level_of_study") or row.level_of_study
+    return inputs
+
+
+class _Chunk:
+    def __init__(self, rows: list[Row], version: int) -> None:
+        self.last_applicant_id = rows[-1].applicant_id
+        self.inputs: list[dict[str, Any]] = []
+        self.previous: list[Optional[bool]] = []
+        self.skipped = 0
+        for row in rows:
+            inputs = _inputs(row) if row.rule_version != version else None
+            if inputs is None:
+                self.skipped += 1
+                continue
+            self.inputs.append(inputs)
+            self.previous.append(json.loads(row.result_payload).get("is_eligible"))
+        self.size = len(rows)
+
+    def submit(self, pool: ProcessPoolExecutor) -> Future:
+        return pool.submit(
+            _evaluate_chunk,
+            [i["gpa"] for i in self.inputs],
+            [i["toefl"] for i in self.inputs],
+            [i["study_destination"] for i in self.inputs],
+            [i["level_of_study"] for i in self.inputs],
+        )
+
+
+def reevaluate_eligibility(
+    engine: Engine,
+    *,
+    chunk_size: Optional[int] = None,
+    processes: Optional[int] = None,
+    rows_per_second: Optional[float] = None,
+    reset: bool = False,
+    progress: Optional[Callable[[ReevaluationReport], None]] = None,
+    stop: Optional[threading.Event] = None,
+) -> ReevaluationReport:
+    """
+    Re-score every applicant's latest stored inputs against the active rule set.
+
+    Applicants are streamed in id order, `chunk_size` at a time, and each
+    chunk is evaluated on a process pool (rules compiled once per process)
+    while earlier chunks are written, so reading, scoring and writing
+    overlap. Results are bulk inserted in chunk order, paced to
+    `rows_per_second` (0 for unthrottled) to leave the database headroom.
+
+    The position is checkpointed in the same commit as each chunk, so an
+    interrupted run (or `stop`) resumes after the last chunk written; a
+    checkpoint from an older rule version is discarded. `reset` starts over.
+    `progress` is called with the report after every chunk.
+    """
+    chunk_size = chunk_size or settings.eligibility_reevaluate_chunk_size
+    processes = processes or settings.eligibility_reevaluate_processes
+    rate = rows_per_second if rows_per_second is not None else settings.eligibility_reevaluate_rows_per_second
+    limiter = RateLimiter(rate, burst=max(rate, chunk_size), metric="eligibility.reevaluate_throttled_seconds")
+    stop = stop or threading.Event()
+
+    with Session(engine) as session:
+        version, rules, _ = get_rules_document(session)
+        compiled = compile_rules(rules, version)
+        report = ReevaluationReport(rule_version=version)
+        state = {} if reset else load_checkpoint(session, CHECKPOINT_NAME)
+        if state.get("rule_version") != version:
+            state = {}
+        report.resumed = bool(state)
+        state = state or {"rule_version": version, "after_applicant_id": 0}
+        for counter in ("processed", "inserted", "changed", "skipped"):
+            setattr(report, counter, state.get(counter, 0))
+        report.total = session.exec(select(func.count(func.distinct(EligibilityResult.applicant_id)))).one()
+        after = state["after_applicant_id"]
+
+        pool = ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(rules, version))
+        pending: deque[tuple[_Chunk, Future]] = deque()
+        exhausted = False
+        try:
+            while not stop.is_set():
+                # Keep the pool busy: a couple of chunks per process read ahead.
+                while not exhausted and len(pending) < 2 * processes:
+                    rows = _latest_results(session, after, chunk_size)
+                    if not rows:
+                        exhausted = True
+                        break
+                    chunk = _Chunk(rows, version)
+                    after = chunk.last_applicant_id
+                    pending.append((chunk, chunk.submit(pool)))
+                if not pending:
+                    break
+                chunk, future = pending.popleft()
+                started = time.perf_counter()
+                tiers = future.result()
+                metrics.histogram("eligibility.reevaluate_chunk_seconds").observe(time.perf_counter() - started)
+
+                created_at = datetime.utcnow()
+                rows = []
+                for inputs, previous, tier in zip(chunk.inputs, chunk.previous, tiers):
+                    outcome = compiled.outcome(tier)
+                    rows.append(
+                        result_row(
+                            inputs,
+                            version,
+                            outcome,
+                            evaluated_by_user_id=None,
+                            created_at=created_at,
+                            source="reevaluation",
+                        )
+                    )
+                    report.changed += previous is not None and previous != outcome[1]
+                limiter.acquire(len(rows))
+                report.inserted += len(store_results(session, rows))
+                report.processed += chunk.size
+                report.skipped += chunk.skipped
+                state.update(
+                    after_applicant_id=chunk.last_applicant_id,
+                    processed=report.processed,
+                    inserted=report.inserted,
+                    changed=report.changed,
+                    skipped=report.skipped,
+                )
+                save_checkpoint(session, CHECKPOINT_NAME, state)
+                session.commit()
+                metrics.counter("eligibility.reevaluated").inc(chunk.size)
+                if progress is not None:
+                    progress(report)
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+        if exhausted and not pending and not stop.is_set():
+            clear_checkpoint(session, CHECKPOINT_NAME)
+            session.commit()
+            report.completed = True
+    logger.info("Eligibility re-evaluation %s: %s", "finished" if report.completed else "stopped", report.as_dict())
+    return report
+
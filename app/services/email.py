@@ -1,6 +1,13 @@
 from __future__ import annotations
 
-from typing import Sequence
+import json
+import os
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional, Union
 
 import boto3
 from botocore.exceptions import BotoCoreError, ClientError
@@ -10,33 +17,159 @@ from app.core.config import get_settings
 
 settings = get_settings()
 
-ses_client = boto3.client("ses", region_name=settings.aws_region)
+# SES errors worth retrying later; anything else (rejected message,
+# unverified sender, suspended account, bad request) will fail the same
+# way again.
+TRANSIENT_SES_ERRORS = {
+    "Throttling",
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "LimitExceededException",
+    "ServiceUnavailable",
+    "InternalFailure",
+    "SendingPausedException",
+}
+TRANSIENT_BULK_STATUSES = {"ACCOUNT_THROTTLED", "ACCOUNT_DAILY_QUOTA_EXCEEDED", "ACCOUNT_SENDING_PAUSED", "TRANSIENT_FAILURE"}
 
 
-def send_email(
-    to_addresses: Sequence[str],
-    subject: str,
-    html_body: str,
-) -> None:
+@dataclass
+class EmailEnvelope:
+    """One queued message as handed to a transport (detached from the session)."""
+
+    id: int
+    to_address: str
+    subject: str
+    html_body: str
+    text_body: Optional[str] = None
+
+    @property
+    def content_key(self) -> tuple[str, str, Optional[str]]:
+        return (self.subject, self.html_body, self.text_body)
+
+
+@dataclass
+class SendResult:
+    ok: bool
+    message_id: Optional[str] = None
+    error: Optional[str] = None
+    transient: bool = False
+
+
+class EmailTransport(ABC):
     """
-    Send a simple HTML email via AWS SES.
+    Delivers envelopes to a provider. `send` receives one batch from
+    `batches` and returns one result per envelope, in order; it must not
+    raise for per-message failures.
+    """
+
+    max_batch = 1  # recipients per provider call
 
-    In production you may want templated emails and richer error handling.
+    def batches(self, envelopes: list[EmailEnvelope]) -> list[list[EmailEnvelope]]:
+        """Group identical content (same subject and bodies) into bulk-sized batches."""
+        groups: dict[tuple, list[EmailEnvelope]] = {}
+        for envelope in envelopes:
+            groups.setdefault(envelope.content_key, []).append(envelope)
+        return [group[i : i + self.max_batch] for group in groups.values() for i in range(0, len(group), self.max_batch)]
+
+    @abstractmethod
+    def send(self, envelopes: list[EmailEnvelope]) -> list[SendResult]:
+        ...
+
+
+class SESTransport(EmailTransport):
     """
-    if not settings.ses_from_email:
-        # Misconfigured; in early dev we just no-op.
-        return
-
-    try:
-        ses_client.send_email(
-            Source=settings.ses_from_email,
-            Destination={"ToAddresses": list(to_addresses)},
-            Message={
-                "Subject": {"Data": subject},
-                "Body": {"Html": {"Data": html_body}},
-            },
+    SES v2. Batches of one go through SendEmail; identical content for
+    several recipients goes through SendBulkEmail (one call, up to 50
+    destinations) with the content as an inline template.
+    """
+
+    max_batch = 50
+
+    def __init__(self, client: Any = None, from_address: Optional[str] = None) -> None:
+        self.client = client or boto3.client("sesv2", region_name=settings.aws_region)
+        self.from_address = from_address or settings.ses_from_email
+
+    def batches(self, envelopes: list[EmailEnvelope]) -> list[list[EmailEnvelope]]:
+        # Inline templates treat "{{" as a placeholder; such content goes one by one.
+        braces = [("{{" in e.subject + e.html_body + (e.text_body or "")) for e in envelopes]
+        plain = [e for e, b in zip(envelopes, braces) if not b]
+        return super().batches(plain) + [[e] for e, b in zip(envelopes, braces) if b]
+
+    def send(self, envelopes: list[EmailEnvelope]) -> list[SendResult]:
+        try:
+            if len(envelopes) == 1:
+                return [self._send_one(envelopes[0])]
+            return self._send_bulk(envelopes)
+        except ClientError as exc:
+            code = exc.response.get("Error", {}).get("Code", "")
+            result = SendResult(ok=False, error=f"{code}: {exc}"[:500], transient=code in TRANSIENT_SES_ERRORS)
+        except BotoCoreError as exc:  # connection errors, timeouts
+            result = SendResult(ok=False, error=f"{type(exc).__name__}: {exc}"[:500], transient=True)
+        return [result] * len(envelopes)
+
+    def _send_one(self, envelope: EmailEnvelope) -> SendResult:
+        body = {"Html": {"Data": envelope.html_body}}
+        if envelope.text_body:
+            body["Text"] = {"Data": envelope.text_body}
+        response = self.client.send_email(
+            FromEmailAddress=self.from_address,
+            Destination={"ToAddresses": [envelope.to_address]},
+            Content={"Simple": {"Subject": {"Data": envelope.subject}, "Body": body}},
+        )
+        return SendResult(ok=True, message_id=response.get("MessageId"))
+
+    def _send_bulk(self, envelopes: list[EmailEnvelope]) -> list[SendResult]:
+        first = envelopes[0]
+        template = {"Subject": first.subject, "Html": first.html_body}
+        if first.text_body:
+            template["Text"] = first.text_body
+        response = self.client.send_bulk_email(
+            FromEmailAddress=self.from_address,
+            DefaultContent={"Template": {"TemplateContent": template, "TemplateData": "{}"}},
+            BulkEmailEntries=[{"Destination": {"ToAddresses": [e.to_address]}} for e in envelopes],
         )
-    except (BotoCoreError, ClientError):
-        # TODO: add logging/monitoring
-        return
+        results = []
+        for entry in response["BulkEmailEntryResults"]:
+            if entry["Status"] == "SUCCESS":
+                results.append(SendResult(ok=True, message_id=entry.get("MessageId")))
+            else:
+                error = f"{entry['Status']}: {entry.get('Error', '')}"[:500]
+                results.append(SendResult(ok=False, error=error, transient=entry["Status"] in TRANSIENT_BULK_STATUSES))
+        return results
+
 
+class FileTransport(EmailTransport):
+    """
+    Local sink for development and tests: each delivered message becomes a
+    JSON file in `directory` (named by its message id).
+    """
+
+    max_batch = 100
+
+    def __init__(self, directory: Union[str, Path]) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def send(self, envelopes: list[EmailEnvelope]) -> list[SendResult]:
+        results = []
+        for envelope in envelopes:
+            message_id = f"{envelope.id}-{uuid.uuid4().hex[:12]}"
+            tmp = self.directory / f".{message_id}.tmp"
+            tmp.write_text(json.dumps({**asdict(envelope), "sent_at": datetime.utcnow().isoformat()}))
+            os.replace(tmp, self.directory / f"{message_id}.json")
+            results.append(SendResult(ok=True, message_id=message_id))
+        return results
+
+    def messages(self) -> list[dict]:
+        """Delivered messages, oldest first."""
+        paths = sorted(self.directory.glob("*.json"), key=lambda p: (p.stat().st_mtime_ns, p.name))
+        return [json.loads(p.read_text()) for p in paths]
+
+
+def get_email_transport() -> EmailTransport:
+    """Transport selected by EMAIL_BACKEND: `ses` or `file` (EMAIL_FILE_DIR)."""
+    if settings.email_backend == "file":
+        return FileTransport(settings.email_file_dir)
+    if not settings.ses_from_email:
+        raise RuntimeError("SES_FROM_EMAIL must be set to send email through SES")
+    return SESTransport()
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Optional, Sequence
+
+from sqlalchemy import or_, update
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app.core.config import get_settings
+from app.models.email import OutboundEmail
+from app.services.email import EmailEnvelope, EmailTransport, SendResult
+from app.services.metrics import metrics
+from app.services.resilience import RateLimiter, RetryPolicy
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def enqueue_email(
+    session: Session,
+    to_addresses: Sequence[str],
+    subject: str,
+    html_body: str,
+    text_body: Optional[str] = None,
+    *,
+    dedupe_key: Optional[str] = None,
+) -> int:
+    """
+    Queue one message per recipient in the caller's transaction. Does not
+    commit, so the email goes out only if the surrounding change does.
+
+    With `dedupe_key`, recipients already queued under that key are skipped.
+    Returns the number of messages queued.
+    """
+    addresses = list(dict.fromkeys(a.strip() for a in to_addresses if a and a.strip()))
+    keys = {a: f"{dedupe_key}:{a.lower()}" if dedupe_key else None for a in addresses}
+    if dedupe_key and addresses:
+        queued = set(session.exec(select(OutboundEmail.dedupe_key).where(OutboundEmail.dedupe_key.in_(keys.values()))).all())
+        addresses = [a for a in addresses if keys[a] not in queued]
+    session.add_all(
+        OutboundEmail(to_address=a, subject=subject, html_body=html_body, text_body=text_body, dedupe_key=keys[a])
+        for a in addresses
+    )
+    metrics.counter("email.queued").inc(len(addresses))
+    return len(addresses)
+
+
+def claim_due(session: Session, limit: int, lease_seconds: int) -> list[tuple[EmailEnvelope, int]]:
+    """Claim queued messages that are due (and expired leases), oldest first: (envelope, attempts)."""
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=lease_seconds)
+    rows = session.exec(
+        select(OutboundEmail)
+        .where(
+            or_(
+                (OutboundEmail.status == "queued") & (OutboundEmail.next_attempt_at <= now),
+                (OutboundEmail.status == "sending") & (OutboundEmail.claimed_at < stale),
+            )
+        )
+        .order_by(OutboundEmail.next_attempt_at, OutboundEmail.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).all()
+    claimed = []
+    for row in rows:
+        row.status = "sending"
+        row.claimed_at = now
+        row.attempts = (row.attempts or 0) + 1
+        session.add(row)
+        claimed.append((EmailEnvelope(row.id, row.to_address, row.subject, row.html_body, row.text_body), row.attempts))
+    session.commit()
+    return claimed
+
+
+def _send_batch(transport: EmailTransport, limiter: RateLimiter, batch: list[EmailEnvelope]) -> list[SendResult]:
+    limiter.acquire(len(batch))  # providers meter recipients, not calls
+    with metrics.timer("email.send_seconds"):
+        results = transport.send(batch)
+    if len(results) != len(batch):
+        raise RuntimeError(f"transport returned {len(results)} results for {len(batch)} messages")
+    return results
+
+
+def deliver_due(
+    engine: Engine,
+    transport: EmailTransport,
+    pool: ThreadPoolExecutor,
+    limiter: RateLimiter,
+    *,
+    batch_size: Optional[int] = None,
+    max_attempts: Optional[int] = None,
+    backoff: Optional[RetryPolicy] = None,
+) -> int:
+    """
+    Claim one batch of due messages, send it as provider-sized batches on
+    `pool`, and record every outcome in one bulk update. Transient failures
+    are rescheduled with jittered exponential backoff; permanent failures
+    and messages out of attempts are dead-lettered. Returns the number claimed.
+    """
+    batch_size = batch_size or settings.email_batch_size
+    max_attempts = max_attempts or settings.email_max_attempts
+    backoff = backoff or RetryPolicy(base_delay=settings.email_retry_base_seconds, max_delay=settings.email_retry_max_seconds)
+    with Session(engine) as session:
+        claimed = claim_due(session, batch_size, settings.email_lease_seconds)
+    if not claimed:
+        return 0
+    attempts = {envelope.id: count for envelope, count in claimed}
+
+    batches = transport.batches([envelope for envelope, _ in claimed])
+    futures = [(batch, pool.submit(_send_batch, transport, limiter, batch)) for batch in batches]
+    now = datetime.utcnow()
+    updates = []
+    for batch, future in futures:
+        try:
+            results = future.result()
+        except Exception as exc:
+            logger.exception("Email transport failed for %d messages", len(batch))
+            results = [SendResult(ok=False, error=f"{type(exc).__name__}: {exc}"[:500], transient=True)] * len(batch)
+        for envelope, result in zip(batch, results):
+            if result.ok:
+                change = {"status": "sent", "sent_at": now, "provider_message_id": result.message_id, "last_error": None}
+            elif result.transient and attempts[envelope.id] < max_attempts:
+                retry_at = now + timedelta(seconds=backoff.delay(attempts[envelope.id]))
+                change = {"status": "queued", "next_attempt_at": retry_at, "last_error": result.error}
+            else:
+                change = {"status": "dead", "last_error": result.error}
+                logger.warning("Email %s to %s dead-lettered: %s", envelope.id, envelope.to_address, result.error)
+            metrics.counter(f"email.{'retried' if change['status'] == 'queued' else change['status']}").inc()
+            updates.append({"id": envelope.id, "claimed_at": None, **change})
+
+    with Session(engine) as session:
+        for status in ("sent", "queued", "dead"):  # bulk UPDATE by primary key needs uniform keys
+            rows = [u for u in updates if u["status"] == status]
+            if rows:
+                session.execute(update(OutboundEmail), rows)
+        session.commit()
+    return len(claimed)
+
+
+def requeue_dead(session: Session, ids: Optional[Sequence[int]] = None) -> int:
+    """Give dead-lettered messages (all, or `ids`) a fresh set of attempts. Commits."""
+    query = update(OutboundEmail).where(OutboundEmail.status == "dead")
+    if ids is not None:
+        query = query.where(OutboundEmail.id.in_(list(ids)))
+    result = session.exec(
+        query.values(status="queued", attempts=0, next_attempt_at=datetime.utcnow()).execution_options(synchronize_session=False)
+    )
+    session.commit()
+    return result.rowcount
+
+
+def run_email_worker(
+    engine: Engine,
+    transport: EmailTransport,
+    *,
+    concurrency: Optional[int] = None,
+    rate_per_second: Optional[float] = None,
+    batch_size: Optional[int] = None,
+    periodic: Optional[Callable[[Engine], None]] = None,
+    periodic_interval: Optional[float] = None,
+    poll_interval: float = 2.0,
+    once: bool = False,
+    stop: Optional[threading.Event] = None,
+) -> int:
+    """
+    Deliver the outbox until stopped: at most `concurrency` provider calls in
+    flight, paced to `rate_per_second` recipients. `periodic` (e.g. digests
+    and reminders) runs every `periodic_interval` seconds before delivery.
+    Returns messages handled.
+    """
+    concurrency = concurrency or settings.email_concurrency
+    rate = rate_per_second if rate_per_second is not None else settings.email_rate_per_second
+    periodic_interval = periodic_interval if periodic_interval is not None else settings.email_digest_check_seconds
+    limiter = RateLimiter(rate, metric="email.rate_limited_seconds")
+    stop = stop or threading.Event()
+    handled = 0
+    next_periodic = 0.0
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="email") as pool:
+        while not stop.is_set():
+            if periodic is not None and time.monotonic() >= next_periodic:
+                try:
+                    periodic(engine)
+                except Exception:
+                    logger.exception("Periodic email work failed")
+                next_periodic = time.monotonic() + periodic_interval
+            count = deliver_due(engine, transport, pool, limiter, batch_size=batch_size)
+            handled += count
+            if not count:
+                if once:
+                    break
+                stop.wait(poll_interval)
+    return handled
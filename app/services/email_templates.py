@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import html
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from mako.lookup import TemplateLookup
+from mako.template import Template
+
+from app.core.config import get_settings
+from app.services.metrics import metrics
+
+
+settings = get_settings()
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "email_templates"
+
+
+def format_money(amount_cents: int, currency: str) -> str:
+    return f"{amount_cents / 100:,.2f} {currency.upper()}"
+
+
+@dataclass
+class RenderedEmail:
+    subject: str
+    html_body: str
+
+
+class EmailTemplates:
+    """
+    Registry of email templates (Mako, in app/email_templates).
+
+    Each template is compiled to Python once, on first use (or by `warm`),
+    and kept by the lookup along with the layout and partials it inherits
+    or imports, so rendering never re-parses anything. Expressions are
+    HTML-escaped by default and unknown names raise, rather than rendering
+    blanks. Every template defines a `subject()`; files starting with `_`
+    are layouts and partials.
+    """
+
+    def __init__(self, directory: Union[str, Path] = TEMPLATE_DIR, *, reload: Optional[bool] = None) -> None:
+        self.directory = Path(directory)
+        self.lookup = TemplateLookup(
+            directories=[str(self.directory)],
+            default_filters=["h"],
+            strict_undefined=True,
+            input_encoding="utf-8",
+            # Without reload, a compiled template is never re-checked on disk.
+            filesystem_checks=settings.email_template_reload if reload is None else reload,
+        )
+
+    def get(self, name: str) -> Template:
+        return self.lookup.get_template(f"{name}.html")
+
+    def names(self) -> list[str]:
+        return sorted(p.stem for p in self.directory.glob("*.html") if not p.name.startswith("_"))
+
+    def warm(self) -> int:
+        """Compile every template (and its partials) up front. Returns the count."""
+        names = self.names()
+        for name in names:
+            self.get(name)
+        return len(names)
+
+    def render(self, template_name: str, /, **context: Any) -> RenderedEmail:
+        template = self.get(template_name)
+        context.setdefault("money", format_money)
+        started = time.perf_counter()
+        # The subject is plain text: undo the HTML escaping applied to its expressions.
+        subject = html.unescape(" ".join(template.get_def("subject").render(**context).split()))
+        body = template.render(**context)
+        metrics.histogram("email.render_seconds").observe(time.perf_counter() - started)
+        return RenderedEmail(subject=subject, html_body=body)
+
+
+_templates: Optional[EmailTemplates] = None
+
+
+def get_email_templates() -> EmailTemplates:
+    global _templates
+    if _templates is None:
+        _templates = EmailTemplates()
+    return _templates
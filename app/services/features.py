@@ -0,0 +1,350 @@
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Iterable, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import case, event, func, inspect, or_
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import Subquery
+from sqlmodel import Session, select
+
+from app.core.config import get_settings
+from app.db.upsert import insert_for
+from app.models.applicant import Applicant
+from app.models.document import Document, DocumentBundle
+from app.models.eligibility import EligibilityResult
+from app.models.feature import ApplicantFeatures
+from app.models.review import ApplicantReview
+from app.services.metrics import metrics
+from app.services.recommendation import parse_budget
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Bump FEATURE_SCHEMA_VERSION whenever FEATURE_NAMES or their meaning change;
+# rows on another version are recomputed before they are read.
+FEATURE_SCHEMA_VERSION = 2
+FEATURE_NAMES = (
+    "gpa",  # latest eligibility check inputs (NaN before the first check)
+    "toefl",
+    "is_eligible",
+    "eligibility_checks",
+    "destination_usa",
+    "destination_canada",
+    "level_freshman",
+    "level_continuing_undergrad",
+    "level_graduate",
+    "budget_usd",  # NaN when unknown
+    "status_accepted",
+    "reviews_positive",
+    "reviews_negative",
+    "documents",  # completed uploads
+    "document_bytes",
+)
+DTYPE = np.dtype("<f4")
+_INDEX = {name: i for i, name in enumerate(FEATURE_NAMES)}
+_IN_CHUNK = 500  # ids per IN (...) list
+
+
+@dataclass
+class FeatureMatrix:
+    """Features of several applicants: row i of `values` belongs to `applicant_ids[i]`."""
+
+    applicant_ids: np.ndarray  # int64
+    values: np.ndarray  # float32, C-contiguous (applicants, features)
+    names: tuple[str, ...] = FEATURE_NAMES
+
+    def column(self, name: str) -> np.ndarray:
+        return self.values[:, _INDEX[name]]
+
+
+def _chunks(ids: Sequence[int]) -> Iterable[list[int]]:
+    for i in range(0, len(ids), _IN_CHUNK):
+        yield list(ids[i : i + _IN_CHUNK])
+
+
+def _mark(connection: Connection, applicant_ids: Iterable[int]) -> None:
+    ids = sorted({i for i in applicant_ids if i is not None})
+    if not ids:
+        return
+    now = datetime.utcnow()
+    insert = insert_for(connection)
+    for chunk in _chunks(ids):
+        statement = insert(ApplicantFeatures).values([{"applicant_id": i, "stale": True, "marked_at": now} for i in chunk])
+        connection.execute(
+            statement.on_conflict_do_update(index_elements=["applicant_id"], set_={"stale": True, "marked_at": now})
+        )
+    metrics.counter("features.marked_stale").inc(len(ids))
+
+
+def mark_stale(session: Session, applicant_ids: Iterable[int]) -> None:
+    """
+    Flag applicants' features for recomputation, in the caller's transaction.
+    Needed only after bulk (Core) statements on the source tables; ORM
+    changes are tracked by `track_feature_changes`.
+    """
+    _mark(session.connection(), applicant_ids)
+
+
+# Columns whose changes alter an existing row's features.
+_APPLICANT_COLUMNS = ("study_destination", "level_of_study", "annual_budget", "status")
+_DOCUMENT_COLUMNS = ("bundle_id", "size_bytes")
+
+
+def _changed(obj: Any, columns: Sequence[str]) -> bool:
+    attrs = inspect(obj).attrs
+    return any(attrs[name].history.has_changes() for name in columns)
+
+
+def _after_flush(session: Session, flush_context: Any) -> None:
+    applicant_ids: set[int] = set()
+    bundle_ids: set[int] = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Applicant):
+            if obj in session.new or (obj in session.dirty and _changed(obj, _APPLICANT_COLUMNS)):
+                applicant_ids.add(obj.id)
+        elif isinstance(obj, (EligibilityResult, ApplicantReview, DocumentBundle)):
+            applicant_ids.add(obj.applicant_id)
+            if obj in session.dirty and _changed(obj, ("applicant_id",)):
+                applicant_ids.update(inspect(obj).attrs.applicant_id.history.deleted)
+        elif isinstance(obj, Document):
+            if obj not in session.dirty or _changed(obj, _DOCUMENT_COLUMNS):
+                bundle_ids.add(obj.bundle_id)
+                bundle_ids.update(inspect(obj).attrs.bundle_id.history.deleted)
+    if not applicant_ids and not bundle_ids:
+        return
+    connection = session.connection()
+    if bundle_ids:
+        applicant_ids.update(
+            connection.execute(
+                select(DocumentBundle.applicant_id).where(DocumentBundle.id.in_([i for i in bundle_ids if i is not None]))
+            ).scalars()
+        )
+    _mark(connection, applicant_ids)
+
+
+def track_feature_changes(session_class: type = Session) -> None:
+    """
+    Mark features stale whenever a flush touches an applicant or its results,
+    reviews or documents. Called at API startup and by the scripts that write
+    those rows; other processes skip the extra upsert.
+    """
+    if not event.contains(session_class, "after_flush", _after_flush):
+        event.listen(session_class, "after_flush", _after_flush)
+
+
+def untrack_feature_changes(session_class: type = Session) -> None:
+    if event.contains(session_class, "after_flush", _after_flush):
+        event.remove(session_class, "after_flush", _after_flush)
+
+
+def latest_results(applicant_ids: Sequence[int]) -> Subquery:
+    """
+    (applicant_id, result_id, checks) for each of `applicant_ids` with a
+    stored eligibility result: the result checked most recently (repeated
+    checks reuse rows, so this is not the newest id) and the row count.
+    """
+    ranked = (
+        select(
+            EligibilityResult.applicant_id,
+            EligibilityResult.id.label("result_id"),
+            func.row_number()
+            .over(
+                partition_by=EligibilityResult.applicant_id,
+                order_by=(EligibilityResult.last_checked_at.desc(), EligibilityResult.id.desc()),
+            )
+            .label("rank"),
+            func.count().over(partition_by=EligibilityResult.applicant_id).label("checks"),
+        )
+        .where(EligibilityResult.applicant_id.in_(applicant_ids))
+        .subquery()
+    )
+    return select(ranked.c.applicant_id, ranked.c.result_id, ranked.c.checks).where(ranked.c.rank == 1).subquery()
+
+
+def compute_features(session: Session, applicant_ids: Sequence[int]) -> dict[int, np.ndarray]:
+    """Feature vectors of existing applicants among `applicant_ids`, from the source tables (grouped queries)."""
+    vectors: dict[int, np.ndarray] = {}
+    for chunk in _chunks(list(applicant_ids)):
+        for row in session.exec(
+            select(
+                Applicant.id, Applicant.study_destination, Applicant.level_of_study, Applicant.annual_budget, Applicant.status
+            ).where(Applicant.id.in_(chunk))
+        ).all():
+            vector = np.full(len(FEATURE_NAMES), np.nan, dtype=DTYPE)
+            destination, level = (row.study_destination or "").lower(), (row.level_of_study or "").lower()
+            vector[_INDEX["destination_usa"]] = destination == "usa"
+            vector[_INDEX["destination_canada"]] = destination == "canada"
+            for name in ("freshman", "continuing_undergrad", "graduate"):
+                vector[_INDEX[f"level_{name}"]] = level == name
+            budget = parse_budget(row.annual_budget)
+            vector[_INDEX["budget_usd"]] = budget if np.isfinite(budget) else np.nan
+            vector[_INDEX["status_accepted"]] = row.status == "accepted"
+            for name in ("eligibility_checks", "reviews_positive", "reviews_negative", "documents", "document_bytes"):
+                vector[_INDEX[name]] = 0
+            vectors[row.id] = vector
+        if not vectors:
+            continue
+
+        latest = latest_results(chunk)
+        for row in session.exec(
+            select(latest.c.applicant_id, latest.c.checks, EligibilityResult.input_payload, EligibilityResult.result_payload)
+            .join(EligibilityResult, EligibilityResult.id == latest.c.result_id)
+        ).all():
+            vector = vectors.get(row.applicant_id)
+            if vector is None:
+                continue
+            inputs, result = json.loads(row.input_payload), json.loads(row.result_payload)
+            vector[_INDEX["gpa"]] = inputs.get("gpa", np.nan)
+            vector[_INDEX["toefl"]] = inputs.get("toefl", np.nan)
+            vector[_INDEX["is_eligible"]] = result.get("is_eligible", np.nan)
+            vector[_INDEX["eligibility_checks"]] = row.checks
+
+        for row in session.exec(
+            select(
+                ApplicantReview.applicant_id,
+                func.sum(case((ApplicantReview.positive, 1), else_=0)).label("positive"),
+                func.sum(case((ApplicantReview.positive, 0), else_=1)).label("negative"),
+            )
+            .where(ApplicantReview.applicant_id.in_(chunk))
+            .group_by(ApplicantReview.applicant_id)
+        ).all():
+            if row.applicant_id in vectors:
+                vectors[row.applicant_id][_INDEX["reviews_positive"]] = row.positive
+                vectors[row.applicant_id][_INDEX["reviews_negative"]] = row.negative
+
+        for row in session.exec(
+            select(
+                DocumentBundle.applicant_id,
+                func.count(Document.id).label("documents"),
+                func.coalesce(func.sum(Document.size_bytes), 0).label("size"),
+            )
+            .join(Document, Document.bundle_id == DocumentBundle.id)
+            .where(DocumentBundle.applicant_id.in_(chunk), Document.size_bytes.is_not(None))  # completed uploads
+            .group_by(DocumentBundle.applicant_id)
+        ).all():
+            if row.applicant_id in vectors:
+                vectors[row.applicant_id][_INDEX["documents"]] = row.documents
+                vectors[row.applicant_id][_INDEX["document_bytes"]] = row.size
+    return vectors
+
+
+def refresh_features(session: Session, applicant_ids: Sequence[int]) -> int:
+    """
+    Recompute and store the features of `applicant_ids`, in the caller's
+    transaction (does not commit). A row marked stale again while this ran
+    (a concurrent change) stays stale. Rows of applicants that no longer
+    exist are removed. Returns the number of rows written.
+    """
+    if not applicant_ids:
+        return 0
+    started = datetime.utcnow()
+    with metrics.timer("features.refresh_seconds"):
+        vectors = compute_features(session, applicant_ids)
+        gone = set(applicant_ids) - vectors.keys()
+        if gone:
+            session.exec(
+                ApplicantFeatures.__table__.delete().where(ApplicantFeatures.applicant_id.in_(list(gone)))
+            )
+        if not vectors:
+            return 0
+        insert = insert_for(session)
+        table = ApplicantFeatures.__table__
+        for chunk in _chunks(sorted(vectors)):
+            statement = insert(ApplicantFeatures).values(
+                [
+                    {
+                        "applicant_id": applicant_id,
+                        "schema_version": FEATURE_SCHEMA_VERSION,
+                        "vector": vectors[applicant_id].tobytes(),
+                        "stale": False,
+                        "marked_at": started,
+                        "updated_at": started,
+                    }
+                    for applicant_id in chunk
+                ]
+            )
+            session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=["applicant_id"],
+                    set_={
+                        "schema_version": statement.excluded.schema_version,
+                        "vector": statement.excluded.vector,
+                        "updated_at": statement.excluded.updated_at,
+                        "stale": table.c.marked_at > started,
+                    },
+                )
+            )
+    metrics.counter("features.refreshed").inc(len(vectors))
+    return len(vectors)
+
+
+def _needs_refresh():
+    return or_(ApplicantFeatures.stale.is_(True), ApplicantFeatures.schema_version != FEATURE_SCHEMA_VERSION)
+
+
+def mark_all_stale(session: Session) -> int:
+    """Flag every stored row for recomputation (after a feature definition change). Does not commit."""
+    return session.exec(ApplicantFeatures.__table__.update().values(stale=True, marked_at=datetime.utcnow())).rowcount
+
+
+def refresh_stale(session: Session, limit: Optional[int] = None) -> int:
+    """
+    Recompute up to `limit` stale or outdated rows, plus applicants that
+    have no row yet. Commits. Returns the number of applicants handled
+    (0 once nothing is left).
+    """
+    limit = limit or settings.feature_refresh_batch_size
+    ids = session.exec(select(ApplicantFeatures.applicant_id).where(_needs_refresh()).limit(limit)).all()
+    if len(ids) < limit:
+        ids += session.exec(
+            select(Applicant.id)
+            .outerjoin(ApplicantFeatures, ApplicantFeatures.applicant_id == Applicant.id)
+            .where(ApplicantFeatures.applicant_id.is_(None))
+            .order_by(Applicant.id)
+            .limit(limit - len(ids))
+        ).all()
+    refresh_features(session, ids)
+    session.commit()
+    return len(ids)
+
+
+def load_features(session: Session, applicant_ids: Sequence[int], *, refresh: bool = True) -> FeatureMatrix:
+    """
+    Features of `applicant_ids` as one contiguous float32 matrix, in the
+    order requested (unknown applicants are left out; see `applicant_ids`
+    of the result). One indexed read of the feature table; with `refresh`,
+    missing, stale or outdated rows are recomputed first (and committed).
+    """
+    requested = list(dict.fromkeys(applicant_ids))
+    rows: dict[int, tuple[int, bool, bytes]] = {}
+    for chunk in _chunks(requested):
+        for row in session.exec(
+            select(
+                ApplicantFeatures.applicant_id,
+                ApplicantFeatures.schema_version,
+                ApplicantFeatures.stale,
+                ApplicantFeatures.vector,
+            ).where(ApplicantFeatures.applicant_id.in_(chunk))
+        ).all():
+            rows[row.applicant_id] = (row.schema_version, row.stale, row.vector)
+
+    if refresh:
+        outdated = [i for i in requested if i not in rows or rows[i][1] or rows[i][0] != FEATURE_SCHEMA_VERSION]
+        if outdated:
+            metrics.counter("features.read_refreshed").inc(len(outdated))
+            refresh_features(session, outdated)
+            session.commit()
+            return load_features(session, requested, refresh=False)
+
+    present = [i for i in requested if i in rows and rows[i][0] == FEATURE_SCHEMA_VERSION]
+    values = np.empty((len(present), len(FEATURE_NAMES)), dtype=np.float32)
+    for i, applicant_id in enumerate(present):
+        values[i] = np.frombuffer(rows[applicant_id][2], dtype=DTYPE)
+    metrics.counter("features.rows_read").inc(len(present))
+    return FeatureMatrix(applicant_ids=np.array(present, dtype=np.int64), values=values)
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import json
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import func, update
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app.core.config import get_settings
+from app.models.email import EmailNotification
+from app.models.task import Task
+from app.models.user import User
+from app.services.email_outbox import enqueue_email
+from app.services.email_templates import get_email_templates
+from app.services.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Digest section order and headings; each kind is also a template and an item partial.
+KINDS = {
+    "payment_receipt": "Payments",
+    "new_message": "Messages",
+    "task_reminder": "Task reminders",
+}
+# How long a user's pending notifications may wait before their digest goes
+# out. Users who switch back to immediate get what is pending on the next pass.
+DIGEST_WINDOWS = {
+    "immediate": timedelta(0),
+    "hourly": timedelta(hours=1),
+    "daily": timedelta(days=1),
+}
+
+
+def _display_name(user: User) -> str:
+    return user.full_name or user.email
+
+
+def notify(
+    session: Session,
+    user: User,
+    kind: str,
+    item: dict[str, Any],
+    *,
+    dedupe_key: Optional[str] = None,
+) -> None:
+    """
+    Notify `user` by email, in the caller's transaction (does not commit).
+
+    Users on immediate delivery get the `kind` template queued right away;
+    for digest users the notification is held and folded into their next
+    digest. `item` is the template context for the notification (JSON).
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown notification kind: {kind}")
+    if not user.email:
+        return
+    if user.email_digest == "immediate":
+        email = get_email_templates().render(kind, name=_display_name(user), item=item)
+        enqueue_email(session, [user.email], email.subject, email.html_body, dedupe_key=dedupe_key)
+        return
+    if dedupe_key and session.exec(select(EmailNotification.id).where(EmailNotification.dedupe_key == dedupe_key)).first():
+        return
+    session.add(EmailNotification(user_id=user.id, kind=kind, context=json.dumps(item), dedupe_key=dedupe_key))
+    metrics.counter("email.notifications.held").inc()
+
+
+def _digest_due_users(session: Session, now: datetime, limit: int) -> list[int]:
+    due = []
+    for mode, window in DIGEST_WINDOWS.items():
+        due += session.exec(
+            select(EmailNotification.user_id)
+            .join(User, User.id == EmailNotification.user_id)
+            .where(EmailNotification.status == "pending", User.email_digest == mode)
+            .group_by(EmailNotification.user_id)
+            .having(func.min(EmailNotification.created_at) <= now - window)
+            .limit(limit - len(due))
+        ).all()
+        if len(due) >= limit:
+            break
+    return due
+
+
+def send_due_digests(engine: Engine, *, now: Optional[datetime] = None, limit: int = 100) -> int:
+    """
+    Collapse each due user's pending notifications into one email (one
+    notification is sent with its own template). The email is queued and
+    the notifications marked sent in one commit. Returns emails queued.
+    """
+    now = now or datetime.utcnow()
+    templates = get_email_templates()
+    queued = 0
+    with Session(engine) as session:
+        for user_id in _digest_due_users(session, now, limit):
+            user = session.get(User, user_id)
+            pending = session.exec(
+                select(EmailNotification)
+                .where(EmailNotification.user_id == user_id, EmailNotification.status == "pending")
+                .order_by(EmailNotification.id)
+                .with_for_update(skip_locked=True)
+            ).all()
+            if not pending:
+                continue
+            items = [json.loads(n.context) for n in pending]
+            if len(pending) == 1:
+                email = templates.render(pending[0].kind, name=_display_name(user), item=items[0])
+            else:
+                grouped: dict[str, list[dict]] = defaultdict(list)
+                for notification, item in zip(pending, items):
+                    grouped[notification.kind].append(item)
+                groups = [(kind, heading, grouped[kind]) for kind, heading in KINDS.items() if grouped[kind]]
+                email = templates.render("digest", name=_display_name(user), groups=groups, count=len(pending))
+            enqueue_email(session, [user.email], email.subject, email.html_body, dedupe_key=f"digest-{user_id}-{pending[-1].id}")
+            session.execute(
+                update(EmailNotification)
+                .where(EmailNotification.id.in_([n.id for n in pending]))
+                .values(status="sent", sent_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+            queued += 1
+            metrics.counter("email.digests").inc()
+            metrics.counter("email.digest_notifications").inc(len(pending))
+    return queued
+
+
+def queue_task_reminders(engine: Engine, *, now: Optional[datetime] = None, horizon: Optional[timedelta] = None) -> int:
+    """Notify assignees of open tasks due within `horizon`, once per task. Returns reminders sent."""
+    now = now or datetime.utcnow()
+    horizon = horizon if horizon is not None else timedelta(hours=settings.task_reminder_hours)
+    with Session(engine) as session:
+        tasks = session.exec(
+            select(Task)
+            .where(
+                Task.status.in_(["pending", "in_progress"]),
+                Task.assignee_id.is_not(None),
+                Task.reminder_sent_at.is_(None),
+                Task.due_at > now,
+                Task.due_at <= now + horizon,
+            )
+            .order_by(Task.due_at)
+            .limit(500)
+            .with_for_update(skip_locked=True)
+        ).all()
+        users = {u.id: u for u in session.exec(select(User).where(User.id.in_({t.assignee_id for t in tasks}))).all()} if tasks else {}
+        for task in tasks:
+            user = users.get(task.assignee_id)
+            if user is not None and user.is_active:
+                item = {"task_id": task.id, "title": task.title, "due_at": task.due_at.strftime("%Y-%m-%d %H:%M")}
+                notify(session, user, "task_reminder", item, dedupe_key=f"task-{task.id}-reminder")
+            task.reminder_sent_at = now
+            session.add(task)
+        session.commit()
+    return len(tasks)
+
+
+def run_scheduled(engine: Engine) -> None:
+    """Periodic notification work, run by the email worker."""
+    queue_task_reminders(engine)
+    send_due_digests(engine)
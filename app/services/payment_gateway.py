@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, TypeVar
+
+import stripe
+
+from app.core.config import get_settings
+from app.models.payment import Payment
+from app.services.metrics import metrics
+from app.services.resilience import RetryPolicy
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+T = TypeVar("T")
+
+
+class PaymentGatewayError(Exception):
+    """A payment provider call failed. `transient` errors were retried before surfacing."""
+
+    def __init__(self, message: str, transient: bool = False) -> None:
+        super().__init__(message)
+        self.transient = transient
+
+
+class GatewayUnavailable(PaymentGatewayError):
+    """The circuit breaker is open: calls fail fast until `retry_after` seconds pass."""
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__("Payment provider unavailable", transient=True)
+        self.retry_after = retry_after
+
+
+def is_transient_stripe_error(exc: BaseException) -> bool:
+    """Network failures, rate limiting and 5xx; not card, validation or auth errors."""
+    if isinstance(exc, (stripe.APIConnectionError, stripe.RateLimitError)):
+        return True
+    if isinstance(exc, stripe.StripeError):
+        return (exc.http_status or 0) >= 500
+    return isinstance(exc, (TimeoutError, ConnectionError))
+
+
+class CircuitBreaker:
+    """
+    Error-rate circuit breaker over the last `window` calls.
+
+    Opens when at least `min_calls` outcomes are recorded and the failure
+    share reaches `failure_rate`; while open, calls fail fast. After
+    `reset_timeout` one trial call is let through (half-open): success
+    closes the circuit, failure opens it again.
+    """
+
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        window: int = 20,
+        min_calls: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._outcomes: deque[bool] = deque(maxlen=window)  # True = failure
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "half_open" if self._clock() - self._opened_at >= self.reset_timeout else "open"
+
+    def before_call(self) -> None:
+        """Raise GatewayUnavailable if the call must not be attempted."""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            waited = self._clock() - self._opened_at
+            if waited < self.reset_timeout or self._trial_in_flight:
+                metrics.counter("stripe.circuit_rejected").inc()
+                raise GatewayUnavailable(max(self.reset_timeout - waited, 1.0))
+            self._trial_in_flight = True
+
+    def record(self, failure: bool) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                self._trial_in_flight = False
+                if failure:
+                    self._opened_at = self._clock()
+                    return
+                self._opened_at = None
+                self._outcomes.clear()
+                logger.info("Stripe circuit closed")
+                return
+            self._outcomes.append(failure)
+            if len(self._outcomes) >= self.min_calls and sum(self._outcomes) / len(self._outcomes) >= self.failure_rate:
+                self._opened_at = self._clock()
+                metrics.counter("stripe.circuit_opened").inc()
+                logger.warning("Stripe circuit opened after %d/%d failed calls", sum(self._outcomes), len(self._outcomes))
+
+
+@dataclass
+class CheckoutSession:
+    id: str
+    url: Optional[str]
+    payment_intent: Optional[str]
+
+
+def checkout_idempotency_key(payment: Payment) -> str:
+    """One Stripe checkout session per Payment row, however often creation is retried."""
+    return f"payment-{payment.id}-checkout"
+
+
+class StripeGateway:
+    """
+    Stripe calls with per-call timeouts (on the HTTP client), idempotency
+    keys, jittered retries of transient failures, a circuit breaker and
+    per-operation latency histograms (`stripe.<op>_seconds`).
+
+    `client` is a `stripe.StripeClient` or anything with the same service
+    methods, such as `LocalStripeStub`.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        *,
+        retry: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        self.client = client
+        self.retry = retry or RetryPolicy(max_attempts=settings.stripe_max_attempts)
+        self.breaker = breaker or CircuitBreaker(reset_timeout=settings.stripe_circuit_reset_seconds)
+
+    def call(self, operation: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        histogram = metrics.histogram(f"stripe.{operation}_seconds")
+        attempt = 1
+        while True:
+            self.breaker.before_call()
+            started = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as exc:
+                histogram.observe(time.perf_counter() - started)
+                transient = is_transient_stripe_error(exc)
+                self.breaker.record(failure=transient)
+                if not transient:
+                    raise PaymentGatewayError(str(exc)) from exc
+                if attempt >= self.retry.max_attempts:
+                    metrics.counter("stripe.errors").inc()
+                    raise PaymentGatewayError(str(exc), transient=True) from exc
+                metrics.counter("stripe.retries").inc()
+                time.sleep(self.retry.delay(attempt))
+                attempt += 1
+                continue
+            histogram.observe(time.perf_counter() - started)
+            self.breaker.record(failure=False)
+            return result
+
+    def create_checkout_session(
+        self,
+        payment: Payment,
+        success_url: str,
+        cancel_url: str,
+        metadata: dict[str, str],
+    ) -> CheckoutSession:
+        params = {
+            "mode": "payment",
+            "line_items": [
+                {
+                    "price_data": {
+                        "currency": payment.currency,
+                        "unit_amount": payment.amount_cents,
+                        "product_data": {
+                            "name": "ScholarValley Service",
+                        },
+                    },
+                    "quantity": 1,
+                }
+            ],
+            "success_url": success_url,
+            "cancel_url": cancel_url,
+            "metadata": metadata,
+        }
+        session = self.call(
+            "checkout_create",
+            self.client.checkout.sessions.create,
+            params,
+            {"idempotency_key": checkout_idempotency_key(payment)},
+        )
+        return CheckoutSession(id=session["id"], url=session.get("url"), payment_intent=session.get("payment_intent"))
+
+    def _list(self, operation: str, fn: Callable[..., Any], params: dict) -> tuple[list[dict], bool]:
+        page = self.call(operation, fn, params)
+        return list(page["data"]), bool(page["has_more"])
+
+    def list_checkout_sessions(
+        self,
+        *,
+        created_gte: Optional[int] = None,
+        starting_after: Optional[str] = None,
+        limit: int = 100,
+    ) -> tuple[list[dict], bool]:
+        """One page of checkout sessions, newest first. Returns (sessions, has_more)."""
+        params: dict[str, Any] = {"limit": limit}
+        if created_gte is not None:
+            params["created"] = {"gte": created_gte}
+        if starting_after:
+            params["starting_after"] = starting_after
+        return self._list("checkout_list", self.client.checkout.sessions.list, params)
+
+    def list_payment_intents(
+        self,
+        *,
+        created_gte: Optional[int] = None,
+        starting_after: Optional[str] = None,
+        limit: int = 100,
+    ) -> tuple[list[dict], bool]:
+        """One page of payment intents with their latest charge expanded (refund state)."""
+        params: dict[str, Any] = {"limit": limit, "expand": ["data.latest_charge"]}
+        if created_gte is not None:
+            params["created"] = {"gte": created_gte}
+        if starting_after:
+            params["starting_after"] = starting_after
+        return self._list("payment_intent_list", self.client.payment_intents.list, params)
+
+
+_gateway: Optional[StripeGateway] = None
+
+
+def get_payment_gateway() -> StripeGateway:
+    """
+    Process-wide gateway selected by STRIPE_BACKEND: `stripe` (the API, or a
+    stand-in such as stripe-mock at STRIPE_API_BASE) or `stub` (LocalStripeStub).
+    """
+    global _gateway
+    if _gateway is None:
+        if settings.stripe_backend == "stub":
+            from app.services.stripe_stub import LocalStripeStub
+
+            client: Any = LocalStripeStub(settings.stripe_stub_path)
+        else:
+            client = stripe.StripeClient(
+                settings.stripe_secret_key or "",
+                base_addresses={"api": settings.stripe_api_base} if settings.stripe_api_base else {},
+                max_network_retries=0,  # retried by the gateway, with the breaker in the loop
+                http_client=stripe.RequestsClient(timeout=settings.stripe_timeout_seconds),
+            )
+        _gateway = StripeGateway(client)
+    return _gateway
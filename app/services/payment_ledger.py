@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import case, delete, func
+from sqlmodel import Session, select
+
+from app.db.upsert import insert_for
+from app.models.payment import PaymentDailyAggregate, PaymentLedgerEntry
+from app.services.metrics import metrics
+
+
+ENTRY_TYPES = ("created", "succeeded", "refunded")
+
+# Ledger entries implied by reaching a Payment status. A refund implies the
+# money was collected, so a payment refunded straight from created/pending
+# (lost success webhook) still gets its succeeded entry.
+STATUS_ENTRIES = {
+    "created": ("created",),
+    "succeeded": ("succeeded",),
+    "refunded": ("succeeded", "refunded"),
+}
+
+
+def _refunded_cents(session: Session, payment_ids: list[int]) -> dict[int, int]:
+    """Refunds already in the ledger, per payment."""
+    return dict(
+        session.exec(
+            select(PaymentLedgerEntry.payment_id, func.sum(PaymentLedgerEntry.amount_cents))
+            .where(PaymentLedgerEntry.payment_id.in_(payment_ids), PaymentLedgerEntry.entry_type == "refunded")
+            .group_by(PaymentLedgerEntry.payment_id)
+        ).all()
+    )
+
+
+def _refund_rows(
+    session: Session, refunds: list[tuple[int, int, str]], source: str, occurred_at: datetime
+) -> list[dict]:
+    """Entries bringing each payment's recorded refunds up to (id, refunded_total_cents, currency)."""
+    recorded = _refunded_cents(session, [payment_id for payment_id, _, _ in refunds]) if refunds else {}
+    return [
+        {
+            "payment_id": payment_id,
+            "entry_type": "refunded",
+            "reference": str(total),
+            "amount_cents": total - recorded.get(payment_id, 0),
+            "currency": currency.lower(),
+            "source": source,
+            "occurred_at": occurred_at,
+            "day": occurred_at.date(),
+        }
+        for payment_id, total, currency in refunds
+        if total > recorded.get(payment_id, 0)
+    ]
+
+
+def record_transitions(
+    session: Session,
+    payments: Iterable[tuple[int, int, str]],
+    status: str,
+    source: str,
+    occurred_at: Optional[datetime] = None,
+) -> int:
+    """
+    Append ledger entries for payments (id, amount_cents, currency) that
+    reached `status`, and add them to the daily aggregates, in the caller's
+    transaction. Does not commit. A full refund records whatever part of
+    the amount earlier (partial) refunds have not.
+
+    Entries already in the ledger are skipped (ON CONFLICT DO NOTHING), and
+    only the rows actually inserted are aggregated, so replays never double
+    count. Returns the number of entries appended.
+    """
+    payments = list(payments)
+    entry_types = STATUS_ENTRIES.get(status, ())
+    occurred_at = occurred_at or datetime.utcnow()
+    rows = [
+        {
+            "payment_id": payment_id,
+            "entry_type": entry_type,
+            "reference": "",
+            "amount_cents": amount_cents,
+            "currency": currency.lower(),
+            "source": source,
+            "occurred_at": occurred_at,
+            "day": occurred_at.date(),
+        }
+        for payment_id, amount_cents, currency in payments
+        for entry_type in entry_types
+        if entry_type != "refunded"
+    ]
+    if "refunded" in entry_types:
+        rows += _refund_rows(session, [(i, amount, currency) for i, amount, currency in payments], source, occurred_at)
+    return _append(session, rows, occurred_at)
+
+
+def record_refund(
+    session: Session,
+    payment: tuple[int, int, str],
+    refunded_total_cents: int,
+    source: str,
+    occurred_at: Optional[datetime] = None,
+) -> int:
+    """
+    Record a (partial) refund of payment (id, amount_cents, currency), given
+    the cumulative amount refunded so far (Stripe's `amount_refunded`): the
+    ledger gets the difference from the refunds it already holds, plus the
+    implied success. Stale or replayed totals append nothing. Does not
+    commit. Returns the number of entries appended.
+    """
+    payment_id, amount_cents, currency = payment
+    occurred_at = occurred_at or datetime.utcnow()
+    rows = [
+        {
+            "payment_id": payment_id,
+            "entry_type": "succeeded",
+            "reference": "",
+            "amount_cents": amount_cents,
+            "currency": currency.lower(),
+            "source": source,
+            "occurred_at": occurred_at,
+            "day": occurred_at.date(),
+        }
+    ]
+    rows += _refund_rows(session, [(payment_id, min(refunded_total_cents, amount_cents), currency)], source, occurred_at)
+    return _append(session, rows, occurred_at)
+
+
+def _append(session: Session, rows: list[dict], occurred_at: datetime) -> int:
+    if not rows:
+        return 0
+    insert = insert_for(session)
+    inserted = session.execute(
+        insert(PaymentLedgerEntry)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=["payment_id", "entry_type", "reference"])
+        .returning(
+            PaymentLedgerEntry.entry_type,
+            PaymentLedgerEntry.amount_cents,
+            PaymentLedgerEntry.currency,
+            PaymentLedgerEntry.day,
+        )
+    ).all()
+    if not inserted:
+        return 0
+
+    deltas: dict[tuple[date, str], dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for entry_type, amount_cents, currency, day in inserted:
+        delta = deltas[(day, currency)]
+        delta[f"{entry_type}_count"] += 1
+        delta[f"{entry_type}_cents"] += amount_cents
+        metrics.counter(f"payments.ledger.{entry_type}").inc()
+    columns = [f"{entry_type}_{unit}" for entry_type in ENTRY_TYPES for unit in ("count", "cents")]
+    values = [
+        {"day": day, "currency": currency, "updated_at": occurred_at, **{c: delta.get(c, 0) for c in columns}}
+        for (day, currency), delta in sorted(deltas.items())  # fixed lock order across writers
+    ]
+    statement = insert(PaymentDailyAggregate).values(values)
+    session.execute(
+        statement.on_conflict_do_update(
+            index_elements=["day", "currency"],
+            set_={
+                **{c: getattr(PaymentDailyAggregate, c) + getattr(statement.excluded, c) for c in columns},
+                "updated_at": statement.excluded.updated_at,
+            },
+        )
+    )
+    return len(inserted)
+
+
+def revenue_by_currency(session: Session, start: Optional[date] = None, end: Optional[date] = None) -> dict[str, dict]:
+    """Gross, refunded and net revenue per currency over [start, end], from the aggregates."""
+    query = select(
+        PaymentDailyAggregate.currency,
+        func.sum(PaymentDailyAggregate.succeeded_count),
+        func.sum(PaymentDailyAggregate.succeeded_cents),
+        func.sum(PaymentDailyAggregate.refunded_count),
+        func.sum(PaymentDailyAggregate.refunded_cents),
+    ).group_by(PaymentDailyAggregate.currency)
+    if start is not None:
+        query = query.where(PaymentDailyAggregate.day >= start)
+    if end is not None:
+        query = query.where(PaymentDailyAggregate.day <= end)
+    return {
+        currency: {
+            "succeeded_count": succeeded_count,
+            "gross_cents": gross,
+            "refunded_count": refunded_count,
+            "refunded_cents": refunded,
+            "net_cents": gross - refunded,
+        }
+        for currency, succeeded_count, gross, refunded_count, refunded in session.exec(query).all()
+    }
+
+
+def daily_revenue(session: Session, start: date, end: date, currency: Optional[str] = None) -> list[PaymentDailyAggregate]:
+    query = select(PaymentDailyAggregate).where(PaymentDailyAggregate.day >= start, PaymentDailyAggregate.day <= end)
+    if currency:
+        query = query.where(PaymentDailyAggregate.currency == currency.lower())
+    return list(session.exec(query.order_by(PaymentDailyAggregate.day, PaymentDailyAggregate.currency)).all())
+
+
+def rebuild_aggregates(session: Session) -> int:
+    """
+    Recompute every aggregate row from the ledger (repair, or checking the
+    incremental maintenance). Does not commit. Returns the number of rows.
+    """
+    sums = []
+    for entry_type in ENTRY_TYPES:
+        is_type = PaymentLedgerEntry.entry_type == entry_type
+        sums.append(func.sum(case((is_type, 1), else_=0)).label(f"{entry_type}_count"))
+        sums.append(func.sum(case((is_type, PaymentLedgerEntry.amount_cents), else_=0)).label(f"{entry_type}_cents"))
+    rows = session.exec(
+        select(PaymentLedgerEntry.day, PaymentLedgerEntry.currency, *sums).group_by(
+            PaymentLedgerEntry.day, PaymentLedgerEntry.currency
+        )
+    ).all()
+    session.execute(delete(PaymentDailyAggregate))
+    now = datetime.utcnow()
+    session.add_all(PaymentDailyAggregate(**row._asdict(), updated_at=now) for row in rows)
+    return len(rows)
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import logging
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional
+
+from sqlalchemy import Row, update
+from sqlmodel import Session, select
+
+from app.core.config import get_settings
+from app.models.payment import Payment
+from app.services.audit import log_event
+from app.services.checkpoints import clear_checkpoint, load_checkpoint, save_checkpoint
+from app.services.metrics import metrics
+from app.services.payment_gateway import StripeGateway
+from app.services.payment_ledger import record_transitions
+from app.services.stripe_events import TRANSITIONS
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+CHECKPOINT_NAME = "payment_reconciliation"
+
+
+@dataclass
+class PaymentReconcileReport:
+    resumed: bool = False
+    completed: bool = False
+    sessions_listed: int = 0
+    intents_listed: int = 0
+    payments_matched: int = 0
+    intent_ids_filled: int = 0
+    corrected: dict[str, int] = field(default_factory=dict)  # new status -> count
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def session_status(obj: dict) -> Optional[str]:
+    """Payment status implied by a checkout session, or None if it says nothing yet."""
+    if obj.get("status") == "complete":
+        # Delayed methods (bank debits) complete the session before the money arrives.
+        return "succeeded" if obj.get("payment_status") in ("paid", "no_payment_required") else "pending"
+    if obj.get("status") == "expired":
+        return "failed"
+    return None
+
+
+def intent_status(obj: dict) -> Optional[str]:
+    """Payment status implied by a payment intent (with `latest_charge` expanded)."""
+    charge = obj.get("latest_charge")
+    if isinstance(charge, dict) and charge.get("refunded"):
+        return "refunded"
+    return {"succeeded": "succeeded", "processing": "pending", "canceled": "failed"}.get(obj.get("status"))
+
+
+class _Reconciler:
+    def __init__(self, session: Session, dry_run: bool, report: PaymentReconcileReport) -> None:
+        self.session = session
+        self.dry_run = dry_run
+        self.report = report
+
+    def _rows(self, column: Any, ids: list[str]) -> list[Row]:
+        if not ids:
+            return []
+        return self.session.exec(
+            select(
+                Payment.id,
+                Payment.user_id,
+                Payment.status,
+                Payment.amount_cents,
+                Payment.currency,
+                Payment.stripe_payment_intent_id,
+                column,
+            ).where(column.in_(ids))
+        ).all()
+
+    def sessions_page(self, page: list[dict]) -> None:
+        by_id = {obj["id"]: obj for obj in page}
+        rows = self._rows(Payment.stripe_checkout_session_id, list(by_id))
+        fills = []
+        targets = []
+        for row in rows:
+            obj = by_id[row.stripe_checkout_session_id]
+            if obj.get("payment_intent") and not row.stripe_payment_intent_id:
+                fills.append({"id": row.id, "stripe_payment_intent_id": obj["payment_intent"]})
+            targets.append((row, session_status(obj), obj["id"]))
+        self.report.sessions_listed += len(page)
+        self.report.payments_matched += len(rows)
+        if fills and not self.dry_run:
+            self.session.execute(update(Payment), fills)  # bulk UPDATE by primary key
+        self.report.intent_ids_filled += len(fills)
+        self._apply(targets, "checkout_session")
+
+    def intents_page(self, page: list[dict]) -> None:
+        by_id = {obj["id"]: obj for obj in page}
+        rows = self._rows(Payment.stripe_payment_intent_id, list(by_id))
+        self.report.intents_listed += len(page)
+        self.report.payments_matched += len(rows)
+        self._apply([(row, intent_status(by_id[row.stripe_payment_intent_id]), row.stripe_payment_intent_id) for row in rows], "payment_intent")
+
+    def _apply(self, targets: list[tuple[Row, Optional[str], str]], source: str) -> None:
+        """
+        Apply corrections with one UPDATE per (from, to) status pair. The
+        `status == from` guard leaves rows a webhook changed meanwhile alone;
+        RETURNING gives exactly the rows changed, which are then audited and
+        added to the payments ledger.
+        """
+        groups: dict[tuple[str, str], dict[int, Row]] = defaultdict(dict)
+        stripe_ids: dict[int, str] = {}
+        for row, target, stripe_id in targets:
+            if target is None or target == row.status or target not in TRANSITIONS.get(row.status, set()):
+                continue
+            groups[(row.status, target)][row.id] = row
+            stripe_ids[row.id] = stripe_id
+        now = datetime.utcnow()
+        for (previous, target), rows in groups.items():
+            if self.dry_run:
+                changed = list(rows)
+            else:
+                changed = self.session.exec(
+                    update(Payment)
+                    .where(Payment.id.in_(list(rows)), Payment.status == previous)
+                    .values(status=target, updated_at=now)
+                    .returning(Payment.id)
+                    .execution_options(synchronize_session=False)
+                ).scalars().all()
+                record_transitions(
+                    self.session,
+                    [(payment_id, rows[payment_id].amount_cents, rows[payment_id].currency) for payment_id in changed],
+                    target,
+                    "reconciliation",
+                )
+                for payment_id in changed:
+                    log_event(
+                        self.session,
+                        user_id=rows[payment_id].user_id,
+                        action=f"payment_{target}",
+                        resource_type="payment",
+                        resource_id=str(payment_id),
+                        metadata={"source": "reconciliation", "from": previous, source: stripe_ids[payment_id]},
+                        commit=False,
+                    )
+            self.report.corrected[target] = self.report.corrected.get(target, 0) + len(changed)
+            metrics.counter(f"payments.reconciled.{target}").inc(len(changed))
+
+
+def reconcile_payments(
+    session: Session,
+    gateway: StripeGateway,
+    *,
+    since: Optional[timedelta] = None,
+    page_size: Optional[int] = None,
+    dry_run: bool = False,
+    reset: bool = False,
+) -> PaymentReconcileReport:
+    """
+    Correct Payment statuses from Stripe, for payments whose webhooks were lost.
+
+    Walks checkout sessions, then payment intents (refunds, late async
+    payments), created in the last `since`, with paginated list calls.
+    Each page is matched to Payment rows with one bulk lookup and corrected
+    with batched updates, following the same allowed transitions as the
+    webhook handlers.
+
+    The walk position is checkpointed in the same commit as each page's
+    corrections, so a run that fails part-way (Stripe outage, deploy)
+    resumes where it stopped; a finished run clears the checkpoint.
+    `reset` discards a stored checkpoint. `dry_run` changes nothing and
+    stores no checkpoint.
+    """
+    since = since if since is not None else timedelta(days=settings.payment_reconcile_lookback_days)
+    page_size = page_size or settings.payment_reconcile_page_size
+    report = PaymentReconcileReport()
+
+    state = {} if reset else load_checkpoint(session, CHECKPOINT_NAME)
+    report.resumed = bool(state)
+    if not state:
+        state = {
+            "created_gte": int(time.time() - since.total_seconds()),
+            "sessions_after": None,
+            "sessions_done": False,
+            "intents_after": None,
+            "intents_done": False,
+        }
+    reconciler = _Reconciler(session, dry_run, report)
+    walks: list[tuple[str, Callable[..., tuple[list[dict], bool]], Callable[[list[dict]], None]]] = [
+        ("sessions", gateway.list_checkout_sessions, reconciler.sessions_page),
+        ("intents", gateway.list_payment_intents, reconciler.intents_page),
+    ]
+    for kind, list_page, apply_page in walks:
+        while not state[f"{kind}_done"]:
+            page, has_more = list_page(
+                created_gte=state["created_gte"], starting_after=state[f"{kind}_after"], limit=page_size
+            )
+            apply_page(page)
+            if page:
+                state[f"{kind}_after"] = page[-1]["id"]
+            state[f"{kind}_done"] = not has_more or not page
+            if dry_run:
+                session.rollback()
+            else:
+                save_checkpoint(session, CHECKPOINT_NAME, state)
+                session.commit()
+
+    if not dry_run:
+        clear_checkpoint(session, CHECKPOINT_NAME)
+        session.commit()
+    report.completed = True
+    logger.info("Payment reconciliation finished: %s", report.as_dict())
+    return report
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import or_, update
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app.core.config import get_settings
+from app.models.document import Document
+from app.services.metrics import metrics
+from app.services.resilience import RestartingProcessPool
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+ReadObjectFn = Callable[[str], Iterable[bytes]]
+WriteObjectFn = Callable[[str, bytes, str], None]
+
+THUMBNAIL_SIZE = (320, 320)
+THUMBNAIL_CONTENT_TYPE = "image/jpeg"
+PREVIEWABLE_IMAGE_TYPES = ("image/jpeg", "image/png", "image/gif", "image/webp", "image/bmp", "image/tiff")
+PDF_CONTENT_TYPE = "application/pdf"
+# Larger sources are skipped rather than pulled into worker memory.
+MAX_SOURCE_BYTES = 50 * 1024 * 1024
+
+
+def preview_key(s3_key: str) -> str:
+    """Thumbnails live alongside the original object."""
+    return f"{s3_key}.preview.jpg"
+
+
+def is_previewable(content_type: str) -> bool:
+    return content_type in PREVIEWABLE_IMAGE_TYPES or content_type == PDF_CONTENT_TYPE
+
+
+def render_thumbnail(data: bytes, content_type: str) -> bytes:
+    """
+    Render a JPEG thumbnail of an image or the first page of a PDF.
+
+    Runs in a worker process (CPU-bound, parses untrusted input); imports the
+    imaging libraries lazily so the API process never loads them.
+    """
+    from PIL import Image
+
+    if content_type == PDF_CONTENT_TYPE:
+        import pypdfium2 as pdfium
+
+        pdf = pdfium.PdfDocument(data)
+        try:
+            page = pdf[0]
+            width, height = page.get_size()
+            scale = min(THUMBNAIL_SIZE[0] / width, THUMBNAIL_SIZE[1] / height) * 2  # oversample, then downscale
+            image = page.render(scale=scale).to_pil()
+        finally:
+            pdf.close()
+    else:
+        image = Image.open(io.BytesIO(data))
+        image.seek(0)
+
+    image.thumbnail(THUMBNAIL_SIZE)
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    out = io.BytesIO()
+    image.save(out, format="JPEG", quality=80, optimize=True)
+    return out.getvalue()
+
+
+def fail_exhausted(session: Session, lease_seconds: int, max_attempts: int) -> int:
+    """
+    Mark documents failed whose last rendering lease expired with no claims
+    left (a file that keeps killing the worker). Does not commit.
+    """
+    failed = session.exec(
+        update(Document)
+        .where(
+            Document.preview_status == "rendering",
+            Document.preview_claimed_at < datetime.utcnow() - timedelta(seconds=lease_seconds),
+            Document.preview_attempts >= max_attempts,
+        )
+        .values(preview_status="failed", preview_claimed_at=None)
+    ).rowcount
+    if failed:
+        metrics.counter("preview.exhausted").inc(failed)
+        logger.warning("Marked %d previews failed after %d attempts", failed, max_attempts)
+    return failed
+
+
+def claim_pending(
+    session: Session, limit: int, lease_seconds: int, max_attempts: Optional[int] = None
+) -> list[tuple[int, str, str, Optional[int]]]:
+    """
+    Claim documents awaiting a preview: (id, s3_key, content_type, size_bytes).
+
+    Only clean documents are rendered; renderers never see unscanned or
+    infected content. Unsupported types are marked in the same pass. Each
+    claim counts as an attempt; documents out of attempts are moved to
+    failed instead of being reclaimed.
+    """
+    max_attempts = max_attempts or settings.preview_max_attempts
+    fail_exhausted(session, lease_seconds, max_attempts)
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=lease_seconds)
+    docs = session.exec(
+        select(Document)
+        .where(
+            Document.scanned_status == "clean",
+            Document.preview_attempts < max_attempts,
+            or_(
+                Document.preview_status == "pending",
+                (Document.preview_status == "rendering") & (Document.preview_claimed_at < stale),
+            ),
+        )
+        .order_by(Document.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).all()
+    keys = {doc.s3_key for doc in docs}
+    ready = dict(
+        session.exec(
+            select(Document.s3_key, Document.preview_etag).where(
+                Document.s3_key.in_(keys), Document.preview_status == "ready"
+            )
+        ).all()
+    ) if keys else {}
+    claimed = []
+    for doc in docs:
+        if doc.s3_key in ready:
+            # Shared stored object already has a thumbnail.
+            doc.preview_status = "ready"
+            doc.preview_etag = ready[doc.s3_key]
+        elif not is_previewable(doc.content_type) or (doc.size_bytes or 0) > MAX_SOURCE_BYTES:
+            doc.preview_status = "unsupported"
+        else:
+            doc.preview_status = "rendering"
+            doc.preview_claimed_at = now
+            doc.preview_attempts = (doc.preview_attempts or 0) + 1
+            claimed.append((doc.id, doc.s3_key, doc.content_type, doc.size_bytes))
+        session.add(doc)
+    session.commit()
+    return claimed
+
+
+def run_preview_worker(
+    engine: Engine,
+    read_object: ReadObjectFn,
+    write_object: WriteObjectFn,
+    *,
+    processes: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    poll_interval: float = 5.0,
+    once: bool = False,
+    stop: Optional[threading.Event] = None,
+) -> int:
+    """
+    Render thumbnails for clean documents on a process pool and store them next to the originals.
+
+    Documents sharing a stored object (content deduplication) share one
+    thumbnail. A renderer that crashes its process only fails its own
+    document; the pool is rebuilt. Returns the number of documents processed.
+    """
+    processes = processes or settings.preview_processes
+    batch_size = batch_size or settings.preview_batch_size
+    stop = stop or threading.Event()
+    processed = 0
+
+    with RestartingProcessPool(processes, "preview") as pool:
+        while not stop.is_set():
+            with Session(engine) as session:
+                claimed = claim_pending(session, batch_size, settings.preview_lease_seconds)
+            if not claimed:
+                if once:
+                    break
+                stop.wait(poll_interval)
+                continue
+
+            # One render per distinct stored object.
+            jobs = {}
+            rendered: dict[str, Optional[str]] = {}
+            for _, s3_key, content_type, _ in claimed:
+                if s3_key in jobs or s3_key in rendered:
+                    continue
+                try:
+                    jobs[s3_key] = (b"".join(read_object(s3_key)), content_type)
+                except Exception as exc:
+                    logger.warning("Could not read %s for preview: %s", s3_key, exc)
+                    rendered[s3_key] = None
+
+            for s3_key, future, seconds in pool.run_each(render_thumbnail, jobs):
+                try:
+                    thumbnail = future.result()
+                    write_object(preview_key(s3_key), thumbnail, THUMBNAIL_CONTENT_TYPE)
+                    rendered[s3_key] = hashlib.md5(thumbnail).hexdigest()
+                    metrics.histogram("preview.render_seconds").observe(seconds)
+                except Exception as exc:
+                    logger.warning("Preview of %s failed: %s", s3_key, exc)
+                    rendered[s3_key] = None
+
+            with Session(engine) as session:
+                for document_id, s3_key, _, _ in claimed:
+                    doc = session.get(Document, document_id)
+                    if doc is None or doc.preview_status != "rendering":
+                        continue
+                    etag = rendered.get(s3_key)
+                    doc.preview_status = "ready" if etag else "failed"
+                    doc.preview_etag = etag
+                    doc.preview_claimed_at = None
+                    session.add(doc)
+                    metrics.counter(f"preview.documents.{doc.preview_status}").inc()
+                session.commit()
+            processed += len(claimed)
+    return processed
+
+
+class PreviewCache:
+    """Small in-process LRU of thumbnail bytes keyed by (storage key, etag)."""
+
+    def __init__(self, max_entries: int = 512) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._items: OrderedDict[tuple[str, str], bytes] = OrderedDict()
+
+    def get(self, key: str, etag: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._items.get((key, etag))
+            if data is not None:
+                self._items.move_to_end((key, etag))
+            return data
+
+    def put(self, key: str, etag: str, data: bytes) -> None:
+        with self._lock:
+            self._items[(key, etag)] = data
+            self._items.move_to_end((key, etag))
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+
+preview_cache = PreviewCache()
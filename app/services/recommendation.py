@@ -0,0 +1,302 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional, Sequence, Union
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.services.batching import MicroBatcher
+from app.services.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+PROGRAM_CATALOG = Path(__file__).resolve().parent.parent / "ml" / "programs.json"
+
+# On-disk layout of a model artifact, <model dir>/<model version>/:
+#   manifest.json  format, version, feature names and weights, program metadata
+#   programs.npy   float32 (programs, features) profile of a typical admit per program
+#   norms.npy      float32 (programs,) weighted squared norm of each profile row
+#   tuition.npy    float32 (programs,) yearly tuition, USD
+#   destination.npy int16 (programs,) index into manifest "destinations", -1 = any
+# The arrays are memory-mapped read-only, so worker processes share the pages.
+ARTIFACT_FORMAT = 1
+LATEST_FILE = "LATEST"
+FEATURE_NAMES = ("gpa", "toefl", "level_freshman", "level_continuing_undergrad", "level_graduate")
+LEVELS = ("freshman", "continuing_undergrad", "graduate")
+DEFAULT_WEIGHTS = (4.0, 3.0, 1.0, 1.0, 1.0)
+# Distance added per unit of tuition above the applicant's budget (in BUDGET_SCALE USD).
+BUDGET_SCALE = 60000.0
+DEFAULT_BUDGET_WEIGHT = 2.0
+# Seconds a batched caller waits for scoring on top of ML_BATCH_MAX_WAIT_MS
+# before giving up on the batcher and scoring its profile directly.
+BATCH_SCORE_TIMEOUT = 5.0
+
+
+def _key(value: Optional[str]) -> str:
+    return (value or "").strip().lower()
+
+
+# Level one-hot rows; an unknown level ("*" or missing) sits between all levels.
+_LEVEL_ROWS = np.vstack([np.eye(len(LEVELS), dtype=np.float32), np.full(len(LEVELS), 1.0 / len(LEVELS), dtype=np.float32)])
+_LEVEL_INDEX = {name: i for i, name in enumerate(LEVELS)}
+
+
+def encode_features(gpa: Sequence[float], toefl: Sequence[float], levels: Sequence[Optional[str]]) -> np.ndarray:
+    """(rows, features) float32 matrix for profiles given as columns."""
+    level_rows = np.fromiter((_LEVEL_INDEX.get(_key(v), len(LEVELS)) for v in levels), dtype=np.intp, count=len(levels))
+    features = np.empty((len(levels), len(FEATURE_NAMES)), dtype=np.float32)
+    features[:, 0] = np.asarray(gpa, dtype=np.float32) / 4.0
+    features[:, 1] = np.asarray(toefl, dtype=np.float32) / 120.0
+    features[:, 2:] = _LEVEL_ROWS[level_rows]
+    return features
+
+
+def parse_budget(value: Any) -> float:
+    """Yearly budget in USD from free text ("15000", "$15,000"); inf when unknown."""
+    digits = "".join(ch for ch in str(value or "") if ch.isdigit() or ch == ".")
+    try:
+        return float(digits) if digits else np.inf
+    except ValueError:
+        return np.inf
+
+
+@dataclass
+class ProfileBatch:
+    """Applicant inputs for scoring, one entry per applicant."""
+
+    gpa: Sequence[float]
+    toefl: Sequence[float]
+    destinations: Sequence[Optional[str]]
+    levels: Sequence[Optional[str]]
+    budgets: Sequence[float]
+
+
+@dataclass
+class ProgramMatch:
+    name: str
+    destination: str
+    level: str
+    score: float
+
+
+def write_artifact(
+    model_dir: Union[str, Path],
+    programs: Sequence[dict[str, Any]],
+    *,
+    weights: Sequence[float] = DEFAULT_WEIGHTS,
+    budget_weight: float = DEFAULT_BUDGET_WEIGHT,
+    make_latest: bool = True,
+) -> str:
+    """
+    Build a nearest-neighbour artifact from program profiles (name,
+    destination, level, gpa, toefl, tuition_usd) under `model_dir`.
+    The version is derived from the content; `make_latest` points LATEST
+    at it. Returns the version.
+    """
+    weights_arr = np.asarray(weights, dtype=np.float32)
+    if len(weights_arr) != len(FEATURE_NAMES):
+        raise ValueError(f"Expected {len(FEATURE_NAMES)} weights, got {len(weights_arr)}")
+    matrix = encode_features([p["gpa"] for p in programs], [p["toefl"] for p in programs], [p["level"] for p in programs])
+    destinations = sorted({_key(p["destination"]) for p in programs} - {"", "*"})
+    codes = np.array(
+        [destinations.index(_key(p["destination"])) if _key(p["destination"]) in destinations else -1 for p in programs],
+        dtype=np.int16,
+    )
+    tuition = np.array([p.get("tuition_usd") or 0 for p in programs], dtype=np.float32)
+
+    digest = hashlib.sha256()
+    for array in (matrix, codes, tuition, weights_arr):
+        digest.update(array.tobytes())
+    digest.update(json.dumps([p["name"] for p in programs]).encode())
+    version = f"knn-{datetime.utcnow():%Y%m%d}-{digest.hexdigest()[:10]}"
+
+    target = Path(model_dir) / version
+    target.mkdir(parents=True, exist_ok=True)
+    np.save(target / "programs.npy", matrix)
+    np.save(target / "norms.npy", (matrix * matrix * weights_arr).sum(axis=1).astype(np.float32))
+    np.save(target / "tuition.npy", tuition)
+    np.save(target / "destination.npy", codes)
+    manifest = {
+        "format": ARTIFACT_FORMAT,
+        "kind": "knn",
+        "version": version,
+        "created_at": datetime.utcnow().isoformat(),
+        "features": list(FEATURE_NAMES),
+        "weights": weights_arr.tolist(),
+        "budget_weight": budget_weight,
+        "destinations": destinations,
+        "programs": [{"name": p["name"], "destination": p["destination"], "level": p["level"]} for p in programs],
+    }
+    (target / "manifest.json").write_text(json.dumps(manifest, indent=2))
+    if make_latest:
+        tmp = Path(model_dir) / f".{LATEST_FILE}.tmp"
+        tmp.write_text(version)
+        os.replace(tmp, Path(model_dir) / LATEST_FILE)
+    return version
+
+
+class Recommender:
+    """
+    Nearest-neighbour program recommender over a memory-mapped artifact.
+
+    Each program is a profile of a typical admit. An applicant is scored
+    against every program with a weighted squared distance, computed for a
+    whole batch as one matrix product (|x|² + |p|² - 2x·p), plus a penalty
+    for tuition above the applicant's budget; programs in another
+    destination are excluded. Safe to share between threads.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self.manifest = json.loads((self.path / "manifest.json").read_text())
+        if self.manifest.get("format") != ARTIFACT_FORMAT or tuple(self.manifest["features"]) != FEATURE_NAMES:
+            raise ValueError(f"Unsupported model artifact at {self.path} (format {self.manifest.get('format')})")
+        self.version: str = self.manifest["version"]
+        self.programs = np.load(self.path / "programs.npy", mmap_mode="r")
+        self.norms = np.load(self.path / "norms.npy", mmap_mode="r")
+        self.tuition = np.load(self.path / "tuition.npy", mmap_mode="r")
+        self.destination_codes = np.load(self.path / "destination.npy", mmap_mode="r")
+        self.weights = np.asarray(self.manifest["weights"], dtype=np.float32)
+        self.budget_weight = float(self.manifest["budget_weight"])
+        self.destinations = {name: i for i, name in enumerate(self.manifest["destinations"])}
+        self.program_info = self.manifest["programs"]
+
+    def __len__(self) -> int:
+        return len(self.program_info)
+
+    def distances(self, batch: ProfileBatch) -> np.ndarray:
+        """(applicants, programs) distances; inf for programs in another destination."""
+        features = encode_features(batch.gpa, batch.toefl, batch.levels)
+        weighted = features * self.weights
+        dist = (weighted * features).sum(axis=1)[:, None] + self.norms[None, :] - 2.0 * (weighted @ self.programs.T)
+        np.maximum(dist, 0.0, out=dist)
+
+        over = self.tuition[None, :] - np.asarray(batch.budgets, dtype=np.float32)[:, None]
+        dist += self.budget_weight * np.square(np.maximum(over, 0.0) / BUDGET_SCALE)
+
+        codes = np.array([self.destinations.get(_key(d), -2) for d in batch.destinations], dtype=np.int16)
+        known = codes[:, None] >= 0
+        elsewhere = known & (self.destination_codes[None, :] >= 0) & (self.destination_codes[None, :] != codes[:, None])
+        dist[elsewhere] = np.inf
+        return dist
+
+    def recommend(self, batch: ProfileBatch, k: Optional[int] = None) -> list[list[ProgramMatch]]:
+        """Top `k` programs per applicant, best first."""
+        k = min(k or settings.ml_recommendation_top_k, len(self))
+        dist = self.distances(batch)
+        top = np.argpartition(dist, k - 1, axis=1)[:, :k]
+        top_dist = np.take_along_axis(dist, top, axis=1)
+        order = np.argsort(top_dist, axis=1)
+        top, top_dist = np.take_along_axis(top, order, axis=1), np.take_along_axis(top_dist, order, axis=1)
+        results = []
+        for indices, distances in zip(top.tolist(), top_dist.tolist()):
+            results.append(
+                [
+                    ProgramMatch(score=round(1.0 / (1.0 + d), 4), **self.program_info[i])
+                    for i, d in zip(indices, distances)
+                    if np.isfinite(d)
+                ]
+            )
+        return results
+
+
+def resolve_model_path(model_dir: Union[str, Path, None] = None, version: Optional[str] = None) -> Optional[Path]:
+    """The pinned (ML_MODEL_VERSION) or latest artifact directory, or None if there is none."""
+    model_dir = Path(model_dir or settings.ml_model_dir)
+    version = version or settings.ml_model_version
+    if not version:
+        latest = model_dir / LATEST_FILE
+        if not latest.exists():
+            return None
+        version = latest.read_text().strip()
+    path = model_dir / version
+    return path if (path / "manifest.json").exists() else None
+
+
+_lock = threading.Lock()
+_recommender: Optional[Recommender] = None
+_loaded = False
+
+
+def get_recommender() -> Optional[Recommender]:
+    """The model for this process, loaded on first use; None when no artifact is installed."""
+    global _recommender, _loaded
+    if not _loaded:
+        with _lock:
+            if not _loaded:
+                path = resolve_model_path()
+                _recommender = Recommender(path) if path is not None else None
+                _loaded = True
+    return _recommender
+
+
+def set_recommender(recommender: Optional[Recommender]) -> None:
+    """Replace the process model (tests, reloading after a deploy)."""
+    global _recommender, _loaded
+    with _lock:
+        _recommender, _loaded = recommender, True
+
+
+def merge_profiles(profiles: Sequence[ProfileBatch]) -> ProfileBatch:
+    return ProfileBatch(
+        gpa=[v for p in profiles for v in p.gpa],
+        toefl=[v for p in profiles for v in p.toefl],
+        destinations=[v for p in profiles for v in p.destinations],
+        levels=[v for p in profiles for v in p.levels],
+        budgets=[v for p in profiles for v in p.budgets],
+    )
+
+
+def _score_batch(profiles: list[ProfileBatch]) -> list[tuple[str, list[ProgramMatch]]]:
+    """Score single-applicant profiles as one batch: (model version, matches) each."""
+    recommender = get_recommender()
+    if recommender is None:
+        raise RuntimeError("No recommendation model is installed")
+    return [(recommender.version, matches) for matches in recommender.recommend(merge_profiles(profiles))]
+
+
+_batcher: Optional[MicroBatcher[ProfileBatch, tuple[str, list[ProgramMatch]]]] = None
+
+
+def get_recommendation_batcher() -> MicroBatcher[ProfileBatch, tuple[str, list[ProgramMatch]]]:
+    global _batcher
+    with _lock:
+        if _batcher is None:
+            _batcher = MicroBatcher(
+                _score_batch,
+                max_batch=settings.ml_batch_max_size,
+                max_wait=settings.ml_batch_max_wait_ms / 1000.0,
+                name="ml.recommendation",
+            )
+        return _batcher
+
+
+def recommend_one(profile: ProfileBatch) -> tuple[str, list[ProgramMatch]]:
+    """
+    Top programs for one applicant: (model version, matches). Concurrent
+    callers are coalesced into one vectorized batch (ML_BATCH_MAX_SIZE,
+    ML_BATCH_MAX_WAIT_MS); with a max wait of 0 the model is called directly.
+    A batch that has not come back within the max wait plus
+    BATCH_SCORE_TIMEOUT is abandoned and the profile is scored directly, so a
+    wedged batcher cannot hang request threads.
+    """
+    if settings.ml_batch_max_wait_ms <= 0:
+        return _score_batch([profile])[0]
+    timeout = settings.ml_batch_max_wait_ms / 1000.0 + BATCH_SCORE_TIMEOUT
+    try:
+        return get_recommendation_batcher()(profile, timeout=timeout)
+    except FutureTimeout:
+        metrics.counter("ml.recommendation.batch_timeouts").inc()
+        logger.warning("Recommendation batch did not finish within %.3fs; scoring directly", timeout)
+        return _score_batch([profile])[0]
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from typing import Iterator, Optional
+
+from sqlalchemy import Row, and_, delete, or_
+from sqlmodel import Session, select
+
+from app.core.config import get_settings
+from app.models.document import Document
+from app.services.metrics import metrics
+from app.services.previews import preview_key
+from app.services.storage import ObjectInfo, StorageBackend, StorageError
+from app.services.upload_events import complete_documents
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+PREVIEW_SUFFIX = preview_key("")
+# Matches the bucket lifecycle rule that aborts incomplete multipart uploads.
+MULTIPART_MAX_AGE = timedelta(days=7)
+# Missing-object document ids kept in the report (the count is always exact).
+MAX_REPORTED_IDS = 100
+
+
+@dataclass
+class ReconcileReport:
+    objects_listed: int = 0
+    documents_checked: int = 0
+    documents_completed: int = 0
+    orphan_objects_deleted: int = 0
+    stale_documents_deleted: int = 0
+    missing_objects: int = 0
+    missing_object_document_ids: list[int] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def _iter_objects(storage: StorageBackend, prefix: str, page_size: int) -> Iterator[ObjectInfo]:
+    for page in storage.list_objects(prefix, page_size):
+        yield from page
+
+
+def _iter_documents(session: Session, prefix: str, page_size: int) -> Iterator[Row]:
+    """
+    Documents under `prefix` as plain column rows, in binary key order
+    (matching S3 listing order), keyset-paginated.
+    """
+    key = Document.s3_key
+    if session.get_bind().dialect.name == "postgresql":
+        key = key.collate("C")
+    last: Optional[tuple[str, int]] = None
+    while True:
+        query = select(
+            Document.id, Document.s3_key, Document.size_bytes, Document.upload_id, Document.created_at
+        ).where(Document.s3_key.startswith(prefix, autoescape=True))
+        if last is not None:
+            query = query.where(or_(key > last[0], and_(Document.s3_key == last[0], Document.id > last[1])))
+        rows = session.exec(query.order_by(key, Document.id).limit(page_size)).all()
+        yield from rows
+        if len(rows) < page_size:
+            return
+        last = (rows[-1].s3_key, rows[-1].id)
+
+
+class _Reconciler:
+    def __init__(self, session: Session, storage: StorageBackend, grace: timedelta, dry_run: bool, batch_size: int) -> None:
+        self.session = session
+        self.storage = storage
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        self.now = datetime.utcnow()
+        self.cutoff = self.now - grace
+        self.report = ReconcileReport()
+        self.completions: dict[int, ObjectInfo] = {}
+        self.orphan_keys: list[str] = []
+        self.preview_keys: list[str] = []
+        self.stale_documents: list[Row] = []
+
+    def _is_stale(self, doc: Row) -> bool:
+        if doc.upload_id:
+            return doc.created_at < self.now - MULTIPART_MAX_AGE
+        return doc.created_at < self.cutoff
+
+    def matched(self, obj: ObjectInfo, doc: Row) -> None:
+        self.report.documents_checked += 1
+        if doc.size_bytes is None and doc.upload_id is None:
+            # The object arrived but neither /complete nor its notification was processed.
+            self.completions[doc.id] = obj
+
+    def unreferenced_object(self, obj: ObjectInfo) -> None:
+        if obj.last_modified is not None and obj.last_modified >= self.cutoff:
+            return
+        if obj.key.endswith(PREVIEW_SUFFIX):
+            self.preview_keys.append(obj.key)
+        else:
+            self.orphan_keys.append(obj.key)
+
+    def missing_object(self, doc: Row) -> None:
+        self.report.documents_checked += 1
+        if doc.size_bytes is None:
+            if self._is_stale(doc):
+                self.stale_documents.append(doc)
+        else:
+            # Completed upload whose object is gone: needs a human, never auto-deleted.
+            self.report.missing_objects += 1
+            if len(self.report.missing_object_document_ids) < MAX_REPORTED_IDS:
+                self.report.missing_object_document_ids.append(doc.id)
+            logger.warning("Document %s references missing object %s", doc.id, doc.s3_key)
+
+    def pending(self) -> int:
+        return len(self.completions) + len(self.orphan_keys) + len(self.preview_keys) + len(self.stale_documents)
+
+    def flush(self) -> None:
+        """Apply queued actions in bulk: one commit, then one batched storage delete."""
+        if self.preview_keys:
+            # A thumbnail is orphaned only when no document references its original.
+            bases = {key[: -len(PREVIEW_SUFFIX)]: key for key in self.preview_keys}
+            live = set(self.session.exec(select(Document.s3_key).where(Document.s3_key.in_(bases))).all())
+            self.orphan_keys.extend(key for base, key in bases.items() if base not in live)
+
+        report = self.report
+        report.documents_completed += len(self.completions)
+        report.stale_documents_deleted += len(self.stale_documents)
+        report.orphan_objects_deleted += len(self.orphan_keys)
+        if not self.dry_run:
+            docs = self.session.exec(
+                select(Document).where(Document.id.in_(self.completions), Document.size_bytes.is_(None))
+            ).all() if self.completions else []
+            redundant = complete_documents(
+                self.session, [(doc, self.completions[doc.id]) for doc in docs], source="reconciliation"
+            )
+            if self.stale_documents:
+                self.session.exec(
+                    delete(Document).where(
+                        Document.id.in_([doc.id for doc in self.stale_documents]),
+                        Document.size_bytes.is_(None),  # completed since it was read
+                    )
+                )
+            self.session.commit()
+            for doc in self.stale_documents:
+                if doc.upload_id:
+                    try:
+                        self.storage.abort_multipart(doc.s3_key, doc.upload_id)
+                    except StorageError:
+                        pass  # already aborted by the bucket lifecycle rule
+            keys = self.orphan_keys + redundant
+            if keys:
+                self.storage.delete_many(keys)
+        self.completions, self.orphan_keys, self.preview_keys, self.stale_documents = {}, [], [], []
+
+
+def reconcile_storage(
+    session: Session,
+    storage: StorageBackend,
+    *,
+    prefix: str = "documents/",
+    page_size: int = 1000,
+    grace: Optional[timedelta] = None,
+    dry_run: bool = False,
+) -> ReconcileReport:
+    """
+    Compare stored objects under `prefix` with Document rows and clean up both sides.
+
+    Storage is listed page by page and Document rows are read in keyset pages
+    in the same key order, so the two are merge-joined in a single pass with
+    bounded memory. Then:
+
+    - objects no document references (and thumbnails of such objects) are deleted;
+    - pending documents whose object exists are completed (missed notification);
+    - pending documents with no object are deleted once stale: older than the
+      grace period, or for multipart uploads older than the lifecycle abort;
+    - completed documents with no object are only reported.
+
+    Anything younger than the grace period is left alone, as it may belong to
+    an upload in flight. With dry_run nothing is changed; the report shows what
+    would be.
+    """
+    grace = timedelta(hours=settings.reconcile_grace_hours) if grace is None else grace
+    reconciler = _Reconciler(session, storage, grace, dry_run, batch_size=page_size)
+    objects = _iter_objects(storage, prefix, page_size)
+    documents = _iter_documents(session, prefix, page_size)
+    obj = next(objects, None)
+    doc = next(documents, None)
+
+    with metrics.timer("reconcile.seconds"):
+        while obj is not None or doc is not None:
+            if doc is None or (obj is not None and obj.key < doc.s3_key):
+                reconciler.report.objects_listed += 1
+                reconciler.unreferenced_object(obj)
+                obj = next(objects, None)
+            elif obj is None or doc.s3_key < obj.key:
+                reconciler.missing_object(doc)
+                doc = next(documents, None)
+            else:
+                reconciler.report.objects_listed += 1
+                key = obj.key
+                while doc is not None and doc.s3_key == key:  # deduplicated content: many rows, one object
+                    reconciler.matched(obj, doc)
+                    doc = next(documents, None)
+                obj = next(objects, None)
+            if reconciler.pending() >= reconciler.batch_size:
+                reconciler.flush()
+        reconciler.flush()
+
+    report = reconciler.report
+    for name in ("documents_completed", "orphan_objects_deleted", "stale_documents_deleted", "missing_objects"):
+        metrics.counter(f"reconcile.{name}").inc(getattr(report, name))
+    return report
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Iterator, Optional
+
+from app.services.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_attempts: int = 3
+    base_delay: float = 0.1
+    max_delay: float = 2.0
+
+    def delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before retry number `attempt` (1-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket: `rate` tokens per second, up to `burst`.
+    `acquire(n)` reserves n tokens and sleeps off any deficit, so callers
+    are spaced out to a downstream rate. A rate of 0 disables it.
+    Time spent waiting is recorded in the `metric` histogram.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        metric: str = "rate_limited_seconds",
+    ) -> None:
+        self.rate = rate
+        self.metric = metric
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._updated = clock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Returns the seconds waited."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            metrics.histogram(self.metric).observe(wait)
+            self._sleep(wait)
+        return wait
+
+
+class RestartingProcessPool:
+    """
+    ProcessPoolExecutor that is replaced when a worker process dies.
+
+    A segfault or OOM kill in one child breaks the whole executor: every
+    pending future fails with BrokenProcessPool and later submits raise it.
+    `run_each` rebuilds the pool and reruns the jobs it took down one at a
+    time, so only the input that actually crashes a process fails.
+    """
+
+    def __init__(self, max_workers: int, name: str) -> None:
+        self.max_workers = max_workers
+        self.name = name
+        self._pool = ProcessPoolExecutor(max_workers=max_workers)
+
+    def __enter__(self) -> "RestartingProcessPool":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._pool.shutdown()
+
+    def restart(self) -> None:
+        broken, self._pool = self._pool, ProcessPoolExecutor(max_workers=self.max_workers)
+        broken.shutdown(wait=False, cancel_futures=True)
+        metrics.counter(f"{self.name}.pool_restarts").inc()
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        try:
+            return self._pool.submit(fn, *args)
+        except BrokenProcessPool:
+            self.restart()
+            return self._pool.submit(fn, *args)
+
+    def run_each(
+        self, fn: Callable[..., Any], jobs: dict[Hashable, tuple]
+    ) -> Iterator[tuple[Hashable, Future, float]]:
+        """
+        Run `fn(*args)` for every job and yield (key, finished future, seconds).
+        A job that crashes its process on its own yields a future raising
+        BrokenProcessPool.
+        """
+        started = time.perf_counter()
+        futures = {key: self.submit(fn, *args) for key, args in jobs.items()}
+        broken = []
+        for key, future in futures.items():
+            if isinstance(future.exception(), BrokenProcessPool):
+                broken.append(key)
+            else:
+                yield key, future, time.perf_counter() - started
+        if broken:
+            self.restart()
+        for key in broken:
+            started = time.perf_counter()
+            future = self.submit(fn, *jobs[key])
+            if isinstance(future.exception(), BrokenProcessPool):
+                logger.warning("%s job %s crashed a worker process", self.name, key)
+                self.restart()
+            yield key, future, time.perf_counter() - started
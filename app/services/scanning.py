@@ -0,0 +1,348 @@
+from __future__ import annotations
+
+import logging
+import random
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, Optional, Protocol
+
+from sqlalchemy import or_, update
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app.core.config import get_settings
+from app.models.document import Document
+from app.services.audit import log_event
+from app.services.content_store import HashingStream, attach_content, record_scan_result
+from app.services.metrics import metrics
+from app.services.storage import is_transient_error
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Reads a stored object as a stream of chunks.
+ReadObjectFn = Callable[[str], Iterable[bytes]]
+# Deletes a stored object (redundant copies after content deduplication).
+DeleteObjectFn = Callable[[str], None]
+
+# EICAR anti-virus test file; every real scanner reports it.
+EICAR_SIGNATURE = rb"X5O!P%@AP[4\PZX54(P^)7CC)7}$EICAR-STANDARD-ANTIVIRUS-TEST-FILE!$H+H*"
+
+
+@dataclass
+class ScanResult:
+    status: str  # clean, infected, failed
+    signature: Optional[str] = None
+    sha256: Optional[str] = None  # set when the whole object was read
+
+
+class TransientScanError(Exception):
+    """Failure worth retrying (storage hiccup, scanner unavailable)."""
+
+
+class Scanner(Protocol):
+    def scan(self, chunks: Iterable[bytes]) -> ScanResult: ...
+
+
+class SignatureScanner:
+    """
+    Stub scanner matching byte signatures in a stream (EICAR by default).
+
+    Keeps an overlap of len(longest signature) - 1 bytes between chunks so
+    signatures split across chunk boundaries are still found.
+    """
+
+    def __init__(self, signatures: Optional[dict[str, bytes]] = None) -> None:
+        self.signatures = signatures or {"Eicar-Test-Signature": EICAR_SIGNATURE}
+        self._overlap = max(len(s) for s in self.signatures.values()) - 1
+
+    def scan(self, chunks: Iterable[bytes]) -> ScanResult:
+        tail = b""
+        for chunk in chunks:
+            window = tail + chunk
+            for name, signature in self.signatures.items():
+                if signature in window:
+                    return ScanResult(status="infected", signature=name)
+            tail = window[-self._overlap :] if self._overlap else b""
+        return ScanResult(status="clean")
+
+
+class ClamdScanner:
+    """Streams objects to a clamd daemon with the INSTREAM command."""
+
+    def __init__(self, host: str, port: int, timeout: float = 30.0) -> None:
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+
+    def scan(self, chunks: Iterable[bytes]) -> ScanResult:
+        try:
+            with socket.create_connection((self.host, self.port), timeout=self.timeout) as conn:
+                conn.sendall(b"zINSTREAM\0")
+                for chunk in chunks:
+                    if chunk:
+                        conn.sendall(struct.pack("!I", len(chunk)) + chunk)
+                conn.sendall(struct.pack("!I", 0))
+                reply = b""
+                while not reply.endswith(b"\0"):
+                    data = conn.recv(4096)
+                    if not data:
+                        break
+                    reply += data
+        except OSError as exc:
+            raise TransientScanError(f"clamd unavailable: {exc}") from exc
+
+        answer = reply.rstrip(b"\0").decode(errors="replace")
+        if answer.endswith("OK"):
+            return ScanResult(status="clean")
+        if answer.endswith("FOUND"):
+            return ScanResult(status="infected", signature=answer.split(":", 1)[-1].rsplit(" ", 1)[0].strip())
+        # e.g. "INSTREAM size limit exceeded. ERROR"
+        raise RuntimeError(f"clamd error: {answer}")
+
+
+def get_scanner() -> Scanner:
+    if settings.scan_backend == "clamd":
+        return ClamdScanner(settings.clamd_host, settings.clamd_port)
+    return SignatureScanner()
+
+
+def _ready_for_scan(now: datetime, lease: timedelta, max_attempts: int):
+    """
+    Completed uploads that are pending, or whose scanning lease expired
+    (worker died), and that have claims left.
+    """
+    return (
+        Document.size_bytes.is_not(None),
+        Document.upload_id.is_(None),
+        Document.scan_attempts < max_attempts,
+        or_(
+            Document.scanned_status == "pending",
+            (Document.scanned_status == "scanning") & (Document.scan_claimed_at < now - lease),
+        ),
+    )
+
+
+def fail_exhausted(session: Session, lease_seconds: int, max_attempts: int) -> int:
+    """
+    Mark documents failed whose last lease expired with no claims left (a
+    file that keeps crashing or hanging the worker). Does not commit.
+    """
+    now = datetime.utcnow()
+    failed = session.exec(
+        update(Document)
+        .where(
+            Document.scanned_status == "scanning",
+            Document.scan_claimed_at < now - timedelta(seconds=lease_seconds),
+            Document.scan_attempts >= max_attempts,
+        )
+        .values(scanned_status="failed", scan_claimed_at=None)
+    ).rowcount
+    if failed:
+        metrics.counter("scan.exhausted").inc(failed)
+        logger.warning("Marked %d documents failed after %d scan attempts", failed, max_attempts)
+    return failed
+
+
+def claim_pending(
+    session: Session, limit: int, lease_seconds: int, max_attempts: Optional[int] = None
+) -> list[tuple[int, str]]:
+    """
+    Claim up to `limit` documents for this worker and return (id, s3_key).
+
+    Each claim counts as an attempt; documents out of attempts are moved to
+    failed instead of being reclaimed. Uses SELECT ... FOR UPDATE SKIP LOCKED
+    so concurrent workers never claim the same rows (the clause is omitted
+    on SQLite, which has one writer).
+    """
+    max_attempts = max_attempts or settings.scan_max_attempts
+    fail_exhausted(session, lease_seconds, max_attempts)
+    now = datetime.utcnow()
+    docs = session.exec(
+        select(Document)
+        .where(*_ready_for_scan(now, timedelta(seconds=lease_seconds), max_attempts))
+        .order_by(Document.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).all()
+    claimed = []
+    for doc in docs:
+        doc.scanned_status = "scanning"
+        doc.scan_claimed_at = now
+        doc.scan_attempts = (doc.scan_attempts or 0) + 1
+        session.add(doc)
+        claimed.append((doc.id, doc.s3_key))
+    session.commit()
+    return claimed
+
+
+def record_results(session: Session, results: list[tuple[int, ScanResult]]) -> list[str]:
+    """
+    Write a batch of results: one UPDATE per status, content hashes, audit events
+    for infections, one commit.
+
+    Returns storage keys made redundant by content deduplication; delete them
+    after this returns.
+    """
+    # A declared checksum (multipart uploads) that the content does not match fails the document.
+    hashed = [document_id for document_id, result in results if result.sha256 and result.status == "clean"]
+    expected: dict[int, str] = {}
+    if hashed:
+        expected = dict(
+            session.exec(
+                select(Document.id, Document.expected_sha256).where(
+                    Document.id.in_(hashed), Document.expected_sha256.is_not(None)
+                )
+            ).all()
+        )
+    mismatched = {document_id for document_id, result in results if expected.get(document_id, result.sha256) != result.sha256}
+    if mismatched:
+        logger.warning("Documents %s do not match their declared SHA-256", sorted(mismatched))
+        metrics.counter("scan.checksum_mismatch").inc(len(mismatched))
+        results = [(i, ScanResult(status="failed") if i in mismatched else r) for i, r in results]
+
+    by_status: dict[str, list[int]] = {}
+    for document_id, result in results:
+        by_status.setdefault(result.status, []).append(document_id)
+    for scan_status, ids in by_status.items():
+        session.exec(
+            update(Document)
+            .where(Document.id.in_(ids), Document.scanned_status == "scanning")
+            .values(scanned_status=scan_status, scan_claimed_at=None)
+        )
+    redundant_keys = []
+    for document_id, result in results:
+        if result.sha256:
+            doc = session.get(Document, document_id)
+            if doc is not None:
+                key = attach_content(session, doc, result.sha256)
+                if key:
+                    redundant_keys.append(key)
+                record_scan_result(session, result.sha256, result.status)
+        if result.status == "infected":
+            log_event(
+                session,
+                user_id=None,
+                action="document_infected",
+                resource_type="document",
+                resource_id=str(document_id),
+                metadata={"signature": result.signature},
+                commit=False,
+            )
+    session.commit()
+    return redundant_keys
+
+
+def scan_document(
+    key: str,
+    scanner: Scanner,
+    read_object: ReadObjectFn,
+    max_attempts: int = 3,
+    backoff_base: float = 0.5,
+) -> ScanResult:
+    """
+    Scan one object, retrying transient failures with jittered exponential backoff.
+
+    The object is hashed in the same pass. Permanent failures (missing object,
+    scanner error) yield status "failed".
+    """
+    for attempt in range(1, max_attempts + 1):
+        started = time.perf_counter()
+        try:
+            stream = HashingStream(read_object(key))
+            result = scanner.scan(stream)
+            result.sha256 = stream.sha256
+            metrics.histogram("scan.latency_seconds").observe(time.perf_counter() - started)
+            return result
+        except Exception as exc:
+            if not (isinstance(exc, TransientScanError) or is_transient_error(exc)) or attempt == max_attempts:
+                logger.warning("Scan of %s failed: %s", key, exc)
+                return ScanResult(status="failed", signature=None)
+            metrics.counter("scan.retries").inc()
+            time.sleep(backoff_base * (2 ** (attempt - 1)) * (0.5 + random.random()))
+    return ScanResult(status="failed")
+
+
+class _MeteredReader:
+    """Wraps a reader to count bytes scanned."""
+
+    def __init__(self, read_object: ReadObjectFn) -> None:
+        self._read_object = read_object
+
+    def __call__(self, key: str) -> Iterable[bytes]:
+        bytes_read = metrics.counter("scan.bytes")
+        for chunk in self._read_object(key):
+            bytes_read.inc(len(chunk))
+            yield chunk
+
+
+def run_scan_worker(
+    engine: Engine,
+    read_object: ReadObjectFn,
+    scanner: Optional[Scanner] = None,
+    *,
+    delete_object: Optional[DeleteObjectFn] = None,
+    concurrency: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    poll_interval: float = 5.0,
+    once: bool = False,
+    stop: Optional[threading.Event] = None,
+) -> int:
+    """
+    Claim pending documents in batches, scan them on a thread pool and write results in batches.
+
+    Objects whose content is already stored under another key are deduplicated
+    and, if `delete_object` is given, the redundant copy is removed.
+
+    Returns the number of documents processed. With once=True, stops when no
+    pending documents remain; otherwise polls until `stop` is set.
+    """
+    scanner = scanner or get_scanner()
+    concurrency = concurrency or settings.scan_concurrency
+    batch_size = batch_size or settings.scan_batch_size
+    stop = stop or threading.Event()
+    reader = _MeteredReader(read_object)
+    processed = 0
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="scan") as pool:
+        while not stop.is_set():
+            with Session(engine) as session:
+                claimed = claim_pending(session, batch_size, settings.scan_lease_seconds)
+            if not claimed:
+                if once:
+                    break
+                stop.wait(poll_interval)
+                continue
+
+            started = time.perf_counter()
+            outcomes = list(
+                pool.map(
+                    lambda item: (
+                        item[0],
+                        scan_document(item[1], scanner, reader, max_attempts=settings.scan_max_attempts),
+                    ),
+                    claimed,
+                )
+            )
+            with Session(engine) as session:
+                redundant_keys = record_results(session, outcomes)
+            if delete_object:
+                for key in redundant_keys:
+                    try:
+                        delete_object(key)
+                    except Exception as exc:  # orphan is harmless; reconciliation removes it
+                        logger.warning("Could not delete duplicate object %s: %s", key, exc)
+
+            elapsed = time.perf_counter() - started
+            metrics.histogram("scan.batch_seconds").observe(elapsed)
+            for _, result in outcomes:
+                metrics.counter(f"scan.documents.{result.status}").inc()
+            processed += len(outcomes)
+            logger.info("Scanned %d documents in %.2fs (%.1f docs/s)", len(outcomes), elapsed, len(outcomes) / elapsed if elapsed else 0.0)
+    return processed
@@ -0,0 +1,450 @@
+from __future__ import annotations
+
+import base64
+import html
+import json
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import datetime
+from typing import Optional, Sequence
+
+from sqlalchemy import and_, event, false, func, inspect, literal, literal_column, or_, text
+from sqlmodel import Session, select
+
+from app.models.applicant import Applicant
+from app.models.document import DocumentText
+from app.models.message import Message
+from app.models.user import User
+
+
+# Field weights mirror the setweight() labels used by the PostgreSQL trigger:
+# A = name, B = education / country / destination, C = owner email.
+WEIGHT_A = 1.0
+WEIGHT_B = 0.4
+WEIGHT_C = 0.2
+
+PREFIX_MATCH = 0.8
+FUZZY_MATCH = 0.6
+TRIGRAM_THRESHOLD = 0.3
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(value: Optional[str]) -> list[str]:
+    """Lowercase word tokens (emails split on punctuation, like the 'simple' text search config)."""
+    if not value:
+        return []
+    return _TOKEN_RE.findall(value.lower())
+
+
+def trigrams(token: str) -> set[str]:
+    """pg_trgm-style trigrams: two leading blanks, one trailing blank."""
+    padded = f"  {token} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def trigram_similarity(a: str, b: str) -> float:
+    ta, tb = trigrams(a), trigrams(b)
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
+
+
+def encode_cursor(score: float, row_id: int) -> str:
+    raw = json.dumps([score, row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[float, int]:
+    """Decode an opaque (score, id) cursor. Raises ValueError on malformed input."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        score, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return float(score), int(row_id)
+    except Exception as exc:  # binascii, json and unpacking errors
+        raise ValueError("Invalid cursor") from exc
+
+
+class ApplicantSearchIndex:
+    """
+    In-process inverted index over applicant search fields.
+
+    Used when PostgreSQL full-text search is not available (SQLite tests,
+    small installs). The index catches up by reading rows whose
+    (updated_at, id) is past its watermark, so inserts, edits, merges and
+    archiving are all picked up; a re-read row replaces its old postings.
+    A change to an owner's email bumps their applicants' updated_at (see
+    `_touch_owned_applicants`) so it is re-read too.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._postings: dict[str, dict[int, float]] = defaultdict(dict)  # token -> {applicant_id: weight}
+        self._trigram_tokens: dict[str, set[str]] = defaultdict(set)  # trigram -> tokens
+        self._vocabulary: list[str] = []  # sorted, for prefix lookups
+        self._owners: dict[int, int] = {}  # applicant_id -> account_user_id
+        self._tokens: dict[int, set[str]] = {}  # applicant_id -> tokens it is posted under
+        self._watermark: tuple[datetime, int] = (datetime.min, 0)  # last (updated_at, id) read
+
+    def reset(self) -> None:
+        with self._lock:
+            self._postings.clear()
+            self._trigram_tokens.clear()
+            self._vocabulary.clear()
+            self._owners.clear()
+            self._tokens.clear()
+            self._watermark = (datetime.min, 0)
+
+    def add(self, applicant: Applicant, owner_email: Optional[str]) -> None:
+        """Index (or re-index) one applicant; archived applicants are dropped."""
+        fields = (
+            (WEIGHT_A, applicant.first_name),
+            (WEIGHT_A, applicant.last_name),
+            (WEIGHT_B, applicant.latest_education),
+            (WEIGHT_B, applicant.country_of_residence),
+            (WEIGHT_B, applicant.study_destination),
+            (WEIGHT_C, owner_email),
+        )
+        with self._lock:
+            self._remove(applicant.id)
+            if applicant.status == "archived":
+                return
+            tokens = self._tokens[applicant.id] = set()
+            for weight, value in fields:
+                for token in tokenize(value):
+                    tokens.add(token)
+                    posting = self._postings.get(token)
+                    if posting is None:
+                        posting = self._postings[token]
+                        insort(self._vocabulary, token)
+                        for gram in trigrams(token):
+                            self._trigram_tokens[gram].add(token)
+                    if posting.get(applicant.id, 0.0) < weight:
+                        posting[applicant.id] = weight
+            self._owners[applicant.id] = applicant.account_user_id
+
+    def remove(self, applicant_id: int) -> None:
+        with self._lock:
+            self._remove(applicant_id)
+
+    def _remove(self, applicant_id: int) -> None:
+        """Drop one applicant's postings; the caller holds the lock."""
+        self._owners.pop(applicant_id, None)
+        for token in self._tokens.pop(applicant_id, ()):
+            self._postings[token].pop(applicant_id, None)
+
+    def refresh(self, session: Session, chunk_size: int = 1000) -> None:
+        """Index applicants created or updated since the last refresh."""
+        while True:
+            since, since_id = self._watermark
+            rows = session.exec(
+                select(Applicant, User.email)
+                .join(User, User.id == Applicant.account_user_id, isouter=True)
+                .where(
+                    or_(
+                        Applicant.updated_at > since,
+                        and_(Applicant.updated_at == since, Applicant.id > since_id),
+                    )
+                )
+                .order_by(Applicant.updated_at, Applicant.id)
+                .limit(chunk_size)
+            ).all()
+            for applicant, email in rows:
+                self.add(applicant, email)
+            if rows:
+                last = rows[-1][0]
+                with self._lock:
+                    self._watermark = max(self._watermark, (last.updated_at, last.id))
+            if len(rows) < chunk_size:
+                return
+
+    def _matches(self, term: str) -> dict[int, float]:
+        """Best match score per applicant for one query term: exact, prefix, then trigram."""
+        candidates: dict[str, float] = {}
+        if term in self._postings:
+            candidates[term] = 1.0
+        start = bisect_left(self._vocabulary, term)
+        for token in self._vocabulary[start:]:
+            if not token.startswith(term):
+                break
+            candidates.setdefault(token, PREFIX_MATCH)
+        if len(term) >= 3:
+            seen: set[str] = set()
+            for gram in trigrams(term):
+                seen |= self._trigram_tokens.get(gram, set())
+            for token in seen - candidates.keys():
+                sim = trigram_similarity(term, token)
+                if sim >= TRIGRAM_THRESHOLD:
+                    candidates[token] = FUZZY_MATCH * sim
+
+        scores: dict[int, float] = {}
+        for token, quality in candidates.items():
+            for applicant_id, weight in self._postings[token].items():
+                score = quality * weight
+                if score > scores.get(applicant_id, 0.0):
+                    scores[applicant_id] = score
+        return scores
+
+    def search(self, query: str, owner_id: Optional[int] = None) -> list[tuple[float, int]]:
+        """Return (score, applicant_id) for applicants matching every query term, best first."""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        with self._lock:
+            totals: Optional[dict[int, float]] = None
+            for term in terms:
+                matches = self._matches(term)
+                if totals is None:
+                    totals = matches
+                else:
+                    totals = {aid: totals[aid] + s for aid, s in matches.items() if aid in totals}
+                if not totals:
+                    return []
+            owners = self._owners
+            hits = [
+                (round(score, 6), aid)
+                for aid, score in totals.items()
+                if aid in owners and (owner_id is None or owners[aid] == owner_id)
+            ]
+        hits.sort(key=lambda hit: (hit[0], hit[1]), reverse=True)
+        return hits
+
+
+applicant_index = ApplicantSearchIndex()
+
+
+@event.listens_for(User, "after_update")
+def _touch_owned_applicants(mapper, connection, user: User) -> None:
+    """The owner email is an indexed field: re-date their applicants so refresh re-reads them."""
+    if inspect(user).attrs.email.history.has_changes():
+        table = Applicant.__table__
+        connection.execute(
+            table.update().where(table.c.account_user_id == user.id).values(updated_at=datetime.utcnow())
+        )
+
+_pg_search_ready: dict[tuple[str, str], bool] = {}
+
+
+def postgres_search_available(session: Session, table: str = "applicant") -> bool:
+    """True when running on PostgreSQL with `table`'s search_vector migration applied."""
+    bind = session.get_bind()
+    if bind.dialect.name != "postgresql":
+        return False
+    key = (str(bind.engine.url), table)
+    if key not in _pg_search_ready:
+        columns = {c["name"] for c in inspect(bind).get_columns(table)}
+        _pg_search_ready[key] = "search_vector" in columns
+    return _pg_search_ready[key]
+
+
+_PG_SEARCH_SQL = text(
+    """
+    SELECT s.id, s.score FROM (
+        SELECT a.id,
+               (ts_rank(a.search_vector, q.tsq) + word_similarity(:q, a.search_text))::double precision AS score
+        FROM applicant a, plainto_tsquery('simple', :q) AS q(tsq)
+        WHERE (a.search_vector @@ q.tsq OR :q <% a.search_text)
+          AND a.status <> 'archived'
+          AND (CAST(:owner_id AS integer) IS NULL OR a.account_user_id = :owner_id)
+    ) s
+    WHERE CAST(:cursor_score AS double precision) IS NULL
+       OR (s.score, s.id) < (:cursor_score, :cursor_id)
+    ORDER BY s.score DESC, s.id DESC
+    LIMIT :limit
+    """
+)
+
+
+def search_applicants(
+    session: Session,
+    query: str,
+    *,
+    owner_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+) -> tuple[list[tuple[Applicant, Optional[str], float]], Optional[str]]:
+    """
+    Ranked applicant search with keyset (score, id) cursor pagination.
+
+    Returns ([(applicant, owner_email, score)], next_cursor).
+    Raises ValueError for a malformed cursor.
+    """
+    after = decode_cursor(cursor) if cursor else None
+
+    if postgres_search_available(session):
+        rows = session.execute(
+            _PG_SEARCH_SQL,
+            {
+                "q": query,
+                "owner_id": owner_id,
+                "cursor_score": after[0] if after else None,
+                "cursor_id": after[1] if after else None,
+                "limit": limit + 1,
+            },
+        ).all()
+        hits = [(float(score), row_id) for row_id, score in rows]
+    else:
+        applicant_index.refresh(session)
+        hits = applicant_index.search(query, owner_id=owner_id)
+        if after:
+            hits = [hit for hit in hits if hit < after]
+        hits = hits[: limit + 1]
+
+    next_cursor = None
+    if len(hits) > limit:
+        hits = hits[:limit]
+        next_cursor = encode_cursor(*hits[-1])
+
+    ids = [row_id for _, row_id in hits]
+    loaded = {
+        applicant.id: (applicant, email)
+        for applicant, email in session.exec(
+            select(Applicant, User.email)
+            .join(User, User.id == Applicant.account_user_id, isouter=True)
+            .where(Applicant.id.in_(ids), Applicant.status != "archived")
+        ).all()
+    } if ids else {}
+    results = [
+        (loaded[row_id][0], loaded[row_id][1], score)
+        for score, row_id in hits
+        if row_id in loaded
+    ]
+    return results, next_cursor
+
+
+# ---------------------------------------------------------------------------
+# Message search
+# ---------------------------------------------------------------------------
+
+# Highlight markers are control characters so the body can be HTML-escaped
+# after highlighting and only our own <mark> tags survive.
+_MARK_START = "\x02"
+_MARK_STOP = "\x03"
+# Snippets are cut from this much of a document's text at most.
+SNIPPET_SOURCE_CHARS = 20_000
+_HEADLINE_OPTIONS = (
+    f"StartSel={_MARK_START}, StopSel={_MARK_STOP}, "
+    "MaxWords=25, MinWords=8, MaxFragments=2, FragmentDelimiter=\" … \""
+)
+
+
+def render_snippet(marked: str) -> str:
+    """HTML-escape a marked snippet and turn the markers into <mark> tags."""
+    escaped = html.escape(marked, quote=False)
+    return escaped.replace(_MARK_START, "<mark>").replace(_MARK_STOP, "</mark>")
+
+
+def like_pattern(term: str) -> str:
+    """`%term%` with LIKE wildcards in the term escaped; use with escape="\\"."""
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def highlight(body: str, terms: Sequence[str], radius: int = 60) -> str:
+    """Plain-Python equivalent of ts_headline: a window around the first hit with terms marked."""
+    if not terms:
+        return render_snippet(body[: radius * 2])
+    pattern = re.compile("|".join(re.escape(t) for t in terms), re.IGNORECASE)
+    first = pattern.search(body)
+    start = max(0, first.start() - radius) if first else 0
+    end = min(len(body), (first.end() if first else 0) + radius)
+    window = pattern.sub(lambda m: f"{_MARK_START}{m.group(0)}{_MARK_STOP}", body[start:end])
+    prefix = "… " if start > 0 else ""
+    suffix = " …" if end < len(body) else ""
+    return render_snippet(prefix + window + suffix)
+
+
+def message_search_query(statement, session: Session, query: str):
+    """
+    Add full-text matching, ranking and a snippet column to a select(Message) statement.
+
+    PostgreSQL matches and ranks on the stored, GIN-indexed
+    message.search_vector (migration 20261019_message_search_vector), so
+    bodies are not re-parsed per hit; the headline covers a bounded prefix.
+    Other dialects fall back to ANDed case-insensitive LIKE filters;
+    snippets are built by `highlight`.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        config = literal_column("'english'")
+        if postgres_search_available(session, "message"):
+            document = literal_column("message.search_vector")
+        else:
+            document = func.to_tsvector(config, Message.body)
+        tsquery = func.websearch_to_tsquery(config, query)
+        prefix = func.substr(Message.body, 1, SNIPPET_SOURCE_CHARS)
+        headline = func.ts_headline(config, prefix, tsquery, _HEADLINE_OPTIONS)
+        return (
+            statement.add_columns(headline)
+            .where(document.op("@@")(tsquery))
+            .order_by(func.ts_rank(document, tsquery).desc(), Message.created_at.desc())
+        )
+
+    terms = tokenize(query)
+    if not terms:
+        return statement.add_columns(literal(None)).where(false())
+    for term in terms:
+        statement = statement.where(Message.body.ilike(like_pattern(term), escape="\\"))
+    return statement.add_columns(literal(None)).order_by(Message.created_at.desc())
+
+
+def message_snippet(message: Message, headline: Optional[str], query: str) -> str:
+    if headline is not None:
+        return render_snippet(headline)
+    return highlight(message.body, tokenize(query))
+
+
+# ---------------------------------------------------------------------------
+# Document content search
+# ---------------------------------------------------------------------------
+
+
+def document_search_query(statement, session: Session, query: str):
+    """
+    Add full-text matching, ranking and a DocumentText.id column to a
+    statement selecting Document joined to DocumentText.
+
+    PostgreSQL matches and ranks on the stored, GIN-indexed
+    documenttext.search_vector (migration 20261019_document_text_vector),
+    so bodies are not re-parsed per hit. Other dialects fall back to ANDed
+    LIKE filters. Snippets for the returned page come from `document_snippets`.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        config = literal_column("'english'")
+        if postgres_search_available(session, "documenttext"):
+            document = literal_column("documenttext.search_vector")
+        else:
+            document = func.to_tsvector(config, DocumentText.body)
+        tsquery = func.websearch_to_tsquery(config, query)
+        return (
+            statement.add_columns(DocumentText.id)
+            .where(document.op("@@")(tsquery))
+            .order_by(func.ts_rank(document, tsquery).desc(), DocumentText.id.desc())
+        )
+
+    terms = tokenize(query)
+    if not terms:
+        return statement.add_columns(DocumentText.id).where(false())
+    for term in terms:
+        statement = statement.where(DocumentText.body.ilike(like_pattern(term), escape="\\"))
+    return statement.add_columns(DocumentText.id).order_by(DocumentText.id.desc())
+
+
+def document_snippets(session: Session, text_ids: Sequence[int], query: str) -> dict[int, str]:
+    """
+    Highlighted snippets for one page of hits, by DocumentText id. Only the
+    first SNIPPET_SOURCE_CHARS of each body are headlined, so the cost is
+    bounded by the page size rather than the document size.
+    """
+    if not text_ids:
+        return {}
+    prefix = func.substr(DocumentText.body, 1, SNIPPET_SOURCE_CHARS)
+    if session.get_bind().dialect.name == "postgresql":
+        config = literal_column("'english'")
+        headline = func.ts_headline(config, prefix, func.websearch_to_tsquery(config, query), _HEADLINE_OPTIONS)
+        rows = session.execute(select(DocumentText.id, headline).where(DocumentText.id.in_(text_ids))).all()
+        return {text_id: render_snippet(marked) for text_id, marked in rows}
+    terms = tokenize(query)
+    rows = session.execute(select(DocumentText.id, prefix).where(DocumentText.id.in_(text_ids))).all()
+    return {text_id: highlight(source, terms) for text_id, source in rows}
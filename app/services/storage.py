@@ -0,0 +1,623 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import shutil
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional, TypeVar, Union
+from urllib.parse import quote, urlencode
+
+import anyio
+import boto3
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+
+from app.core.config import get_settings
+from app.services.metrics import metrics
+from app.services.resilience import RetryPolicy
+
+
+settings = get_settings()
+T = TypeVar("T")
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+class StorageError(Exception):
+    """A storage operation failed. `transient` errors are worth retrying."""
+
+    def __init__(self, message: str, transient: bool = False) -> None:
+        super().__init__(message)
+        self.transient = transient
+
+
+class ObjectNotFound(StorageError):
+    pass
+
+
+class InvalidUpload(StorageError):
+    """The store rejected the request itself (e.g. bad multipart part list)."""
+
+
+class StorageTimeout(StorageError):
+    def __init__(self, message: str) -> None:
+        super().__init__(message, transient=True)
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """Throttling, 5xx, timeouts and connection failures; not missing objects or bad requests."""
+    if isinstance(exc, StorageError):
+        return exc.transient
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    if isinstance(exc, ClientError):
+        code = exc.response.get("Error", {}).get("Code", "")
+        http_status = exc.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+        return http_status >= 500 or code in ("SlowDown", "Throttling", "RequestTimeout")
+    return isinstance(exc, BotoCoreError)
+
+
+def parse_range(header: str, total: int) -> tuple[int, int]:
+    """Parse a single `bytes=` range. Raises ValueError if malformed or unsatisfiable."""
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        raise ValueError("Unsupported range")
+    first, _, last = spec.strip().partition("-")
+    if first:
+        start = int(first)
+        end = int(last) if last else total - 1
+    else:
+        start, end = total - int(last), total - 1  # suffix range: last N bytes
+    start, end = max(start, 0), min(end, total - 1)
+    if start > end:
+        raise ValueError("Unsatisfiable range")
+    return start, end
+
+
+def object_name(filename: str) -> str:
+    """Last path segment of a client-supplied filename, safe to use as the final segment of an object key."""
+    name = filename.replace("\\", "/").rsplit("/", 1)[-1]
+    name = "".join(ch for ch in name if ch >= " " and ch != "\x7f").strip().lstrip(".")
+    return name or "file"
+
+
+def content_disposition(filename: str) -> str:
+    """`attachment` header value for `filename`: an ASCII fallback plus RFC 6266 `filename*`."""
+    fallback = "".join(ch if " " <= ch < "\x7f" and ch not in '"\\' else "_" for ch in filename)
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+
+@dataclass
+class ObjectInfo:
+    size: Optional[int]
+    etag: Optional[str] = None  # without quotes
+    checksum_sha256: Optional[str] = None  # base64, when the store verified one
+    key: Optional[str] = None  # set by list_objects
+    last_modified: Optional[datetime] = None  # naive UTC
+
+
+class StorageBackend(ABC):
+    """
+    Object storage used for documents and uploads.
+
+    Methods are blocking; the `a*` variants run them on a dedicated, bounded
+    thread pool with an overall timeout and retries, so a slow store cannot
+    tie up the event loop or the request thread pool.
+    """
+
+    def __init__(
+        self,
+        *,
+        concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        retry: Optional[RetryPolicy] = None,
+    ) -> None:
+        self.concurrency = concurrency or settings.storage_concurrency
+        self.timeout = timeout or settings.storage_timeout_seconds
+        self.retry = retry or RetryPolicy(max_attempts=settings.storage_max_attempts)
+        self._limiter: Optional[anyio.CapacityLimiter] = None
+
+    # -- blocking interface -------------------------------------------------
+
+    @abstractmethod
+    def presign_put(self, key: str, content_type: str, checksum_sha256: Optional[str] = None, expires: int = 900) -> str:
+        ...
+
+    @abstractmethod
+    def presign_get(self, key: str, filename: Optional[str] = None, expires: int = 900) -> str:
+        ...
+
+    @abstractmethod
+    def create_multipart(self, key: str, content_type: str) -> str:
+        ...
+
+    @abstractmethod
+    def presign_part(self, key: str, upload_id: str, part_number: int, expires: int = 3600) -> str:
+        ...
+
+    @abstractmethod
+    def complete_multipart(self, key: str, upload_id: str, parts: list[tuple[int, str]]) -> None:
+        ...
+
+    @abstractmethod
+    def abort_multipart(self, key: str, upload_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def head(self, key: str) -> ObjectInfo:
+        ...
+
+    @abstractmethod
+    def read(self, key: str, offset: int = 0, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        ...
+
+    @abstractmethod
+    def write(self, key: str, data: Union[bytes, Iterable[bytes]], content_type: str) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    def delete_many(self, keys: list[str]) -> None:
+        for key in keys:
+            self.delete(key)
+
+    @abstractmethod
+    def list_objects(self, prefix: str = "", page_size: int = 1000) -> Iterator[list[ObjectInfo]]:
+        """Yield pages of objects under `prefix`, in ascending (binary) key order."""
+
+    # -- async interface ----------------------------------------------------
+
+    @property
+    def limiter(self) -> anyio.CapacityLimiter:
+        if self._limiter is None:
+            self._limiter = anyio.CapacityLimiter(self.concurrency)
+        return self._limiter
+
+    async def call(self, operation: str, fn: Callable[..., T], *args) -> T:
+        """Run a blocking storage call off the event loop with timeout and retries."""
+        started = time.perf_counter()
+        attempt = 0
+        try:
+            while True:
+                attempt += 1
+                try:
+                    with anyio.fail_after(self.timeout):
+                        return await anyio.to_thread.run_sync(
+                            partial(fn, *args), limiter=self.limiter, abandon_on_cancel=True
+                        )
+                except TimeoutError:
+                    metrics.counter("storage.timeouts").inc()
+                    error: StorageError = StorageTimeout(f"{operation} timed out after {self.timeout}s")
+                except StorageError as exc:
+                    error = exc
+                if not error.transient or attempt >= self.retry.max_attempts:
+                    raise error
+                metrics.counter("storage.retries").inc()
+                await anyio.sleep(self.retry.delay(attempt))
+        finally:
+            metrics.histogram(f"storage.{operation}_seconds").observe(time.perf_counter() - started)
+
+    async def ahead(self, key: str) -> ObjectInfo:
+        return await self.call("head", self.head, key)
+
+    async def adelete(self, key: str) -> None:
+        await self.call("delete", self.delete, key)
+
+
+def s3_client_config() -> Config:
+    """Per-call connect/read timeouts; retries are handled by StorageBackend.call."""
+    return Config(
+        connect_timeout=settings.storage_connect_timeout_seconds,
+        read_timeout=settings.storage_read_timeout_seconds,
+        retries={"mode": "standard", "total_max_attempts": 1},
+        max_pool_connections=settings.storage_concurrency,
+    )
+
+
+class S3Storage(StorageBackend):
+    def __init__(self, bucket: str, client=None, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.bucket = bucket
+        self.client = client or boto3.client("s3", region_name=settings.aws_region, config=s3_client_config())
+
+    def _translate(self, exc: ClientError) -> StorageError:
+        code = exc.response.get("Error", {}).get("Code", "")
+        http_status = exc.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+        if http_status == 404 or code in ("NoSuchKey", "NoSuchUpload", "404"):
+            return ObjectNotFound(str(exc))
+        if http_status == 400:
+            return InvalidUpload(str(exc))
+        return StorageError(str(exc), transient=is_transient_error(exc))
+
+    def _do(self, fn: Callable[..., T], **params) -> T:
+        try:
+            return fn(Bucket=self.bucket, **params)
+        except ClientError as exc:
+            raise self._translate(exc) from exc
+        except BotoCoreError as exc:
+            raise StorageError(str(exc), transient=True) from exc
+
+    def presign_put(self, key: str, content_type: str, checksum_sha256: Optional[str] = None, expires: int = 900) -> str:
+        params = {"Key": key, "ContentType": content_type}
+        if checksum_sha256:
+            # S3 rejects the PUT unless the content matches.
+            params["ChecksumSHA256"] = checksum_sha256
+        try:
+            return self.client.generate_presigned_url(
+                "put_object", Params={"Bucket": self.bucket, **params}, ExpiresIn=expires
+            )
+        except (ClientError, BotoCoreError) as exc:
+            raise StorageError(f"Failed to presign upload: {exc}") from exc
+
+    def presign_get(self, key: str, filename: Optional[str] = None, expires: int = 900) -> str:
+        params = {"Bucket": self.bucket, "Key": key}
+        if filename:
+            params["ResponseContentDisposition"] = content_disposition(filename)
+        try:
+            return self.client.generate_presigned_url("get_object", Params=params, ExpiresIn=expires)
+        except (ClientError, BotoCoreError) as exc:
+            raise StorageError(f"Failed to presign download: {exc}") from exc
+
+    def create_multipart(self, key: str, content_type: str) -> str:
+        return self._do(self.client.create_multipart_upload, Key=key, ContentType=content_type)["UploadId"]
+
+    def presign_part(self, key: str, upload_id: str, part_number: int, expires: int = 3600) -> str:
+        try:
+            return self.client.generate_presigned_url(
+                "upload_part",
+                Params={"Bucket": self.bucket, "Key": key, "UploadId": upload_id, "PartNumber": part_number},
+                ExpiresIn=expires,
+            )
+        except (ClientError, BotoCoreError) as exc:
+            raise StorageError(f"Failed to presign part: {exc}") from exc
+
+    def complete_multipart(self, key: str, upload_id: str, parts: list[tuple[int, str]]) -> None:
+        self._do(
+            self.client.complete_multipart_upload,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": [{"PartNumber": n, "ETag": etag} for n, etag in parts]},
+        )
+
+    def abort_multipart(self, key: str, upload_id: str) -> None:
+        self._do(self.client.abort_multipart_upload, Key=key, UploadId=upload_id)
+
+    def head(self, key: str) -> ObjectInfo:
+        head = self._do(self.client.head_object, Key=key, ChecksumMode="ENABLED")
+        return ObjectInfo(
+            size=head.get("ContentLength"),
+            etag=(head.get("ETag") or "").strip('"') or None,
+            checksum_sha256=head.get("ChecksumSHA256"),
+        )
+
+    def read(self, key: str, offset: int = 0, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        extra = {"Range": f"bytes={offset}-"} if offset else {}
+        body = self._do(self.client.get_object, Key=key, **extra)["Body"]
+        try:
+            yield from body.iter_chunks(chunk_size)
+        finally:
+            body.close()
+
+    def write(self, key: str, data: Union[bytes, Iterable[bytes]], content_type: str) -> None:
+        body = data if isinstance(data, bytes) else b"".join(data)
+        self._do(self.client.put_object, Key=key, Body=body, ContentType=content_type)
+
+    def delete(self, key: str) -> None:
+        self._do(self.client.delete_object, Key=key)
+
+    def delete_many(self, keys: list[str]) -> None:
+        for start in range(0, len(keys), 1000):  # DeleteObjects limit
+            batch = keys[start : start + 1000]
+            self._do(self.client.delete_objects, Delete={"Objects": [{"Key": k} for k in batch], "Quiet": True})
+
+    def list_objects(self, prefix: str = "", page_size: int = 1000) -> Iterator[list[ObjectInfo]]:
+        token = None
+        while True:
+            params = {"Prefix": prefix, "MaxKeys": page_size}
+            if token:
+                params["ContinuationToken"] = token
+            page = self._do(self.client.list_objects_v2, **params)
+            yield [
+                ObjectInfo(
+                    size=item["Size"],
+                    etag=item.get("ETag", "").strip('"') or None,
+                    key=item["Key"],
+                    last_modified=item["LastModified"].replace(tzinfo=None) if item.get("LastModified") else None,
+                )
+                for item in page.get("Contents", [])
+            ]
+            if not page.get("IsTruncated"):
+                return
+            token = page["NextContinuationToken"]
+
+
+class LocalStorage(StorageBackend):
+    """
+    Objects as files under `root` (on-prem installs, benchmarks, no cloud dependency).
+
+    "Presigned" URLs point at the API's own /api/storage/objects endpoints and
+    carry an HMAC signature and expiry, so clients upload and download exactly
+    as they would against S3. Object metadata (content type, ETag, SHA-256)
+    lives in JSON sidecars under `.meta/`; multipart parts under `.multipart/`.
+    """
+
+    def __init__(self, root: Union[str, Path], secret: str, base_url: str = "", **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.root = Path(root).resolve()
+        self.secret = secret.encode()
+        self.base_url = base_url.rstrip("/")
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    # -- paths and signatures -----------------------------------------------
+
+    def path(self, key: str) -> Path:
+        """
+        Filesystem path of an object. Rejects keys with empty, `..` or
+        dot-prefixed segments (which could reach another object's directory
+        or the `.meta`/`.multipart` sidecars) and anything escaping the root.
+        """
+        segments = key.split("/")
+        if not key or "\\" in key or "\0" in key or any(not part or part.startswith(".") for part in segments):
+            raise InvalidUpload(f"Invalid object key: {key!r}")
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root) or path == self.root:
+            raise InvalidUpload(f"Invalid object key: {key!r}")
+        return path
+
+    def _meta_path(self, key: str) -> Path:
+        return self.root / ".meta" / f"{key}.json"
+
+    def _part_dir(self, upload_id: str) -> Path:
+        if not upload_id.isalnum():
+            raise InvalidUpload("Invalid upload id")
+        return self.root / ".multipart" / upload_id
+
+    def sign(self, method: str, key: str, expires: int, **params: str) -> str:
+        payload = "\n".join([method, key, str(expires), *(f"{k}={params[k]}" for k in sorted(params))])
+        return hmac.new(self.secret, payload.encode(), hashlib.sha256).hexdigest()
+
+    def verify(self, method: str, key: str, expires: int, signature: str, **params: str) -> bool:
+        if expires < time.time():
+            return False
+        return hmac.compare_digest(self.sign(method, key, expires, **params), signature)
+
+    def _signed_url(self, method: str, key: str, expires_in: int, **params: str) -> str:
+        expires = int(time.time()) + expires_in
+        params = {k: v for k, v in params.items() if v}
+        query = urlencode({**params, "expires": expires, "signature": self.sign(method, key, expires, **params)})
+        return f"{self.base_url}/api/storage/objects/{quote(key)}?{query}"
+
+    # -- blocking interface -------------------------------------------------
+
+    def presign_put(self, key: str, content_type: str, checksum_sha256: Optional[str] = None, expires: int = 900) -> str:
+        self.path(key)
+        return self._signed_url("PUT", key, expires, content_type=content_type, checksum_sha256=checksum_sha256 or "")
+
+    def presign_get(self, key: str, filename: Optional[str] = None, expires: int = 900) -> str:
+        self.path(key)
+        return self._signed_url("GET", key, expires, filename=filename or "")
+
+    def create_multipart(self, key: str, content_type: str) -> str:
+        self.path(key)
+        upload_id = uuid.uuid4().hex
+        part_dir = self._part_dir(upload_id)
+        part_dir.mkdir(parents=True)
+        (part_dir / "upload.json").write_text(json.dumps({"key": key, "content_type": content_type}))
+        return upload_id
+
+    def presign_part(self, key: str, upload_id: str, part_number: int, expires: int = 3600) -> str:
+        return self._signed_url("PUT", key, expires, upload_id=upload_id, part_number=str(part_number))
+
+    def open_writer(self, key: str, content_type: str, upload_id: Optional[str] = None, part_number: Optional[int] = None) -> "LocalWriter":
+        """Streamed write of an object (or one multipart part); nothing is visible until commit()."""
+        if upload_id:
+            part_dir = self._part_dir(upload_id)
+            if not part_dir.is_dir():
+                raise ObjectNotFound("No such multipart upload")
+            return LocalWriter(part_dir / f"{part_number:05d}", None)
+        return LocalWriter(
+            self.path(key),
+            (self._meta_path(key), content_type),
+            on_commit=lambda size, etag: self._publish_created(key, size, etag),
+        )
+
+    def complete_multipart(self, key: str, upload_id: str, parts: list[tuple[int, str]]) -> None:
+        part_dir = self._part_dir(upload_id)
+        if not part_dir.is_dir():
+            raise ObjectNotFound("No such multipart upload")
+        content_type = json.loads((part_dir / "upload.json").read_text())["content_type"]
+        writer = LocalWriter(
+            self.path(key),
+            (self._meta_path(key), content_type),
+            on_commit=lambda size, etag: self._publish_created(key, size, etag),
+        )
+        part_md5s = []
+        try:
+            for number, etag in parts:
+                part_path = part_dir / f"{number:05d}"
+                if not part_path.is_file():
+                    raise InvalidUpload(f"Part {number} was not uploaded")
+                part_md5 = hashlib.md5()
+                with part_path.open("rb") as part:
+                    while chunk := part.read(DEFAULT_CHUNK_SIZE):
+                        part_md5.update(chunk)
+                        writer.write(chunk)
+                if part_md5.hexdigest() != etag.strip('"'):
+                    raise InvalidUpload(f"ETag mismatch for part {number}")
+                part_md5s.append(part_md5.digest())
+            # Same ETag S3 reports for multipart objects.
+            writer.commit(etag=f"{hashlib.md5(b''.join(part_md5s)).hexdigest()}-{len(parts)}")
+        except BaseException:
+            writer.abort()
+            raise
+        shutil.rmtree(part_dir, ignore_errors=True)
+
+    def abort_multipart(self, key: str, upload_id: str) -> None:
+        part_dir = self._part_dir(upload_id)
+        if not part_dir.is_dir():
+            raise ObjectNotFound("No such multipart upload")
+        shutil.rmtree(part_dir, ignore_errors=True)
+
+    def _meta(self, key: str) -> dict:
+        try:
+            return json.loads(self._meta_path(key).read_text())
+        except FileNotFoundError:
+            return {}
+
+    def head(self, key: str) -> ObjectInfo:
+        try:
+            size = self.path(key).stat().st_size
+        except FileNotFoundError:
+            raise ObjectNotFound(f"No such object: {key}") from None
+        meta = self._meta(key)
+        return ObjectInfo(size=size, etag=meta.get("etag"), checksum_sha256=meta.get("sha256"))
+
+    def content_type(self, key: str) -> str:
+        return self._meta(key).get("content_type") or "application/octet-stream"
+
+    def read(self, key: str, offset: int = 0, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        try:
+            handle = self.path(key).open("rb")
+        except FileNotFoundError:
+            raise ObjectNotFound(f"No such object: {key}") from None
+        with handle:
+            handle.seek(offset)
+            while chunk := handle.read(chunk_size):
+                yield chunk
+
+    def write(self, key: str, data: Union[bytes, Iterable[bytes]], content_type: str) -> None:
+        writer = self.open_writer(key, content_type)
+        try:
+            for chunk in [data] if isinstance(data, bytes) else data:
+                writer.write(chunk)
+            writer.commit()
+        except BaseException:
+            writer.abort()
+            raise
+
+    def delete(self, key: str) -> None:
+        for path in (self.path(key), self._meta_path(key)):
+            path.unlink(missing_ok=True)
+
+    def list_objects(self, prefix: str = "", page_size: int = 1000) -> Iterator[list[ObjectInfo]]:
+        keys = []
+        for directory, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]  # .meta, .multipart, .events
+            relative = Path(directory).relative_to(self.root).as_posix()
+            for name in filenames:
+                if name.startswith("."):  # in-progress temp files
+                    continue
+                key = name if relative == "." else f"{relative}/{name}"
+                if key.startswith(prefix):
+                    keys.append(key)
+        keys.sort()
+        for start in range(0, len(keys), page_size):
+            page = []
+            for key in keys[start : start + page_size]:
+                try:
+                    stat = (self.root / key).stat()
+                except FileNotFoundError:
+                    continue
+                page.append(
+                    ObjectInfo(
+                        size=stat.st_size,
+                        etag=self._meta(key).get("etag"),
+                        key=key,
+                        last_modified=datetime.utcfromtimestamp(stat.st_mtime),
+                    )
+                )
+            yield page
+
+    @property
+    def events_dir(self) -> Path:
+        """Object-created notifications for the local event queue (stand-in for S3 -> SQS)."""
+        return self.root / ".events"
+
+    def _publish_created(self, key: str, size: int, etag: str) -> None:
+        self.events_dir.mkdir(exist_ok=True)
+        record = {
+            "eventSource": "local:storage",
+            "eventName": "ObjectCreated:Put",
+            "s3": {"object": {"key": quote(key), "size": size, "eTag": etag}},
+        }
+        name = f"{time.time_ns()}-{uuid.uuid4().hex}.json"
+        tmp = self.events_dir / f".{name}"
+        tmp.write_text(json.dumps({"Records": [record]}))
+        os.replace(tmp, self.events_dir / name)
+
+
+class LocalWriter:
+    """Writes to a temp file while hashing; commit() atomically renames it into place."""
+
+    def __init__(
+        self,
+        path: Path,
+        meta: Optional[tuple[Path, str]],
+        on_commit: Optional[Callable[[int, str], None]] = None,
+    ) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._meta = meta
+        self._on_commit = on_commit
+        self._tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        self._handle: BinaryIO = self._tmp.open("wb")
+        self._md5 = hashlib.md5()
+        self._sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, chunk: bytes) -> None:
+        self._handle.write(chunk)
+        self._md5.update(chunk)
+        self._sha256.update(chunk)
+        self.size += len(chunk)
+
+    @property
+    def sha256(self) -> str:
+        """Base64 SHA-256 so far (S3 checksum format)."""
+        return base64.b64encode(self._sha256.digest()).decode()
+
+    def commit(self, etag: Optional[str] = None) -> str:
+        """Publish the object and return its ETag (md5 hex unless given)."""
+        etag = etag or self._md5.hexdigest()
+        self._handle.close()
+        os.replace(self._tmp, self.path)
+        if self._meta:
+            meta_path, content_type = self._meta
+            meta_path.parent.mkdir(parents=True, exist_ok=True)
+            meta_path.write_text(json.dumps({"content_type": content_type, "etag": etag, "sha256": self.sha256}))
+        if self._on_commit:
+            self._on_commit(self.size, etag)
+        return etag
+
+    def abort(self) -> None:
+        self._handle.close()
+        self._tmp.unlink(missing_ok=True)
+
+
+_storage: Optional[StorageBackend] = None
+
+
+def get_storage() -> StorageBackend:
+    """Process-wide storage backend selected by STORAGE_BACKEND (s3, local)."""
+    global _storage
+    if _storage is None:
+        if settings.storage_backend == "local":
+            _storage = LocalStorage(
+                settings.storage_local_root,
+                settings.jwt_secret_key,
+                base_url=settings.storage_public_url or "",
+            )
+        else:
+            _storage = S3Storage(settings.aws_s3_bucket)
+    return _storage
@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from app.core.config import get_settings
+from app.models.payment import Payment, StripeEvent
+from app.models.user import User
+from app.services.audit import log_event
+from app.services.metrics import metrics
+from app.services.notifications import notify
+from app.services.payment_ledger import record_refund, record_transitions
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Allowed Payment.status transitions. Events can arrive out of order or be
+# replayed; anything not listed (e.g. succeeded -> failed) is ignored.
+TRANSITIONS = {
+    "created": {"pending", "succeeded", "failed", "refunded"},
+    "pending": {"succeeded", "failed", "refunded"},
+    "failed": {"pending", "succeeded"},  # customer retried with another method
+    "succeeded": {"refunded"},
+    "refunded": set(),
+}
+
+
+def record_event(session: Session, event_id: str, event_type: str, payload: str) -> bool:
+    """
+    Persist a verified webhook event. Returns False if it was already recorded
+    (Stripe redelivery), relying on the unique stripe_event_id.
+    """
+    session.add(StripeEvent(stripe_event_id=event_id, type=event_type, payload=payload))
+    try:
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        metrics.counter("stripe.events.duplicate").inc()
+        return False
+    metrics.counter("stripe.events.received").inc()
+    return True
+
+
+def _payment_by(session: Session, checkout_session_id: Optional[str] = None, payment_intent_id: Optional[str] = None) -> Optional[Payment]:
+    """Look up and lock the Payment, so concurrent events for it apply one at a time."""
+    if checkout_session_id:
+        payment = session.exec(
+            select(Payment).where(Payment.stripe_checkout_session_id == checkout_session_id).with_for_update()
+        ).first()
+        if payment:
+            return payment
+    if payment_intent_id:
+        return session.exec(
+            select(Payment).where(Payment.stripe_payment_intent_id == payment_intent_id).with_for_update()
+        ).first()
+    return None
+
+
+def transition(session: Session, payment: Payment, new_status: str, event: StripeEvent, **metadata) -> bool:
+    """Apply an allowed status change with an audit entry and ledger entries. Does not commit."""
+    if payment.status == new_status or new_status not in TRANSITIONS.get(payment.status, set()):
+        return False
+    previous = payment.status
+    payment.status = new_status
+    payment.updated_at = datetime.utcnow()
+    session.add(payment)
+    record_transitions(session, [(payment.id, payment.amount_cents, payment.currency)], new_status, "webhook")
+    log_event(
+        session,
+        user_id=payment.user_id,
+        action=f"payment_{new_status}",
+        resource_type="payment",
+        resource_id=str(payment.id),
+        metadata={"stripe_event_id": event.stripe_event_id, "from": previous, **metadata},
+        commit=False,
+    )
+    return True
+
+
+def _on_checkout_completed(session: Session, event: StripeEvent, obj: dict) -> Optional[Payment]:
+    payment = _payment_by(session, obj.get("id"), obj.get("payment_intent"))
+    if payment is None:
+        return None
+    if obj.get("payment_intent") and not payment.stripe_payment_intent_id:
+        payment.stripe_payment_intent_id = obj["payment_intent"]
+    # Delayed methods (bank debits) complete the session before the money arrives.
+    paid = obj.get("payment_status") in ("paid", "no_payment_required")
+    status = "succeeded" if paid else "pending"
+    return payment if transition(session, payment, status, event, stripe_checkout_session_id=obj.get("id")) else None
+
+
+def _on_checkout_async_succeeded(session: Session, event: StripeEvent, obj: dict) -> Optional[Payment]:
+    payment = _payment_by(session, obj.get("id"), obj.get("payment_intent"))
+    if payment and transition(session, payment, "succeeded", event, stripe_checkout_session_id=obj.get("id")):
+        return payment
+    return None
+
+
+def _on_checkout_failed(session: Session, event: StripeEvent, obj: dict) -> Optional[Payment]:
+    """async_payment_failed and expired sessions."""
+    payment = _payment_by(session, obj.get("id"), obj.get("payment_intent"))
+    if payment and transition(session, payment, "failed", event, stripe_checkout_session_id=obj.get("id")):
+        return payment
+    return None
+
+
+def _on_payment_intent_succeeded(session: Session, event: StripeEvent, obj: dict) -> Optional[Payment]:
+    payment = _payment_by(session, payment_intent_id=obj.get("id"))
+    if payment and transition(session, payment, "succeeded", event, stripe_payment_intent_id=obj.get("id")):
+        return payment
+    return None
+
+
+def _on_payment_intent_failed(session: Session, event: StripeEvent, obj: dict) -> Optional[Payment]:
+    payment = _payment_by(session, payment_intent_id=obj.get("id"))
+    if payment is None:
+        return None
+    error = obj.get("last_payment_error") or {}
+    if transition(session, payment, "failed", event, stripe_payment_intent_id=obj.get("id"), reason=error.get("code")):
+        return payment
+    return None
+
+
+def _on_charge_refunded(session: Session, event: StripeEvent, obj: dict) -> Optional[Payment]:
+    payment = _payment_by(session, payment_intent_id=obj.get("payment_intent"))
+    if payment is None:
+        return None
+    if obj.get("refunded"):  # fully refunded
+        if transition(session, payment, "refunded", event, amount_refunded=obj.get("amount_refunded")):
+            return payment
+    elif record_refund(
+        session, (payment.id, payment.amount_cents, payment.currency), int(obj.get("amount_refunded") or 0), "webhook"
+    ):
+        log_event(
+            session,
+            user_id=payment.user_id,
+            action="payment_partially_refunded",
+            resource_type="payment",
+            resource_id=str(payment.id),
+            metadata={"stripe_event_id": event.stripe_event_id, "amount_refunded": obj.get("amount_refunded")},
+            commit=False,
+        )
+    return None
+
+
+# Each handler applies an event to its Payment (without committing) and
+# returns the Payment if its status changed.
+HANDLERS: dict[str, Callable[[Session, StripeEvent, dict], Optional[Payment]]] = {
+    "checkout.session.completed": _on_checkout_completed,
+    "checkout.session.async_payment_succeeded": _on_checkout_async_succeeded,
+    "checkout.session.async_payment_failed": _on_checkout_failed,
+    "checkout.session.expired": _on_checkout_failed,
+    "payment_intent.succeeded": _on_payment_intent_succeeded,
+    "payment_intent.payment_failed": _on_payment_intent_failed,
+    "charge.refunded": _on_charge_refunded,
+}
+
+
+def _queue_receipt(session: Session, payment: Payment) -> None:
+    user = session.get(User, payment.user_id) if payment.user_id else None
+    if user:
+        item = {"payment_id": payment.id, "amount_cents": payment.amount_cents, "currency": payment.currency}
+        notify(session, user, "payment_receipt", item, dedupe_key=f"payment-{payment.id}-receipt")
+
+
+def process_event(session: Session, event: StripeEvent) -> None:
+    """
+    Apply one event to its Payment and mark it processed (or ignored), in one
+    commit. A receipt for a successful payment is queued in the same commit
+    and delivered by the email worker.
+    """
+    handler = HANDLERS.get(event.type)
+    now = datetime.utcnow()
+    if handler is None:
+        event.status = "ignored"
+        event.processed_at = now
+        session.add(event)
+        session.commit()
+        return
+
+    obj = json.loads(event.payload)["data"]["object"]
+    changed = handler(session, event, obj)
+    if changed is not None and changed.status == "succeeded":
+        _queue_receipt(session, changed)
+    event.status = "processed"
+    event.processed_at = now
+    event.last_error = None
+    session.add(event)
+    session.commit()
+    metrics.counter(f"stripe.events.{event.type}").inc()
+
+
+def claim_pending(session: Session, limit: int, lease_seconds: int, max_attempts: int) -> list[int]:
+    """Claim events to process, oldest first: pending, retryable failures and expired leases."""
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=lease_seconds)
+    events = session.exec(
+        select(StripeEvent)
+        .where(
+            or_(
+                StripeEvent.status == "pending",
+                (StripeEvent.status == "failed") & (StripeEvent.attempts < max_attempts),
+                (StripeEvent.status == "processing") & (StripeEvent.claimed_at < stale),
+            )
+        )
+        .order_by(StripeEvent.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).all()
+    for event in events:
+        event.status = "processing"
+        event.claimed_at = now
+        event.attempts = (event.attempts or 0) + 1
+        session.add(event)
+    session.commit()
+    return [event.id for event in events]
+
+
+def process_pending(engine: Engine, *, batch_size: Optional[int] = None, max_attempts: Optional[int] = None) -> int:
+    """
+    Process one batch of claimed events, each in its own transaction.
+
+    A failing event is marked failed (retried on a later pass) and dead once
+    it has used `max_attempts`; it never blocks the rest of the batch.
+    Returns the number of events claimed.
+    """
+    batch_size = batch_size or settings.stripe_event_batch_size
+    max_attempts = max_attempts or settings.stripe_event_max_attempts
+    with Session(engine) as session:
+        claimed = claim_pending(session, batch_size, settings.stripe_event_lease_seconds, max_attempts)
+        for event_id in claimed:
+            event = session.get(StripeEvent, event_id)
+            try:
+                with metrics.timer("stripe.events.process_seconds"):
+                    process_event(session, event)
+            except Exception as exc:
+                session.rollback()
+                logger.exception("Processing Stripe event %s failed", event.stripe_event_id)
+                event = session.get(StripeEvent, event_id)
+                event.status = "dead" if event.attempts >= max_attempts else "failed"
+                event.last_error = f"{type(exc).__name__}: {exc}"[:500]
+                session.add(event)
+                session.commit()
+                metrics.counter(f"stripe.events.{event.status}").inc()
+    return len(claimed)
+
+
+def run_stripe_event_worker(
+    engine: Engine,
+    *,
+    batch_size: Optional[int] = None,
+    poll_interval: float = 2.0,
+    once: bool = False,
+    stop: Optional[threading.Event] = None,
+) -> int:
+    """Process recorded webhook events until stopped. Returns the number of events handled."""
+    stop = stop or threading.Event()
+    handled = 0
+    while not stop.is_set():
+        count = process_pending(engine, batch_size=batch_size)
+        handled += count
+        if not count:
+            if once:
+                break
+            stop.wait(poll_interval)
+    return handled
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Optional, Union
+
+import stripe
+
+
+class LocalStripeStub:
+    """
+    In-process stand-in for the parts of `stripe.StripeClient` the payment
+    gateway uses: checkout session create/list and payment intent list.
+
+    Honours idempotency keys the way Stripe does (same key and params ->
+    same response; same key, different params -> IdempotencyError), lists
+    newest first with `starting_after` cursors, and can inject latency and
+    failures. With a `path`, state is kept in a JSON file so separate
+    processes (API, reconciliation command) share it.
+    """
+
+    def __init__(self, path: Union[str, Path, None] = None, *, latency: float = 0.0) -> None:
+        self.path = Path(path) if path else None
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._failures: list[Exception] = []
+        self._state: dict[str, dict] = {"sessions": {}, "payment_intents": {}, "idempotency": {}}
+        if self.path and self.path.exists():
+            self._state = json.loads(self.path.read_text())
+        self.checkout = _Namespace(sessions=_SessionService(self))
+        self.payment_intents = _PaymentIntentService(self)
+        self.calls = 0
+
+    # -- test controls -------------------------------------------------------
+
+    def fail_next(self, count: int = 1, error: Optional[Exception] = None) -> None:
+        """Make the next `count` calls raise `error` (default: a connection error)."""
+        with self._lock:
+            for _ in range(count):
+                self._failures.append(error or stripe.APIConnectionError("stub: connection reset"))
+
+    def complete_session(self, session_id: str, paid: bool = True) -> dict:
+        """Simulate the customer finishing checkout."""
+        with self._lock:
+            session = self._state["sessions"][session_id]
+            session["status"] = "complete"
+            session["payment_status"] = "paid" if paid else "unpaid"
+            intent = self._state["payment_intents"][session["payment_intent"]]
+            intent["status"] = "succeeded" if paid else "processing"
+            self._save()
+            return dict(session)
+
+    def expire_session(self, session_id: str) -> dict:
+        with self._lock:
+            session = self._state["sessions"][session_id]
+            session["status"] = "expired"
+            self._state["payment_intents"][session["payment_intent"]]["status"] = "canceled"
+            self._save()
+            return dict(session)
+
+    def refund(self, payment_intent_id: str, amount: Optional[int] = None) -> None:
+        with self._lock:
+            intent = self._state["payment_intents"][payment_intent_id]
+            refunded = amount if amount is not None else intent["amount"]
+            intent["latest_charge"] = {
+                "id": f"ch_test_{payment_intent_id[8:]}",
+                "object": "charge",
+                "amount": intent["amount"],
+                "amount_refunded": refunded,
+                "refunded": refunded >= intent["amount"],
+            }
+            self._save()
+
+    # -- internals -----------------------------------------------------------
+
+    def _enter(self) -> None:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            if self._failures:
+                raise self._failures.pop(0)
+
+    def _save(self) -> None:
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self._state))
+            tmp.replace(self.path)
+
+    def _list(self, kind: str, params: dict) -> dict:
+        self._enter()
+        limit = min(int(params.get("limit", 10)), 100)
+        created = params.get("created") or {}
+        with self._lock:
+            items = sorted(self._state[kind].values(), key=lambda o: (o["created"], o["id"]), reverse=True)
+        if "gte" in created:
+            items = [o for o in items if o["created"] >= created["gte"]]
+        if params.get("starting_after"):
+            ids = [o["id"] for o in items]
+            items = items[ids.index(params["starting_after"]) + 1 :]
+        return {"object": "list", "data": [dict(o) for o in items[:limit]], "has_more": len(items) > limit}
+
+
+class _Namespace:
+    def __init__(self, **services: Any) -> None:
+        self.__dict__.update(services)
+
+
+class _SessionService:
+    def __init__(self, stub: LocalStripeStub) -> None:
+        self.stub = stub
+
+    def create(self, params: dict, options: Optional[dict] = None) -> dict:
+        stub = self.stub
+        stub._enter()
+        key = (options or {}).get("idempotency_key")
+        with stub._lock:
+            if key and key in stub._state["idempotency"]:
+                stored = stub._state["idempotency"][key]
+                if stored["params"] != params:
+                    raise stripe.IdempotencyError("Keys for idempotent requests can only be used with the same parameters")
+                return dict(stub._state["sessions"][stored["id"]])
+            now = int(time.time())
+            session_id = f"cs_test_{uuid.uuid4().hex[:24]}"
+            intent_id = f"pi_test_{uuid.uuid4().hex[:24]}"
+            item = params["line_items"][0]["price_data"]
+            amount = item["unit_amount"] * params["line_items"][0].get("quantity", 1)
+            stub._state["payment_intents"][intent_id] = {
+                "id": intent_id, "object": "payment_intent", "amount": amount, "latest_charge": None,
+                "currency": item["currency"], "status": "requires_payment_method", "created": now,
+                "metadata": params.get("metadata", {}),
+            }
+            session = {
+                "id": session_id, "object": "checkout.session", "url": f"https://checkout.stripe.test/{session_id}",
+                "payment_intent": intent_id, "amount_total": amount, "currency": item["currency"],
+                "status": "open", "payment_status": "unpaid", "created": now,
+                "metadata": params.get("metadata", {}),
+            }
+            stub._state["sessions"][session_id] = session
+            if key:
+                stub._state["idempotency"][key] = {"id": session_id, "params": params}
+            stub._save()
+            return dict(session)
+
+    def list(self, params: Optional[dict] = None, options: Optional[dict] = None) -> dict:
+        return self.stub._list("sessions", params or {})
+
+
+class _PaymentIntentService:
+    def __init__(self, stub: LocalStripeStub) -> None:
+        self.stub = stub
+
+    def list(self, params: Optional[dict] = None, options: Optional[dict] = None) -> dict:
+        return self.stub._list("payment_intents", params or {})
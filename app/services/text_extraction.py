@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import codecs
+import logging
+import os
+import re
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import or_, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from app.core.config import get_settings
+from app.models.document import Document, DocumentText
+from app.services.metrics import metrics
+from app.services.previews import PDF_CONTENT_TYPE
+from app.services.resilience import RestartingProcessPool
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+ReadObjectFn = Callable[[str], Iterable[bytes]]
+
+# Bump to re-extract everything after an extractor change.
+TEXT_EXTRACTOR_VERSION = 1
+TEXT_CONTENT_TYPES = ("application/json", "application/xml")
+READ_CHUNK_SIZE = 64 * 1024
+
+_SPACES_RE = re.compile(r"[^\S\n]+")
+_BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+
+
+def is_extractable(content_type: str) -> bool:
+    return content_type.startswith("text/") or content_type in TEXT_CONTENT_TYPES or content_type == PDF_CONTENT_TYPE
+
+
+def _normalize(text: str) -> str:
+    # NUL is not allowed in PostgreSQL text; runs of whitespace only bloat the index.
+    text = _SPACES_RE.sub(" ", text.replace("\x00", ""))
+    return _BLANK_LINES_RE.sub("\n\n", text).strip()
+
+
+def _pdf_pages(path: str) -> Iterable[str]:
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(path)  # reads from the file on demand, not into memory
+    try:
+        for index in range(len(pdf)):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            try:
+                yield textpage.get_text_bounded()
+            finally:
+                textpage.close()
+                page.close()
+    finally:
+        pdf.close()
+
+
+def _text_chunks(path: str) -> Iterable[str]:
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    with open(path, "rb") as fh:
+        while chunk := fh.read(READ_CHUNK_SIZE):
+            yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+
+def extract_text(path: str, content_type: str, max_chars: int) -> tuple[str, bool]:
+    """
+    Extract text from a spooled file: PDFs page by page, text files in
+    decoded chunks. Stops once `max_chars` is reached, so memory stays
+    bounded whatever the file size. Returns (text, truncated).
+
+    Runs in a worker process (parses untrusted input).
+    """
+    pieces = _pdf_pages(path) if content_type == PDF_CONTENT_TYPE else _text_chunks(path)
+    parts: list[str] = []
+    total = 0
+    truncated = False
+    for piece in pieces:
+        parts.append(piece)
+        total += len(piece)
+        if total > max_chars:
+            truncated = True
+            break
+    text = _normalize("\n".join(parts) if content_type == PDF_CONTENT_TYPE else "".join(parts))
+    if len(text) > max_chars:
+        text, truncated = text[:max_chars], True
+    return text, truncated
+
+
+def fail_exhausted(session: Session, lease_seconds: int, max_attempts: int) -> int:
+    """
+    Mark documents failed whose last extraction lease expired with no claims
+    left (a file that keeps killing the worker). Does not commit.
+    """
+    failed = session.exec(
+        update(Document)
+        .where(
+            Document.text_status == "extracting",
+            Document.text_claimed_at < datetime.utcnow() - timedelta(seconds=lease_seconds),
+            Document.text_attempts >= max_attempts,
+        )
+        .values(text_status="failed", text_claimed_at=None)
+    ).rowcount
+    if failed:
+        metrics.counter("text.exhausted").inc(failed)
+        logger.warning("Marked %d text extractions failed after %d attempts", failed, max_attempts)
+    return failed
+
+
+def claim_pending(
+    session: Session, limit: int, lease_seconds: int, max_attempts: Optional[int] = None
+) -> list[tuple[int, str, str, str]]:
+    """
+    Claim documents awaiting text extraction: (id, s3_key, content_type, content_sha256).
+
+    Only clean, hashed documents are extracted. Content that already has a
+    DocumentText row (same hash) is marked ready without re-extraction, and
+    unsupported types are marked in the same pass. Each claim counts as an
+    attempt; documents out of attempts are moved to failed.
+    """
+    max_attempts = max_attempts or settings.text_extract_max_attempts
+    fail_exhausted(session, lease_seconds, max_attempts)
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=lease_seconds)
+    docs = session.exec(
+        select(Document)
+        .where(
+            Document.scanned_status == "clean",
+            Document.content_sha256.is_not(None),
+            Document.text_attempts < max_attempts,
+            or_(
+                Document.text_status == "pending",
+                (Document.text_status == "extracting") & (Document.text_claimed_at < stale),
+            ),
+        )
+        .order_by(Document.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).all()
+    hashes = {doc.content_sha256 for doc in docs}
+    extracted = set(
+        session.exec(
+            select(DocumentText.content_sha256).where(
+                DocumentText.content_sha256.in_(hashes),
+                DocumentText.extractor_version >= TEXT_EXTRACTOR_VERSION,
+            )
+        ).all()
+    ) if hashes else set()
+    claimed = []
+    for doc in docs:
+        if doc.content_sha256 in extracted:
+            doc.text_status = "ready"
+            metrics.counter("text.reused").inc()
+        elif not is_extractable(doc.content_type):
+            doc.text_status = "unsupported"
+        else:
+            doc.text_status = "extracting"
+            doc.text_claimed_at = now
+            doc.text_attempts = (doc.text_attempts or 0) + 1
+            claimed.append((doc.id, doc.s3_key, doc.content_type, doc.content_sha256))
+        session.add(doc)
+    session.commit()
+    return claimed
+
+
+def store_text(session: Session, sha256: str, text: str, truncated: bool) -> None:
+    """Insert or refresh the DocumentText row for `sha256`. Does not commit."""
+    existing = session.exec(select(DocumentText).where(DocumentText.content_sha256 == sha256)).first()
+    if existing is None:
+        try:
+            with session.begin_nested():
+                session.add(
+                    DocumentText(
+                        content_sha256=sha256,
+                        body=text,
+                        char_count=len(text),
+                        truncated=truncated,
+                        extractor_version=TEXT_EXTRACTOR_VERSION,
+                    )
+                )
+            return
+        except IntegrityError:
+            # Another worker extracted the same content first.
+            existing = session.exec(select(DocumentText).where(DocumentText.content_sha256 == sha256)).one()
+    existing.body = text
+    existing.char_count = len(text)
+    existing.truncated = truncated
+    existing.extractor_version = TEXT_EXTRACTOR_VERSION
+    session.add(existing)
+
+
+def _spool(read_object: ReadObjectFn, s3_key: str) -> str:
+    """Stream an object to a temp file; extraction then reads it piecewise."""
+    fd, path = tempfile.mkstemp(prefix="extract-")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            for chunk in read_object(s3_key):
+                fh.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
+
+
+def run_text_worker(
+    engine: Engine,
+    read_object: ReadObjectFn,
+    *,
+    processes: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    max_chars: Optional[int] = None,
+    poll_interval: float = 5.0,
+    once: bool = False,
+    stop: Optional[threading.Event] = None,
+) -> int:
+    """
+    Extract searchable text from clean documents on a process pool into DocumentText.
+
+    Each distinct content hash is extracted once per batch; documents sharing
+    content share its text. An extractor that crashes its process only
+    fails its own content; the pool is rebuilt. Returns the number of
+    documents processed.
+    """
+    processes = processes or settings.text_extract_processes
+    batch_size = batch_size or settings.text_extract_batch_size
+    max_chars = max_chars or settings.text_extract_max_chars
+    stop = stop or threading.Event()
+    processed = 0
+
+    with RestartingProcessPool(processes, "text") as pool:
+        while not stop.is_set():
+            with Session(engine) as session:
+                claimed = claim_pending(session, batch_size, settings.text_extract_lease_seconds)
+            if not claimed:
+                if once:
+                    break
+                stop.wait(poll_interval)
+                continue
+
+            jobs = {}
+            for _, s3_key, content_type, sha256 in claimed:
+                if sha256 in jobs:
+                    continue
+                try:
+                    jobs[sha256] = (_spool(read_object, s3_key), content_type, max_chars)
+                except Exception as exc:
+                    logger.warning("Could not read %s for text extraction: %s", s3_key, exc)
+
+            extracted: set[str] = set()
+            with Session(engine) as session:
+                try:
+                    for sha256, future, seconds in pool.run_each(extract_text, jobs):
+                        try:
+                            text, truncated = future.result()
+                            store_text(session, sha256, text, truncated)
+                            extracted.add(sha256)
+                            metrics.histogram("text.extract_seconds").observe(seconds)
+                        except Exception as exc:
+                            logger.warning("Text extraction of %s failed: %s", sha256, exc)
+                finally:
+                    for path, _, _ in jobs.values():
+                        os.unlink(path)
+                for document_id, _, _, sha256 in claimed:
+                    doc = session.get(Document, document_id)
+                    if doc is None or doc.text_status != "extracting":
+                        continue
+                    doc.text_status = "ready" if sha256 in extracted else "failed"
+                    doc.text_claimed_at = None
+                    session.add(doc)
+                    metrics.counter(f"text.documents.{doc.text_status}").inc()
+                session.commit()
+            processed += len(claimed)
+    return processed
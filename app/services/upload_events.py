@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Protocol
+from urllib.parse import unquote_plus
+
+import boto3
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app.core.config import get_settings
+from app.models.document import Document
+from app.services.audit import log_event
+from app.services.content_store import attach_content, checksum_to_hex
+from app.services.metrics import metrics
+from app.services.storage import LocalStorage, ObjectInfo, StorageBackend, StorageError, get_storage
+
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# SQS caps ReceiveMessage and DeleteMessageBatch at 10 entries.
+SQS_MAX_MESSAGES = 10
+
+
+@dataclass
+class ObjectCreatedEvent:
+    key: str
+    size: Optional[int]
+    etag: Optional[str] = None
+
+
+@dataclass
+class QueueMessage:
+    receipt: str
+    body: str
+
+
+def parse_notification(body: str) -> list[ObjectCreatedEvent]:
+    """
+    Extract ObjectCreated records from an S3 event notification.
+
+    Accepts the raw S3 payload or one wrapped in an SNS envelope. Keys arrive
+    URL-encoded with '+' for spaces. Test events and other event types yield
+    nothing; malformed bodies raise ValueError.
+    """
+    payload = json.loads(body)
+    if isinstance(payload, dict) and payload.get("Type") == "Notification" and "Message" in payload:
+        payload = json.loads(payload["Message"])
+    if not isinstance(payload, dict):
+        raise ValueError("Notification is not a JSON object")
+    events = []
+    for record in payload.get("Records", []):
+        if not str(record.get("eventName", "")).startswith("ObjectCreated:"):
+            continue
+        obj = record["s3"]["object"]
+        events.append(
+            ObjectCreatedEvent(
+                key=unquote_plus(obj["key"]),
+                size=obj.get("size"),
+                etag=(obj.get("eTag") or "").strip('"') or None,
+            )
+        )
+    return events
+
+
+class EventQueue(Protocol):
+    def receive(self, max_messages: int, wait_seconds: int) -> list[QueueMessage]: ...
+
+    def ack(self, receipts: list[str]) -> None: ...
+
+
+class SQSEventQueue:
+    """S3 -> SQS notifications. Unacked messages reappear after the visibility timeout."""
+
+    def __init__(self, queue_url: str, client=None) -> None:
+        self.queue_url = queue_url
+        self.client = client or boto3.client("sqs", region_name=settings.aws_region)
+
+    def receive(self, max_messages: int, wait_seconds: int) -> list[QueueMessage]:
+        response = self.client.receive_message(
+            QueueUrl=self.queue_url,
+            MaxNumberOfMessages=min(max_messages, SQS_MAX_MESSAGES),
+            WaitTimeSeconds=wait_seconds,
+        )
+        return [QueueMessage(m["ReceiptHandle"], m["Body"]) for m in response.get("Messages", [])]
+
+    def ack(self, receipts: list[str]) -> None:
+        for start in range(0, len(receipts), SQS_MAX_MESSAGES):
+            batch = receipts[start : start + SQS_MAX_MESSAGES]
+            self.client.delete_message_batch(
+                QueueUrl=self.queue_url,
+                Entries=[{"Id": str(i), "ReceiptHandle": r} for i, r in enumerate(batch)],
+            )
+
+
+class LocalEventQueue:
+    """
+    Spool directory of notification files, written by LocalStorage on every
+    object commit. Stands in for SQS in development and tests.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = Path(directory)
+
+    def receive(self, max_messages: int, wait_seconds: int = 0) -> list[QueueMessage]:
+        if not self.directory.is_dir():
+            return []
+        names = sorted(n for n in os.listdir(self.directory) if not n.startswith("."))[:max_messages]
+        messages = []
+        for name in names:
+            try:
+                messages.append(QueueMessage(name, (self.directory / name).read_text()))
+            except FileNotFoundError:
+                continue  # acked by another consumer
+        return messages
+
+    def ack(self, receipts: list[str]) -> None:
+        for name in receipts:
+            (self.directory / name).unlink(missing_ok=True)
+
+
+def get_event_queue(storage: Optional[StorageBackend] = None) -> Optional[EventQueue]:
+    storage = storage or get_storage()
+    if settings.upload_events_queue_url:
+        return SQSEventQueue(settings.upload_events_queue_url)
+    if isinstance(storage, LocalStorage):
+        return LocalEventQueue(storage.events_dir)
+    return None
+
+
+def complete_documents(
+    session: Session,
+    completions: list[tuple[Document, ObjectInfo]],
+    source: str,
+) -> list[str]:
+    """
+    Mark single-PUT documents as uploaded from what storage reports, in the
+    caller's transaction: size, content hash (deduplicated as in the
+    /complete endpoint) and one audit entry each. Does not commit.
+
+    Returns storage keys made redundant by deduplication, to delete after commit.
+    """
+    redundant = []
+    for doc, info in completions:
+        doc.size_bytes = info.size
+        sha256 = checksum_to_hex(info.checksum_sha256)
+        if sha256:
+            key = attach_content(session, doc, sha256)
+            if key:
+                redundant.append(key)
+        session.add(doc)
+        log_event(
+            session=session,
+            user_id=None,
+            action="document_upload_completed",
+            resource_type="document",
+            resource_id=str(doc.id),
+            metadata={"source": source},
+            commit=False,
+        )
+    return redundant
+
+
+def _head_or_event(storage: StorageBackend, event: ObjectCreatedEvent) -> ObjectInfo:
+    """HEAD for the verified checksum (enables dedup); fall back to the event's size."""
+    try:
+        return storage.head(event.key)
+    except StorageError:
+        return ObjectInfo(size=event.size, etag=event.etag)
+
+
+def complete_from_events(session: Session, storage: StorageBackend, events: list[ObjectCreatedEvent]) -> int:
+    """
+    Complete every pending single-PUT document named by `events` with one
+    lookup and one commit. Events for unknown keys, multipart uploads in
+    progress (verified by their own endpoint) or already completed documents
+    are ignored, so redelivered notifications are harmless.
+    """
+    latest = {event.key: event for event in events}
+    if not latest:
+        return 0
+    docs = session.exec(
+        select(Document).where(
+            Document.s3_key.in_(latest),
+            Document.size_bytes.is_(None),
+            Document.upload_id.is_(None),
+        )
+    ).all()
+    if not docs:
+        return 0
+    completions = [(doc, _head_or_event(storage, latest[doc.s3_key])) for doc in docs]
+    redundant = complete_documents(session, completions, source="storage_event")
+    session.commit()
+    for key in redundant:
+        try:
+            storage.delete(key)
+        except StorageError:
+            pass  # orphan; removed by storage reconciliation
+    metrics.counter("upload_events.completed").inc(len(docs))
+    return len(docs)
+
+
+def run_upload_event_worker(
+    engine: Engine,
+    queue: EventQueue,
+    storage: Optional[StorageBackend] = None,
+    *,
+    batch_size: Optional[int] = None,
+    wait_seconds: int = 20,
+    poll_interval: float = 1.0,
+    once: bool = False,
+    stop: Optional[threading.Event] = None,
+) -> int:
+    """
+    Drain object-created notifications and complete matching documents in batches.
+
+    Messages are acknowledged only after the batch commits; a crash means
+    redelivery, which completion tolerates. Unparseable messages are logged
+    and acknowledged (SQS redrive handles poison messages that keep failing
+    for other reasons). Returns the number of documents completed.
+    """
+    storage = storage or get_storage()
+    batch_size = batch_size or settings.upload_events_batch_size
+    stop = stop or threading.Event()
+    completed = 0
+
+    while not stop.is_set():
+        messages: list[QueueMessage] = []
+        while len(messages) < batch_size:
+            received = queue.receive(min(SQS_MAX_MESSAGES, batch_size - len(messages)), 0 if messages else wait_seconds)
+            if not received:
+                break
+            messages.extend(received)
+        if not messages:
+            if once:
+                break
+            stop.wait(poll_interval)
+            continue
+
+        events = []
+        for message in messages:
+            try:
+                events.extend(parse_notification(message.body))
+            except (ValueError, KeyError, TypeError) as exc:
+                logger.warning("Dropping malformed storage notification: %s", exc)
+                metrics.counter("upload_events.malformed").inc()
+        with metrics.timer("upload_events.batch_seconds"), Session(engine) as session:
+            completed += complete_from_events(session, storage, events)
+        queue.ack([message.receipt for message in messages])
+        metrics.counter("upload_events.received").inc(len(events))
+    return completed
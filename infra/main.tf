@@ -76,10 +76,71 @@ resource "aws_s3_bucket_cors_configuration" "app" {
     allowed_headers = ["*"]
     allowed_methods = ["GET", "PUT", "HEAD"]
     allowed_origins = ["http://localhost:8000", "https://localhost:8000"]
-    expose_headers  = []
+    expose_headers  = ["ETag"] # multipart uploads read each part's ETag
   }
 }
 
+# Parts of abandoned multipart uploads are billed until aborted; clean them up.
+resource "aws_s3_bucket_lifecycle_configuration" "app" {
+  bucket = aws_s3_bucket.app.id
+
+  rule {
+    id     = "abort-incomplete-multipart-uploads"
+    status = "Enabled"
+
+    filter {}
+
+    abort_incomplete_multipart_upload {
+      days_after_initiation = 7
+    }
+  }
+}
+
+# Upload notifications – S3 ObjectCreated events for documents/ feed the
+# upload completion worker (scripts/run_upload_event_worker.py)
+resource "aws_sqs_queue" "upload_events_dlq" {
+  name                      = "${local.name}-upload-events-dlq"
+  message_retention_seconds = 1209600
+  tags                      = { Name = local.name, Environment = var.environment }
+}
+
+resource "aws_sqs_queue" "upload_events" {
+  name                       = "${local.name}-upload-events"
+  visibility_timeout_seconds = 120
+  receive_wait_time_seconds  = 20
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.upload_events_dlq.arn
+    maxReceiveCount     = 5
+  })
+  tags = { Name = local.name, Environment = var.environment }
+}
+
+resource "aws_sqs_queue_policy" "upload_events" {
+  queue_url = aws_sqs_queue.upload_events.id
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [{
+      Effect    = "Allow"
+      Principal = { Service = "s3.amazonaws.com" }
+      Action    = "sqs:SendMessage"
+      Resource  = aws_sqs_queue.upload_events.arn
+      Condition = { ArnEquals = { "aws:SourceArn" = aws_s3_bucket.app.arn } }
+    }]
+  })
+}
+
+resource "aws_s3_bucket_notification" "upload_events" {
+  bucket = aws_s3_bucket.app.id
+
+  queue {
+    queue_arn     = aws_sqs_queue.upload_events.arn
+    events        = ["s3:ObjectCreated:*"]
+    filter_prefix = "documents/"
+  }
+
+  depends_on = [aws_sqs_queue_policy.upload_events]
+}
+
 # ECR – container registry
 resource "aws_ecr_repository" "app" {
   name                 = var.project
@@ -145,12 +206,17 @@ resource "aws_iam_role_policy" "ecs_task" {
     Statement = [
       {
         Effect   = "Allow"
-        Action   = ["s3:GetObject", "s3:PutObject", "s3:ListBucket", "s3:DeleteObject"]
+        Action   = ["s3:GetObject", "s3:PutObject", "s3:ListBucket", "s3:DeleteObject", "s3:AbortMultipartUpload"]
         Resource = [aws_s3_bucket.app.arn, "${aws_s3_bucket.app.arn}/*"]
       },
       {
         Effect   = "Allow"
-        Action   = ["ses:SendEmail", "ses:SendRawEmail"]
+        Action   = ["sqs:ReceiveMessage", "sqs:DeleteMessage", "sqs:GetQueueAttributes"]
+        Resource = aws_sqs_queue.upload_events.arn
+      },
+      {
+        Effect   = "Allow"
+        Action   = ["ses:SendEmail", "ses:SendRawEmail", "ses:SendBulkEmail"]
         Resource = "*"
       }
     ]
@@ -333,7 +399,8 @@ resource "aws_ecs_task_definition" "app" {
     }
     environment = [
       { name = "AWS_REGION", value = var.aws_region },
-      { name = "AWS_S3_BUCKET", value = aws_s3_bucket.app.id }
+      { name = "AWS_S3_BUCKET", value = aws_s3_bucket.app.id },
+      { name = "UPLOAD_EVENTS_QUEUE_URL", value = aws_sqs_queue.upload_events.url }
     ]
     secrets = [
       {
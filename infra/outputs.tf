@@ -7,6 +7,11 @@ output "s3_bucket_name" {
   value       = aws_s3_bucket.app.id
 }
 
+output "upload_events_queue_url" {
+  description = "SQS queue receiving S3 ObjectCreated events for documents/"
+  value       = aws_sqs_queue.upload_events.url
+}
+
 output "ecr_repository_url" {
   description = "ECR repository URL for the app image"
   value       = local.ecr_repository_url
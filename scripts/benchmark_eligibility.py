@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark the eligibility rule engine: rows per second for the vectorized
+evaluator against a per-row Python loop over the same compiled rules, and
+optionally the bulk insert of results (in-memory SQLite by default).
+
+Run from project root:
+  python3 scripts/benchmark_eligibility.py [--rows 100000] [--repeat 5] [--insert]
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np
+
+from app.services.eligibility import DEFAULT_RULES, compile_rules
+
+
+def _best(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def _insert_rate(rows: int, tiers, compiled) -> float:
+    from sqlalchemy import create_engine, insert
+    from sqlalchemy.pool import StaticPool
+    from sqlmodel import Session, SQLModel
+
+    from app.models import EligibilityResult
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    now = datetime.utcnow()
+    payload = [
+        {
+            "applicant_id": i + 1,
+            "input_payload": "{}",
+            "result_payload": json.dumps({"tier": compiled.tier_names[t]}),
+            "rule_version": compiled.version,
+            "is_eligible": bool(compiled.tier_eligible[t]),
+            "created_at": now,
+        }
+        for i, t in enumerate(tiers.tolist())
+    ]
+    started = time.perf_counter()
+    with Session(engine) as session:
+        session.execute(insert(EligibilityResult), payload)
+        session.commit()
+    return rows / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--insert", action="store_true", help="also time the bulk insert of results")
+    args = parser.parse_args()
+
+    rules = {
+        **DEFAULT_RULES,
+        "rules": DEFAULT_RULES["rules"]
+        + [
+            {"destination": "USA", "level": "graduate", "thresholds": [{"tier": "top", "min_gpa": 3.7, "min_toefl": 100}]},
+            {"destination": "Canada", "level": "*", "thresholds": [{"tier": "solid", "min_gpa": 3.0, "min_toefl": 85}]},
+        ],
+    }
+    compiled = compile_rules(rules, version=1)
+    rng = np.random.default_rng(42)
+    gpa = rng.uniform(2.0, 4.0, args.rows)
+    toefl = rng.integers(60, 121, args.rows)
+    destinations = rng.choice(["USA", "Canada", ""], args.rows).tolist()
+    levels = rng.choice(["freshman", "continuing_undergrad", "graduate"], args.rows).tolist()
+    gpa_list, toefl_list = gpa.tolist(), toefl.tolist()
+
+    vectorized = _best(lambda: compiled.evaluate(gpa, toefl, destinations, levels), args.repeat)
+    per_row = _best(
+        lambda: [compiled.evaluate_row(*row) for row in zip(gpa_list, toefl_list, destinations, levels)],
+        max(1, args.repeat // 2),
+    )
+    print(f"rows:        {args.rows}")
+    print(f"vectorized:  {args.rows / vectorized:,.0f} rows/s ({vectorized * 1000:.1f} ms)")
+    print(f"per-row:     {args.rows / per_row:,.0f} rows/s ({per_row * 1000:.1f} ms)")
+    print(f"speedup:     {per_row / vectorized:.1f}x")
+    if args.insert:
+        tiers = compiled.evaluate(gpa, toefl, destinations, levels)
+        print(f"bulk insert: {_insert_rate(args.rows, tiers, compiled):,.0f} rows/s (SQLite, in memory)")
+
+
+if __name__ == "__main__":
+    main()
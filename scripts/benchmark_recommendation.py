@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark the recommendation model: p50/p99 latency of single-applicant
+scoring (as served per request) and throughput of batched scoring, over a
+synthetic catalog of N programs in a temporary artifact. CPU only.
+With --concurrency, also compares concurrent request threads scoring one
+by one against the same threads going through the micro-batcher.
+
+Run from project root:
+  python3 scripts/benchmark_recommendation.py [--programs 5000] [--requests 2000] [--batch 64] [--concurrency 32]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np
+
+from app.services.batching import MicroBatcher
+from app.services.recommendation import LEVELS, ProfileBatch, Recommender, merge_profiles, write_artifact
+
+
+def _synthetic_programs(count: int, rng: np.random.Generator) -> list[dict]:
+    return [
+        {
+            "name": f"Program {i}",
+            "destination": str(rng.choice(["USA", "Canada", "*"])),
+            "level": str(rng.choice([*LEVELS, "*"])),
+            "gpa": float(rng.uniform(2.5, 4.0)),
+            "toefl": int(rng.integers(60, 115)),
+            "tuition_usd": int(rng.integers(10_000, 70_000)),
+        }
+        for i in range(count)
+    ]
+
+
+def _profiles(count: int, rng: np.random.Generator) -> ProfileBatch:
+    return ProfileBatch(
+        gpa=rng.uniform(2.0, 4.0, count).tolist(),
+        toefl=rng.integers(50, 121, count).tolist(),
+        destinations=rng.choice(["USA", "Canada", ""], count).tolist(),
+        levels=rng.choice(list(LEVELS), count).tolist(),
+        budgets=rng.choice([15_000.0, 30_000.0, 60_000.0, np.inf], count).tolist(),
+    )
+
+
+def _row(profiles: ProfileBatch, i: int) -> ProfileBatch:
+    return ProfileBatch(
+        [profiles.gpa[i]], [profiles.toefl[i]], [profiles.destinations[i]], [profiles.levels[i]], [profiles.budgets[i]]
+    )
+
+
+def _concurrent(score, profiles: ProfileBatch, count: int, threads: int) -> tuple[float, float, float]:
+    """(p50 ms, p99 ms, requests/s) for `count` requests from `threads` threads."""
+
+    def one(i):
+        started = time.perf_counter()
+        score(_row(profiles, i))
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = list(pool.map(one, range(count)))
+    elapsed = time.perf_counter() - started
+    p50, p99 = np.percentile(np.array(latencies) * 1000, [50, 99])
+    return p50, p99, count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--programs", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=64, help="batch size for the throughput run")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=0, help="request threads for the micro-batching comparison")
+    parser.add_argument("--max-wait-ms", type=float, default=2.0, help="micro-batcher max wait")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    with tempfile.TemporaryDirectory() as model_dir:
+        version = write_artifact(model_dir, _synthetic_programs(args.programs, rng))
+        started = time.perf_counter()
+        recommender = Recommender(Path(model_dir) / version)
+        load_ms = (time.perf_counter() - started) * 1000
+        profiles = _profiles(args.requests, rng)
+        recommender.recommend(ProfileBatch([3.0], [90], ["USA"], ["graduate"], [np.inf]), args.top_k)  # warm up
+
+        latencies = []
+        for i in range(args.requests):
+            one = _row(profiles, i)
+            started = time.perf_counter()
+            recommender.recommend(one, args.top_k)
+            latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for i in range(0, args.requests, args.batch):
+            chunk = slice(i, i + args.batch)
+            recommender.recommend(
+                ProfileBatch(
+                    profiles.gpa[chunk],
+                    profiles.toefl[chunk],
+                    profiles.destinations[chunk],
+                    profiles.levels[chunk],
+                    profiles.budgets[chunk],
+                ),
+                args.top_k,
+            )
+        batched = time.perf_counter() - started
+
+        if args.concurrency:
+            direct = _concurrent(lambda p: recommender.recommend(p, args.top_k), profiles, args.requests, args.concurrency)
+
+            batcher = MicroBatcher(
+                lambda items: recommender.recommend(merge_profiles(items), args.top_k),
+                max_batch=args.batch,
+                max_wait=args.max_wait_ms / 1000,
+                name="bench",
+            )
+            coalesced = _concurrent(batcher, profiles, args.requests, args.concurrency)
+            batcher.close()
+
+    p50, p99 = np.percentile(np.array(latencies) * 1000, [50, 99])
+    print(f"model:       {version} ({args.programs} programs), loaded in {load_ms:.1f} ms")
+    print(f"single:      p50 {p50:.3f} ms, p99 {p99:.3f} ms ({args.requests / sum(latencies):,.0f} req/s)")
+    print(f"batch of {args.batch}: {args.requests / batched:,.0f} applicants/s")
+    if args.concurrency:
+        for label, (c50, c99, rate) in (("direct", direct), ("micro-batched", coalesced)):
+            print(f"{args.concurrency} threads, {label}: p50 {c50:.3f} ms, p99 {c99:.3f} ms ({rate:,.0f} req/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Build a program recommendation model artifact (nearest-neighbour profiles,
+memory-mapped by the API) from a program catalog, and point LATEST at it.
+API workers load the new version on restart, or pin ML_MODEL_VERSION.
+
+Run from project root:
+  python3 scripts/build_recommendation_model.py [--catalog app/ml/programs.json] [--model-dir data/models] [--no-latest]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.core.config import get_settings
+from app.services.recommendation import PROGRAM_CATALOG, write_artifact
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--catalog", default=str(PROGRAM_CATALOG), help="program catalog JSON ({\"programs\": [...]})")
+    parser.add_argument("--model-dir", default=None, help="artifact directory (default ML_MODEL_DIR)")
+    parser.add_argument("--no-latest", action="store_true", help="build only; do not make it the latest version")
+    args = parser.parse_args()
+
+    programs = json.loads(Path(args.catalog).read_text())["programs"]
+    model_dir = args.model_dir or get_settings().ml_model_dir
+    version = write_artifact(model_dir, programs, make_latest=not args.no_latest)
+    print(f"Built {version} ({len(programs)} programs) in {model_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Payment reconciliation: walks recent Stripe checkout sessions and payment
+intents page by page and corrects Payment rows left behind by lost webhooks
+(e.g. stuck in `created`). Progress is checkpointed per page, so an
+interrupted run resumes where it stopped. Run periodically.
+
+Against the local stub (no Stripe account needed):
+  STRIPE_BACKEND=stub STRIPE_STUB_PATH=data/stripe_stub.json python3 scripts/reconcile_payments.py
+
+Run from project root:
+  python3 scripts/reconcile_payments.py [--dry-run] [--since-days 30] [--page-size 100] [--reset]
+"""
+
+import argparse
+import json
+import logging
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from sqlmodel import Session
+
+from app.db.session import engine
+from app.services.payment_gateway import get_payment_gateway
+from app.services.payment_reconciliation import reconcile_payments
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--since-days", type=float, default=None, help="Stripe objects created this recently (default PAYMENT_RECONCILE_LOOKBACK_DAYS)")
+    parser.add_argument("--page-size", type=int, default=None, help="Stripe list page size (max 100)")
+    parser.add_argument("--reset", action="store_true", help="ignore a stored checkpoint and start over")
+    parser.add_argument("--dry-run", action="store_true", help="report only, change nothing")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    since = timedelta(days=args.since_days) if args.since_days is not None else None
+    with Session(engine) as session:
+        report = reconcile_payments(
+            session,
+            get_payment_gateway(),
+            since=since,
+            page_size=args.page_size,
+            dry_run=args.dry_run,
+            reset=args.reset,
+        )
+    print(json.dumps(report.as_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
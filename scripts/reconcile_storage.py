@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Storage reconciliation: lists stored objects under a prefix page by page,
+merge-joins them with Document rows, completes uploads whose notification
+was missed, deletes unreferenced objects and abandoned pending documents,
+and reports completed documents whose object is missing. Run periodically.
+
+Only point it at prefixes whose objects are all tracked by Document rows.
+
+Run from project root:
+  python3 scripts/reconcile_storage.py [--dry-run] [--prefix documents/] [--grace-hours 24]
+"""
+
+import argparse
+import json
+import logging
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from sqlmodel import Session
+
+from app.db.session import engine
+from app.services.features import track_feature_changes
+from app.services.reconciliation import reconcile_storage
+from app.services.storage import get_storage
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--prefix", default="documents/", help="storage prefix to reconcile")
+    parser.add_argument("--grace-hours", type=float, default=None, help="leave objects/rows younger than this (default RECONCILE_GRACE_HOURS)")
+    parser.add_argument("--page-size", type=int, default=1000, help="objects/rows per page")
+    parser.add_argument("--dry-run", action="store_true", help="report only, change nothing")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    track_feature_changes()  # completions change applicants' document features
+    grace = timedelta(hours=args.grace_hours) if args.grace_hours is not None else None
+    with Session(engine) as session:
+        report = reconcile_storage(
+            session,
+            get_storage(),
+            prefix=args.prefix,
+            page_size=args.page_size,
+            grace=grace,
+            dry_run=args.dry_run,
+        )
+    print(json.dumps(report.as_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
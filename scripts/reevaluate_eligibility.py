@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Eligibility re-evaluation: re-scores every applicant's latest stored inputs
+against the active rule set (run after PUT /api/eligibility/rules). Chunks
+are evaluated on a process pool and written with bulk inserts at a bounded
+rate. Progress is checkpointed per chunk; an interrupted run resumes.
+
+Run from project root:
+  python3 scripts/reevaluate_eligibility.py [--chunk-size 2000] [--processes 2] [--rows-per-second 5000] [--reset]
+"""
+
+import argparse
+import json
+import logging
+import signal
+import sys
+import threading
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.db.session import engine
+from app.services.eligibility_reevaluation import reevaluate_eligibility
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunk-size", type=int, default=None, help="applicants per chunk")
+    parser.add_argument("--processes", type=int, default=None, help="evaluation processes")
+    parser.add_argument("--rows-per-second", type=float, default=None, help="result write rate (0 = unthrottled)")
+    parser.add_argument("--reset", action="store_true", help="ignore a stored checkpoint and start over")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    def progress(report):
+        share = f" ({100 * report.processed / report.total:.1f}%)" if report.total else ""
+        logging.info("Processed %d/%d applicants%s, %d results written", report.processed, report.total, share, report.inserted)
+
+    report = reevaluate_eligibility(
+        engine,
+        chunk_size=args.chunk_size,
+        processes=args.processes,
+        rows_per_second=args.rows_per_second,
+        reset=args.reset,
+        progress=progress,
+        stop=stop,
+    )
+    print(json.dumps(report.as_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
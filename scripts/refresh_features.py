@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Applicant feature store refresh: recomputes stale feature rows (and rows of
+applicants that have none yet) in batches until none are left. Source
+changes only mark rows stale; run this periodically so reads rarely have
+to recompute.
+
+Run from project root:
+  python3 scripts/refresh_features.py [--batch-size 500] [--all]
+"""
+
+import argparse
+import logging
+import signal
+import sys
+import threading
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from sqlmodel import Session
+
+from app.db.session import engine
+from app.services.features import mark_all_stale, refresh_stale
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch-size", type=int, default=None, help="applicants per batch")
+    parser.add_argument("--all", action="store_true", help="recompute every stored row, not only stale ones")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    total = 0
+    with Session(engine) as session:
+        if args.all:
+            logging.info("Marked %d rows stale", mark_all_stale(session))
+            session.commit()
+        while not stop.is_set():
+            refreshed = refresh_stale(session, args.batch_size)
+            if not refreshed:
+                break
+            total += refreshed
+            logging.info("Refreshed %d applicants (%d so far)", refreshed, total)
+    logging.info("Feature refresh %s: %d applicants", "stopped" if stop.is_set() else "finished", total)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Email worker: delivers the email outbox (outboundemail table) with bounded
+concurrency, paced to the provider's sending rate, using bulk sends for
+identical content. Transient failures are retried with backoff; permanent
+ones are dead-lettered (requeue them with --requeue-dead). Also sends due
+digest emails and task reminders every EMAIL_DIGEST_CHECK_SECONDS.
+
+EMAIL_BACKEND=file writes messages to EMAIL_FILE_DIR instead of sending.
+
+Run from project root:
+  python3 scripts/run_email_worker.py [--once] [--concurrency 4] [--rate 14] [--requeue-dead]
+"""
+
+import argparse
+import logging
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from sqlmodel import Session
+
+from app.db.session import engine
+from app.services.email import get_email_transport
+from app.services.email_outbox import requeue_dead, run_email_worker
+from app.services.email_templates import get_email_templates
+from app.services.notifications import run_scheduled
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--once", action="store_true", help="exit when no due messages remain")
+    parser.add_argument("--concurrency", type=int, default=None, help="provider calls in flight (default EMAIL_CONCURRENCY)")
+    parser.add_argument("--rate", type=float, default=None, help="recipients per second (default EMAIL_RATE_PER_SECOND)")
+    parser.add_argument("--batch-size", type=int, default=None, help="messages claimed per batch")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="seconds between polls when idle")
+    parser.add_argument("--no-digests", action="store_true", help="do not send digests and task reminders from this worker")
+    parser.add_argument("--requeue-dead", action="store_true", help="requeue dead-lettered messages before starting")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    if args.requeue_dead:
+        with Session(engine) as session:
+            print(f"Requeued {requeue_dead(session)} dead messages.")
+
+    get_email_templates().warm()
+    started = time.perf_counter()
+    handled = run_email_worker(
+        engine,
+        get_email_transport(),
+        concurrency=args.concurrency,
+        rate_per_second=args.rate,
+        batch_size=args.batch_size,
+        periodic=None if args.no_digests else run_scheduled,
+        poll_interval=args.poll_interval,
+        once=args.once,
+        stop=stop,
+    )
+    print(f"Handled {handled} messages in {time.perf_counter() - started:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Background thumbnail worker: renders first-page JPEG previews of clean image
+and PDF documents on a process pool and stores them next to the originals
+(`<key>.preview.jpg`), served by GET /api/documents/{id}/preview.
+
+Run from project root:
+  python3 scripts/run_preview_worker.py [--once] [--processes 4] [--batch-size 20]
+"""
+
+import argparse
+import logging
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.api.documents import _read_object, storage
+from app.db.session import engine
+from app.services.previews import run_preview_worker
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--once", action="store_true", help="exit when no pending documents remain")
+    parser.add_argument("--processes", type=int, default=None, help="render processes")
+    parser.add_argument("--batch-size", type=int, default=None, help="documents claimed per batch")
+    parser.add_argument("--poll-interval", type=float, default=5.0, help="seconds between polls when idle")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    started = time.perf_counter()
+    processed = run_preview_worker(
+        engine,
+        _read_object,
+        storage.write,
+        processes=args.processes,
+        batch_size=args.batch_size,
+        poll_interval=args.poll_interval,
+        once=args.once,
+        stop=stop,
+    )
+    print(f"Processed {processed} documents in {time.perf_counter() - started:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Background virus-scan worker: claims completed uploads with scanned_status
+"pending", streams them from S3 through the configured scanner (hashing them
+in the same pass) and records clean / infected / failed in batches. Uploads
+whose content is already stored are repointed at the existing object and the
+duplicate copy is deleted.
+
+Run several copies side by side; SELECT ... FOR UPDATE SKIP LOCKED keeps them
+from claiming the same documents. Tune with SCAN_BACKEND (signature, clamd),
+CLAMD_HOST / CLAMD_PORT, SCAN_CONCURRENCY and SCAN_BATCH_SIZE.
+
+Run from project root:
+  python3 scripts/run_scan_worker.py [--once] [--concurrency 8] [--batch-size 100]
+"""
+
+import argparse
+import logging
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.api.documents import _read_object, storage
+from app.db.session import engine
+from app.services.metrics import metrics
+from app.services.scanning import run_scan_worker
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--once", action="store_true", help="exit when no pending documents remain")
+    parser.add_argument("--concurrency", type=int, default=None, help="parallel scans")
+    parser.add_argument("--batch-size", type=int, default=None, help="documents claimed per batch")
+    parser.add_argument("--poll-interval", type=float, default=5.0, help="seconds between polls when idle")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    started = time.perf_counter()
+    processed = run_scan_worker(
+        engine,
+        _read_object,
+        delete_object=storage.delete,
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        poll_interval=args.poll_interval,
+        once=args.once,
+        stop=stop,
+    )
+    elapsed = time.perf_counter() - started
+    latency = metrics.histogram("scan.latency_seconds").snapshot()
+    print(
+        f"Scanned {processed} documents in {elapsed:.1f}s "
+        f"({processed / elapsed if elapsed else 0:.1f} docs/s; "
+        f"p50 {latency['p50']:.3f}s, p99 {latency['p99']:.3f}s)."
+    )
+
+
+if __name__ == "__main__":
+    main()
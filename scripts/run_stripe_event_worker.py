@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Stripe event worker: applies recorded webhook events (stripeevent table) to
+payments, retrying failures with a bounded number of attempts. The webhook
+only verifies, records and acknowledges events.
+
+Run from project root:
+  python3 scripts/run_stripe_event_worker.py [--once] [--batch-size 50]
+"""
+
+import argparse
+import logging
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.db.session import engine
+from app.services.stripe_events import run_stripe_event_worker
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--once", action="store_true", help="exit when no pending events remain")
+    parser.add_argument("--batch-size", type=int, default=None, help="events claimed per batch")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="seconds between polls when idle")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    started = time.perf_counter()
+    handled = run_stripe_event_worker(
+        engine,
+        batch_size=args.batch_size,
+        poll_interval=args.poll_interval,
+        once=args.once,
+        stop=stop,
+    )
+    print(f"Handled {handled} events in {time.perf_counter() - started:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
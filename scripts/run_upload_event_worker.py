@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Upload completion worker: consumes storage object-created notifications
+(S3 -> SQS at UPLOAD_EVENTS_QUEUE_URL, or the local backend's spool) and
+completes the matching pending documents in batches, so uploads are
+recorded even when the browser never calls /documents/{id}/complete.
+
+Run from project root:
+  python3 scripts/run_upload_event_worker.py [--once] [--batch-size 100]
+"""
+
+import argparse
+import logging
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.db.session import engine
+from app.services.features import track_feature_changes
+from app.services.storage import get_storage
+from app.services.upload_events import get_event_queue, run_upload_event_worker
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--once", action="store_true", help="exit when the queue is empty")
+    parser.add_argument("--batch-size", type=int, default=None, help="notifications completed per transaction")
+    parser.add_argument("--wait", type=int, default=20, help="long-poll seconds per receive")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    track_feature_changes()  # completions change applicants' document features
+    storage = get_storage()
+    queue = get_event_queue(storage)
+    if queue is None:
+        sys.exit("No event queue: set UPLOAD_EVENTS_QUEUE_URL (or STORAGE_BACKEND=local).")
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    started = time.perf_counter()
+    completed = run_upload_event_worker(
+        engine,
+        queue,
+        storage,
+        batch_size=args.batch_size,
+        wait_seconds=args.wait,
+        once=args.once,
+        stop=stop,
+    )
+    print(f"Completed {completed} documents in {time.perf_counter() - started:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
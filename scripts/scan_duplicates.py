@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Full duplicate-applicant scan: backfill blocking keys, score every block and
+queue suspected duplicates for manager review (GET /api/applicants/duplicates).
+
+Safe to re-run; already-queued or dismissed pairs are skipped.
+
+Run from project root:
+  python3 scripts/scan_duplicates.py [--chunk-size 10000]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from sqlmodel import Session
+
+from app.db.session import engine
+from app.services.dedup import scan_all
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunk-size", type=int, default=10_000, help="pairs scored per batch")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with Session(engine) as session:
+        stats = scan_all(session, chunk_size=args.chunk_size)
+    elapsed = time.perf_counter() - started
+    print(
+        f"Backfilled keys for {stats['backfilled']} applicants; scored {stats['pairs_scored']} pairs; "
+        f"queued {stats['candidates']} candidates in {elapsed:.1f}s."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -116,6 +116,23 @@
       });
   }
 
+  /* Thumbnails need the auth header, so fetch them as blobs; the browser revalidates via ETag. */
+  function loadPreview(documentId, cell) {
+    fetch("/api/documents/" + documentId + "/preview", { headers: authHeaders() })
+      .then(function (r) { return r.ok ? r.blob() : null; })
+      .then(function (blob) {
+        if (!blob) return;
+        var img = document.createElement("img");
+        img.src = URL.createObjectURL(blob);
+        img.alt = "Preview";
+        img.style.maxWidth = "80px";
+        img.style.maxHeight = "80px";
+        cell.textContent = "";
+        cell.appendChild(img);
+      })
+      .catch(function () {});
+  }
+
   function formatDate(d) {
     if (!d) return "";
     var date = new Date(d);
@@ -160,8 +177,9 @@
         if (documentsEmpty) documentsEmpty.style.display = "none";
         documents.forEach(function (d) {
           var tr = document.createElement("tr");
-          tr.innerHTML = "<td>" + (d.filename || "—") + "</td><td>" + (d.content_type || "—") + "</td><td>" + (d.scanned_status || "—") + "</td>";
+          tr.innerHTML = "<td class=\"doc-preview\">—</td><td>" + (d.filename || "—") + "</td><td>" + (d.content_type || "—") + "</td><td>" + (d.scanned_status || "—") + "</td>";
           documentsTbody.appendChild(tr);
+          if (d.preview_status === "ready") loadPreview(d.id, tr.querySelector(".doc-preview"));
         });
       }
 
@@ -84,8 +84,66 @@
     return valid;
   }
 
+  /* Files at or above this size use S3 multipart: parts upload in parallel and retry individually. */
+  var MULTIPART_THRESHOLD = 16 * 1024 * 1024;
+  var PART_CONCURRENCY = 4;
+  var PART_RETRIES = 3;
+
+  function authJson(token, url, body) {
+    return fetch(url, {
+      method: "POST",
+      headers: { "Authorization": "Bearer " + token, "Content-Type": "application/json" },
+      body: JSON.stringify(body || {})
+    }).then(parseJson);
+  }
+
+  function putPart(token, documentId, part, blob, attempt) {
+    return fetch(part.upload_url, { method: "PUT", body: blob }).then(function (res) {
+      if (!res.ok) throw new Error("Part " + part.part_number + " failed (" + res.status + ")");
+      var etag = res.headers.get("ETag");
+      if (!etag) throw new Error("Storage did not expose the ETag header (check bucket CORS ExposeHeaders).");
+      return { part_number: part.part_number, etag: etag };
+    }).catch(function (err) {
+      if (attempt >= PART_RETRIES) throw err;
+      /* Re-presign in case the URL expired, then retry this part only. */
+      return authJson(token, API + "/documents/" + documentId + "/multipart/parts", { part_numbers: [part.part_number] })
+        .then(function (data) { return putPart(token, documentId, data.parts[0], blob, attempt + 1); });
+    });
+  }
+
+  function uploadDocumentMultipart(token, bundleId, file, kind) {
+    var contentType = file.type || "application/octet-stream";
+    return authJson(token, API + "/bundles/" + bundleId + "/documents/multipart/initiate", {
+      filename: file.name,
+      content_type: contentType,
+      size_bytes: file.size
+    }).then(function (data) {
+      var queue = data.parts.slice();
+      var done = [];
+      function worker() {
+        var part = queue.shift();
+        if (!part) return Promise.resolve();
+        var start = (part.part_number - 1) * data.part_size;
+        var blob = file.slice(start, Math.min(start + data.part_size, file.size));
+        return putPart(token, data.document_id, part, blob, 1).then(function (result) {
+          done.push(result);
+          return worker();
+        });
+      }
+      var workers = [];
+      for (var i = 0; i < Math.min(PART_CONCURRENCY, queue.length); i++) workers.push(worker());
+      return Promise.all(workers).then(function () {
+        return authJson(token, API + "/documents/" + data.document_id + "/multipart/complete", { parts: done });
+      }).catch(function (err) {
+        authJson(token, API + "/documents/" + data.document_id + "/multipart/abort").catch(function () {});
+        throw new Error("Failed to upload " + kind + " file: " + err.message);
+      });
+    });
+  }
+
   function uploadDocument(token, bundleId, file, kind) {
     if (!file || !file.name) return Promise.resolve();
+    if (file.size >= MULTIPART_THRESHOLD) return uploadDocumentMultipart(token, bundleId, file, kind);
     var filename = file.name || (kind + ".pdf");
     var contentType = file.type || "application/octet-stream";
     var initiateUrl = API + "/bundles/" + bundleId + "/documents/initiate?filename=" + encodeURIComponent(filename) + "&content_type=" + encodeURIComponent(contentType);
@@ -123,6 +181,59 @@
       });
   }
 
+  /* Base64 SHA-256 of a file; S3 verifies it on upload and the server uses it to share identical content. */
+  function sha256Base64(file) {
+    if (!window.crypto || !window.crypto.subtle || !file.arrayBuffer) return Promise.resolve(null);
+    return file.arrayBuffer().then(function (buf) {
+      return window.crypto.subtle.digest("SHA-256", buf);
+    }).then(function (digest) {
+      var bytes = new Uint8Array(digest);
+      var binary = "";
+      for (var i = 0; i < bytes.length; i++) binary += String.fromCharCode(bytes[i]);
+      return btoa(binary);
+    }).catch(function () { return null; });
+  }
+
+  /* Upload several files: small ones share one batch initiate call, large ones go multipart; all run in parallel. */
+  function uploadDocuments(token, bundleId, items) {
+    items = items.filter(function (it) { return it.file && it.file.name && it.file.size > 0; });
+    var small = items.filter(function (it) { return it.file.size < MULTIPART_THRESHOLD; });
+    var large = items.filter(function (it) { return it.file.size >= MULTIPART_THRESHOLD; });
+    var uploads = large.map(function (it) {
+      return uploadDocument(token, bundleId, it.file, it.kind).catch(function (err) {
+        console.warn(it.kind + " upload failed:", err);
+      });
+    });
+    if (small.length) {
+      uploads.push(Promise.all(small.map(function (it) { return sha256Base64(it.file); })).then(function (digests) {
+        return authJson(token, API + "/bundles/" + bundleId + "/documents/initiate-batch", {
+          documents: small.map(function (it, i) {
+            return { filename: it.file.name, content_type: it.file.type || "application/octet-stream", sha256: digests[i] || undefined };
+          })
+        }).then(function (data) {
+          return Promise.all(data.documents.map(function (doc, i) {
+            var it = small[i];
+            var headers = { "Content-Type": doc.content_type };
+            if (digests[i]) headers["x-amz-checksum-sha256"] = digests[i];
+            return fetch(doc.upload_url, {
+              method: "PUT",
+              body: it.file,
+              headers: headers
+            }).then(function (putRes) {
+              if (!putRes.ok) throw new Error("Failed to upload " + it.kind + " file.");
+              return authJson(token, API + "/documents/" + doc.document_id + "/complete", { key: doc.key });
+            }).catch(function (err) {
+              console.warn(it.kind + " upload failed:", err);
+            });
+          }));
+        });
+      }).catch(function (err) {
+        console.warn("Document upload failed:", err);
+      }));
+    }
+    return Promise.all(uploads);
+  }
+
   if (!form || !submitBtn || !statusEl) return;
 
   form.addEventListener("submit", function (e) {
@@ -192,23 +303,12 @@
           })
         }).then(parseJson).then(function (applicant) {
           var uploadDone = Promise.resolve();
-          if (transcriptFile && transcriptFile.size > 0) {
-            setStatus("Uploading transcript…", false);
-            uploadDone = uploadDone.then(function () {
-              return uploadDocument(token, applicant.bundle_id, transcriptFile, "transcript").catch(function (err) {
-                console.warn("Transcript upload failed:", err);
-                return Promise.resolve();
-              });
-            });
-          }
-          if (degreeFile && degreeFile.size > 0) {
-            uploadDone = uploadDone.then(function () {
-              setStatus("Uploading degree…", false);
-              return uploadDocument(token, applicant.bundle_id, degreeFile, "degree").catch(function (err) {
-                console.warn("Degree upload failed:", err);
-                return Promise.resolve();
-              });
-            });
+          if ((transcriptFile && transcriptFile.size > 0) || (degreeFile && degreeFile.size > 0)) {
+            setStatus("Uploading documents…", false);
+            uploadDone = uploadDocuments(token, applicant.bundle_id, [
+              { file: transcriptFile, kind: "transcript" },
+              { file: degreeFile, kind: "degree" }
+            ]);
           }
           return uploadDone.then(function () {
             setStatus("Registration complete. You can sign in or upload documents later from your dashboard.", false);
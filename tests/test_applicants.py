@@ -1,6 +1,10 @@
 """Applicants API: create, list, get, get other's (403), bundle."""
 import pytest
 from fastapi.testclient import TestClient
+from sqlmodel import select
+
+from app.models.applicant import Applicant
+from app.models.user import User
 
 
 def test_create_applicant(client: TestClient, auth_headers):
@@ -83,3 +87,92 @@ def test_list_applicants_pagination(client: TestClient, auth_headers):
     r = client.get("/api/applicants/?page=1&limit=10", headers=auth_headers)
     assert r.status_code == 200
     assert isinstance(r.json(), list)
+
+
+def test_search_applicants_ranked_and_typo_tolerant(client: TestClient, auth_headers, manager_headers):
+    client.post(
+        "/api/applicants/",
+        headers=auth_headers,
+        json={
+            "first_name": "Searchable",
+            "last_name": "Okonkwo",
+            "latest_education": "BSc Physics, Lagos University",
+            "country_of_residence": "Nigeria",
+            "study_destination": "Canada",
+        },
+    )
+    r = client.get("/api/applicants/search?q=okonkwo", headers=manager_headers)
+    assert r.status_code == 200
+    items = r.json()["items"]
+    assert items[0]["last_name"] == "Okonkwo"
+    assert items[0]["owner_email"] == "authuser@example.com"
+
+    # Misspelled surname still matches via trigrams; multiple terms are ANDed.
+    r = client.get("/api/applicants/search?q=okonkow nigeria", headers=manager_headers)
+    assert [i["last_name"] for i in r.json()["items"]] == ["Okonkwo"]
+
+
+def test_search_applicants_reindexes_updated_rows(client: TestClient, session, auth_headers):
+    created = client.post(
+        "/api/applicants/",
+        headers=auth_headers,
+        json={"first_name": "Reindex", "last_name": "Abernathy", "latest_education": "BS"},
+    ).json()
+    r = client.get("/api/applicants/search?q=abernathy", headers=auth_headers)
+    assert [i["id"] for i in r.json()["items"]] == [created["applicant_id"]]
+
+    applicant = session.get(Applicant, created["applicant_id"])
+    applicant.last_name = "Castellanos"
+    session.add(applicant)
+    session.commit()
+    assert client.get("/api/applicants/search?q=abernathy", headers=auth_headers).json()["items"] == []
+    r = client.get("/api/applicants/search?q=castellanos", headers=auth_headers)
+    assert [i["id"] for i in r.json()["items"]] == [created["applicant_id"]]
+
+
+def test_search_applicants_reindexes_owner_email_change(client: TestClient, session, manager_headers):
+    client.post("/api/auth/register", json={"email": "zanzibarowner@example.com", "password": "pass123", "full_name": "Z"})
+    login = client.post("/api/auth/login", data={"username": "zanzibarowner@example.com", "password": "pass123"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    created = client.post(
+        "/api/applicants/", headers=headers, json={"first_name": "Owned", "last_name": "Byemail", "latest_education": "BS"}
+    ).json()
+    r = client.get("/api/applicants/search?q=zanzibarowner", headers=manager_headers)
+    assert [i["id"] for i in r.json()["items"]] == [created["applicant_id"]]
+
+    owner = session.exec(select(User).where(User.email == "zanzibarowner@example.com")).one()
+    owner.email = "timbuktuowner@example.com"
+    session.add(owner)
+    session.commit()
+    assert client.get("/api/applicants/search?q=zanzibarowner", headers=manager_headers).json()["items"] == []
+    r = client.get("/api/applicants/search?q=timbuktuowner", headers=manager_headers)
+    assert [i["id"] for i in r.json()["items"]] == [created["applicant_id"]]
+
+
+def test_search_applicants_cursor_pagination(client: TestClient, auth_headers):
+    for n in range(3):
+        client.post(
+            "/api/applicants/",
+            headers=auth_headers,
+            json={"first_name": f"Pager{n}", "last_name": "Cursorson", "latest_education": "BS"},
+        )
+    seen = []
+    cursor = None
+    while True:
+        params = {"q": "cursorson", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        r = client.get("/api/applicants/search", params=params, headers=auth_headers)
+        assert r.status_code == 200
+        page = r.json()
+        seen.extend(i["id"] for i in page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert len(seen) == len(set(seen)) >= 3
+    assert all(i["owner_email"] is None for i in page["items"])
+
+
+def test_search_applicants_invalid_cursor(client: TestClient, auth_headers):
+    r = client.get("/api/applicants/search?q=x&cursor=not-a-cursor", headers=auth_headers)
+    assert r.status_code == 400
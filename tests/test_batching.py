@@ -0,0 +1,70 @@
+"""Micro-batching coalescer: batch limits, fan-out, errors, metrics."""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services.batching import MicroBatcher
+from app.services.metrics import metrics
+
+
+def test_concurrent_calls_are_coalesced_and_fanned_out():
+    batches = []
+    gate = threading.Event()
+
+    def double(items):
+        gate.wait(1)  # hold the first batch so the rest queue up behind it
+        batches.append(list(items))
+        return [i * 2 for i in items]
+
+    batcher = MicroBatcher(double, max_batch=8, max_wait=0.05, name="test.batcher")
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        futures = [pool.submit(batcher, i) for i in range(20)]
+        time.sleep(0.1)
+        gate.set()
+        assert [f.result(2) for f in futures] == [i * 2 for i in range(20)]
+    batcher.close()
+
+    assert sorted(i for batch in batches for i in batch) == list(range(20))
+    assert max(len(b) for b in batches) == 8 and len(batches) < 20
+    snapshot = metrics.snapshot()["histograms"]
+    assert snapshot["test.batcher.batch_size"]["count"] == len(batches)
+    assert snapshot["test.batcher.queue_seconds"]["count"] == 20
+
+
+def test_lone_call_waits_at_most_max_wait_and_errors_propagate():
+    batcher = MicroBatcher(lambda items: [len(items)] * len(items), max_batch=64, max_wait=0.01, name="test.lone")
+    started = time.perf_counter()
+    assert batcher(1, timeout=1) == 1
+    assert time.perf_counter() - started < 0.5
+
+    def fail(items):
+        raise ValueError("model broke")
+
+    failing = MicroBatcher(fail, max_batch=4, max_wait=0.001, name="test.fail")
+    with pytest.raises(ValueError, match="model broke"):
+        failing(1, timeout=1)
+    failing.close()
+    batcher.close()
+    with pytest.raises(RuntimeError):
+        batcher.submit(2)
+
+
+def test_dead_worker_fails_its_futures_and_is_restarted():
+    class Crash(BaseException):
+        pass
+
+    calls = []
+
+    def flaky(items):
+        calls.append(len(items))
+        if len(calls) == 1:
+            raise Crash()
+        return [item * 10 for item in items]
+
+    batcher = MicroBatcher(flaky, max_batch=4, max_wait=0.001, name="test.crash")
+    with pytest.raises(RuntimeError, match="worker thread died"):
+        batcher(1, timeout=1)
+    assert batcher(2, timeout=1) == 20
+    batcher.close()
@@ -1,10 +1,14 @@
 """Documents: initiate and complete (S3 mocked)."""
+import base64
+import hashlib
 import pytest
 from unittest.mock import patch
+from botocore.exceptions import ClientError
 from fastapi.testclient import TestClient
+from sqlmodel import select
 
 
-@patch("app.api.documents.s3_client")
+@patch("app.api.documents.storage.client")
 def test_documents_initiate(mock_s3, client: TestClient, auth_headers):
     mock_s3.generate_presigned_url.return_value = "https://s3.example.com/presigned"
     cr = client.post(
@@ -24,7 +28,7 @@ def test_documents_initiate(mock_s3, client: TestClient, auth_headers):
     assert "key" in data
 
 
-@patch("app.api.documents.s3_client")
+@patch("app.api.documents.storage.client")
 def test_documents_initiate_bundle_404(mock_s3, client: TestClient, auth_headers):
     r = client.post(
         "/api/bundles/99999/documents/initiate?filename=x.pdf&content_type=application/pdf",
@@ -33,7 +37,7 @@ def test_documents_initiate_bundle_404(mock_s3, client: TestClient, auth_headers
     assert r.status_code == 404
 
 
-@patch("app.api.documents.s3_client")
+@patch("app.api.documents.storage.client")
 def test_documents_complete(mock_s3, client: TestClient, auth_headers):
     mock_s3.generate_presigned_url.return_value = "https://s3.example.com/presigned"
     cr = client.post(
@@ -56,3 +60,380 @@ def test_documents_complete(mock_s3, client: TestClient, auth_headers):
     )
     assert r.status_code == 200
     assert r.json().get("status") == "ok"
+
+
+@patch("app.api.documents.storage.client")
+def test_documents_multipart_flow(mock_s3, client: TestClient, auth_headers):
+    mock_s3.create_multipart_upload.return_value = {"UploadId": "up-1"}
+    mock_s3.generate_presigned_url.side_effect = lambda op, Params, ExpiresIn: f"https://s3/{op}/{Params['PartNumber']}"
+    cr = client.post(
+        "/api/applicants/",
+        headers=auth_headers,
+        json={"first_name": "MP", "last_name": "Multipart", "latest_education": "PhD"},
+    )
+    bundle_id = cr.json()["bundle_id"]
+    size = 20 * 1024 * 1024
+    r = client.post(
+        f"/api/bundles/{bundle_id}/documents/multipart/initiate",
+        headers=auth_headers,
+        json={"filename": "scan.pdf", "content_type": "application/pdf", "size_bytes": size},
+    )
+    assert r.status_code == 200
+    data = r.json()
+    assert data["part_count"] == 3
+    assert [p["part_number"] for p in data["parts"]] == [1, 2, 3]
+    doc_id = data["document_id"]
+
+    r = client.post(f"/api/documents/{doc_id}/multipart/parts", headers=auth_headers, json={"part_numbers": [2]})
+    assert r.json()["parts"][0]["upload_url"].endswith("/upload_part/2")
+
+    etags = ["a" * 32, "b" * 32, "c" * 32]
+    # SSE-KMS buckets report an ETag that is not derived from the parts; completion does not depend on it.
+    mock_s3.head_object.return_value = {"ContentLength": size, "ETag": '"0123456789abcdef0123456789abcdef-3"'}
+    r = client.post(
+        f"/api/documents/{doc_id}/multipart/complete",
+        headers=auth_headers,
+        json={"parts": [{"part_number": i + 1, "etag": f'"{e}"'} for i, e in enumerate(etags)]},
+    )
+    assert r.status_code == 200
+    assert r.json()["size_bytes"] == size
+    kwargs = mock_s3.complete_multipart_upload.call_args.kwargs
+    assert kwargs["UploadId"] == "up-1"
+    assert len(kwargs["MultipartUpload"]["Parts"]) == 3
+
+    # Upload is finished; further multipart calls are rejected.
+    r = client.post(f"/api/documents/{doc_id}/multipart/abort", headers=auth_headers)
+    assert r.status_code == 409
+
+
+@patch("app.api.documents.storage.client")
+def test_documents_multipart_complete_retry_after_head_failure(mock_s3, client: TestClient, auth_headers):
+    mock_s3.create_multipart_upload.return_value = {"UploadId": "up-3"}
+    mock_s3.generate_presigned_url.return_value = "https://s3.example.com/part"
+    bundle_id = client.post(
+        "/api/applicants/",
+        headers=auth_headers,
+        json={"first_name": "MR", "last_name": "Retry", "latest_education": "BS"},
+    ).json()["bundle_id"]
+    doc_id = client.post(
+        f"/api/bundles/{bundle_id}/documents/multipart/initiate",
+        headers=auth_headers,
+        json={"filename": "retry.pdf", "content_type": "application/pdf", "size_bytes": 1024},
+    ).json()["document_id"]
+    parts = {"parts": [{"part_number": 1, "etag": "a" * 32}]}
+
+    # The parts are assembled, then the HEAD fails: upload_id is still set.
+    denied = {"Error": {"Code": "AccessDenied"}, "ResponseMetadata": {"HTTPStatusCode": 403}}
+    mock_s3.head_object.side_effect = ClientError(denied, "HeadObject")
+    r = client.post(f"/api/documents/{doc_id}/multipart/complete", headers=auth_headers, json=parts)
+    assert r.status_code == 500
+
+    # S3 no longer knows the upload; the retry verifies the object it left behind.
+    gone = {"Error": {"Code": "NoSuchUpload"}, "ResponseMetadata": {"HTTPStatusCode": 404}}
+    mock_s3.complete_multipart_upload.side_effect = ClientError(gone, "CompleteMultipartUpload")
+    mock_s3.head_object.side_effect = None
+    mock_s3.head_object.return_value = {"ContentLength": 1024, "ETag": '"deadbeef-1"'}
+    r = client.post(f"/api/documents/{doc_id}/multipart/complete", headers=auth_headers, json=parts)
+    assert r.status_code == 200
+    assert r.json()["size_bytes"] == 1024
+
+    # An upload that was never assembled is still rejected.
+    doc_id = client.post(
+        f"/api/bundles/{bundle_id}/documents/multipart/initiate",
+        headers=auth_headers,
+        json={"filename": "retry.pdf", "content_type": "application/pdf", "size_bytes": 1024},
+    ).json()["document_id"]
+    mock_s3.head_object.side_effect = ClientError({"Error": {"Code": "404"}}, "HeadObject")
+    r = client.post(f"/api/documents/{doc_id}/multipart/complete", headers=auth_headers, json=parts)
+    assert r.status_code == 400
+
+
+@patch("app.api.documents.storage.client")
+def test_documents_multipart_verification_and_abort(mock_s3, client: TestClient, auth_headers):
+    mock_s3.create_multipart_upload.return_value = {"UploadId": "up-2"}
+    mock_s3.generate_presigned_url.return_value = "https://s3.example.com/part"
+    cr = client.post(
+        "/api/applicants/",
+        headers=auth_headers,
+        json={"first_name": "MV", "last_name": "Verify", "latest_education": "BS"},
+    )
+    bundle_id = cr.json()["bundle_id"]
+    data = client.post(
+        f"/api/bundles/{bundle_id}/documents/multipart/initiate",
+        headers=auth_headers,
+        json={"filename": "big.pdf", "content_type": "application/pdf", "size_bytes": 1024},
+    ).json()
+    doc_id = data["document_id"]
+
+    r = client.post(
+        f"/api/documents/{doc_id}/multipart/complete",
+        headers=auth_headers,
+        json={"parts": [{"part_number": 2, "etag": "a" * 32}]},
+    )
+    assert r.status_code == 400
+
+    mock_s3.head_object.return_value = {"ContentLength": 1000, "ETag": '"deadbeef-1"'}
+    r = client.post(
+        f"/api/documents/{doc_id}/multipart/complete",
+        headers=auth_headers,
+        json={"parts": [{"part_number": 1, "etag": "a" * 32}]},
+    )
+    assert r.status_code == 409  # smaller than declared
+    mock_s3.delete_object.assert_called_once()
+
+    declared = base64.b64encode(hashlib.sha256(b"declared").digest()).decode()
+    doc_id = client.post(
+        f"/api/bundles/{bundle_id}/documents/multipart/initiate",
+        headers=auth_headers,
+        json={"filename": "big.pdf", "content_type": "application/pdf", "size_bytes": 1024, "sha256": declared},
+    ).json()["document_id"]
+    other = base64.b64encode(hashlib.sha256(b"other").digest()).decode()
+    mock_s3.head_object.return_value = {"ContentLength": 1024, "ETag": '"deadbeef-1"', "ChecksumSHA256": other}
+    r = client.post(
+        f"/api/documents/{doc_id}/multipart/complete",
+        headers=auth_headers,
+        json={"parts": [{"part_number": 1, "etag": "a" * 32}]},
+    )
+    assert r.status_code == 409  # stored checksum differs from the declared one
+    assert mock_s3.delete_object.call_count == 2
+
+    # The failed upload was discarded; a fresh one can be aborted.
+    data = client.post(
+        f"/api/bundles/{bundle_id}/documents/multipart/initiate",
+        headers=auth_headers,
+        json={"filename": "big.pdf", "content_type": "application/pdf", "size_bytes": 1024},
+    ).json()
+    r = client.post(f"/api/documents/{data['document_id']}/multipart/abort", headers=auth_headers)
+    assert r.status_code == 200
+    mock_s3.abort_multipart_upload.assert_called_once()
+    docs = client.get(f"/api/bundles/{bundle_id}/documents", headers=auth_headers).json()
+    assert all(d["id"] not in (doc_id, data["document_id"]) for d in docs)
+
+
+@patch("app.api.documents.storage.client")
+def test_documents_initiate_batch(mock_s3, client: TestClient, session, auth_headers):
+    from sqlmodel import select
+    from app.models.audit import AuditLog
+
+    mock_s3.generate_presigned_url.return_value = "https://s3.example.com/presigned"
+    cr = client.post(
+        "/api/applicants/",
+        headers=auth_headers,
+        json={"first_name": "B", "last_name": "Batch", "latest_education": "BS"},
+    )
+    bundle_id = cr.json()["bundle_id"]
+    files = [
+        {"filename": "transcript.pdf", "content_type": "application/pdf"},
+        {"filename": "degree.pdf", "content_type": "application/pdf"},
+        {"filename": "passport.jpg", "content_type": "image/jpeg"},
+    ]
+    r = client.post(
+        f"/api/bundles/{bundle_id}/documents/initiate-batch",
+        headers=auth_headers,
+        json={"documents": files},
+    )
+    assert r.status_code == 200
+    docs = r.json()["documents"]
+    assert [d["content_type"] for d in docs] == [f["content_type"] for f in files]
+    assert len({d["document_id"] for d in docs}) == 3
+    assert mock_s3.generate_presigned_url.call_count == 3
+
+    events = session.exec(
+        select(AuditLog).where(AuditLog.resource_type == "document_bundle", AuditLog.resource_id == str(bundle_id))
+    ).all()
+    assert len(events) == 1
+
+    listed = client.get(f"/api/bundles/{bundle_id}/documents", headers=auth_headers).json()
+    assert {d["filename"] for d in listed} == {f["filename"] for f in files}
+
+
+@patch("app.api.documents.storage.client")
+def test_documents_initiate_batch_limits(mock_s3, client: TestClient, auth_headers):
+    r = client.post("/api/bundles/99999/documents/initiate-batch", headers=auth_headers, json={"documents": []})
+    assert r.status_code == 422
+    r = client.post(
+        "/api/bundles/99999/documents/initiate-batch",
+        headers=auth_headers,
+        json={"documents": [{"filename": "x.pdf", "content_type": "application/pdf"}]},
+    )
+    assert r.status_code == 404
+
+
+class _FakeBody:
+    def __init__(self, data):
+        self._data = data
+
+    def iter_chunks(self, size):
+        for i in range(0, len(self._data), 7):  # small chunks to exercise chunk boundaries
+            yield self._data[i : i + 7]
+
+    def close(self):
+        pass
+
+
+@patch("app.api.documents.storage.client")
+def test_bundle_archive_stream_and_range(mock_s3, client: TestClient, auth_headers):
+    import hashlib
+    import io
+    import zipfile
+
+    mock_s3.generate_presigned_url.return_value = "https://s3.example.com/presigned"
+    cr = client.post(
+        "/api/applicants/",
+        headers=auth_headers,
+        json={"first_name": "Z", "last_name": "Zip", "latest_education": "BS"},
+    )
+    bundle_id = cr.json()["bundle_id"]
+    contents = {"transcript.pdf": b"%PDF transcript " * 40, "degree.pdf": b"%PDF degree " * 25}
+    objects = {}
+    for name, data in contents.items():
+        init = client.post(
+            f"/api/bundles/{bundle_id}/documents/initiate?filename={name}&content_type=application/pdf",
+            headers=auth_headers,
+        ).json()
+        objects[init["key"]] = data
+        mock_s3.head_object.return_value = {"ContentLength": len(data)}
+        client.post(f"/api/documents/{init['document_id']}/complete", headers=auth_headers, json={"key": init["key"]})
+
+    def get_object(Bucket, Key, Range=None):
+        data = objects[Key]
+        if Range:
+            data = data[int(Range.split("=")[1].rstrip("-")) :]
+        return {"Body": _FakeBody(data)}
+
+    mock_s3.get_object.side_effect = get_object
+
+    r = client.get(f"/api/bundles/{bundle_id}/archive", headers=auth_headers)
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/zip"
+    full = r.content
+    assert int(r.headers["content-length"]) == len(full)
+    with zipfile.ZipFile(io.BytesIO(full)) as zf:
+        assert zf.testzip() is None
+        names = zf.namelist()
+        assert names[-1] == "SHA256SUMS"
+        by_suffix = {n.split("_", 1)[1]: zf.read(n) for n in names[:-1]}
+        assert by_suffix == contents
+        manifest = zf.read("SHA256SUMS").decode()
+        for data in contents.values():
+            assert hashlib.sha256(data).hexdigest() in manifest
+
+    # Resume from the middle: identical bytes to the tail of the full download.
+    mid = len(full) // 2
+    r = client.get(
+        f"/api/bundles/{bundle_id}/archive",
+        headers={**auth_headers, "Range": f"bytes={mid}-", "If-Range": r.headers["etag"]},
+    )
+    assert r.status_code == 206
+    assert r.headers["content-range"] == f"bytes {mid}-{len(full) - 1}/{len(full)}"
+    assert r.content == full[mid:]
+
+    r = client.get(f"/api/bundles/{bundle_id}/archive", headers={**auth_headers, "Range": "bytes=10-20"})
+    assert r.content == full[10:21]
+
+    r = client.get(f"/api/bundles/{bundle_id}/archive", headers={**auth_headers, "Range": f"bytes={len(full) + 5}-"})
+    assert r.status_code == 416
+
+
+@patch("app.api.documents.storage.client")
+def test_bundle_archive_entry_names_stay_inside_the_archive(mock_s3, client: TestClient, auth_headers):
+    import io
+    import zipfile
+
+    mock_s3.generate_presigned_url.return_value = "https://s3.example.com/presigned"
+    bundle_id = client.post(
+        "/api/applicants/",
+        headers=auth_headers,
+        json={"first_name": "Z", "last_name": "Slip", "latest_education": "BS"},
+    ).json()["bundle_id"]
+    init = client.post(
+        f"/api/bundles/{bundle_id}/documents/initiate",
+        params={"filename": "..\\..\\evil\x01.bat", "content_type": "application/octet-stream"},
+        headers=auth_headers,
+    ).json()
+    mock_s3.head_object.return_value = {"ContentLength": 4}
+    client.post(f"/api/documents/{init['document_id']}/complete", headers=auth_headers, json={"key": init["key"]})
+    mock_s3.get_object.side_effect = lambda Bucket, Key, Range=None: {"Body": _FakeBody(b"boom")}
+
+    r = client.get(f"/api/bundles/{bundle_id}/archive", headers=auth_headers)
+    with zipfile.ZipFile(io.BytesIO(r.content)) as zf:
+        assert zf.namelist() == [f"{init['document_id']}_evil.bat", "SHA256SUMS"]
+
+
+@patch("app.api.documents.storage.client")
+def test_documents_content_dedup_and_refcounted_delete(mock_s3, client: TestClient, session, auth_headers):
+    import base64
+    import hashlib
+
+    from app.models.document import Document, StoredObject
+
+    mock_s3.generate_presigned_url.return_value = "https://s3.example.com/presigned"
+    cr = client.post(
+        "/api/applicants/",
+        headers=auth_headers,
+        json={"first_name": "H", "last_name": "Hash", "latest_education": "BS"},
+    )
+    bundle_id = cr.json()["bundle_id"]
+    data = b"%PDF passport scan"
+    checksum = base64.b64encode(hashlib.sha256(data).digest()).decode()
+
+    assert client.post(
+        f"/api/bundles/{bundle_id}/documents/initiate-batch",
+        headers=auth_headers,
+        json={"documents": [{"filename": "p.pdf", "content_type": "application/pdf", "sha256": "not-a-digest"}]},
+    ).status_code == 400
+
+    r = client.post(
+        f"/api/bundles/{bundle_id}/documents/initiate-batch",
+        headers=auth_headers,
+        json={"documents": [{"filename": f"passport{i}.pdf", "content_type": "application/pdf", "sha256": checksum} for i in range(2)]},
+    )
+    assert r.status_code == 200
+    assert mock_s3.generate_presigned_url.call_args.kwargs["Params"]["ChecksumSHA256"] == checksum
+    first, second = r.json()["documents"]
+
+    mock_s3.head_object.return_value = {"ContentLength": len(data), "ChecksumSHA256": checksum}
+    for doc in (first, second):
+        assert client.post(f"/api/documents/{doc['document_id']}/complete", headers=auth_headers, json={"key": doc["key"]}).status_code == 200
+    # The second copy was repointed at the first object and deleted from storage.
+    mock_s3.delete_object.assert_called_once_with(Bucket="test-bucket", Key=second["key"])
+    docs = [session.get(Document, d["document_id"]) for d in (first, second)]
+    assert docs[0].s3_key == docs[1].s3_key == first["key"]
+    assert docs[0].content_sha256 == hashlib.sha256(data).hexdigest()
+    stored = session.exec(select(StoredObject).where(StoredObject.sha256 == docs[0].content_sha256)).one()
+    assert stored.ref_count == 2
+
+    mock_s3.delete_object.reset_mock()
+    assert client.delete(f"/api/documents/{first['document_id']}", headers=auth_headers).status_code == 200
+    mock_s3.delete_object.assert_not_called()
+    session.refresh(stored)
+    assert stored.ref_count == 1
+    assert client.delete(f"/api/documents/{second['document_id']}", headers=auth_headers).status_code == 200
+    mock_s3.delete_object.assert_called_once_with(Bucket="test-bucket", Key=first["key"])
+    session.expire_all()
+    assert session.exec(select(StoredObject).where(StoredObject.sha256 == hashlib.sha256(data).hexdigest())).first() is None
+
+
+@patch("app.api.documents.storage.client")
+def test_document_download_redirect(mock_s3, client: TestClient, auth_headers):
+    mock_s3.generate_presigned_url.return_value = "https://s3.example.com/presigned"
+    cr = client.post(
+        "/api/applicants/",
+        headers=auth_headers,
+        json={"first_name": "Dl", "last_name": "Load", "latest_education": "BS"},
+    )
+    bundle_id = cr.json()["bundle_id"]
+    init = client.post(
+        f"/api/bundles/{bundle_id}/documents/initiate?filename=cv.pdf&content_type=application/pdf",
+        headers=auth_headers,
+    ).json()
+    url = f"/api/documents/{init['document_id']}/download"
+    assert client.get(url, headers=auth_headers, follow_redirects=False).status_code == 409
+
+    mock_s3.head_object.return_value = {"ContentLength": 10}
+    client.post(f"/api/documents/{init['document_id']}/complete", headers=auth_headers, json={"key": init["key"]})
+    mock_s3.generate_presigned_url.return_value = "https://s3.example.com/download"
+    r = client.get(url, headers=auth_headers, follow_redirects=False)
+    assert r.status_code == 307
+    assert r.headers["location"] == "https://s3.example.com/download"
+    assert mock_s3.generate_presigned_url.call_args.args[0] == "get_object"
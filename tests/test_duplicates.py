@@ -0,0 +1,100 @@
+"""Duplicate applicants: detection on create, review queue, merge, dismiss, batch scan."""
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import select
+
+from app.models.applicant import Applicant
+from app.models.user import User
+from app.services import dedup
+
+
+def _create(client, headers, **fields):
+    body = {"first_name": "X", "last_name": "Y", "latest_education": "BS", **fields}
+    return client.post("/api/applicants/", headers=headers, json=body).json()
+
+
+def test_soundex_and_blocking_keys():
+    assert dedup.soundex("Robert") == dedup.soundex("Rupert") == "R163"
+    assert dedup.soundex("Tymczak") == "T522"
+    keys = dedup.blocking_keys(Applicant(account_user_id=1, first_name="José", last_name="Núñez", country_of_residence="Peru"))
+    assert "n:jose nunez" in keys
+    assert "c:peru|N520" in keys
+
+
+def test_duplicate_flagged_on_create_and_merged(client: TestClient, auth_headers, manager_headers):
+    original = _create(client, auth_headers, first_name="Adaeze", last_name="Nwachukwu", country_of_residence="Nigeria")
+    dup = _create(client, auth_headers, first_name="Adaeze", last_name="Nwachukwu ", country_of_residence="nigeria")
+    assert original["applicant_id"] in dup["possible_duplicate_ids"]
+
+    r = client.get("/api/applicants/duplicates", headers=manager_headers)
+    assert r.status_code == 200
+    entry = next(e for e in r.json() if e["applicant_id"] == dup["applicant_id"])
+    assert entry["duplicate_of"]["id"] == original["applicant_id"]
+    assert entry["score"] >= dedup.DUPLICATE_THRESHOLD
+
+    assert client.post(f"/api/applicants/duplicates/{entry['id']}/merge", headers=auth_headers, json={}).status_code == 403
+    r = client.post(f"/api/applicants/duplicates/{entry['id']}/merge", headers=manager_headers, json={})
+    assert r.status_code == 200
+    assert r.json()["status"] == "merged"
+
+    merged = client.get(f"/api/applicants/{dup['applicant_id']}", headers=manager_headers).json()
+    assert merged["status"] == "archived"
+    bundle = client.get(f"/api/applicants/{original['applicant_id']}/bundle", headers=manager_headers)
+    assert bundle.status_code == 200
+
+    r = client.post(f"/api/applicants/duplicates/{entry['id']}/merge", headers=manager_headers, json={})
+    assert r.status_code == 409
+
+
+def test_dismiss_and_batch_scan(client: TestClient, session, auth_headers, manager_headers):
+    a = _create(client, auth_headers, first_name="Tomasz", last_name="Kowalczyk", country_of_residence="Poland")
+    b = _create(client, auth_headers, first_name="Tomasz", last_name="Kowalczyk", country_of_residence="Poland")
+    queue = client.get("/api/applicants/duplicates", headers=manager_headers).json()
+    entry = next(e for e in queue if e["applicant_id"] == b["applicant_id"])
+    r = client.post(f"/api/applicants/duplicates/{entry['id']}/dismiss", headers=manager_headers)
+    assert r.status_code == 200
+    assert r.json()["status"] == "dismissed"
+
+    # Rows inserted without the incremental check (e.g. imports) are found by the batch scan,
+    # while the dismissed pair is not re-queued.
+    owner_id = session.get(Applicant, a["applicant_id"]).account_user_id
+    imported = [
+        Applicant(account_user_id=owner_id, first_name="Ingrid", last_name="Halvorsen", country_of_residence="Norway")
+        for _ in range(2)
+    ]
+    session.add_all(imported)
+    session.commit()
+    stats = dedup.scan_all(session, chunk_size=50)
+    assert stats["backfilled"] >= 2
+    queue = client.get("/api/applicants/duplicates", headers=manager_headers).json()
+    pairs = {(e["applicant_id"], e["duplicate_of_id"]) for e in queue}
+    assert (imported[1].id, imported[0].id) in pairs
+    assert (b["applicant_id"], a["applicant_id"]) not in pairs
+
+
+def test_merge_rejects_other_owner_and_archived_target(client: TestClient, session, auth_headers, manager_headers):
+    a = _create(client, auth_headers, first_name="Oluwaseun", last_name="Adebayo", country_of_residence="Ghana")
+    b = _create(client, auth_headers, first_name="Oluwaseun", last_name="Adebayo", country_of_residence="Ghana")
+    queue = client.get("/api/applicants/duplicates", headers=manager_headers).json()
+    entry = next(e for e in queue if e["applicant_id"] == b["applicant_id"])
+
+    # Same person registered under a different account: not mergeable.
+    other = session.get(Applicant, a["applicant_id"])
+    owner_id = other.account_user_id
+    other.account_user_id = session.exec(select(User.id).where(User.email == "manager@example.com")).one()
+    session.add(other)
+    session.commit()
+    r = client.post(f"/api/applicants/duplicates/{entry['id']}/merge", headers=manager_headers, json={})
+    assert r.status_code == 400
+
+    other.account_user_id = owner_id
+    other.status = "archived"
+    session.add(other)
+    session.commit()
+    r = client.post(f"/api/applicants/duplicates/{entry['id']}/merge", headers=manager_headers, json={})
+    assert r.status_code == 400
+
+    listed = client.get("/api/applicants/", headers=auth_headers, params={"limit": 100}).json()
+    assert a["applicant_id"] not in {row["id"] for row in listed}
+    hits = client.get("/api/applicants/search", headers=auth_headers, params={"q": "Oluwaseun"}).json()["items"]
+    assert [hit["id"] for hit in hits] == [b["applicant_id"]]
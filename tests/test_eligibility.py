@@ -54,3 +54,158 @@ def test_eligibility_not_eligible(client: TestClient, auth_headers):
     assert r.status_code == 200
     assert r.json()["is_eligible"] is False
     assert "Foundational" in str(r.json().get("recommendations", []))
+
+
+def _applicant(client: TestClient, headers, **profile) -> int:
+    r = client.post(
+        "/api/applicants/",
+        headers=headers,
+        json={"first_name": "B", "last_name": "Batch", "latest_education": "BS", **profile},
+    )
+    return r.json()["applicant_id"]
+
+
+def test_compiled_rules_vectorized_matches_per_row():
+    import numpy as np
+
+    from app.services.eligibility import DEFAULT_RULES, compile_rules
+
+    rules = {
+        **DEFAULT_RULES,
+        "rules": DEFAULT_RULES["rules"]
+        + [
+            {"destination": "USA", "level": "*", "thresholds": [{"tier": "solid", "min_gpa": 3.2, "min_toefl": 85}]},
+            {"destination": "*", "level": "graduate", "thresholds": [{"tier": "top", "min_gpa": 3.7, "min_toefl": 100}]},
+            {"destination": "usa", "level": "graduate", "thresholds": [{"tier": "top", "min_gpa": 3.9, "min_toefl": 110}]},
+        ],
+    }
+    compiled = compile_rules(rules, version=7)
+    rng = np.random.default_rng(0)
+    n = 2000
+    gpa = rng.uniform(2.0, 4.0, n)
+    toefl = rng.integers(60, 121, n)
+    destinations = rng.choice(["USA", "Canada", None, "UK"], n).tolist()
+    levels = rng.choice(["graduate", "freshman", None], n).tolist()
+
+    tiers = compiled.evaluate(gpa, toefl, destinations, levels)
+    assert tiers.tolist() == [compiled.evaluate_row(*row) for row in zip(gpa, toefl, destinations, levels)]
+
+    # Most specific rule wins: USA graduate beats both USA/* and */graduate.
+    tiers = compiled.evaluate([3.8] * 3, [105] * 3, ["USA", "Canada", "USA"], ["graduate", "graduate", "freshman"])
+    names = [compiled.outcome(t)[0] for t in tiers]
+    assert names == ["prep", "top", "solid"]
+
+
+def test_eligibility_batch_scores_and_persists(client: TestClient, auth_headers, manager_headers, session):
+    from sqlmodel import select
+
+    from app.models.eligibility import EligibilityResult
+
+    ids = [_applicant(client, auth_headers) for _ in range(3)]
+    items = [
+        {"applicant_id": ids[0], "gpa": 3.8, "toefl": 100},
+        {"applicant_id": ids[1], "gpa": 3.1, "toefl": 82},
+        {"applicant_id": ids[2], "gpa": 2.0, "toefl": 60},
+    ]
+    r = client.post("/api/eligibility/batch", headers=manager_headers, json={"items": items})
+    assert r.status_code == 200
+    data = r.json()
+    assert data["count"] == 3 and data["eligible_count"] == 2 and data["persisted"] == 3
+    assert [row["is_eligible"] for row in data["results"]] == [True, True, False]
+    stored = session.exec(select(EligibilityResult).where(EligibilityResult.applicant_id.in_(ids))).all()
+    assert len(stored) == 3
+    assert all(row.rule_version == data["rule_version"] for row in stored)
+
+    r = client.post("/api/eligibility/batch", headers=manager_headers, json={"items": items, "persist": False})
+    assert r.json()["persisted"] == 0
+
+    unknown = {"items": [{"applicant_id": 999999, "gpa": 3.0, "toefl": 80}]}
+    r = client.post("/api/eligibility/batch", headers=manager_headers, json=unknown)
+    assert r.status_code == 404
+    r = client.post("/api/eligibility/batch", headers=auth_headers, json={"items": items})
+    assert r.status_code == 403
+
+
+def test_eligibility_rules_publish_applies_per_destination(client: TestClient, auth_headers, manager_headers, root_headers):
+    r = client.get("/api/eligibility/rules", headers=manager_headers)
+    assert r.status_code == 200
+    rules = r.json()["rules"]
+    previous = r.json()["version"]
+
+    rules["rules"].append(
+        {"destination": "Canada", "level": "graduate", "thresholds": [{"tier": "top", "min_gpa": 3.9, "min_toefl": 110}]}
+    )
+    r = client.put("/api/eligibility/rules", headers=root_headers, json=rules)
+    assert r.status_code == 200
+    assert r.json()["version"] == previous + 1
+
+    aid = _applicant(client, auth_headers, study_destination="Canada", level_of_study="graduate")
+    r = client.post("/api/eligibility/check", headers=auth_headers, json={"applicant_id": aid, "gpa": 3.8, "toefl": 100})
+    assert r.json()["is_eligible"] is False and r.json()["rule_version"] == previous + 1
+    # Other destinations keep the catch-all thresholds.
+    r = client.post(
+        "/api/eligibility/check",
+        headers=auth_headers,
+        json={"applicant_id": aid, "gpa": 3.8, "toefl": 100, "study_destination": "USA"},
+    )
+    assert r.json()["is_eligible"] is True
+
+    bad = {**rules, "fallback_tier": "missing"}
+    assert client.put("/api/eligibility/rules", headers=root_headers, json=bad).status_code == 422
+    assert client.put("/api/eligibility/rules", headers=manager_headers, json=rules).status_code == 403
+
+
+def test_eligibility_repeat_check_reuses_result(client: TestClient, auth_headers, manager_headers, session):
+    from sqlmodel import select
+
+    from app.models.eligibility import EligibilityResult
+    from app.services import eligibility as engine
+
+    aid = _applicant(client, auth_headers, study_destination="USA", level_of_study="freshman")
+    body = {"applicant_id": aid, "gpa": 3.6, "toefl": 95}
+    first = client.post("/api/eligibility/check", headers=auth_headers, json=body).json()
+    assert first["cached"] is False
+
+    # Served from the LRU, then (cache cleared) from the stored row; case and notes do not matter.
+    again = client.post("/api/eligibility/check", headers=auth_headers, json={**body, "notes": "recheck"}).json()
+    engine._result_cache.clear()
+    stored = client.post(
+        "/api/eligibility/check", headers=auth_headers, json={**body, "gpa": 3.600001, "study_destination": "usa"}
+    ).json()
+    assert again["cached"] is True and stored["cached"] is True
+    assert again["created_at"] == first["created_at"] == stored["created_at"]
+    assert stored["recommendations"] == first["recommendations"]
+
+    # A batch with the same inputs stores nothing new.
+    r = client.post("/api/eligibility/batch", headers=manager_headers, json={"items": [body, body]})
+    assert r.json()["persisted"] == 0 and r.json()["reused"] == 2
+
+    client.post("/api/eligibility/check", headers=auth_headers, json={**body, "toefl": 70})
+    rows = session.exec(select(EligibilityResult).where(EligibilityResult.applicant_id == aid)).all()
+    assert len(rows) == 2
+
+    r = client.get(f"/api/eligibility/applicants/{aid}/history", headers=auth_headers)
+    assert r.status_code == 200
+    history = r.json()
+    assert [h["toefl"] for h in history] == [70, 95]
+    assert history[0]["is_eligible"] is False and history[1]["tier"] == "top"
+
+    other = client.post("/api/auth/register", json={"email": "elig-other@example.com", "password": "pass123", "full_name": "O"})
+    assert other.status_code in (200, 201)
+    login = client.post("/api/auth/login", data={"username": "elig-other@example.com", "password": "pass123"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    assert client.get(f"/api/eligibility/applicants/{aid}/history", headers=headers).status_code == 403
+
+
+def test_eligibility_gpa_rounding_matches_fingerprint(client: TestClient, auth_headers, session):
+    from app.services import eligibility as engine
+
+    aid = _applicant(client, auth_headers, study_destination="USA", level_of_study="freshman")
+    rules = engine.get_active_rules(session)
+    expected = rules.outcome(rules.evaluate_row(3.5, 95, "USA", "freshman"))[0]
+
+    # 3.499 and 3.5 share a fingerprint, so both must be scored as 3.50 whichever comes first.
+    first = client.post("/api/eligibility/check", headers=auth_headers, json={"applicant_id": aid, "gpa": 3.499, "toefl": 95}).json()
+    second = client.post("/api/eligibility/check", headers=auth_headers, json={"applicant_id": aid, "gpa": 3.5, "toefl": 95}).json()
+    assert first["tier"] == second["tier"] == expected
+    assert second["cached"] is True
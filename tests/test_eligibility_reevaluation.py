@@ -0,0 +1,64 @@
+"""Eligibility re-evaluation after a rule change: chunked, process pool, resumable."""
+import threading
+
+from sqlmodel import select
+
+from app.models.eligibility import EligibilityResult
+from app.services.checkpoints import load_checkpoint
+from app.services.eligibility_reevaluation import CHECKPOINT_NAME, reevaluate_eligibility
+
+
+def _applicant(client, headers, n):
+    r = client.post(
+        "/api/applicants/",
+        headers=headers,
+        json={"first_name": f"R{n}", "last_name": "Reeval", "latest_education": "BS", "study_destination": "USA"},
+    )
+    return r.json()["applicant_id"]
+
+
+def test_reevaluation_rescores_latest_inputs_and_resumes(client, session, auth_headers, manager_headers, root_headers):
+    ids = [_applicant(client, auth_headers, n) for n in range(6)]
+    items = [{"applicant_id": aid, "gpa": 3.4, "toefl": 95} for aid in ids]
+    assert client.post("/api/eligibility/batch", headers=manager_headers, json={"items": items}).json()["eligible_count"] == 6
+
+    # Stricter rules for USA: 3.4 no longer qualifies.
+    rules = client.get("/api/eligibility/rules", headers=manager_headers).json()["rules"]
+    rules["rules"] = [r for r in rules["rules"] if r["destination"].lower() != "usa"] + [
+        {"destination": "USA", "level": "*", "thresholds": [{"tier": "top", "min_gpa": 3.6, "min_toefl": 100}]}
+    ]
+    version = client.put("/api/eligibility/rules", headers=root_headers, json=rules).json()["version"]
+
+    # Stop after the first chunk, then resume from the checkpoint.
+    stop = threading.Event()
+    first = reevaluate_eligibility(
+        session.get_bind(),
+        chunk_size=2,
+        processes=1,
+        rows_per_second=0,
+        reset=True,
+        progress=lambda _: stop.set(),
+        stop=stop,
+    )
+    assert not first.completed and first.processed == 2
+    session.expire_all()
+    assert load_checkpoint(session, CHECKPOINT_NAME)["rule_version"] == version
+
+    seen = []
+    report = reevaluate_eligibility(
+        session.get_bind(), chunk_size=2, processes=2, rows_per_second=0, progress=lambda r: seen.append(r.processed)
+    )
+    assert report.resumed and report.completed
+    assert report.processed == report.total and seen == sorted(seen)
+    assert report.changed >= 6
+
+    session.expire_all()
+    latest = session.exec(
+        select(EligibilityResult).where(EligibilityResult.applicant_id.in_(ids), EligibilityResult.rule_version == version)
+    ).all()
+    assert len(latest) == 6 and not any(row.is_eligible for row in latest)
+    assert load_checkpoint(session, CHECKPOINT_NAME) == {}
+
+    # Nothing left to do on this version.
+    again = reevaluate_eligibility(session.get_bind(), chunk_size=50, processes=1, rows_per_second=0)
+    assert again.completed and again.inserted == 0 and again.skipped == again.processed
@@ -0,0 +1,153 @@
+"""Email outbox: enqueue in-transaction, batched delivery, retries, dead-letters, rate limiting, SES bulk."""
+from datetime import datetime
+
+import boto3
+import pytest
+from botocore.stub import Stubber
+from sqlmodel import select
+
+from app.models.email import OutboundEmail
+from app.services.email import EmailEnvelope, EmailTransport, FileTransport, SendResult, SESTransport
+from app.services.email_outbox import enqueue_email, requeue_dead, run_email_worker
+from app.services.resilience import RateLimiter, RetryPolicy
+
+
+def _rows(session, subject):
+    session.expire_all()
+    return session.exec(select(OutboundEmail).where(OutboundEmail.subject == subject).order_by(OutboundEmail.id)).all()
+
+
+def test_outbox_delivers_to_file_sink_in_bulk_batches(session, tmp_path):
+    recipients = [f"bulk{i}@example.com" for i in range(3)]
+    assert enqueue_email(session, recipients + [" bulk0@example.com ", ""], "Outbox news", "<p>Hi</p>", dedupe_key="news-1") == 3
+    assert enqueue_email(session, ["bulk1@example.com"], "Outbox news", "<p>Hi</p>", dedupe_key="news-1") == 0
+    enqueue_email(session, ["solo@example.com"], "Outbox solo", "<p>Just you</p>", "Just you")
+    session.commit()
+
+    class CountingFileTransport(FileTransport):
+        calls = []
+
+        def send(self, envelopes):
+            self.calls.append([e.to_address for e in envelopes])
+            return super().send(envelopes)
+
+    transport = CountingFileTransport(tmp_path)
+    assert run_email_worker(session.get_bind(), transport, rate_per_second=0, once=True) >= 4
+    assert sorted(recipients) in [sorted(call) for call in transport.calls]  # one bulk call for identical content
+    sent = {m["to_address"]: m for m in transport.messages() if m["subject"].startswith("Outbox")}
+    assert set(sent) == set(recipients) | {"solo@example.com"}
+    assert sent["solo@example.com"]["text_body"] == "Just you"
+    assert all(r.status == "sent" and r.provider_message_id and r.sent_at for r in _rows(session, "Outbox news"))
+
+
+class FlakyTransport(EmailTransport):
+    max_batch = 10
+
+    def __init__(self, outcomes):
+        self.outcomes = outcomes  # address -> list of SendResult, consumed in order; others succeed
+
+    def send(self, envelopes):
+        return [(self.outcomes.get(e.to_address) or [SendResult(ok=True)]).pop(0) for e in envelopes]
+
+
+class FixedBackoff(RetryPolicy):
+    def delay(self, attempt):
+        return 600.0
+
+
+def test_outbox_retries_with_backoff_then_dead_letters(session):
+    from app.services import email_outbox
+
+    enqueue_email(session, ["retry@example.com", "bounce@example.com"], "Outbox retry", "<p>x</p>")
+    session.commit()
+    transient = SendResult(ok=False, error="Throttling", transient=True)
+    transport = FlakyTransport({
+        "retry@example.com": [transient, SendResult(ok=True, message_id="m-1")],
+        "bounce@example.com": [SendResult(ok=False, error="MessageRejected")],
+    })
+    engine = session.get_bind()
+    pool = email_outbox.ThreadPoolExecutor(max_workers=2)
+    limiter = RateLimiter(0)
+    backoff = FixedBackoff()
+
+    email_outbox.deliver_due(engine, transport, pool, limiter, max_attempts=3, backoff=backoff)
+    retry, bounce = _rows(session, "Outbox retry")
+    assert (retry.status, retry.attempts, retry.last_error) == ("queued", 1, "Throttling")
+    assert (retry.next_attempt_at - datetime.utcnow()).total_seconds() > 500  # not due yet
+    assert (bounce.status, bounce.last_error) == ("dead", "MessageRejected")  # permanent: no retry
+
+    retry.next_attempt_at = datetime.utcnow()
+    session.add(retry)
+    session.commit()
+    email_outbox.deliver_due(engine, transport, pool, limiter, max_attempts=3, backoff=backoff)
+    retry, bounce = _rows(session, "Outbox retry")
+    assert (retry.status, retry.attempts, retry.provider_message_id) == ("sent", 2, "m-1")
+
+    assert requeue_dead(session, [bounce.id]) == 1
+    assert _rows(session, "Outbox retry")[1].status == "queued"
+    pool.shutdown()
+
+
+def test_rate_limiter_paces_recipients():
+    now = [0.0]
+    slept = []
+
+    def sleep(seconds):
+        slept.append(seconds)
+        now[0] += seconds
+
+    limiter = RateLimiter(10, burst=10, clock=lambda: now[0], sleep=sleep)
+    assert limiter.acquire(10) == 0  # the burst is free
+    assert limiter.acquire(5) == 0.5
+    now[0] += 1.0  # refills 10 tokens
+    assert limiter.acquire(1) == 0
+    assert slept == [0.5]
+
+
+def test_ses_transport_uses_bulk_send_for_identical_content():
+    client = boto3.client("sesv2", region_name="us-east-1", aws_access_key_id="x", aws_secret_access_key="x")
+    transport = SESTransport(client, "no-reply@example.com")
+    envelopes = [EmailEnvelope(i, f"u{i}@example.com", "Hello", "<p>Hello</p>") for i in range(3)]
+    envelopes.append(EmailEnvelope(9, "odd@example.com", "Hi {{name}}", "<p>{{literal}}</p>"))
+    batches = transport.batches(envelopes)
+    assert [len(b) for b in batches] == [3, 1]
+
+    with Stubber(client) as stubber:
+        stubber.add_response(
+            "send_bulk_email",
+            {"BulkEmailEntryResults": [
+                {"Status": "SUCCESS", "MessageId": "a"},
+                {"Status": "ACCOUNT_THROTTLED", "Error": "slow down"},
+                {"Status": "MESSAGE_REJECTED", "Error": "no"},
+            ]},
+        )
+        stubber.add_client_error("send_email", service_error_code="TooManyRequestsException", http_status_code=429)
+        bulk = transport.send(batches[0])
+        single = transport.send(batches[1])
+    assert [(r.ok, r.transient) for r in bulk] == [(True, False), (False, True), (False, False)]
+    assert (single[0].ok, single[0].transient) == (False, True)
+
+
+def test_ses_transport_treats_suspension_and_failed_status_as_permanent():
+    client = boto3.client("sesv2", region_name="us-east-1", aws_access_key_id="x", aws_secret_access_key="x")
+    transport = SESTransport(client, "no-reply@example.com")
+    envelopes = [EmailEnvelope(i, f"u{i}@example.com", "Hello", "<p>Hello</p>") for i in range(2)]
+
+    with Stubber(client) as stubber:
+        stubber.add_response(
+            "send_bulk_email",
+            {"BulkEmailEntryResults": [{"Status": "FAILED", "Error": "boom"}, {"Status": "SUCCESS", "MessageId": "b"}]},
+        )
+        stubber.add_client_error("send_email", service_error_code="AccountSuspendedException", http_status_code=400)
+        bulk = transport.send(envelopes)
+        single = transport.send(envelopes[:1])
+    assert [(r.ok, r.transient) for r in bulk] == [(False, False), (True, False)]
+    assert (single[0].ok, single[0].transient) == (False, False)
+
+
+def test_email_transport_requires_send():
+    class Incomplete(EmailTransport):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
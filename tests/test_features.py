@@ -0,0 +1,113 @@
+"""Applicant feature store: incremental staleness tracking and bulk contiguous reads."""
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import select
+
+from app.models.document import Document, DocumentBundle
+from app.models.feature import ApplicantFeatures
+from app.models.review import ApplicantReview
+from app.services.features import (
+    FEATURE_NAMES,
+    load_features,
+    refresh_stale,
+    track_feature_changes,
+    untrack_feature_changes,
+)
+
+
+@pytest.fixture(autouse=True)
+def tracking():
+    """The API registers change tracking at startup, which TestClient (outside `with`) does not run."""
+    track_feature_changes()
+    yield
+    untrack_feature_changes()
+
+
+def _applicant(client: TestClient, auth_headers, **profile) -> int:
+    return client.post(
+        "/api/applicants/",
+        headers=auth_headers,
+        json={"first_name": "F", "last_name": "Store", "latest_education": "BS", **profile},
+    ).json()["applicant_id"]
+
+
+def _row(session, applicant_id) -> ApplicantFeatures:
+    session.expire_all()
+    return session.exec(select(ApplicantFeatures).where(ApplicantFeatures.applicant_id == applicant_id)).one()
+
+
+def test_load_features_returns_contiguous_matrix(client: TestClient, auth_headers, session):
+    first = _applicant(client, auth_headers, study_destination="USA", level_of_study="graduate", annual_budget="$30,000")
+    second = _applicant(client, auth_headers, study_destination="Canada")
+    check = client.post("/api/eligibility/check", headers=auth_headers, json={"applicant_id": first, "gpa": 3.6, "toefl": 95})
+
+    features = load_features(session, [second, 999999, first, second])
+    assert features.applicant_ids.tolist() == [second, first]
+    assert features.values.dtype == np.float32 and features.values.flags.c_contiguous
+    assert features.values.shape == (2, len(FEATURE_NAMES))
+
+    assert features.column("gpa")[1] == np.float32(3.6) and np.isnan(features.column("gpa")[0])
+    assert features.column("is_eligible")[1] == float(check.json()["is_eligible"])
+    assert np.isnan(features.column("budget_usd")[0]) and features.column("budget_usd")[1] == 30000.0
+    assert features.column("destination_usa").tolist() == [0.0, 1.0]
+    assert features.column("level_graduate").tolist() == [0.0, 1.0]
+    assert not _row(session, first).stale
+
+
+def test_source_changes_mark_features_stale(client: TestClient, auth_headers, session):
+    aid = _applicant(client, auth_headers, study_destination="USA")
+    load_features(session, [aid])
+    assert not _row(session, aid).stale
+
+    client.post("/api/eligibility/check", headers=auth_headers, json={"applicant_id": aid, "gpa": 3.1, "toefl": 85})
+    assert _row(session, aid).stale
+    assert load_features(session, [aid]).column("eligibility_checks").tolist() == [1.0]
+
+    session.add(ApplicantReview(applicant_id=aid, reviewer_user_id=1, positive=False))
+    bundle = DocumentBundle(applicant_id=aid, name="Transcripts")
+    session.add(bundle)
+    session.commit()
+    session.add(Document(bundle_id=bundle.id, filename="t.pdf", content_type="application/pdf", s3_key="k", size_bytes=1200))
+    session.commit()
+    assert _row(session, aid).stale
+
+    features = load_features(session, [aid])
+    assert features.column("reviews_negative").tolist() == [1.0]
+    assert features.column("documents").tolist() == [1.0]
+    assert features.column("document_bytes").tolist() == [1200.0]
+
+    # Changes to columns that do not feed a feature leave the row fresh.
+    document = session.get(Document, session.exec(select(Document.id).where(Document.bundle_id == bundle.id)).one())
+    document.scanned_status = "clean"
+    session.add(document)
+    session.commit()
+    assert not _row(session, aid).stale
+
+
+def test_refresh_stale_drains_the_queue(client: TestClient, auth_headers, session):
+    aid = _applicant(client, auth_headers)
+    while refresh_stale(session, limit=50):
+        pass
+    row = _row(session, aid)
+    assert not row.stale and row.schema_version > 0
+    assert np.frombuffer(row.vector, dtype="<f4").shape == (len(FEATURE_NAMES),)
+
+
+def test_writes_are_not_tracked_unless_registered(client: TestClient, auth_headers, session):
+    aid = _applicant(client, auth_headers)
+    load_features(session, [aid])
+    untrack_feature_changes()
+    session.add(ApplicantReview(applicant_id=aid, reviewer_user_id=1, positive=True))
+    session.commit()
+    assert not _row(session, aid).stale
+
+
+def test_repeated_check_becomes_the_latest_inputs(client: TestClient, auth_headers, session):
+    aid = _applicant(client, auth_headers, study_destination="USA")
+    for gpa in (3.1, 3.9, 3.1):  # the last check reuses the first stored row
+        client.post("/api/eligibility/check", headers=auth_headers, json={"applicant_id": aid, "gpa": gpa, "toefl": 95})
+
+    features = load_features(session, [aid])
+    assert features.column("gpa")[0] == np.float32(3.1)
+    assert features.column("eligibility_checks")[0] == 2
@@ -52,3 +52,70 @@ def test_list_messages_filter_by_applicant(client: TestClient, auth_headers):
 def test_mark_read_404(client: TestClient, auth_headers):
     r = client.post("/api/messages/99999/read", headers=auth_headers)
     assert r.status_code == 404
+
+
+def test_search_messages_snippet_and_filters(client: TestClient, auth_headers):
+    cr = client.post(
+        "/api/applicants/",
+        headers=auth_headers,
+        json={"first_name": "S", "last_name": "Search", "latest_education": "BS"},
+    )
+    aid = cr.json()["applicant_id"]
+    client.post(
+        "/api/messages/",
+        headers=auth_headers,
+        json={"applicant_id": aid, "body": "My <visa> appointment date is 12 March, please note the Visa date."},
+    )
+    client.post(
+        "/api/messages/",
+        headers=auth_headers,
+        json={"applicant_id": aid, "body": "Transcript uploaded."},
+    )
+    r = client.get("/api/messages/search", params={"q": "visa date", "applicant_id": aid}, headers=auth_headers)
+    assert r.status_code == 200
+    items = r.json()
+    assert len(items) == 1
+    snippet = items[0]["snippet"]
+    assert "<mark>visa</mark>" in snippet and "<mark>Visa</mark>" in snippet
+    assert "&lt;" in snippet  # message HTML is escaped
+
+    r = client.get(
+        "/api/messages/search",
+        params={"q": "visa", "applicant_id": aid, "created_to": "2000-01-01T00:00:00"},
+        headers=auth_headers,
+    )
+    assert r.status_code == 200
+    assert r.json() == []
+
+
+def test_search_messages_treats_underscore_literally(client: TestClient, auth_headers):
+    cr = client.post(
+        "/api/applicants/",
+        headers=auth_headers,
+        json={"first_name": "L", "last_name": "Like", "latest_education": "BS"},
+    )
+    aid = cr.json()["applicant_id"]
+    for body in ("Form ds_160 attached.", "Form ds-160 attached."):
+        client.post("/api/messages/", headers=auth_headers, json={"applicant_id": aid, "body": body})
+    r = client.get("/api/messages/search", params={"q": "ds_160", "applicant_id": aid}, headers=auth_headers)
+    assert [i["body"] for i in r.json()] == ["Form ds_160 attached."]
+
+
+def test_messages_of_another_clients_applicant_are_forbidden(client: TestClient, auth_headers, manager_headers):
+    cr = client.post(
+        "/api/applicants/",
+        headers=auth_headers,
+        json={"first_name": "P", "last_name": "Private", "latest_education": "BS"},
+    )
+    aid = cr.json()["applicant_id"]
+    client.post("/api/messages/", headers=auth_headers, json={"applicant_id": aid, "body": "My passport number."})
+
+    client.post("/api/auth/register", json={"email": "msg-other@example.com", "password": "pass123", "full_name": "O"})
+    login = client.post("/api/auth/login", data={"username": "msg-other@example.com", "password": "pass123"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    assert client.get("/api/messages/search", params={"q": "passport", "applicant_id": aid}, headers=headers).status_code == 403
+    assert client.get("/api/messages/", params={"applicant_id": aid}, headers=headers).status_code == 403
+    assert client.get("/api/messages/", params={"applicant_id": 999999}, headers=headers).status_code == 404
+
+    r = client.get("/api/messages/search", params={"q": "passport", "applicant_id": aid}, headers=manager_headers)
+    assert r.status_code == 200 and len(r.json()) == 1
@@ -0,0 +1,96 @@
+"""Email templates (compiled once, shared partials), immediate notifications, digests and task reminders."""
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlmodel import select
+
+from app.core.security import hash_password
+from app.models.email import EmailNotification, OutboundEmail
+from app.models.task import Task
+from app.models.user import User
+from app.services.email_templates import EmailTemplates
+from app.services.notifications import notify, queue_task_reminders, send_due_digests
+
+
+def _user(session, email, digest="immediate"):
+    user = User(email=email, full_name="Notified User", hashed_password=hash_password("pass123"), email_digest=digest)
+    session.add(user)
+    session.commit()
+    return user
+
+
+def _outbox(session, address):
+    session.expire_all()
+    return session.exec(select(OutboundEmail).where(OutboundEmail.to_address == address).order_by(OutboundEmail.id)).all()
+
+
+def test_templates_compile_once_and_escape(tmp_path):
+    (tmp_path / "_partial.html").write_text('<%def name="line(v)">[${v}]</%def>')
+    (tmp_path / "hello.html").write_text(
+        '<%namespace name="p" file="_partial.html"/><%def name="subject()">Hi ${who}</%def>${p.line(who)}'
+    )
+    templates = EmailTemplates(tmp_path, reload=False)
+    assert templates.warm() == 1
+    email = templates.render("hello", who="Tom & <Jerry>")
+    assert email.subject == "Hi Tom & <Jerry>"  # plain-text subject
+    assert email.html_body.strip() == "[Tom &amp; &lt;Jerry&gt;]"
+
+    (tmp_path / "_partial.html").write_text('<%def name="line(v)">changed</%def>')
+    assert templates.render("hello", who="x").html_body.strip() == "[x]"  # compiled copies are reused
+
+
+def test_new_message_notifies_recipient_immediately(client: TestClient, session, auth_headers):
+    recipient = _user(session, "msg-recipient@example.com")
+    r = client.post("/api/messages/", json={"recipient_id": recipient.id, "body": "Your <b>visa</b> letter is ready"}, headers=auth_headers)
+    assert r.status_code == 200
+    [email] = _outbox(session, "msg-recipient@example.com")
+    assert email.subject == "New message from Test User"
+    assert "Your &lt;b&gt;visa&lt;/b&gt; letter is ready" in email.html_body
+    assert "Hello Notified User" in email.html_body
+
+
+def test_digest_collapses_notifications_per_window(client: TestClient, session):
+    user = _user(session, "digest@example.com")
+    token = client.post("/api/auth/login", data={"username": "digest@example.com", "password": "pass123"}).json()["access_token"]
+    r = client.put("/api/auth/me/email-preferences", json={"email_digest": "hourly"}, headers={"Authorization": f"Bearer {token}"})
+    assert r.status_code == 200 and r.json()["email_digest"] == "hourly"
+    session.refresh(user)
+
+    notify(session, user, "new_message", {"sender": "Ada", "preview": "first"}, dedupe_key="digest-test-m1")
+    notify(session, user, "new_message", {"sender": "Ada", "preview": "second"})
+    notify(session, user, "payment_receipt", {"amount_cents": 4200, "currency": "usd"}, dedupe_key="digest-test-p1")
+    notify(session, user, "payment_receipt", {"amount_cents": 4200, "currency": "usd"}, dedupe_key="digest-test-p1")  # duplicate
+    session.commit()
+    assert _outbox(session, "digest@example.com") == []
+
+    engine = session.get_bind()
+    send_due_digests(engine)
+    assert _outbox(session, "digest@example.com") == []  # window still open
+    assert send_due_digests(engine, now=datetime.utcnow() + timedelta(hours=2)) >= 1
+    [email] = _outbox(session, "digest@example.com")
+    assert email.subject == "Your ScholarValley updates (3)"
+    assert email.html_body.index("Payments") < email.html_body.index("Messages (2)")
+    assert "42.00 USD" in email.html_body and "second" in email.html_body
+    held = session.exec(select(EmailNotification).where(EmailNotification.user_id == user.id)).all()
+    assert [n.status for n in held] == ["sent"] * 3
+
+    send_due_digests(engine, now=datetime.utcnow() + timedelta(hours=4))
+    assert len(_outbox(session, "digest@example.com")) == 1
+
+
+def test_task_reminders_are_sent_once(session):
+    assignee = _user(session, "reminder@example.com")
+    now = datetime.utcnow()
+    soon = Task(title="Upload transcript", assignee_id=assignee.id, due_at=now + timedelta(hours=3))
+    later = Task(title="Sign contract", assignee_id=assignee.id, due_at=now + timedelta(days=5))
+    done = Task(title="Done already", assignee_id=assignee.id, due_at=now + timedelta(hours=1), status="completed")
+    session.add_all([soon, later, done])
+    session.commit()
+
+    engine = session.get_bind()
+    queue_task_reminders(engine, now=now, horizon=timedelta(hours=24))
+    queue_task_reminders(engine, now=now, horizon=timedelta(hours=24))
+    [email] = _outbox(session, "reminder@example.com")
+    assert email.subject == "Reminder: Upload transcript"
+    session.refresh(later)
+    assert later.reminder_sent_at is None
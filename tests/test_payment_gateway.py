@@ -0,0 +1,101 @@
+"""Stripe gateway: idempotent retries, circuit breaker, checkout endpoint against the local stub."""
+from unittest.mock import patch
+
+import pytest
+import stripe
+from fastapi.testclient import TestClient
+
+from app.models.payment import Payment
+from app.services.metrics import metrics
+from app.services.payment_gateway import (
+    CircuitBreaker,
+    GatewayUnavailable,
+    PaymentGatewayError,
+    StripeGateway,
+    get_payment_gateway,
+)
+from app.services.resilience import RetryPolicy
+from app.services.stripe_stub import LocalStripeStub
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _gateway(stub, breaker=None):
+    return StripeGateway(stub, retry=RetryPolicy(max_attempts=3, base_delay=0.001), breaker=breaker)
+
+
+def test_checkout_retries_transient_errors_under_one_idempotency_key():
+    stub = LocalStripeStub()
+    gateway = _gateway(stub)
+    payment = Payment(id=41, amount_cents=1200, currency="usd")
+    before = metrics.counter("stripe.retries").value
+
+    stub.fail_next(2)
+    first = gateway.create_checkout_session(payment, "https://x/ok", "https://x/cancel", {"payment_id": "41"})
+    assert metrics.counter("stripe.retries").value == before + 2
+    # Replaying the same payment returns the same session instead of creating another.
+    again = gateway.create_checkout_session(payment, "https://x/ok", "https://x/cancel", {"payment_id": "41"})
+    assert again == first
+    assert len(stub.checkout.sessions.list({"limit": 100})["data"]) == 1
+
+    stub.fail_next(1, stripe.CardError("declined", None, "card_declined"))
+    with pytest.raises(PaymentGatewayError) as info:
+        gateway.create_checkout_session(Payment(id=42, amount_cents=1, currency="usd"), "a", "b", {})
+    assert not info.value.transient
+
+
+def test_circuit_breaker_fails_fast_and_recovers():
+    clock = _Clock()
+    stub = LocalStripeStub()
+    breaker = CircuitBreaker(failure_rate=0.5, window=4, min_calls=2, reset_timeout=10, clock=clock)
+    gateway = StripeGateway(stub, retry=RetryPolicy(max_attempts=1), breaker=breaker)
+    payment = Payment(id=7, amount_cents=500, currency="eur")
+
+    stub.fail_next(2)
+    for _ in range(2):
+        with pytest.raises(PaymentGatewayError):
+            gateway.create_checkout_session(payment, "a", "b", {})
+    assert breaker.state == "open"
+    calls = stub.calls
+    with pytest.raises(GatewayUnavailable):
+        gateway.create_checkout_session(payment, "a", "b", {})
+    assert stub.calls == calls  # failed fast, Stripe not called
+
+    clock.now = 11
+    assert breaker.state == "half_open"
+    gateway.create_checkout_session(payment, "a", "b", {})  # trial call succeeds
+    assert breaker.state == "closed"
+
+
+def test_checkout_endpoint_uses_gateway(client: TestClient, auth_headers, session):
+    from app.api import payments
+    from app.main import app
+
+    clock = _Clock()
+    stub = LocalStripeStub()
+    breaker = CircuitBreaker(min_calls=1, window=1, reset_timeout=30, clock=clock)
+    gateway = StripeGateway(stub, retry=RetryPolicy(max_attempts=1), breaker=breaker)
+    app.dependency_overrides[get_payment_gateway] = lambda: gateway
+    body = {"amount_cents": 900, "currency": "gbp", "success_url": "https://x/ok", "cancel_url": "https://x/no"}
+    try:
+        with patch.object(payments.settings, "stripe_backend", "stub"):
+            r = client.post("/api/payments/checkout-session", headers=auth_headers, json=body)
+            assert r.status_code == 200
+            payment = session.get(Payment, r.json()["id"])
+            assert payment.stripe_checkout_session_id.startswith("cs_test_")
+            assert payment.stripe_payment_intent_id.startswith("pi_test_")
+
+            stub.fail_next(1)
+            r = client.post("/api/payments/checkout-session", headers=auth_headers, json=body)
+            assert r.status_code == 502
+            r = client.post("/api/payments/checkout-session", headers=auth_headers, json=body)
+            assert r.status_code == 503
+            assert int(r.headers["retry-after"]) >= 1
+    finally:
+        app.dependency_overrides.pop(get_payment_gateway, None)
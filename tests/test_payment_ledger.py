@@ -0,0 +1,116 @@
+"""Payments ledger: append-only entries, incremental per-currency daily aggregates, revenue reports."""
+from datetime import datetime
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+from sqlmodel import select
+
+from app.api import dashboard
+from app.models.payment import Payment, PaymentDailyAggregate, PaymentLedgerEntry, StripeEvent
+from app.services.payment_ledger import rebuild_aggregates, record_transitions, revenue_by_currency
+from app.services.stripe_events import transition
+
+
+def _payments(session, currency, *amounts):
+    payments = [Payment(amount_cents=amount, currency=currency, status="created") for amount in amounts]
+    session.add_all(payments)
+    session.commit()
+    return payments
+
+
+def test_ledger_is_idempotent_and_aggregates_match_a_rebuild(session):
+    # XTS is the ISO 4217 code reserved for testing: no other test writes it.
+    a, b, c = _payments(session, "XTS", 1000, 250, 40)
+    day = datetime(2026, 3, 1, 12)
+    rows = [(p.id, p.amount_cents, p.currency) for p in (a, b, c)]
+    assert record_transitions(session, rows, "created", "checkout", occurred_at=day) == 3
+    assert record_transitions(session, rows[:1], "succeeded", "webhook", occurred_at=day) == 1
+    # Refunded without a recorded success (lost webhook): the success is implied.
+    assert record_transitions(session, rows[1:2], "refunded", "reconciliation", occurred_at=day) == 2
+    session.commit()
+
+    # Replays append nothing and leave the aggregates alone.
+    assert record_transitions(session, rows, "created", "checkout", occurred_at=day) == 0
+    assert record_transitions(session, rows[:2], "refunded", "webhook") == 1  # only a's refund is new
+    session.commit()
+
+    entries = session.exec(select(PaymentLedgerEntry).where(PaymentLedgerEntry.currency == "xts")).all()
+    assert sorted(e.entry_type for e in entries) == ["created"] * 3 + ["refunded"] * 2 + ["succeeded"] * 2
+    totals = revenue_by_currency(session)["xts"]
+    assert (totals["gross_cents"], totals["refunded_cents"], totals["net_cents"]) == (1250, 1250, 0)
+    assert revenue_by_currency(session, start=day.date(), end=day.date())["xts"]["refunded_cents"] == 250
+
+    def snapshot():
+        return sorted(
+            (r.day, r.currency, r.created_count, r.created_cents, r.succeeded_count, r.succeeded_cents, r.refunded_count, r.refunded_cents)
+            for r in session.exec(select(PaymentDailyAggregate)).all()
+        )
+
+    incremental = snapshot()
+    rebuild_aggregates(session)
+    session.commit()
+    assert snapshot() == incremental
+
+
+def test_dashboard_revenue_reads_aggregates_per_currency(client: TestClient, session, manager_headers, auth_headers):
+    first, other = _payments(session, "xxx", 700, 300)
+    record_transitions(session, [(p.id, p.amount_cents, p.currency) for p in (first, other)], "created", "checkout")
+    event = StripeEvent(stripe_event_id="evt_ledger", type="payment_intent.succeeded", payload="{}")
+    assert transition(session, first, "succeeded", event)
+    assert transition(session, other, "succeeded", event)
+    assert transition(session, other, "refunded", event)
+    assert not transition(session, other, "succeeded", event)  # refunded is final
+    session.commit()
+
+    r = client.get("/api/dashboard/revenue", params={"currency": "XXX"}, headers=manager_headers)
+    assert r.status_code == 200
+    data = r.json()
+    assert data["totals"] == {
+        "xxx": {"succeeded_count": 2, "gross_cents": 1000, "refunded_count": 1, "refunded_cents": 300, "net_cents": 700}
+    }
+    [today] = data["days"]
+    assert (today["created_count"], today["net_cents"]) == (2, 700)
+
+    with patch.object(dashboard.settings, "reporting_currency", "XXX"):
+        summary = client.get("/api/dashboard/summary", headers=manager_headers).json()
+    assert summary["revenue_by_currency"]["xxx"]["net_cents"] == 700
+    assert summary["total_revenue_cents"] == 700
+    assert client.get("/api/dashboard/revenue", headers=auth_headers).status_code == 403
+    assert client.get("/api/dashboard/revenue", params={"start": "2026-02-01", "end": "2026-01-01"}, headers=manager_headers).status_code == 400
+
+
+def test_partial_refunds_reach_the_ledger_once_each(session):
+    import json
+
+    from app.services.stripe_events import process_event
+
+    # XAU: another ISO 4217 code no other test writes.
+    [payment] = _payments(session, "XAU", 1000)
+    payment.stripe_payment_intent_id = "pi_partial"
+    record_transitions(session, [(payment.id, 1000, "XAU")], "created", "checkout")
+    assert transition(session, payment, "succeeded", StripeEvent(stripe_event_id="evt_p0", type="t", payload="{}"))
+    session.commit()
+
+    def refund(event_id, amount_refunded, refunded=False):
+        obj = {"id": "ch_p", "payment_intent": "pi_partial", "refunded": refunded, "amount_refunded": amount_refunded}
+        event = StripeEvent(stripe_event_id=event_id, type="charge.refunded", payload=json.dumps({"data": {"object": obj}}))
+        session.add(event)
+        session.commit()
+        process_event(session, event)
+
+    refund("evt_p1", 300)
+    refund("evt_p2", 300)  # same cumulative total again: nothing new
+    refund("evt_p3", 200)  # older total delivered late: nothing new
+    refund("evt_p4", 450)
+    refund("evt_p5", 1000, refunded=True)  # the rest
+
+    refunds = session.exec(
+        select(PaymentLedgerEntry.amount_cents).where(
+            PaymentLedgerEntry.payment_id == payment.id, PaymentLedgerEntry.entry_type == "refunded"
+        )
+    ).all()
+    assert sorted(refunds) == [150, 300, 550]
+    totals = revenue_by_currency(session)["xau"]
+    assert (totals["gross_cents"], totals["refunded_cents"], totals["net_cents"]) == (1000, 1000, 0)
+    session.refresh(payment)
+    assert payment.status == "refunded"
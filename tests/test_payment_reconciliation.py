@@ -0,0 +1,93 @@
+"""Payment reconciliation against the local Stripe stub: batched corrections, resumable walk."""
+import pytest
+from sqlmodel import select
+
+from app.models.audit import AuditLog
+from app.models.payment import Payment
+from app.services.checkpoints import load_checkpoint
+from app.services.payment_gateway import PaymentGatewayError, StripeGateway
+from app.services.payment_reconciliation import CHECKPOINT_NAME, reconcile_payments
+from app.services.resilience import RetryPolicy
+from app.services.stripe_stub import LocalStripeStub
+
+
+def _setup(session, statuses):
+    stub = LocalStripeStub()
+    gateway = StripeGateway(stub, retry=RetryPolicy(max_attempts=1))
+    payments = []
+    for status in statuses:
+        payment = Payment(amount_cents=5000, currency="usd", status=status)
+        session.add(payment)
+        session.commit()
+        checkout = gateway.create_checkout_session(payment, "https://x/ok", "https://x/cancel", {})
+        payment.stripe_checkout_session_id = checkout.id
+        if status != "created":
+            payment.stripe_payment_intent_id = checkout.payment_intent
+        session.add(payment)
+        session.commit()
+        payments.append((payment, checkout))
+    return stub, gateway, payments
+
+
+def test_reconcile_corrects_payments_from_lost_webhooks(session):
+    stub, gateway, payments = _setup(session, ["created", "created", "succeeded", "created", "succeeded"])
+    (paid, paid_cs), (expired, expired_cs), (refunded, refunded_cs), (open_, _), (late_expiry, late_cs) = payments
+    stub.complete_session(paid_cs.id)
+    stub.expire_session(expired_cs.id)
+    stub.complete_session(refunded_cs.id)
+    stub.refund(refunded_cs.payment_intent)
+    stub.expire_session(late_cs.id)  # succeeded -> failed is not an allowed transition
+
+    dry = reconcile_payments(session, gateway, page_size=2, dry_run=True)
+    assert dry.corrected == {"succeeded": 1, "failed": 1, "refunded": 1}
+    session.refresh(paid)
+    assert paid.status == "created"
+
+    report = reconcile_payments(session, gateway, page_size=2)
+    assert (report.sessions_listed, report.intents_listed) == (5, 5)
+    assert report.corrected == {"succeeded": 1, "failed": 1, "refunded": 1}
+    assert report.intent_ids_filled == 3
+    for payment, expected in [(paid, "succeeded"), (expired, "failed"), (refunded, "refunded"), (open_, "created"), (late_expiry, "succeeded")]:
+        session.refresh(payment)
+        assert payment.status == expected
+    assert paid.stripe_payment_intent_id == paid_cs.payment_intent
+    audit = session.exec(
+        select(AuditLog).where(AuditLog.resource_type == "payment", AuditLog.resource_id == str(paid.id))
+    ).all()
+    assert [entry.action for entry in audit] == ["payment_succeeded"]
+
+    # Nothing left to correct on a second pass.
+    assert reconcile_payments(session, gateway, page_size=2).corrected == {}
+
+
+def test_reconcile_resumes_from_checkpoint_after_failure(session):
+    stub, gateway, payments = _setup(session, ["created"] * 5)
+    for _, checkout in payments:
+        stub.complete_session(checkout.id)
+
+    list_sessions = stub.checkout.sessions.list
+    calls = []
+
+    def flaky_list(params=None, options=None):
+        calls.append(params)
+        if len(calls) == 2:
+            stub.fail_next(1)
+        return list_sessions(params, options)
+
+    stub.checkout.sessions.list = flaky_list
+    with pytest.raises(PaymentGatewayError):
+        reconcile_payments(session, gateway, page_size=2)
+    checkpoint = load_checkpoint(session, CHECKPOINT_NAME)
+    assert checkpoint["sessions_after"] and not checkpoint["sessions_done"]
+    session.expire_all()
+    assert sum(p.status == "succeeded" for p, _ in payments) == 2  # first page committed with the checkpoint
+
+    report = reconcile_payments(session, gateway, page_size=2)
+    assert report.resumed and report.completed
+    assert report.sessions_listed == 3  # only the pages after the checkpoint
+    assert report.corrected == {"succeeded": 3}
+    assert calls[2].get("starting_after") == checkpoint["sessions_after"]
+    assert load_checkpoint(session, CHECKPOINT_NAME) == {}
+    for payment, _ in payments:
+        session.refresh(payment)
+        assert payment.status == "succeeded"
@@ -50,3 +50,91 @@ def test_webhook_not_configured(client: TestClient):
         headers={"Content-Type": "application/json"},
     )
     assert r.status_code == 500
+
+
+def _signed(payload: bytes, secret: str) -> dict:
+    import hashlib
+    import hmac
+    import time
+
+    timestamp = int(time.time())
+    signature = hmac.new(secret.encode(), f"{timestamp}.".encode() + payload, hashlib.sha256).hexdigest()
+    return {"Content-Type": "application/json", "Stripe-Signature": f"t={timestamp},v1={signature}"}
+
+
+def _event(event_id, event_type, obj):
+    import json
+
+    return json.dumps({"id": event_id, "object": "event", "type": event_type, "data": {"object": obj}}).encode()
+
+
+@patch("app.api.payments.settings")
+def test_webhook_records_dedupes_and_processes_events(mock_settings, client: TestClient, session):
+    from app.models.email import OutboundEmail
+    from app.models.payment import Payment, StripeEvent
+    from sqlmodel import select
+
+    def receipts():
+        return session.exec(select(OutboundEmail).where(OutboundEmail.dedupe_key.startswith(f"payment-{payment.id}-receipt"))).all()
+
+    mock_settings.stripe_webhook_secret = "whsec_test"
+    mock_settings.stripe_events_process_inline = True
+    payment = Payment(amount_cents=2500, currency="usd", user_id=1, stripe_checkout_session_id="cs_hook", status="created")
+    session.add(payment)
+    session.commit()
+
+    body = _event("evt_hook_1", "checkout.session.completed", {"id": "cs_hook", "payment_intent": "pi_hook", "payment_status": "paid"})
+    r = client.post("/api/payments/webhook", content=body, headers=_signed(body, "whsec_test"))
+    assert r.status_code == 200 and r.json() == {"ok": True, "duplicate": False}
+    session.refresh(payment)
+    assert payment.status == "succeeded"
+    assert payment.stripe_payment_intent_id == "pi_hook"
+    assert len(receipts()) == 1  # queued with the status change, delivered by the email worker
+
+    # Stripe redelivery: acknowledged, not reprocessed.
+    r = client.post("/api/payments/webhook", content=body, headers=_signed(body, "whsec_test"))
+    assert r.json() == {"ok": True, "duplicate": True}
+    assert len(receipts()) == 1
+
+    # Refunds; an out-of-order success after the refund does not resurrect the payment.
+    for event_id, event_type, obj in (
+        ("evt_hook_2", "charge.refunded", {"id": "ch_1", "payment_intent": "pi_hook", "refunded": True, "amount_refunded": 2500}),
+        ("evt_hook_3", "payment_intent.succeeded", {"id": "pi_hook"}),
+        ("evt_hook_4", "customer.created", {"id": "cus_1"}),
+    ):
+        body = _event(event_id, event_type, obj)
+        assert client.post("/api/payments/webhook", content=body, headers=_signed(body, "whsec_test")).status_code == 200
+    session.refresh(payment)
+    assert payment.status == "refunded"
+    statuses = dict(session.exec(select(StripeEvent.stripe_event_id, StripeEvent.status).where(StripeEvent.stripe_event_id.like("evt_hook_%"))).all())
+    assert statuses == {"evt_hook_1": "processed", "evt_hook_2": "processed", "evt_hook_3": "processed", "evt_hook_4": "ignored"}
+
+    bad = client.post("/api/payments/webhook", content=body, headers=_signed(body, "wrong_secret"))
+    assert bad.status_code == 400
+
+
+def test_stripe_event_failures_are_retried_then_dead(session):
+    from app.models.payment import Payment, StripeEvent
+    from app.services import stripe_events
+    from sqlmodel import select
+
+    payment = Payment(amount_cents=100, currency="usd", stripe_payment_intent_id="pi_fail", status="created")
+    session.add(payment)
+    session.add(StripeEvent(stripe_event_id="evt_broken", type="payment_intent.payment_failed", payload="{}"))
+    session.add(StripeEvent(
+        stripe_event_id="evt_fail",
+        type="payment_intent.payment_failed",
+        payload=_event("evt_fail", "payment_intent.payment_failed", {"id": "pi_fail", "last_payment_error": {"code": "card_declined"}}).decode(),
+    ))
+    session.commit()
+
+    engine = session.get_bind()
+    stripe_events.process_pending(engine, max_attempts=2)
+    session.refresh(payment)
+    assert payment.status == "failed"
+    broken = session.exec(select(StripeEvent).where(StripeEvent.stripe_event_id == "evt_broken")).one()
+    assert (broken.status, broken.attempts) == ("failed", 1)
+    stripe_events.process_pending(engine, max_attempts=2)
+    session.refresh(broken)
+    assert (broken.status, broken.attempts) == ("dead", 2)
+    assert "KeyError" in broken.last_error
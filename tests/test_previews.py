@@ -0,0 +1,157 @@
+"""Document previews: thumbnail rendering, preview worker, cached preview endpoint with ETags."""
+import io
+import os
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.models.applicant import Applicant
+from app.models.document import Document, DocumentBundle
+from app.services import previews
+
+
+def _png(size=(800, 600)):
+    out = io.BytesIO()
+    Image.new("RGB", size, (200, 30, 30)).save(out, format="PNG")
+    return out.getvalue()
+
+
+def _pdf():
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument.new()
+    pdf.new_page(612, 792)
+    out = io.BytesIO()
+    pdf.save(out)
+    pdf.close()
+    return out.getvalue()
+
+
+def test_render_thumbnail_image_and_pdf():
+    for data, content_type in ((_png(), "image/png"), (_pdf(), "application/pdf")):
+        thumb = Image.open(io.BytesIO(previews.render_thumbnail(data, content_type)))
+        assert thumb.format == "JPEG"
+        assert max(thumb.size) <= 320
+
+
+def test_preview_worker_renders_clean_documents(session):
+    applicant = Applicant(account_user_id=1, first_name="Pre", last_name="View")
+    session.add(applicant)
+    session.flush()
+    bundle = DocumentBundle(applicant_id=applicant.id, name="Preview bundle")
+    session.add(bundle)
+    session.flush()
+    docs = {
+        "preview/photo.png": Document(bundle_id=bundle.id, filename="photo.png", content_type="image/png", s3_key="preview/photo.png", size_bytes=10, scanned_status="clean"),
+        "preview/notes.txt": Document(bundle_id=bundle.id, filename="notes.txt", content_type="text/plain", s3_key="preview/notes.txt", size_bytes=10, scanned_status="clean"),
+        "preview/unscanned.png": Document(bundle_id=bundle.id, filename="unscanned.png", content_type="image/png", s3_key="preview/unscanned.png", size_bytes=10),
+        "preview/broken.png": Document(bundle_id=bundle.id, filename="broken.png", content_type="image/png", s3_key="preview/broken.png", size_bytes=10, scanned_status="clean"),
+    }
+    session.add_all(docs.values())
+    session.commit()
+
+    stored = {}
+    objects = {"preview/photo.png": _png(), "preview/broken.png": b"not an image"}
+    previews.run_preview_worker(
+        session.get_bind(),
+        lambda key: [objects.get(key, b"")],
+        lambda key, data, content_type: stored.__setitem__(key, data),
+        processes=1,
+        once=True,
+    )
+
+    for doc in docs.values():
+        session.refresh(doc)
+    assert docs["preview/photo.png"].preview_status == "ready"
+    assert "preview/photo.png.preview.jpg" in stored
+    assert docs["preview/notes.txt"].preview_status == "unsupported"
+    assert docs["preview/unscanned.png"].preview_status == "pending"
+    assert docs["preview/broken.png"].preview_status == "failed"
+
+
+_render_thumbnail = previews.render_thumbnail
+
+
+def _crashing_render(data, content_type):
+    if data == b"crash":
+        os._exit(1)  # like a renderer segfault: the process dies, not the call
+    return _render_thumbnail(data, content_type)
+
+
+def test_preview_worker_survives_renderer_crash_and_caps_attempts(session):
+    applicant = Applicant(account_user_id=1, first_name="Pre", last_name="Crash")
+    session.add(applicant)
+    session.flush()
+    bundle = DocumentBundle(applicant_id=applicant.id, name="Crash bundle")
+    session.add(bundle)
+    session.flush()
+    crash = Document(bundle_id=bundle.id, filename="crash.png", content_type="image/png", s3_key="preview/crash.png", size_bytes=10, scanned_status="clean")
+    good = Document(bundle_id=bundle.id, filename="good.png", content_type="image/png", s3_key="preview/good.png", size_bytes=10, scanned_status="clean")
+    session.add_all([crash, good])
+    session.commit()
+
+    objects = {"preview/crash.png": b"crash", "preview/good.png": _png()}
+    with patch.object(previews, "render_thumbnail", _crashing_render):
+        previews.run_preview_worker(
+            session.get_bind(), lambda key: [objects[key]], lambda key, data, content_type: None, processes=2, once=True
+        )
+    session.refresh(crash)
+    session.refresh(good)
+    assert (crash.preview_status, good.preview_status) == ("failed", "ready")
+
+    # A document whose lease keeps expiring (the whole worker died) fails once out of attempts.
+    crash.preview_status = "rendering"
+    crash.preview_claimed_at = datetime.utcnow() - timedelta(hours=1)
+    crash.preview_attempts = 3
+    session.add(crash)
+    session.commit()
+    assert previews.claim_pending(session, 10, lease_seconds=60, max_attempts=3) == []
+    session.refresh(crash)
+    assert crash.preview_status == "failed"
+
+
+@patch("app.api.documents.storage.client")
+def test_preview_endpoint_etag(mock_s3, client: TestClient, session, auth_headers):
+    mock_s3.generate_presigned_url.return_value = "https://s3.example.com/presigned"
+    cr = client.post(
+        "/api/applicants/",
+        headers=auth_headers,
+        json={"first_name": "E", "last_name": "Tag", "latest_education": "BS"},
+    )
+    bundle_id = cr.json()["bundle_id"]
+    init = client.post(
+        f"/api/bundles/{bundle_id}/documents/initiate?filename=id.png&content_type=image/png",
+        headers=auth_headers,
+    ).json()
+    assert client.get(f"/api/documents/{init['document_id']}/preview", headers=auth_headers).status_code == 404
+
+    doc = session.get(Document, init["document_id"])
+    doc.preview_status, doc.preview_etag = "ready", "abc123"
+    session.add(doc)
+    session.commit()
+
+    class _Body:
+        def iter_chunks(self, size):
+            yield b"\xff\xd8thumb"
+
+        def close(self):
+            pass
+
+    mock_s3.get_object.return_value = {"Body": _Body()}
+    r = client.get(f"/api/documents/{doc.id}/preview", headers=auth_headers)
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "image/jpeg"
+    assert r.headers["etag"] == '"abc123"'
+    assert r.content == b"\xff\xd8thumb"
+
+    r = client.get(f"/api/documents/{doc.id}/preview", headers={**auth_headers, "If-None-Match": '"abc123"'})
+    assert r.status_code == 304
+    # Second full fetch is served from the in-process cache.
+    client.get(f"/api/documents/{doc.id}/preview", headers=auth_headers)
+    assert mock_s3.get_object.call_count == 1
+
+    listed = client.get(f"/api/bundles/{bundle_id}/documents", headers=auth_headers).json()
+    assert listed[0]["preview_status"] == "ready"
@@ -0,0 +1,77 @@
+"""Program recommendation model: artifact format, vectorized scoring, endpoint."""
+import json
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.services.recommendation import (
+    PROGRAM_CATALOG,
+    ProfileBatch,
+    Recommender,
+    resolve_model_path,
+    set_recommender,
+    write_artifact,
+)
+
+
+@pytest.fixture
+def recommender(tmp_path):
+    programs = json.loads(PROGRAM_CATALOG.read_text())["programs"]
+    write_artifact(tmp_path, programs)
+    model = Recommender(resolve_model_path(tmp_path))
+    set_recommender(model)
+    yield model
+    set_recommender(None)
+
+
+def test_artifact_is_versioned_and_memory_mapped(recommender, tmp_path):
+    assert recommender.version.startswith("knn-")
+    assert (tmp_path / "LATEST").read_text() == recommender.version
+    assert isinstance(recommender.programs, np.memmap)
+    # Same content, same version.
+    programs = json.loads(PROGRAM_CATALOG.read_text())["programs"]
+    assert write_artifact(tmp_path, programs, make_latest=False) == recommender.version
+
+
+def test_batch_scoring_matches_single(recommender):
+    batch = ProfileBatch(
+        gpa=[3.9, 2.6, 3.4],
+        toefl=[110, 65, 92],
+        destinations=["USA", "Canada", None],
+        levels=["graduate", "freshman", "continuing_undergrad"],
+        budgets=[np.inf, np.inf, 20000.0],
+    )
+    together = recommender.recommend(batch, 3)
+    for i, matches in enumerate(together):
+        one = ProfileBatch(*[[column[i]] for column in vars(batch).values()])
+        assert recommender.recommend(one, 3)[0] == matches
+    assert together[0][0].name == "USA selective graduate programs"
+    assert all(m.destination in ("Canada", "*") for m in together[1])
+
+
+def test_recommendation_endpoint_uses_model(client: TestClient, auth_headers, recommender):
+    aid = client.post(
+        "/api/applicants/",
+        headers=auth_headers,
+        json={
+            "first_name": "K",
+            "last_name": "Knn",
+            "latest_education": "BS",
+            "study_destination": "Canada",
+            "level_of_study": "graduate",
+        },
+    ).json()["applicant_id"]
+    client.post("/api/ml/consent", headers=auth_headers, json={"applicant_id": aid, "consent_given": True, "version": "v1"})
+
+    r = client.post("/api/ml/recommendation", headers=auth_headers, json={"applicant_id": aid, "context": {}})
+    assert r.json()["model_version"] == recommender.version and r.json()["programs"] == []
+
+    client.post("/api/eligibility/check", headers=auth_headers, json={"applicant_id": aid, "gpa": 3.3, "toefl": 91})
+    r = client.post("/api/ml/recommendation", headers=auth_headers, json={"applicant_id": aid, "context": {}})
+    data = r.json()
+    assert data["model_version"] == recommender.version
+    assert data["programs"][0]["name"] == "Canada mid-tier graduate programs"
+    assert all(p["destination"] in ("Canada", "*") for p in data["programs"])
+
+    assert client.get("/api/ml/model", headers=auth_headers).json()["model_version"] == recommender.version
@@ -0,0 +1,156 @@
+"""Virus-scan worker: streaming signature scanner, claim/scan/record loop, retries, metrics endpoint."""
+import pytest
+from botocore.exceptions import ClientError
+from fastapi.testclient import TestClient
+
+from app.models.applicant import Applicant
+from app.models.document import Document, DocumentBundle
+from app.services import scanning
+from app.services.metrics import metrics
+
+
+def _chunks(data: bytes, size: int):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+def test_signature_scanner_across_chunk_boundaries():
+    scanner = scanning.SignatureScanner()
+    infected = b"header " * 10 + scanning.EICAR_SIGNATURE + b" trailer"
+    result = scanner.scan(_chunks(infected, 7))
+    assert result.status == "infected"
+    assert result.signature == "Eicar-Test-Signature"
+    assert scanner.scan(_chunks(b"%PDF-1.7 plain document" * 100, 16)).status == "clean"
+
+
+def test_scan_worker_records_results(session):
+    applicant = Applicant(account_user_id=1, first_name="Scan", last_name="Worker")
+    session.add(applicant)
+    session.flush()
+    bundle = DocumentBundle(applicant_id=applicant.id, name="Scan bundle")
+    session.add(bundle)
+    session.flush()
+    docs = {
+        "scan/clean.pdf": Document(bundle_id=bundle.id, filename="clean.pdf", content_type="application/pdf", s3_key="scan/clean.pdf", size_bytes=10),
+        "scan/eicar.txt": Document(bundle_id=bundle.id, filename="eicar.txt", content_type="text/plain", s3_key="scan/eicar.txt", size_bytes=68),
+        "scan/missing.pdf": Document(bundle_id=bundle.id, filename="missing.pdf", content_type="application/pdf", s3_key="scan/missing.pdf", size_bytes=10),
+        "scan/flaky.pdf": Document(bundle_id=bundle.id, filename="flaky.pdf", content_type="application/pdf", s3_key="scan/flaky.pdf", size_bytes=10),
+        "scan/unfinished.pdf": Document(bundle_id=bundle.id, filename="unfinished.pdf", content_type="application/pdf", s3_key="scan/unfinished.pdf"),
+    }
+    session.add_all(docs.values())
+    session.commit()
+
+    flaky_calls = []
+
+    def read_object(key):
+        if key == "scan/eicar.txt":
+            return _chunks(scanning.EICAR_SIGNATURE, 10)
+        if key == "scan/missing.pdf":
+            raise ClientError({"Error": {"Code": "NoSuchKey"}, "ResponseMetadata": {"HTTPStatusCode": 404}}, "GetObject")
+        if key == "scan/flaky.pdf" and not flaky_calls:
+            flaky_calls.append(key)
+            raise ClientError({"Error": {"Code": "SlowDown"}, "ResponseMetadata": {"HTTPStatusCode": 503}}, "GetObject")
+        return [b"%PDF-1.7 ok"]
+
+    processed = scanning.run_scan_worker(session.get_bind(), read_object, concurrency=2, batch_size=2, once=True)
+    assert processed >= 4
+
+    for doc in docs.values():
+        session.refresh(doc)
+    assert docs["scan/clean.pdf"].scanned_status == "clean"
+    assert docs["scan/eicar.txt"].scanned_status == "infected"
+    assert docs["scan/missing.pdf"].scanned_status == "failed"
+    assert docs["scan/flaky.pdf"].scanned_status == "clean"
+    assert docs["scan/unfinished.pdf"].scanned_status == "pending"
+    assert docs["scan/clean.pdf"].scan_attempts == 1
+    assert metrics.counter("scan.retries").value >= 1
+
+
+def test_metrics_endpoint(client: TestClient, auth_headers, manager_headers):
+    assert client.get("/api/dashboard/metrics", headers=auth_headers).status_code == 403
+    r = client.get("/api/dashboard/metrics", headers=manager_headers)
+    assert r.status_code == 200
+    assert set(r.json()) == {"counters", "histograms"}
+
+
+def test_scan_worker_shares_identical_content(session):
+    applicant = Applicant(account_user_id=1, first_name="Same", last_name="Content")
+    session.add(applicant)
+    session.flush()
+    bundle = DocumentBundle(applicant_id=applicant.id, name="Dedup bundle")
+    session.add(bundle)
+    session.flush()
+    docs = [
+        Document(bundle_id=bundle.id, filename=f"copy{i}.pdf", content_type="application/pdf", s3_key=f"dedup/copy{i}.pdf", size_bytes=12)
+        for i in range(3)
+    ]
+    session.add_all(docs)
+    session.commit()
+
+    deleted = []
+    scanning.run_scan_worker(
+        session.get_bind(),
+        lambda key: [b"%PDF-1.7 ", b"same"] if key.startswith("dedup/") else [b"other"],
+        delete_object=deleted.append,
+        batch_size=10,
+        once=True,
+    )
+
+    for doc in docs:
+        session.refresh(doc)
+    assert {doc.s3_key for doc in docs} == {"dedup/copy0.pdf"}
+    assert {doc.scanned_status for doc in docs} == {"clean"}
+    assert sorted(deleted) == ["dedup/copy1.pdf", "dedup/copy2.pdf"]
+
+
+def test_expired_leases_are_not_reclaimed_forever(session):
+    from datetime import datetime, timedelta
+
+    applicant = Applicant(account_user_id=1, first_name="Poison", last_name="File")
+    session.add(applicant)
+    session.flush()
+    bundle = DocumentBundle(applicant_id=applicant.id, name="Poison bundle")
+    session.add(bundle)
+    session.flush()
+    expired = datetime.utcnow() - timedelta(hours=1)
+    retry, exhausted = (
+        Document(
+            bundle_id=bundle.id, filename=f"{name}.pdf", content_type="application/pdf", s3_key=f"poison/{name}.pdf",
+            size_bytes=10, scanned_status="scanning", scan_claimed_at=expired, scan_attempts=attempts,
+        )
+        for name, attempts in (("retry", 1), ("exhausted", 3))
+    )
+    session.add_all([retry, exhausted])
+    session.commit()
+
+    claimed = scanning.claim_pending(session, 100, lease_seconds=60, max_attempts=3)
+    session.refresh(retry)
+    session.refresh(exhausted)
+    assert retry.id in [doc_id for doc_id, _ in claimed] and retry.scan_attempts == 2
+    assert exhausted.id not in [doc_id for doc_id, _ in claimed]
+    assert exhausted.scanned_status == "failed"
+
+
+def test_content_not_matching_declared_checksum_fails(session):
+    import hashlib
+
+    applicant = Applicant(account_user_id=1, first_name="Declared", last_name="Hash")
+    session.add(applicant)
+    session.flush()
+    bundle = DocumentBundle(applicant_id=applicant.id, name="Declared bundle")
+    session.add(bundle)
+    session.flush()
+    docs = {
+        name: Document(
+            bundle_id=bundle.id, filename=f"{name}.pdf", content_type="application/pdf", s3_key=f"declared/{name}.pdf",
+            size_bytes=9, expected_sha256=hashlib.sha256(b"%PDF-1.7 " if name == "match" else b"other").hexdigest(),
+        )
+        for name in ("match", "mismatch")
+    }
+    session.add_all(docs.values())
+    session.commit()
+
+    scanning.run_scan_worker(session.get_bind(), lambda key: [b"%PDF-1.7 "], batch_size=10, once=True)
+    for doc in docs.values():
+        session.refresh(doc)
+    assert docs["match"].scanned_status == "clean"
+    assert docs["mismatch"].scanned_status == "failed" and docs["mismatch"].content_sha256 is None
@@ -0,0 +1,131 @@
+"""Storage interface: async calls with bounded concurrency, timeouts and retries."""
+import time
+from unittest.mock import MagicMock
+
+import anyio
+import pytest
+from botocore.exceptions import ClientError
+
+from app.services.metrics import metrics
+from app.services.resilience import RetryPolicy
+from app.services.storage import ObjectNotFound, S3Storage, StorageTimeout
+
+
+def _error(code, http_status):
+    return ClientError({"Error": {"Code": code}, "ResponseMetadata": {"HTTPStatusCode": http_status}}, "HeadObject")
+
+
+def test_async_head_retries_transient_errors():
+    client = MagicMock()
+    client.head_object.side_effect = [_error("SlowDown", 503), {"ContentLength": 7, "ETag": '"abc"'}]
+    storage = S3Storage("bucket", client, retry=RetryPolicy(max_attempts=3, base_delay=0.001))
+    before = metrics.counter("storage.retries").value
+
+    info = anyio.run(storage.ahead, "k")
+    assert (info.size, info.etag) == (7, "abc")
+    assert client.head_object.call_count == 2
+    assert metrics.counter("storage.retries").value == before + 1
+
+    client.head_object.side_effect = _error("NoSuchKey", 404)
+    with pytest.raises(ObjectNotFound):
+        anyio.run(storage.ahead, "missing")
+
+
+def test_async_head_times_out():
+    client = MagicMock()
+    client.head_object.side_effect = lambda **kw: time.sleep(0.5)
+    storage = S3Storage("bucket", client, timeout=0.05, retry=RetryPolicy(max_attempts=1))
+    started = time.perf_counter()
+    with pytest.raises(StorageTimeout):
+        anyio.run(storage.ahead, "slow")
+    assert time.perf_counter() - started < 0.4
+
+
+@pytest.fixture
+def local_storage(tmp_path, client):
+    from app.main import app
+    from app.services.storage import LocalStorage, get_storage
+
+    storage = LocalStorage(tmp_path, "test-secret")
+    app.dependency_overrides[get_storage] = lambda: storage
+    yield storage
+    app.dependency_overrides.pop(get_storage, None)
+
+
+def test_local_storage_roundtrip_and_key_safety(tmp_path):
+    from app.services.storage import InvalidUpload, LocalStorage
+
+    storage = LocalStorage(tmp_path, "s")
+    storage.write("docs/a.txt", [b"hello ", b"world"], "text/plain")
+    info = storage.head("docs/a.txt")
+    assert info.size == 11
+    assert b"".join(storage.read("docs/a.txt", offset=6, chunk_size=2)) == b"world"
+    for key in ("../outside.txt", "documents/1/x/../../7/y", "documents/1/x/../../../.meta/z", "a//b", ".meta/a", "a/./b"):
+        with pytest.raises(InvalidUpload):
+            storage.path(key)
+    storage.delete("docs/a.txt")
+    with pytest.raises(ObjectNotFound):
+        storage.head("docs/a.txt")
+
+
+def test_local_presigned_put_get_and_range(client, local_storage):
+    import base64
+    import hashlib
+    from urllib.parse import urlsplit
+
+    data = bytes(range(256)) * 40
+    checksum = base64.b64encode(hashlib.sha256(data).digest()).decode()
+    url = urlsplit(local_storage.presign_put("documents/1/x/file.bin", "application/octet-stream", checksum))
+    path = f"{url.path}?{url.query}"
+
+    assert client.put(path.replace("signature=", "signature=0"), content=data).status_code == 403
+    assert client.put(path, content=data[:-1]).status_code == 400  # checksum mismatch
+    r = client.put(path, content=data)
+    assert r.status_code == 200
+    assert r.headers["etag"] == f'"{hashlib.md5(data).hexdigest()}"'
+    assert local_storage.head("documents/1/x/file.bin").checksum_sha256 == checksum
+
+    get = urlsplit(local_storage.presign_get("documents/1/x/file.bin", filename="file.bin"))
+    get_path = f"{get.path}?{get.query}"
+    r = client.get(get_path)
+    assert r.status_code == 200
+    assert r.content == data
+    assert r.headers["content-disposition"] == "attachment; filename=\"file.bin\"; filename*=UTF-8''file.bin"
+    r = client.get(get_path, headers={"Range": "bytes=100-299"})
+    assert r.status_code == 206
+    assert r.headers["content-range"] == f"bytes 100-299/{len(data)}"
+    assert r.content == data[100:300]
+    assert client.get(get_path, headers={"Range": f"bytes={len(data)}-"}).status_code == 416
+
+
+def test_local_multipart_upload(client, local_storage):
+    import hashlib
+    from urllib.parse import urlsplit
+
+    key = "documents/1/y/big.bin"
+    upload_id = local_storage.create_multipart(key, "application/pdf")
+    parts = [b"a" * 1000, b"b" * 500]
+    etags = []
+    for number, part in enumerate(parts, start=1):
+        url = urlsplit(local_storage.presign_part(key, upload_id, number))
+        r = client.put(f"{url.path}?{url.query}", content=part)
+        assert r.status_code == 200
+        etags.append(r.headers["etag"])
+    local_storage.complete_multipart(key, upload_id, list(enumerate(etags, start=1)))
+
+    info = local_storage.head(key)
+    expected = hashlib.md5(b"".join(hashlib.md5(p).digest() for p in parts)).hexdigest() + "-2"
+    assert (info.size, info.etag) == (1500, expected)
+    assert b"".join(local_storage.read(key)) == b"".join(parts)
+
+
+def test_client_filenames_are_reduced_to_safe_names():
+    from app.services.storage import content_disposition, object_name
+
+    assert object_name("../../../.meta/x") == "x"
+    assert object_name("C:\\docs\\cv.pdf") == "cv.pdf"
+    assert object_name("..") == "file"
+    header = content_disposition('a"b\r\nX-Evil: 1.pdf')
+    assert "\r" not in header and "\n" not in header
+    assert header.startswith('attachment; filename="a_b__X-Evil: 1.pdf"; ')
+    assert header.endswith("filename*=UTF-8''a%22b%0D%0AX-Evil%3A%201.pdf")
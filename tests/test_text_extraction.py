@@ -0,0 +1,155 @@
+"""Document text extraction worker and content search endpoint."""
+import hashlib
+import os
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+from sqlmodel import select
+
+from app.models.applicant import Applicant
+from app.models.document import Document, DocumentBundle, DocumentText
+from app.services import text_extraction
+
+
+def _pdf(text):
+    """Minimal one-page PDF with `text` in a standard font."""
+    stream = b"BT /F1 12 Tf 72 720 Td (" + text.encode() + b") Tj ET"
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return out
+
+
+def test_extract_text_streams_and_truncates(tmp_path):
+    pdf = tmp_path / "t.pdf"
+    pdf.write_bytes(_pdf("Transcript from Oxford University"))
+    assert text_extraction.extract_text(str(pdf), "application/pdf", 1000) == ("Transcript from Oxford University", False)
+
+    txt = tmp_path / "t.txt"
+    txt.write_bytes(("café \x00  " * 50_000).encode())  # multi-byte chars straddle read chunks
+    text, truncated = text_extraction.extract_text(str(txt), "text/plain", 1000)
+    assert truncated and len(text) == 1000
+    assert text.startswith("café café") and "�" not in text
+
+
+def test_text_worker_and_content_search(client: TestClient, session, auth_headers, manager_headers):
+    objects = {}
+    docs = []
+    for name, content_type, data in (
+        ("transcript.pdf", "application/pdf", _pdf("Awarded by Kwame Nkrumah University")),
+        ("copy.pdf", "application/pdf", _pdf("Awarded by Kwame Nkrumah University")),
+        ("essay.txt", "text/plain", b"My essay mentions Makerere University."),
+        ("photo.png", "image/png", b"\x89PNG"),
+    ):
+        cr = client.post(
+            "/api/applicants/",
+            headers=auth_headers,
+            json={"first_name": "Doc", "last_name": name, "latest_education": "BS"},
+        ).json()
+        sha = hashlib.sha256(data).hexdigest()
+        key = f"text/{sha}"
+        objects[key] = data
+        doc = Document(
+            bundle_id=cr["bundle_id"], filename=name, content_type=content_type, s3_key=key,
+            size_bytes=len(data), scanned_status="clean", content_sha256=sha,
+        )
+        session.add(doc)
+        docs.append(doc)
+    session.commit()
+
+    reads = []
+
+    def read_object(key):
+        if key in objects:
+            reads.append(key)
+        return [objects.get(key, b"")]
+
+    text_extraction.run_text_worker(session.get_bind(), read_object, processes=1, once=True)
+    assert len(reads) == 2  # identical PDFs extracted once; the image is never read
+    statuses = {}
+    for doc in docs:
+        session.refresh(doc)
+        statuses[doc.filename] = doc.text_status
+    assert statuses == {"transcript.pdf": "ready", "copy.pdf": "ready", "essay.txt": "ready", "photo.png": "unsupported"}
+
+    # Unchanged content is never extracted again.
+    bundle = session.get(DocumentBundle, docs[0].bundle_id)
+    again = Document(bundle_id=bundle.id, filename="again.pdf", content_type="application/pdf", s3_key=docs[0].s3_key,
+                     size_bytes=1, scanned_status="clean", content_sha256=docs[0].content_sha256)
+    session.add(again)
+    session.commit()
+    text_extraction.run_text_worker(session.get_bind(), read_object, processes=1, once=True)
+    session.refresh(again)
+    assert again.text_status == "ready" and len(reads) == 2
+
+    r = client.get("/api/documents/search", params={"q": "Nkrumah university"}, headers=manager_headers)
+    assert r.status_code == 200
+    hits = r.json()
+    assert {hit["filename"] for hit in hits} == {"transcript.pdf", "copy.pdf", "again.pdf"}
+    assert "<mark>" in hits[0]["snippet"]
+    # "_" is a literal underscore, not a LIKE wildcard matching the space.
+    r = client.get("/api/documents/search", params={"q": "kwame_nkrumah"}, headers=manager_headers)
+    assert r.json() == []
+
+    r = client.get("/api/documents/search", params={"q": "Nkrumah", "bundle_id": bundle.id}, headers=auth_headers)
+    assert {hit["filename"] for hit in r.json()} == {"transcript.pdf", "again.pdf"}
+    r = client.get("/api/documents/search", params={"q": "Makerere", "applicant_id": bundle.applicant_id}, headers=auth_headers)
+    assert r.json() == []
+    assert session.exec(select(DocumentText).where(DocumentText.content_sha256 == docs[0].content_sha256)).one().char_count > 0
+
+
+_extract_text = text_extraction.extract_text
+
+
+def _crashing_extract(path, content_type, max_chars):
+    with open(path, "rb") as fh:
+        if fh.read() == b"crash":
+            os._exit(1)  # like a parser segfault: the process dies, not the call
+    return _extract_text(path, content_type, max_chars)
+
+
+def test_text_worker_survives_extractor_crash_and_caps_attempts(session):
+    applicant = Applicant(account_user_id=1, first_name="Text", last_name="Crash")
+    session.add(applicant)
+    session.flush()
+    bundle = DocumentBundle(applicant_id=applicant.id, name="Crash bundle")
+    session.add(bundle)
+    session.flush()
+    objects = {"text/crash": b"crash", "text/fine": b"Perfectly ordinary text."}
+    docs = [
+        Document(bundle_id=bundle.id, filename=key, content_type="text/plain", s3_key=key, size_bytes=len(data),
+                 scanned_status="clean", content_sha256=hashlib.sha256(data).hexdigest())
+        for key, data in objects.items()
+    ]
+    session.add_all(docs)
+    session.commit()
+
+    with patch.object(text_extraction, "extract_text", _crashing_extract):
+        text_extraction.run_text_worker(session.get_bind(), lambda key: [objects[key]], processes=2, once=True)
+    for doc in docs:
+        session.refresh(doc)
+    assert [doc.text_status for doc in docs] == ["failed", "ready"]
+
+    crash = docs[0]
+    crash.text_status = "extracting"
+    crash.text_claimed_at = datetime.utcnow() - timedelta(hours=1)
+    crash.text_attempts = 3
+    session.add(crash)
+    session.commit()
+    assert text_extraction.claim_pending(session, 10, lease_seconds=60, max_attempts=3) == []
+    session.refresh(crash)
+    assert crash.text_status == "failed"
@@ -0,0 +1,117 @@
+"""Upload completion from storage notifications, and storage/DB reconciliation."""
+import json
+import os
+from datetime import datetime, timedelta
+
+from app.models.applicant import Applicant
+from app.models.document import Document, DocumentBundle
+from app.services.reconciliation import reconcile_storage
+from app.services.storage import LocalStorage
+from app.services.upload_events import LocalEventQueue, parse_notification, run_upload_event_worker
+
+
+def _bundle(session):
+    applicant = Applicant(account_user_id=1, first_name="Event", last_name="Driven")
+    session.add(applicant)
+    session.flush()
+    bundle = DocumentBundle(applicant_id=applicant.id, name="Event bundle")
+    session.add(bundle)
+    session.flush()
+    return bundle
+
+
+def _doc(bundle, key, **kwargs):
+    return Document(bundle_id=bundle.id, filename=key.rsplit("/", 1)[-1], content_type="text/plain", s3_key=key, **kwargs)
+
+
+def test_parse_notification_handles_sns_and_encoded_keys():
+    s3_event = {
+        "Records": [
+            {"eventName": "ObjectCreated:Put", "s3": {"object": {"key": "documents/1/my+fil%C3%A9.pdf", "size": 5, "eTag": "abc"}}},
+            {"eventName": "ObjectRemoved:Delete", "s3": {"object": {"key": "documents/1/gone"}}},
+        ]
+    }
+    events = parse_notification(json.dumps({"Type": "Notification", "Message": json.dumps(s3_event)}))
+    assert [(e.key, e.size, e.etag) for e in events] == [("documents/1/my fil\u00e9.pdf", 5, "abc")]
+    assert parse_notification(json.dumps({"Event": "s3:TestEvent"})) == []
+
+
+def test_event_worker_completes_documents_in_batches(session, tmp_path):
+    storage = LocalStorage(tmp_path, "s")
+    bundle = _bundle(session)
+    docs = [_doc(bundle, f"events/{bundle.id}/file-{i}.txt") for i in range(3)]
+    multipart = _doc(bundle, f"events/{bundle.id}/big.bin", upload_id="mpu-1")
+    session.add_all(docs + [multipart])
+    session.commit()
+
+    for i, doc in enumerate(docs):
+        storage.write(doc.s3_key, [b"x" * (i + 1)], "text/plain")
+    storage.write("events/unknown.txt", [b"?"], "text/plain")
+    (storage.events_dir / "0-malformed.json").write_text("not json")
+    queue = LocalEventQueue(storage.events_dir)
+
+    completed = run_upload_event_worker(session.get_bind(), queue, storage, batch_size=2, wait_seconds=0, once=True)
+    assert completed == 3
+    assert queue.receive(10) == []  # everything acknowledged, including the malformed message
+    for i, doc in enumerate(docs):
+        session.refresh(doc)
+        assert doc.size_bytes == i + 1
+        assert doc.content_sha256 is not None  # checksum from HEAD enables deduplication
+    session.refresh(multipart)
+    assert multipart.size_bytes is None  # multipart uploads are verified by their own endpoint
+
+    # Redelivered notifications are harmless.
+    storage.write(docs[0].s3_key, [b"x"], "text/plain")
+    assert run_upload_event_worker(session.get_bind(), queue, storage, wait_seconds=0, once=True) == 0
+
+
+def test_reconcile_storage_cleans_up_both_directions(session, tmp_path):
+    storage = LocalStorage(tmp_path, "s")
+    bundle = _bundle(session)
+    old = datetime.utcnow() - timedelta(days=2)
+    prefix = f"reconcile/{bundle.id}/"
+
+    def put(key, age=None):
+        storage.write(prefix + key, [b"data"], "text/plain")
+        if age:
+            stamp = (datetime.utcnow() - age).timestamp()
+            os.utime(storage.path(prefix + key), (stamp, stamp))
+
+    put("orphan-old", age=timedelta(days=2))
+    put("orphan-old.preview.jpg", age=timedelta(days=2))
+    put("orphan-new")
+    put("missed-event")
+    put("complete")
+    put("complete.preview.jpg", age=timedelta(days=2))
+
+    missed = _doc(bundle, prefix + "missed-event", created_at=old)
+    shared = [_doc(bundle, prefix + "complete", size_bytes=4) for _ in range(2)]  # deduplicated content
+    stale = _doc(bundle, prefix + "abandoned", created_at=old)
+    stale_multipart = _doc(bundle, prefix + "abandoned-multipart", created_at=old, upload_id="mpu")
+    fresh = _doc(bundle, prefix + "in-flight")
+    lost = _doc(bundle, prefix + "lost", size_bytes=9)
+    session.add_all([missed, *shared, stale, stale_multipart, fresh, lost])
+    session.commit()
+    stale_id = stale.id
+
+    dry = reconcile_storage(session, storage, prefix=prefix, page_size=2, grace=timedelta(hours=1), dry_run=True)
+    assert (dry.orphan_objects_deleted, dry.stale_documents_deleted, dry.documents_completed) == (2, 1, 1)
+    assert storage.path(prefix + "orphan-old").exists()
+
+    report = reconcile_storage(session, storage, prefix=prefix, page_size=2, grace=timedelta(hours=1))
+    assert report.objects_listed == 6
+    assert report.documents_checked == 7
+    assert report.orphan_objects_deleted == 2
+    assert report.documents_completed == 1
+    assert report.stale_documents_deleted == 1
+    assert report.missing_object_document_ids == [lost.id]
+
+    assert not storage.path(prefix + "orphan-old").exists()
+    assert not storage.path(prefix + "orphan-old.preview.jpg").exists()
+    for kept in ("orphan-new", "missed-event", "complete", "complete.preview.jpg"):
+        assert storage.path(prefix + kept).exists()
+    session.expire_all()
+    assert session.get(Document, stale_id) is None
+    assert session.get(Document, stale_multipart.id) is not None  # younger than the multipart lifecycle
+    assert session.get(Document, fresh.id) is not None
+    assert session.get(Document, missed.id).size_bytes == 4
@@ -4,7 +4,7 @@ from unittest.mock import MagicMock, patch
 from fastapi.testclient import TestClient
 
 
-@patch("app.api.uploads.s3_client")
+@patch("app.api.uploads.storage.client")
 def test_uploads_initiate(mock_s3, client: TestClient, auth_headers):
     mock_s3.generate_presigned_url.return_value = "https://s3.example.com/presigned"
     r = client.post(
@@ -18,7 +18,7 @@ def test_uploads_initiate(mock_s3, client: TestClient, auth_headers):
     assert "key" in data
 
 
-@patch("app.api.uploads.s3_client")
+@patch("app.api.uploads.storage.client")
 def test_uploads_complete(mock_s3, client: TestClient, auth_headers):
     mock_s3.generate_presigned_url.return_value = "https://s3.example.com/presigned"
     init_r = client.post(
@@ -36,7 +36,7 @@ def test_uploads_complete(mock_s3, client: TestClient, auth_headers):
     assert r.json().get("status") in ("received", "ok") or "key" in r.json()
 
 
-@patch("app.api.uploads.s3_client")
+@patch("app.api.uploads.storage.client")
 def test_uploads_complete_not_found(mock_s3, client: TestClient, auth_headers):
     from botocore.exceptions import ClientError
     err = ClientError({"Error": {"Code": "404"}}, "HeadObject")
@@ -48,3 +48,19 @@ def test_uploads_complete_not_found(mock_s3, client: TestClient, auth_headers):
         headers=auth_headers,
     )
     assert r.status_code == 400
+
+
+@patch("app.api.uploads.storage.client")
+def test_uploads_complete_storage_timeout(mock_s3, client: TestClient, auth_headers, monkeypatch):
+    import time
+    from app.api.uploads import storage
+
+    monkeypatch.setattr(storage, "timeout", 0.05)
+    monkeypatch.setattr(storage, "retry", type(storage.retry)(max_attempts=1))
+    mock_s3.head_object.side_effect = lambda **kw: time.sleep(0.3)
+    r = client.post(
+        "/api/uploads/complete",
+        params={"key": "uploads/1/slow"},
+        headers=auth_headers,
+    )
+    assert r.status_code == 503